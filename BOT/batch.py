@@ -0,0 +1,276 @@
+"""
+Bulk Order Submission
+Streams orders from CSV/JSONL, validates them up front and submits them concurrently
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import tempfile
+import contextlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from rate_limit import RateLimiter, is_rate_limit_error, retry_after
+
+ORDER_TYPES = {'MARKET', 'LIMIT', 'STOP_LIMIT'}
+
+RESULT_FIELDS = ['line', 'symbol', 'side', 'type', 'quantity', 'price', 'stop_price',
+                 'status', 'order_id', 'latency_ms', 'error']
+
+
+class BatchOrder(NamedTuple):
+    """One order line from a batch file"""
+    line: int
+    symbol: str
+    side: str
+    type: str
+    quantity: float
+    price: Optional[float]
+    stop_price: Optional[float]
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """File format from an explicit choice or the file extension (default: csv)"""
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(path: str, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line number, raw row) one at a time; blank lines and '#' comments are skipped"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_no, {'_error': f"Invalid JSON: {e}"}
+        else:
+            current = [0]
+
+            def lines():
+                for line_no, line in enumerate(f, 1):
+                    if line.strip() and not line.lstrip().startswith('#'):
+                        current[0] = line_no
+                        yield line
+
+            for row in csv.DictReader(lines()):
+                yield current[0], row
+
+
+def _optional_float(value) -> Optional[float]:
+    if value is None or str(value).strip() == '':
+        return None
+    return float(value)
+
+
+def parse_order(line: int, row: Dict) -> BatchOrder:
+    """
+    Convert a raw row into a BatchOrder
+
+    Raises:
+        ValueError: If a field is missing or malformed
+    """
+    if '_error' in row:
+        raise ValueError(row['_error'])
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    try:
+        symbol = str(row['symbol']).strip().upper()
+        side = str(row['side']).strip().upper()
+        quantity = float(row['quantity'])
+    except KeyError as e:
+        raise ValueError(f"Missing field {e}")
+    order_type = str(row.get('type') or 'LIMIT').strip().upper().replace('-', '_')
+    if order_type not in ORDER_TYPES:
+        raise ValueError(f"Order type must be one of {', '.join(sorted(ORDER_TYPES))}")
+    return BatchOrder(line, symbol, side, order_type, quantity,
+                      _optional_float(row.get('price')), _optional_float(row.get('stop_price')))
+
+
+@contextlib.contextmanager
+def open_source(path: str):
+    """
+    Yield a re-readable path for a batch source
+
+    stdin ('-') is spooled to a temporary file so it can be read once for
+    validation and again for submission without holding it in memory.
+    """
+    if path != '-':
+        yield path
+        return
+    spool = tempfile.NamedTemporaryFile('w', suffix='.batch', delete=False, encoding='utf-8')
+    try:
+        with spool:
+            shutil.copyfileobj(sys.stdin, spool)
+        yield spool.name
+    finally:
+        os.unlink(spool.name)
+
+
+class ResultWriter:
+    """Writes one result row per order as CSV or JSONL"""
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        self.fmt = detect_format(path, fmt)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._csv = None
+        if self.fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, result: Dict):
+        if self._csv:
+            self._csv.writerow(result)
+        else:
+            self._file.write(json.dumps(result) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class BatchRunner:
+    """
+    Validate and submit a file of orders through a TradingBot
+
+    Both passes stream the file, so memory use does not grow with its size.
+    Submission keeps at most `concurrency` orders in flight, admits each one
+    through a RateLimiter, and retries orders rejected for rate limiting.
+    """
+
+    def __init__(self, bot, concurrency: int = 4, rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = 3):
+        """
+        Args:
+            bot: TradingBot used for validation and submission
+            concurrency: Maximum orders in flight
+            rate_limiter: Limiter shared by all workers (default: futures order limits)
+            max_retries: Retries for an order rejected by the exchange's rate limits
+        """
+        self.bot = bot
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+
+    def orders(self, path: str, fmt: str) -> Iterator[Tuple[int, Optional[BatchOrder], str]]:
+        """Yield (line, order, validation error) for every row of the file"""
+        for line, row in read_rows(path, fmt):
+            try:
+                order = parse_order(line, row)
+            except (ValueError, TypeError) as e:
+                yield line, None, str(e)
+                continue
+            yield line, order, self.validate(order)
+
+    def validate(self, order: BatchOrder) -> str:
+        """Validation error for an order, or '' if it is valid"""
+        check_type = 'MARKET' if order.type == 'MARKET' else 'LIMIT'
+        is_valid, error = self.bot.validate_order_params(
+            order.symbol, order.side, check_type, order.quantity, order.price
+        )
+        if is_valid and order.type == 'STOP_LIMIT' and not (order.stop_price and order.stop_price > 0):
+            return "Stop price must be specified and positive for stop-limit orders"
+        return error
+
+    def validate_file(self, path: str, fmt: str) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Validate every order in a file
+
+        Returns:
+            Tuple of (number of orders, [(line, error), ...])
+        """
+        count = 0
+        errors = []
+        for line, _, error in self.orders(path, fmt):
+            count += 1
+            if error:
+                errors.append((line, error))
+        return count, errors
+
+    def submit_file(self, path: str, fmt: str, writer: ResultWriter) -> Dict:
+        """
+        Submit every valid order in a file and write one result per line
+
+        Returns:
+            Summary with counts of submitted, failed and skipped orders
+        """
+        summary = {'submitted': 0, 'failed': 0, 'skipped': 0}
+        pending = set()
+
+        def collect(done):
+            for future in done:
+                result = future.result()
+                summary['failed' if result['error'] else 'submitted'] += 1
+                writer.write(result)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='BatchOrder') as executor:
+            for line, order, error in self.orders(path, fmt):
+                if error:
+                    summary['skipped'] += 1
+                    writer.write(self._result(line, order, error=error, status='SKIPPED'))
+                    continue
+                if len(pending) >= self.concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(self._submit, order))
+            collect(wait(pending)[0])
+
+        summary['elapsed_s'] = time.perf_counter() - started
+        summary['rate_limit_waits'] = self.rate_limiter.stats()['waits']
+        return summary
+
+    def _submit(self, order: BatchOrder) -> Dict:
+        attempts = 0
+        while True:
+            self.rate_limiter.acquire()
+            sent = time.perf_counter()
+            try:
+                response = self._place(order)
+            except Exception as e:
+                if is_rate_limit_error(e) and attempts < self.max_retries:
+                    attempts += 1
+                    self.rate_limiter.backoff(retry_after(e))
+                    continue
+                return self._result(order.line, order, error=str(e), status='ERROR',
+                                    latency_ms=(time.perf_counter() - sent) * 1000)
+            latency_ms = (time.perf_counter() - sent) * 1000
+            self._observe_usage()
+            return self._result(order.line, order, status=response.get('status', ''),
+                                order_id=response.get('orderId'), latency_ms=latency_ms)
+
+    def _place(self, order: BatchOrder) -> Dict:
+        if order.type == 'MARKET':
+            return self.bot.place_market_order(order.symbol, order.side, order.quantity)
+        if order.type == 'LIMIT':
+            return self.bot.place_limit_order(order.symbol, order.side, order.quantity, order.price)
+        return self.bot.place_stop_limit_order(order.symbol, order.side, order.quantity,
+                                               order.price, order.stop_price)
+
+    def _observe_usage(self):
+        # The client keeps the last response; with several workers this is approximate
+        response = getattr(self.bot.client, 'response', None)
+        if response is not None:
+            self.rate_limiter.observe(response.headers)
+
+    @staticmethod
+    def _result(line: int, order: Optional[BatchOrder], status: str = '', order_id=None,
+                latency_ms: Optional[float] = None, error: str = '') -> Dict:
+        return {
+            'line': line,
+            'symbol': order.symbol if order else '',
+            'side': order.side if order else '',
+            'type': order.type if order else '',
+            'quantity': order.quantity if order else '',
+            'price': order.price if order and order.price is not None else '',
+            'stop_price': order.stop_price if order and order.stop_price is not None else '',
+            'status': status,
+            'order_id': order_id if order_id is not None else '',
+            'latency_ms': round(latency_ms, 3) if latency_ms is not None else '',
+            'error': error,
+        }
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the Trading Bot
+Measures TradingBot hot paths against the local mock exchange and compares runs
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import multiprocessing
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from colorama import Fore, Style, init
+
+from market_stream import Bar
+from mock_exchange import MockExchangeServer
+from shm_ring import EVENT_DTYPE, TICK_EVENT, EventReader, EventRing
+from strategy import Strategy, StrategyRuntime
+from trading_bot import TradingBot
+
+init(autoreset=True)
+
+# Metric name -> True if higher is better
+METRICS = {
+    'startup_ms': False,
+    'orders_per_sec': True,
+    'order_latency_p50_ms': False,
+    'order_latency_p99_ms': False,
+    'validation_us': False,
+    'exchange_info_hit_rate': True,
+    'memory_per_account_kb': False,
+    'runtime_events_per_sec': True,
+    'ring_events_per_sec': True,
+    'ring_lost': False,
+}
+
+# Events per publish in the ring benchmark
+RING_BATCH = 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def quiet_bot(bot: TradingBot) -> TradingBot:
+    """Silence per-order console logging so it does not dominate the timings"""
+    for handler in bot.logger.handlers:
+        handler.setLevel(logging.WARNING)
+    return bot
+
+
+def make_bot(server: MockExchangeServer) -> TradingBot:
+    return quiet_bot(TradingBot('mock-key', 'mock-secret', sync_clock=False, client=server.client()))
+
+
+def bench_startup(server: MockExchangeServer, runs: int) -> float:
+    """Median time to construct an authenticated bot"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        bot = make_bot(server)
+        samples.append((time.perf_counter() - start) * 1000)
+        bot.close()
+    return percentile(samples, 50)
+
+
+def bench_orders(bot: TradingBot, count: int) -> Dict[str, float]:
+    """Place and cancel resting limit orders, timing each round trip"""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(count):
+        price = 40000 + (i % 100)
+        sent = time.perf_counter()
+        order = bot.place_limit_order('BTCUSDT', 'BUY', 0.002, price)
+        latencies.append((time.perf_counter() - sent) * 1000)
+        bot.cancel_order('BTCUSDT', order['orderId'])
+    elapsed = time.perf_counter() - start
+    return {
+        'orders_per_sec': count / elapsed,
+        'order_latency_p50_ms': percentile(latencies, 50),
+        'order_latency_p99_ms': percentile(latencies, 99),
+    }
+
+
+def bench_validation(bot: TradingBot, count: int) -> float:
+    """Mean cost of validate_order_params with a warm symbol cache"""
+    bot.validate_order_params('BTCUSDT', 'BUY', 'LIMIT', 0.002, 45000)
+    start = time.perf_counter()
+    for _ in range(count):
+        bot.validate_order_params('BTCUSDT', 'BUY', 'LIMIT', 0.002, 45000)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bench_memory(server: MockExchangeServer, accounts: int) -> float:
+    """Traced Python heap per bot instance"""
+    bots = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(accounts):
+        bot = make_bot(server)
+        bot.get_symbol_info('BTCUSDT')
+        bots.append(bot)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    for bot in bots:
+        bot.close()
+    return used / accounts / 1024
+
+
+class _CountingStrategy(Strategy):
+    def __init__(self):
+        super().__init__(name='benchmark')
+        self.bars = 0
+
+    def on_bar(self, bar):
+        self.bars += 1
+
+
+def bench_runtime(bot: TradingBot, count: int) -> float:
+    """Bars dispatched per second by the strategy runtime (bars are never conflated)"""
+    runtime = StrategyRuntime(bot, logger=bot.logger)
+    strategy = _CountingStrategy()
+    runtime.add_strategy(strategy)
+    runtime.start()
+
+    symbols = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT']
+    start = time.perf_counter()
+    for i in range(count):
+        runtime.push_bar(Bar(symbols[i % 3], '1m', 1.0, 1.0, 1.0, 1.0, 1.0, i, i))
+    while strategy.bars < count and time.perf_counter() - start < 60:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    runtime.stop()
+    return strategy.bars / elapsed
+
+
+def _ring_consumer(name: str, count: int, ready, cursor, result):
+    """Reads `count` events from an EventRing in another process; reports events read and lost"""
+    ring = EventRing.attach(name)
+    reader = EventReader(ring)
+    ready.set()
+    received = 0
+    volume = 0.0
+    while received + reader.lost < count:
+        view = reader.read()
+        if len(view):
+            # Zero-copy: aggregate straight from shared memory
+            volume += float(view['qty'].sum())
+            received += len(view)
+            cursor.value = reader.cursor
+    result.put((received, reader.lost, volume))
+    del view, reader
+    ring.close()
+
+
+def bench_ring(count: int) -> Dict[str, float]:
+    """Events per second from this process to a consumer process through an EventRing"""
+    context = multiprocessing.get_context('spawn')
+    ring = EventRing(capacity=1 << 16)
+    ready, cursor, result = context.Event(), context.Value('Q', 0, lock=False), context.Queue()
+    consumer = context.Process(target=_ring_consumer, args=(ring.name, count, ready, cursor, result))
+    consumer.start()
+    ready.wait(30)
+
+    batch = np.zeros(RING_BATCH, dtype=EVENT_DTYPE)
+    batch['kind'] = TICK_EVENT
+    batch['symbol'] = b'BTCUSDT'
+    batch['price'] = 50000.0
+    batch['qty'] = 1.0
+    published = 0
+    start = time.perf_counter()
+    while published < count:
+        # Stay half a ring ahead of the consumer so the measurement counts delivered events
+        if ring.head - cursor.value > ring.capacity // 2:
+            continue
+        size = min(RING_BATCH, count - published)
+        batch['ts'][:size] = np.arange(published, published + size)
+        ring.publish(batch[:size])
+        published += size
+    received, lost, _ = result.get(timeout=60)
+    elapsed = time.perf_counter() - start
+    consumer.join(timeout=5)
+    ring.close()
+    return {'ring_events_per_sec': received / elapsed, 'ring_lost': lost}
+
+
+def run_benchmarks(orders: int = 500, validations: int = 20000, accounts: int = 20,
+                   events: int = 100000, startup_runs: int = 5, ring_events: int = 10_000_000) -> Dict:
+    """Run the full suite and return the result document"""
+    results = {}
+    with MockExchangeServer() as server:
+        results['startup_ms'] = bench_startup(server, startup_runs)
+
+        bot = make_bot(server)
+        try:
+            results.update(bench_orders(bot, orders))
+            results['validation_us'] = bench_validation(bot, validations)
+            results['exchange_info_hit_rate'] = bot.symbol_cache.stats()['hit_rate']
+            results['runtime_events_per_sec'] = bench_runtime(bot, events)
+        finally:
+            bot.close()
+
+        results['memory_per_account_kb'] = bench_memory(server, accounts)
+
+    results.update(bench_ring(ring_events))
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'orders': orders, 'validations': validations, 'accounts': accounts,
+            'events': events, 'startup_runs': startup_runs, 'ring_events': ring_events,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare results against a baseline
+
+    Returns:
+        Descriptions of metrics that regressed by more than `tolerance` (a fraction)
+    """
+    regressions = []
+    for metric, higher_is_better in METRICS.items():
+        old = baseline['results'].get(metric)
+        new = current['results'].get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+
+def display_results(document: Dict, baseline: Optional[Dict] = None):
+    print(f"\n{Fore.CYAN}{'='*60}")
+    print(f"{Fore.CYAN}BENCHMARK RESULTS")
+    print(f"{Fore.CYAN}{'='*60}")
+    for metric, value in document['results'].items():
+        line = f"{metric:<26} {value:>14.4f}" if value is not None else f"{metric:<26} {'-':>14}"
+        old = baseline['results'].get(metric) if baseline else None
+        if old:
+            change = (value - old) / old
+            better = change >= 0 if METRICS[metric] else change <= 0
+            color = Fore.GREEN if better else Fore.YELLOW
+            line += f"  {color}{change:+.1%}{Style.RESET_ALL}"
+        print(line)
+    print(f"{Fore.CYAN}{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TradingBot against a local mock exchange')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', '-b', help='Baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative regression before failing (default: 0.2)')
+    parser.add_argument('--orders', type=int, default=500, help='Limit orders to place and cancel')
+    parser.add_argument('--validations', type=int, default=20000, help='Validation calls to time')
+    parser.add_argument('--accounts', type=int, default=20, help='Bot instances for the memory measurement')
+    parser.add_argument('--events', type=int, default=100000, help='Runtime events to dispatch')
+    parser.add_argument('--ring-events', type=int, default=10_000_000,
+                        help='Events to pass through the shared memory ring')
+    args = parser.parse_args()
+
+    # Keep bot log files out of the working tree
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            document = run_benchmarks(args.orders, args.validations, args.accounts, args.events,
+                                      ring_events=args.ring_events)
+        finally:
+            os.chdir(cwd)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    display_results(document, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline:
+        regressions = compare(document, baseline, args.tolerance)
+        if regressions:
+            print(f"{Fore.RED}Regressions beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"{Fore.RED}  {regression}")
+            sys.exit(1)
+        print(f"{Fore.GREEN}No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
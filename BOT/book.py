@@ -0,0 +1,166 @@
+"""
+Local Order Books
+Top-of-book and depth per symbol, kept in memory from partial depth streams or REST snapshots
+"""
+
+import time
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Levels per side kept from partial depth streams (5, 10 or 20)
+DEFAULT_DEPTH_LEVELS = 20
+
+
+class Sweep(NamedTuple):
+    """Result of walking one side of the book for a quantity"""
+    filled: float          # Quantity available (<= the requested quantity)
+    average_price: float   # Volume-weighted price of the filled part (0 if nothing)
+    worst_price: float     # Last level touched (0 if nothing)
+
+
+class BookSnapshot(NamedTuple):
+    """One complete state of a book, replaced as a whole on every update"""
+    bids: Tuple[Tuple[float, float], ...]   # Best (highest) first
+    asks: Tuple[Tuple[float, float], ...]   # Best (lowest) first
+    updated_at: float                       # Local monotonic time of the update
+    event_time: int                         # Exchange time (ms) of the update
+
+    @property
+    def mid(self) -> float:
+        if not self.bids or not self.asks:
+            return 0.0
+        return (self.bids[0][0] + self.asks[0][0]) / 2
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the update"""
+        return (time.monotonic() if now is None else now) - self.updated_at
+
+    def sweep(self, side: str, quantity: float, limit_price: float = 0.0) -> Sweep:
+        """
+        Walk the levels an aggressive order would take
+
+        Args:
+            side: Side of the aggressive order ('BUY' takes asks, 'SELL' takes bids)
+            quantity: Quantity to fill
+            limit_price: Stop at levels beyond this price (0: no limit)
+        """
+        buy = side == 'BUY'
+        levels = self.asks if buy else self.bids
+        filled = cost = worst = 0.0
+        for price, size in levels:
+            if limit_price and (price > limit_price if buy else price < limit_price):
+                break
+            take = min(size, quantity - filled)
+            filled += take
+            cost += take * price
+            worst = price
+            if filled >= quantity:
+                break
+        return Sweep(filled, cost / filled if filled else 0.0, worst)
+
+
+EMPTY_BOOK = BookSnapshot((), (), 0.0, 0)
+
+
+class OrderBook:
+    """
+    Depth of one symbol: bids best (highest) first, asks best (lowest) first
+
+    Each update replaces the whole book (partial depth streams send the top
+    N levels every time), so there is no sequence bookkeeping. The sides and
+    their timestamps live in one immutable BookSnapshot that is swapped in
+    with a single assignment: a reader that takes snapshot() once sees both
+    sides and the age of the same update.
+    """
+
+    __slots__ = ('symbol', '_snapshot')
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._snapshot = EMPTY_BOOK
+
+    def update(self, bids: List, asks: List, event_time: int = 0):
+        """Replace the book with [[price, qty], ...] levels (strings or numbers)"""
+        self._snapshot = BookSnapshot(
+            tuple((float(p), float(q)) for p, q in bids if float(q) > 0),
+            tuple((float(p), float(q)) for p, q in asks if float(q) > 0),
+            time.monotonic(), event_time
+        )
+
+    def snapshot(self) -> BookSnapshot:
+        """The current state; use it for anything reading more than one field"""
+        return self._snapshot
+
+    @property
+    def bids(self) -> Tuple[Tuple[float, float], ...]:
+        return self._snapshot.bids
+
+    @property
+    def asks(self) -> Tuple[Tuple[float, float], ...]:
+        return self._snapshot.asks
+
+    @property
+    def updated_at(self) -> float:
+        return self._snapshot.updated_at
+
+    @property
+    def event_time(self) -> int:
+        return self._snapshot.event_time
+
+    @property
+    def best_bid(self) -> float:
+        bids = self._snapshot.bids
+        return bids[0][0] if bids else 0.0
+
+    @property
+    def best_ask(self) -> float:
+        asks = self._snapshot.asks
+        return asks[0][0] if asks else 0.0
+
+    @property
+    def mid(self) -> float:
+        return self._snapshot.mid
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the last update"""
+        return self._snapshot.age(now)
+
+    def sweep(self, side: str, quantity: float, limit_price: float = 0.0) -> Sweep:
+        """Walk the levels an aggressive order would take; see BookSnapshot.sweep()"""
+        return self._snapshot.sweep(side, quantity, limit_price)
+
+
+class OrderBooks:
+    """
+    Order books of all streamed symbols
+
+    on_depth() is the stream callback; the router and strategies read books
+    from other threads. Updates swap in a new BookSnapshot with one attribute
+    assignment, which is atomic in CPython, so reads take no lock.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, OrderBook] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[OrderBook]:
+        return self._books.get(symbol)
+
+    def book(self, symbol: str) -> OrderBook:
+        """The book of a symbol, created empty if needed"""
+        book = self._books.get(symbol)
+        if book is None:
+            with self._lock:
+                book = self._books.setdefault(symbol, OrderBook(symbol))
+        return book
+
+    def symbols(self) -> List[str]:
+        return list(self._books)
+
+    def on_depth(self, data: Dict):
+        """Apply a partial depth stream payload ('depthUpdate' with top-N 'b' and 'a')"""
+        self.book(data['s']).update(data['b'], data['a'], data.get('T') or data.get('E', 0))
+
+    def load_snapshot(self, symbol: str, depth: Dict):
+        """Apply a REST order book snapshot (futures_order_book())"""
+        self.book(symbol).update(depth['bids'], depth['asks'], depth.get('T') or depth.get('E', 0))
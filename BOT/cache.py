@@ -0,0 +1,105 @@
+"""
+Caching Utilities for the Trading Bot
+Time-based, size-capped caches with hit/miss accounting
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Key/value cache whose entries expire `ttl` seconds after they are stored
+
+    With `max_size`, the cache also holds at most that many entries: storing
+    into a full cache first drops expired entries, then the least recently
+    used ones.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 0):
+        """
+        Args:
+            ttl: Entry lifetime in seconds
+            max_size: Maximum number of entries (0: unbounded)
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry, counting the lookup as a hit or miss"""
+        value = self.peek(key, self)
+        with self._lock:
+            if value is self:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry without touching the hit/miss counters"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if time.monotonic() >= expires:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store an entry"""
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[Hashable, Any]):
+        """Store several entries with the same expiry"""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (value, expires)
+                self._data.move_to_end(key)
+            if self.max_size and len(self._data) > self.max_size:
+                self._purge()
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def purge(self) -> int:
+        """Drop expired entries; returns how many"""
+        with self._lock:
+            return self._purge()
+
+    def _purge(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, (_, expires) in self._data.items() if now >= expires]
+        for key in expired:
+            del self._data[key]
+        return len(expired)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters, evictions and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'evictions': self.evictions,
+        }
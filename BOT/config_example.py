@@ -1,5 +1,8 @@
 # Configuration Example for Trading Bot
-# Copy this file to config.py and fill in your API credentials
+# Copy this file to config.py, fill in your API credentials and run with --config config.py
+# (a JSON file with the same lower-case keys works too). Every setting can also be given
+# as an environment variable, e.g. TRADING_BOT_API_KEY or TRADING_BOT_LOG_LEVEL.
+# The file is re-read when it changes; only credentials and TESTNET need a restart.
 
 # Binance Futures Testnet API Credentials
 API_KEY = "your_api_key_here"
@@ -12,13 +15,42 @@ TESTNET = True  # Set to False for mainnet (NOT RECOMMENDED for testing)
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
 LOG_TO_FILE = True
 LOG_TO_CONSOLE = True
+LOG_MAX_BYTES = 10_000_000  # Rotate a run's log file at this size (0 never rotates)
+LOG_BACKUPS = 3  # Rotated files kept per run
+LOG_RETENTION = 30  # Run log files kept in logs/; older runs are deleted at startup (0 keeps all)
 
 # Default Trading Parameters
+SYMBOLS = ("BTCUSDT", "ETHUSDT")
 DEFAULT_SYMBOL = "BTCUSDT"
 DEFAULT_QUANTITY = 0.001
 DEFAULT_LEVERAGE = 1
+MARGIN_TYPE = ""  # "CROSSED", "ISOLATED" or "" to leave it as it is
+APPLY_LEVERAGE = False  # Set DEFAULT_LEVERAGE/MARGIN_TYPE on SYMBOLS before trading commands
 
-# Risk Management
-MAX_POSITION_SIZE = 0.01  # Maximum position size in BTC
+# Risk Management (0 disables a limit)
+MAX_ORDER_QUANTITY = 0.01  # Maximum quantity of one order in the base asset (e.g. BTC), same for every symbol
+MAX_ORDER_NOTIONAL = 0  # Maximum limit order value in USDT; comparable across symbols
 STOP_LOSS_PERCENTAGE = 0.02  # 2% stop loss
 TAKE_PROFIT_PERCENTAGE = 0.05  # 5% take profit
+
+# Dead Man's Switch: the exchange cancels a symbol's open orders if the bot stops
+# refreshing this countdown (process hung or killed). 0 disables; otherwise >= 10 seconds.
+CANCEL_COUNTDOWN = 0
+
+# Universe Scanner (used by `run` without --symbols and by the `scan` command)
+UNIVERSE_SIZE = 20  # Symbols kept after ranking
+MIN_QUOTE_VOLUME = 50_000_000  # Minimum 24h volume in USDT
+MAX_FUNDING_RATE = 0.001  # Maximum absolute funding rate (0.1%)
+MIN_OPEN_INTEREST = 0  # Minimum open interest in USDT
+UNIVERSE_REFRESH = 900  # Seconds between rescans while running
+
+# Caches and Background Work
+EXCHANGE_INFO_TTL = 300  # Seconds symbol filters are cached
+SYMBOL_CACHE_SIZE = 2000  # Most symbols kept in the filter cache (least recently used are dropped)
+RECONCILE_INTERVAL = 10  # Seconds between open-order reconciliation snapshots
+
+# Order Event Log (every order request and stream update as columnar rows; needs pyarrow)
+ORDER_EVENTS = ""  # "PARQUET", "ARROW" or "" (off)
+ORDER_EVENTS_DIR = "order_events"  # One date=YYYY-MM-DD directory per day
+ORDER_EVENTS_ROLL_ROWS = 1_000_000  # Rows per file before starting the next
+ORDER_EVENTS_ROLL_SECONDS = 300  # Seconds per file; rows are readable (and crash-safe) once it closes
@@ -0,0 +1,45 @@
+"""
+Shared fixtures: TradingBot instances served by an in-process MockExchange
+"""
+
+from typing import Tuple
+
+import pytest
+
+from mock_exchange import MockExchange, create_in_process_client
+from settings import Settings
+from trading_bot import TradingBot
+
+
+def bot_for(exchange: MockExchange, **settings) -> TradingBot:
+    """TradingBot trading every symbol of `exchange`, without clock sync or console logging"""
+    symbols: Tuple[str, ...] = tuple(exchange.symbols)
+    settings = Settings(symbols=symbols, default_symbol=symbols[0], log_to_console=False, **settings)
+    return TradingBot('mock-key', 'mock-secret', sync_clock=False, client=create_in_process_client(exchange),
+                      settings=settings)
+
+
+@pytest.fixture
+def make_bot(tmp_path, monkeypatch):
+    """Factory for bots against a MockExchange, run in a temporary directory and closed afterwards"""
+    monkeypatch.chdir(tmp_path)
+    bots = []
+
+    def make(exchange: MockExchange, **settings) -> TradingBot:
+        bot = bot_for(exchange, **settings)
+        bots.append(bot)
+        return bot
+
+    yield make
+    for bot in bots:
+        bot.close()
+
+
+@pytest.fixture(scope='module')
+def mock_bot(tmp_path_factory):
+    """One bot against a default MockExchange, shared by a test module"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(tmp_path_factory.mktemp('mock_bot'))
+        bot = bot_for(MockExchange())
+        yield bot
+        bot.close()
@@ -0,0 +1,307 @@
+"""
+Live Terminal Dashboard
+Stream-driven curses view of balances, positions and open orders with command input
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# All-symbol mark price stream, one array message per second
+MARK_PRICE_STREAM = '!markPrice@arr@1s'
+
+# Seconds without a frame loop cycle after which the dashboard counts as hung
+LIVENESS_MAX_STALL = 5.0
+
+HELP = "Commands: market SYM SIDE QTY | limit SYM SIDE QTY PRICE | modify SYM ID PRICE | cancel SYM ID | quit"
+
+
+class DashboardState:
+    """
+    Account view maintained from one REST snapshot plus stream updates
+
+    Every change bumps `version`, so the renderer can skip frames in which
+    nothing happened. Unrealized PnL is recomputed locally from mark prices.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.positions: Dict[Tuple[str, str], Dict] = {}
+        self.marks: Dict[str, float] = {}
+        self.wallet_balance = 0.0
+        self.version = 0
+
+    def load_snapshot(self, account: Dict, positions: List[Dict]):
+        """Seed from get_account_info() and get_positions()"""
+        with self._lock:
+            self.wallet_balance = float(account.get('totalWalletBalance', 0))
+            self.positions = {}
+            for p in positions:
+                self.marks[p['symbol']] = float(p['markPrice'])
+                self._set_position(p['symbol'], p.get('positionSide', 'BOTH'),
+                                   float(p['positionAmt']), float(p['entryPrice']))
+            self.version += 1
+
+    def _set_position(self, symbol: str, side: str, amount: float, entry: float):
+        key = (symbol, side)
+        if amount == 0:
+            self.positions.pop(key, None)
+            return
+        mark = self.marks.get(symbol, entry)
+        self.positions[key] = {
+            'symbol': symbol, 'side': side, 'amount': amount, 'entry': entry,
+            'mark': mark, 'pnl': amount * (mark - entry),
+        }
+
+    def on_account_update(self, msg: Dict):
+        """Apply an ACCOUNT_UPDATE message from the user data stream"""
+        data = msg.get('a', {})
+        with self._lock:
+            for balance in data.get('B', []):
+                if balance.get('a') == 'USDT':
+                    self.wallet_balance = float(balance['wb'])
+            for p in data.get('P', []):
+                self._set_position(p['s'], p.get('ps', 'BOTH'), float(p['pa']), float(p['ep']))
+            self.version += 1
+
+    def on_mark_prices(self, msg: Dict):
+        """Apply a mark price stream message (single update or all-symbol array)"""
+        data = msg.get('data', msg)
+        updates = data if isinstance(data, list) else [data]
+        changed = False
+        with self._lock:
+            for update in updates:
+                if update.get('e') != 'markPriceUpdate':
+                    continue
+                symbol = update['s']
+                mark = float(update['p'])
+                self.marks[symbol] = mark
+                for side in ('BOTH', 'LONG', 'SHORT'):
+                    position = self.positions.get((symbol, side))
+                    if position and position['mark'] != mark:
+                        position['mark'] = mark
+                        position['pnl'] = position['amount'] * (mark - position['entry'])
+                        changed = True
+            if changed:
+                self.version += 1
+
+    def touch(self):
+        """Mark the view as changed (e.g. after an order update)"""
+        with self._lock:
+            self.version += 1
+
+    def snapshot(self) -> Tuple[float, List[Dict]]:
+        """Wallet balance and positions sorted by symbol"""
+        with self._lock:
+            return self.wallet_balance, [dict(self.positions[k]) for k in sorted(self.positions)]
+
+
+def render_lines(state: DashboardState, orders: List[Dict], width: int, height: int,
+                 status: str = '') -> List[str]:
+    """
+    Lay out the dashboard as one string per screen line (excluding the prompt line)
+
+    Rows keep fixed-width columns so an unchanged position renders to an
+    identical line and is not redrawn.
+    """
+    balance, positions = state.snapshot()
+    total_pnl = sum(p['pnl'] for p in positions)
+    lines = [
+        f"Wallet {balance:,.2f} USDT   Unrealized {total_pnl:+,.2f}   Margin balance "
+        f"{balance + total_pnl:,.2f}   {datetime.now().strftime('%H:%M:%S')}",
+        '',
+        f"{'Symbol':<14}{'Side':<7}{'Size':>14}{'Entry':>14}{'Mark':>14}{'Unrealized PnL':>18}",
+    ]
+    for p in positions:
+        lines.append(f"{p['symbol']:<14}{p['side']:<7}{p['amount']:>14.4f}{p['entry']:>14.4f}"
+                     f"{p['mark']:>14.4f}{p['pnl']:>18.4f}")
+    if not positions:
+        lines.append('(no open positions)')
+
+    lines += ['', f"{'Symbol':<14}{'Side':<6}{'Type':<12}{'Qty':>12}{'Price':>14}{'Order ID':>14}  Status"]
+    room = max(0, height - len(lines) - 2)
+    for order in orders[:room]:
+        lines.append(f"{order['symbol']:<14}{order['side']:<6}{order['type']:<12}"
+                     f"{float(order['origQty']):>12.4f}{float(order['price']):>14.4f}"
+                     f"{order['orderId']:>14}  {order['status']}")
+    if room and len(orders) > room:
+        lines[-1] = f"... {len(orders) - room + 1} more orders"
+
+    lines = lines[:height - 2]
+    lines += [''] * (height - 2 - len(lines))
+    lines.append(status or HELP)
+    return [line[:width - 1] for line in lines]
+
+
+class ScreenBuffer:
+    """Remembers what is on screen so only changed lines are rewritten"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def diff(self, lines: List[str]) -> List[Tuple[int, str]]:
+        """Lines (row, text) that differ from what was last drawn"""
+        changes = [(row, text) for row, text in enumerate(lines)
+                   if row >= len(self.lines) or self.lines[row] != text]
+        self.lines = list(lines)
+        return changes
+
+    def reset(self):
+        self.lines = []
+
+
+class Dashboard:
+    """
+    Curses dashboard driven by the user data and mark price streams
+
+    After one REST snapshot, all updates come from streams, so watching costs no
+    request weight. Frames are drawn at most `fps` times per second and only when
+    something changed; within a frame only changed lines are rewritten. Keyboard
+    input is polled with a timeout of one frame, and commands run on a worker
+    thread so slow requests never freeze the display.
+    """
+
+    def __init__(self, bot, fps: float = 10.0):
+        """
+        Args:
+            bot: TradingBot to monitor and trade through
+            fps: Maximum redraws per second
+        """
+        self.bot = bot
+        self.frame_interval = 1.0 / max(fps, 1.0)
+        self.state = DashboardState()
+        self.screen = ScreenBuffer()
+        self.status = ''
+        self.frames = 0
+        self._input = ''
+        self._running = False
+        self._loop_time = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DashboardCommand')
+
+    def run(self):
+        """Run until the user quits"""
+        try:
+            import curses
+        except ImportError:
+            raise RuntimeError("The dashboard needs curses (on Windows: pip install windows-curses)")
+
+        self.state.load_snapshot(self.bot.get_account_info(), self.bot.get_positions())
+        self.bot.get_open_orders(refresh=True)
+
+        # Log lines written to the console would corrupt the screen
+        consoles = [h for h in self.bot.logger.handlers
+                    if isinstance(h, logging.StreamHandler) and not isinstance(h, logging.FileHandler)]
+        for handler in consoles:
+            self.bot.logger.removeHandler(handler)
+
+        stream = self.bot.create_market_stream()
+        stream.start_user(on_order_update=self._on_order_update,
+                          on_account_update=self.state.on_account_update,
+                          on_status=self.bot.order_index.set_stream_live)
+        stream.start_raw([MARK_PRICE_STREAM], self.state.on_mark_prices)
+        stream.start()
+        self.bot.order_reconciler.start()
+        self._loop_time = time.monotonic()
+        self.bot.start_dead_man_switch(lambda: time.monotonic() - self._loop_time < LIVENESS_MAX_STALL)
+        try:
+            curses.wrapper(self._loop)
+        finally:
+            if self.bot.dead_man_switch:
+                self.bot.dead_man_switch.stop()
+            self.bot.order_reconciler.stop()
+            self.bot.order_index.set_stream_live(False)
+            stream.stop()
+            self._executor.shutdown(wait=False)
+            for handler in consoles:
+                self.bot.logger.addHandler(handler)
+
+    def _on_order_update(self, update: Dict):
+        self.bot.order_index.on_stream_update(update)
+        self.state.touch()
+
+    def _loop(self, stdscr):
+        import curses
+        curses.curs_set(1)
+        stdscr.timeout(int(self.frame_interval * 1000))
+        self._running = True
+        drawn_version = None
+        drawn_second = None
+        next_frame = 0.0
+
+        while self._running:
+            self._loop_time = time.monotonic()
+            key = stdscr.getch()
+            if key == curses.KEY_RESIZE:
+                self.screen.reset()
+                stdscr.clear()
+                drawn_version = None
+            elif key != -1:
+                self._handle_key(key)
+                drawn_version = None
+
+            now = time.monotonic()
+            second = int(time.time())
+            if now < next_frame or (self.state.version == drawn_version and second == drawn_second):
+                continue
+            next_frame = now + self.frame_interval
+            drawn_version, drawn_second = self.state.version, second
+            self._draw(stdscr)
+
+    def _draw(self, stdscr):
+        height, width = stdscr.getmaxyx()
+        orders = sorted(self.bot.order_index.orders(), key=lambda o: (o['symbol'], o['orderId']))
+        lines = render_lines(self.state, orders, width, height, self.status)
+        for row, text in self.screen.diff(lines):
+            stdscr.move(row, 0)
+            stdscr.clrtoeol()
+            stdscr.addstr(row, 0, text)
+        prompt = f"> {self._input}"[:width - 1]
+        stdscr.move(height - 1, 0)
+        stdscr.clrtoeol()
+        stdscr.addstr(height - 1, 0, prompt)
+        stdscr.refresh()
+        self.frames += 1
+
+    def _handle_key(self, key: int):
+        if key in (10, 13):
+            command, self._input = self._input.strip(), ''
+            if command:
+                self._execute(command)
+        elif key in (8, 127, 263):  # Backspace variants
+            self._input = self._input[:-1]
+        elif key == 27:  # Escape clears the line
+            self._input = ''
+        elif 32 <= key < 127:
+            self._input += chr(key)
+
+    def _execute(self, command: str):
+        parts = command.split()
+        name = parts[0].lower()
+        if name in ('quit', 'exit', 'q'):
+            self._running = False
+            return
+
+        def run():
+            try:
+                if name == 'market' and len(parts) == 4:
+                    order = self.bot.place_market_order(parts[1].upper(), parts[2].upper(), float(parts[3]))
+                elif name == 'limit' and len(parts) == 5:
+                    order = self.bot.place_limit_order(parts[1].upper(), parts[2].upper(),
+                                                       float(parts[3]), float(parts[4]))
+                elif name == 'modify' and len(parts) == 4:
+                    order = self.bot.modify_order(parts[1].upper(), int(parts[2]), float(parts[3]))
+                elif name == 'cancel' and len(parts) == 3:
+                    order = self.bot.cancel_order(parts[1].upper(), int(parts[2]))
+                else:
+                    self.status = f"Unknown command: {command}. {HELP}"
+                    return
+                self.status = f"{name}: order {order['orderId']} {order['status']}"
+            except Exception as e:
+                self.status = f"{name} failed: {e}"
+            self.state.touch()
+
+        self.status = f"Running: {command}"
+        self._executor.submit(run)
@@ -0,0 +1,187 @@
+"""
+Dead Man's Switch
+Keeps the exchange's countdownCancelAll timer armed for every symbol with open orders
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from rate_limit import DEFAULT_WEIGHT_LIMIT
+
+# Request weight of one countdownCancelAll call
+COUNTDOWN_WEIGHT = 10
+
+
+class DeadMansSwitch:
+    """
+    Server-side auto-cancel for open orders while this process is healthy
+
+    For each symbol with open orders the exchange runs a countdown; if it is not
+    refreshed in time, the exchange cancels all of that symbol's orders. A
+    background thread refreshes a symbol's countdown only once less than
+    `refresh_margin` seconds remain, so each active symbol costs one request
+    per (countdown - refresh_margin) seconds. Symbols without open orders are
+    never sent. Due symbols are refreshed together, concurrently.
+
+    Heartbeats get their own weight budget: the countdown is lengthened when
+    many symbols are active, so the heartbeat stays within `weight_budget` per
+    minute. While the exchange reports request weight above `defer_above` of
+    the limit, refreshes are put off until they are urgent, leaving that weight
+    to order traffic.
+
+    When `liveness` returns False (e.g. the strategy event loop has stalled),
+    refreshes stop and the exchange pulls the orders when the countdown runs out.
+    """
+
+    def __init__(self, bot, countdown: float = 60.0, refresh_margin: float = 20.0,
+                 weight_budget: int = 120, defer_above: float = 0.7,
+                 liveness: Optional[Callable[[], bool]] = None, tick: float = 1.0):
+        """
+        Args:
+            bot: TradingBot whose open orders are protected
+            countdown: Seconds until the exchange cancels a symbol's orders without a refresh
+            refresh_margin: Refresh once this many seconds or fewer remain
+            weight_budget: Request weight per minute the heartbeat may use
+            defer_above: Fraction of the per-minute weight limit above which
+                         non-urgent refreshes wait
+            liveness: Returns False when the process should be considered hung
+            tick: Seconds between checks
+        """
+        if refresh_margin >= countdown:
+            raise ValueError("refresh_margin must be shorter than countdown")
+        self.bot = bot
+        self.countdown = countdown
+        self.refresh_margin = refresh_margin
+        self.weight_budget = weight_budget
+        self.defer_above = defer_above
+        self.liveness = liveness
+        self.tick = tick
+        self.armed_until: Dict[str, float] = {}
+        self.stats = {'refreshes': 0, 'deferred': 0, 'errors': 0, 'stalls': 0}
+        self._lock = threading.Lock()
+        self._stalled = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def effective_countdown(self, active: int) -> float:
+        """Countdown that keeps `active` symbols within the weight budget"""
+        if active == 0:
+            return self.countdown
+        # Each symbol is refreshed every (countdown - refresh_margin) seconds
+        min_period = active * COUNTDOWN_WEIGHT * 60.0 / self.weight_budget
+        return max(self.countdown, min_period + self.refresh_margin)
+
+    def active_symbols(self) -> List[str]:
+        """Symbols with open orders in the bot's order index"""
+        return self.bot.order_index.symbols()
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """
+        Refresh the countdowns that are due
+
+        Returns:
+            Symbols refreshed
+        """
+        now = time.monotonic() if now is None else now
+        if self.liveness is not None and not self.liveness():
+            if not self._stalled:
+                self._stalled = True
+                self.stats['stalls'] += 1
+                self.bot.logger.critical("Event loop stalled; countdown refreshes stopped, "
+                                         "open orders will be cancelled by the exchange")
+            return []
+        if self._stalled:
+            self._stalled = False
+            self.bot.logger.warning("Event loop recovered; countdown refreshes resumed")
+
+        active = self.active_symbols()
+        countdown = self.effective_countdown(len(active))
+        busy = self._used_weight() >= DEFAULT_WEIGHT_LIMIT[0] * self.defer_above
+        urgent_within = min(self.refresh_margin, 3 * self.tick)
+
+        due = []
+        with self._lock:
+            for symbol in active:
+                remaining = self.armed_until.get(symbol, now) - now
+                if remaining > self.refresh_margin:
+                    continue
+                if busy and remaining > urgent_within:
+                    self.stats['deferred'] += 1
+                    continue
+                due.append(symbol)
+        if due:
+            self._send(due, countdown)
+        return due
+
+    def _send(self, symbols: Iterable[str], countdown: float):
+        symbols = list(symbols)
+        sent = time.monotonic()
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols)), thread_name_prefix='Countdown') as executor:
+            results = list(executor.map(lambda s: self._countdown(s, countdown), symbols))
+        with self._lock:
+            for symbol, error in zip(symbols, results):
+                if error:
+                    self.stats['errors'] += 1
+                    self.bot.logger.error(f"Countdown refresh failed for {symbol}: {error}")
+                elif countdown:
+                    self.stats['refreshes'] += 1
+                    # Measured from the send time: the exchange's clock starts no earlier
+                    self.armed_until[symbol] = sent + countdown
+                else:
+                    self.armed_until.pop(symbol, None)
+
+    def _countdown(self, symbol: str, countdown: float) -> str:
+        client = self.bot.client
+        try:
+            self.bot._api_call(
+                lambda **params: client._request_futures_api('post', 'countdownCancelAll', True, data=params),
+                symbol=symbol, countdownTime=int(countdown * 1000)
+            )
+            return ''
+        except Exception as e:
+            return str(e)
+
+    def _used_weight(self) -> int:
+        response = getattr(self.bot.client, 'response', None)
+        # requests' headers are case-insensitive
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            return int(headers.get('X-MBX-USED-WEIGHT-1M', 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.bot.background_polling_allowed('DeadMansSwitch'):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='DeadMansSwitch', daemon=True)
+        self._thread.start()
+        self.bot.logger.info(f"Dead man's switch started: {self.countdown:.0f}s countdown")
+
+    def stop(self, disarm: bool = True):
+        """
+        Stop refreshing
+
+        Args:
+            disarm: Cancel the countdowns so orders survive an orderly shutdown
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if disarm:
+            with self._lock:
+                armed = [s for s, until in self.armed_until.items() if until > time.monotonic()]
+            if armed:
+                self._send(armed, 0)
+
+    def _run(self):
+        while not self._stop_event.wait(self.tick):
+            try:
+                self.check()
+            except Exception as e:
+                self.bot.logger.warning(f"Dead man's switch check failed: {e}")
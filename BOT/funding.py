@@ -0,0 +1,210 @@
+"""
+Funding and Basis Monitor
+Annualized funding, perpetual basis and predicted funding payments for every symbol from one bulk request
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+# Funding periods per year for the default 8-hour funding interval
+DEFAULT_FUNDING_HOURS = 8
+
+# Binance clamps the interest component of the funding rate to +/-0.05% of the premium
+INTEREST_CLAMP = 0.0005
+
+
+class FundingThresholds(NamedTuple):
+    """Alert thresholds (0 disables one)"""
+    min_annualized: float = 0.3     # |annualized funding| as a fraction, e.g. 0.3 = 30%/year
+    min_basis_bps: float = 20.0     # |mark - index| / index in basis points
+    min_payment: float = 0.0        # |predicted next payment| on an open position, in USDT
+
+
+class FundingAlert(NamedTuple):
+    """A symbol crossing a threshold"""
+    symbol: str
+    kind: str          # 'funding', 'basis' or 'payment'
+    value: float
+    threshold: float
+    message: str
+
+
+def funding_metrics(premium: List[Dict], positions: Optional[Dict[str, float]] = None,
+                    intervals: Optional[Dict[str, float]] = None,
+                    now_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Funding and basis metrics for every perpetual in a premium index response
+
+    Rows are parsed into arrays once; everything else is array arithmetic, so
+    the cost is the same few operations for 5 or 500 symbols. Delivery
+    contracts (no funding rate) are skipped.
+
+    Args:
+        premium: Rows from futures_mark_price() without a symbol (premiumIndex, all symbols)
+        positions: Signed position quantity per symbol, for predicted payments (default: none)
+        intervals: Funding interval in hours per symbol where it is not 8
+        now_ms: Current exchange time in ms (default: local clock)
+
+    Returns:
+        Arrays keyed by 'symbol', 'mark', 'index', 'funding_rate' (the exchange's current
+        estimate), 'annualized', 'basis' (fraction), 'basis_bps', 'predicted_rate' (from the
+        instantaneous premium), 'seconds_to_funding', 'position' and 'payment' (USDT received
+        at the next funding; negative is paid)
+    """
+    rows = [p for p in premium if p.get('lastFundingRate') not in (None, '')]
+    count = len(rows)
+    symbols = np.array([p['symbol'] for p in rows], dtype=object)
+    mark = np.array([p['markPrice'] for p in rows], dtype=float)
+    index = np.array([p['indexPrice'] for p in rows], dtype=float)
+    rate = np.array([p['lastFundingRate'] for p in rows], dtype=float)
+    interest = np.array([p.get('interestRate') or 0 for p in rows], dtype=float)
+    next_time = np.array([p.get('nextFundingTime') or 0 for p in rows], dtype=float)
+
+    hours = np.full(count, float(DEFAULT_FUNDING_HOURS))
+    if intervals:
+        for i, symbol in enumerate(symbols):
+            hours[i] = intervals.get(symbol, DEFAULT_FUNDING_HOURS)
+    quantity = np.zeros(count)
+    if positions:
+        for i, symbol in enumerate(symbols):
+            quantity[i] = positions.get(symbol, 0.0)
+
+    basis = np.divide(mark - index, index, out=np.zeros(count), where=index > 0)
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    return {
+        'symbol': symbols,
+        'mark': mark,
+        'index': index,
+        'funding_rate': rate,
+        'annualized': rate * (365 * 24 / hours),
+        'basis': basis,
+        'basis_bps': basis * 1e4,
+        'predicted_rate': basis + np.clip(interest - basis, -INTEREST_CLAMP, INTEREST_CLAMP),
+        'seconds_to_funding': np.maximum(next_time - now_ms, 0) / 1000,
+        'position': quantity,
+        # Longs pay positive funding, shorts receive it
+        'payment': -quantity * mark * rate,
+    }
+
+
+def threshold_breaches(metrics: Dict[str, np.ndarray],
+                       thresholds: FundingThresholds) -> List[Tuple[str, str, float, float]]:
+    """(symbol, kind, value, threshold) for every metric at or beyond its threshold"""
+    breaches = []
+    for kind, values, threshold in (('funding', metrics['annualized'], thresholds.min_annualized),
+                                    ('basis', metrics['basis_bps'], thresholds.min_basis_bps),
+                                    ('payment', metrics['payment'], thresholds.min_payment)):
+        if not threshold:
+            continue
+        for i in np.flatnonzero(np.abs(values) >= threshold):
+            breaches.append((str(metrics['symbol'][i]), kind, float(values[i]), threshold))
+    return breaches
+
+
+def _describe(symbol: str, kind: str, value: float) -> str:
+    if kind == 'funding':
+        return f"{symbol} funding {value * 100:+.1f}%/year ({'longs' if value > 0 else 'shorts'} pay)"
+    if kind == 'basis':
+        return f"{symbol} basis {value:+.1f} bps (mark {'above' if value > 0 else 'below'} index)"
+    return f"{symbol} next funding payment {value:+.2f} USDT on the open position"
+
+
+class FundingMonitor:
+    """
+    Funding and basis across all perpetuals, refreshed on a schedule
+
+    A refresh is one premiumIndex request without a symbol (weight 10)
+    however many symbols are listed, plus one position request when
+    `track_positions` is set. Alerts fire when a symbol first crosses a
+    threshold and re-arm once it is back inside, so a persistent condition
+    alerts once rather than on every refresh.
+    """
+
+    def __init__(self, bot, thresholds: Optional[FundingThresholds] = None, interval: float = 60.0,
+                 track_positions: bool = False, intervals: Optional[Dict[str, float]] = None,
+                 on_alert: Optional[Callable[[FundingAlert], None]] = None):
+        """
+        Args:
+            bot: TradingBot used for the REST calls
+            thresholds: Alert thresholds (default: FundingThresholds())
+            interval: Seconds between scheduled refreshes
+            track_positions: Fetch positions each refresh to predict their next payment
+            intervals: Funding interval in hours per symbol where it is not 8
+            on_alert: Called with each new FundingAlert (default: log a warning)
+        """
+        self.bot = bot
+        self.thresholds = thresholds or FundingThresholds()
+        self.interval = interval
+        self.track_positions = track_positions
+        self.intervals = intervals
+        self.on_alert = on_alert
+        self.metrics: Dict[str, np.ndarray] = {}
+        self.updated_at: Optional[float] = None
+        self._active: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> List[FundingAlert]:
+        """Fetch and recompute now; returns the alerts raised by this refresh"""
+        premium = self.bot.client.futures_mark_price()
+        positions = None
+        if self.track_positions:
+            # Net per symbol: in hedge mode the LONG and SHORT legs are separate rows
+            positions = {}
+            for p in self.bot.get_positions():
+                positions[p['symbol']] = positions.get(p['symbol'], 0.0) + float(p['positionAmt'])
+        metrics = funding_metrics(premium, positions, self.intervals)
+
+        breaches = threshold_breaches(metrics, self.thresholds)
+        active = {(symbol, kind) for symbol, kind, _, _ in breaches}
+        with self._lock:
+            new = [b for b in breaches if (b[0], b[1]) not in self._active]
+            self._active = active
+            self.metrics = metrics
+            self.updated_at = time.time()
+
+        alerts = [FundingAlert(symbol, kind, value, threshold, _describe(symbol, kind, value))
+                  for symbol, kind, value, threshold in new]
+        for alert in alerts:
+            if self.on_alert:
+                self.on_alert(alert)
+            else:
+                self.bot.logger.warning(f"Funding alert: {alert.message}")
+        self.bot.logger.info(f"Funding refreshed: {len(metrics['symbol'])} symbols, {len(alerts)} new alerts")
+        return alerts
+
+    def rows(self, sort_by: str = 'annualized', limit: Optional[int] = None) -> List[Dict]:
+        """Latest metrics as one dict per symbol, largest absolute `sort_by` first"""
+        with self._lock:
+            metrics = self.metrics
+        if not metrics:
+            return []
+        order = np.argsort(-np.abs(metrics[sort_by]), kind='stable')[:limit]
+        return [{key: (str(values[i]) if key == 'symbol' else float(values[i])) for key, values in metrics.items()}
+                for i in order]
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.bot.background_polling_allowed('FundingMonitor'):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='FundingMonitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.bot.logger.warning(f"Funding refresh failed: {e}")
@@ -0,0 +1,336 @@
+"""
+Technical Indicators for Strategies and Backtests
+Streaming indicators with O(1) state per update, plus NumPy batch equivalents
+
+Each streaming indicator returns None from ``update`` until it has enough history;
+the matching batch function returns NaN at the same positions. Streaming and batch
+results agree to within floating-point rounding (relative error well below 1e-9).
+"""
+
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+# Block length of the vectorized EMA is chosen so that decay**block stays above 10**-EXP
+_EWM_BLOCK_EXPONENT = 16
+
+# Bollinger streaming state is recomputed exactly every this many windows
+_BOLLINGER_RESYNC_WINDOWS = 64
+
+
+def _ewm_filter(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    Vectorized y[t] = y[t-1] + alpha * (x[t] - y[t-1]) starting from y[-1] = initial
+
+    Uses the closed form y[t] = decay**(t+1) * (initial + alpha * sum(x[i] / decay**(i+1))),
+    evaluated in blocks short enough that the scaled terms never overflow.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    if len(values) == 0:
+        return out
+    if decay <= 0.0:
+        out[:] = values
+        return out
+
+    block = max(1, int(_EWM_BLOCK_EXPONENT / -math.log10(decay)))
+    previous = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (previous + alpha * np.cumsum(chunk / powers))
+        previous = out[start + len(chunk) - 1]
+    return out
+
+
+class EMA:
+    """Exponential moving average seeded with the simple average of the first `period` values"""
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("Period must be at least 1")
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+        self._count = 0
+        self._seed_sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, price: float) -> Optional[float]:
+        """Add a price and return the current EMA"""
+        if self.value is None:
+            self._count += 1
+            self._seed_sum += price
+            if self._count == self.period:
+                self.value = self._seed_sum / self.period
+            return self.value
+        self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class RSI:
+    """Relative strength index with Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError("Period must be at least 1")
+        self.period = period
+        self.value: Optional[float] = None
+        self._previous: Optional[float] = None
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, price: float) -> Optional[float]:
+        """Add a closing price and return the current RSI"""
+        previous, self._previous = self._previous, price
+        if previous is None:
+            return None
+
+        change = price - previous
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+
+        if self._count < self.period:
+            self._count += 1
+            self._avg_gain += gain
+            self._avg_loss += loss
+            if self._count < self.period:
+                return None
+            self._avg_gain /= self.period
+            self._avg_loss /= self.period
+        else:
+            self._avg_gain += (gain - self._avg_gain) / self.period
+            self._avg_loss += (loss - self._avg_loss) / self.period
+
+        self.value = _rsi_value(self._avg_gain, self._avg_loss)
+        return self.value
+
+
+class ATR:
+    """Average true range with Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError("Period must be at least 1")
+        self.period = period
+        self.value: Optional[float] = None
+        self._previous_close: Optional[float] = None
+        self._count = 0
+        self._seed_sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        """Add a bar and return the current ATR"""
+        if self._previous_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self._previous_close), abs(low - self._previous_close))
+        self._previous_close = close
+
+        if self.value is None:
+            self._count += 1
+            self._seed_sum += true_range
+            if self._count == self.period:
+                self.value = self._seed_sum / self.period
+            return self.value
+        self.value += (true_range - self.value) / self.period
+        return self.value
+
+
+class BollingerBands:
+    """Simple moving average with bands `num_std` population standard deviations away"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        if period < 1:
+            raise ValueError("Period must be at least 1")
+        self.period = period
+        self.num_std = num_std
+        self.value: Optional[Tuple[float, float, float]] = None
+        self._window: Deque[float] = deque(maxlen=period)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, price: float) -> Optional[Tuple[float, float, float]]:
+        """Add a price and return (middle, upper, lower)"""
+        window = self._window
+        if len(window) < self.period:
+            # Welford accumulation while the window fills
+            window.append(price)
+            delta = price - self._mean
+            self._mean += delta / len(window)
+            self._m2 += delta * (price - self._mean)
+            if len(window) < self.period:
+                return None
+        else:
+            # Sliding Welford update: replace the oldest value with the newest
+            oldest = window[0]
+            window.append(price)
+            old_mean = self._mean
+            self._mean += (price - oldest) / self.period
+            self._m2 += (price - oldest) * (price - self._mean + oldest - old_mean)
+
+            self._updates += 1
+            if self._updates >= self.period * _BOLLINGER_RESYNC_WINDOWS:
+                self._resync()
+
+        std = math.sqrt(max(self._m2, 0.0) / self.period)
+        self.value = (self._mean, self._mean + self.num_std * std, self._mean - self.num_std * std)
+        return self.value
+
+    def _resync(self):
+        """Recompute mean and squared deviations exactly to stop rounding drift (amortized O(1))"""
+        self._updates = 0
+        self._mean = math.fsum(self._window) / self.period
+        self._m2 = math.fsum((x - self._mean) ** 2 for x in self._window)
+
+
+class VWAP:
+    """Volume-weighted average price, cumulative since the last reset"""
+
+    def __init__(self):
+        self.value: Optional[float] = None
+        self._price_volume = 0.0
+        self._volume = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, price: float, volume: float) -> Optional[float]:
+        """Add a trade (or a bar's typical price and volume) and return the current VWAP"""
+        self._price_volume += price * volume
+        self._volume += volume
+        self.value = self._price_volume / self._volume if self._volume > 0 else None
+        return self.value
+
+    def reset(self):
+        """Start a new session"""
+        self.value = None
+        self._price_volume = 0.0
+        self._volume = 0.0
+
+
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 50.0 if avg_gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def ema(prices, period: int) -> np.ndarray:
+    """Batch EMA, equivalent to feeding every price through EMA.update"""
+    prices = np.asarray(prices, dtype=float)
+    out = np.full(len(prices), np.nan)
+    if len(prices) < period:
+        return out
+    seed = math.fsum(prices[:period]) / period
+    out[period - 1] = seed
+    out[period:] = _ewm_filter(prices[period:], 2.0 / (period + 1), seed)
+    return out
+
+
+def rsi(prices, period: int = 14) -> np.ndarray:
+    """Batch RSI, equivalent to feeding every price through RSI.update"""
+    prices = np.asarray(prices, dtype=float)
+    out = np.full(len(prices), np.nan)
+    if len(prices) <= period:
+        return out
+    changes = np.diff(prices)
+    gains = np.where(changes > 0, changes, 0.0)
+    losses = np.where(changes < 0, -changes, 0.0)
+
+    seed_gain = math.fsum(gains[:period]) / period
+    seed_loss = math.fsum(losses[:period]) / period
+    avg_gain = np.concatenate(([seed_gain], _ewm_filter(gains[period:], 1.0 / period, seed_gain)))
+    avg_loss = np.concatenate(([seed_loss], _ewm_filter(losses[period:], 1.0 / period, seed_loss)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), values)
+    out[period:] = values
+    return out
+
+
+def atr(highs, lows, closes, period: int = 14) -> np.ndarray:
+    """Batch ATR, equivalent to feeding every bar through ATR.update"""
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+    out = np.full(len(closes), np.nan)
+    if len(closes) < period:
+        return out
+
+    true_range = highs - lows
+    previous_close = closes[:-1]
+    true_range[1:] = np.maximum.reduce([
+        true_range[1:], np.abs(highs[1:] - previous_close), np.abs(lows[1:] - previous_close)
+    ])
+
+    seed = math.fsum(true_range[:period]) / period
+    out[period - 1] = seed
+    out[period:] = _ewm_filter(true_range[period:], 1.0 / period, seed)
+    return out
+
+
+def bollinger_bands(prices, period: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Batch Bollinger Bands as (middle, upper, lower), equivalent to BollingerBands.update"""
+    prices = np.asarray(prices, dtype=float)
+    middle = np.full(len(prices), np.nan)
+    upper = np.full(len(prices), np.nan)
+    lower = np.full(len(prices), np.nan)
+    if len(prices) < period:
+        return middle, upper, lower
+
+    windows = np.lib.stride_tricks.sliding_window_view(prices, period)
+    mean = windows.mean(axis=1)
+    std = windows.std(axis=1)
+    middle[period - 1:] = mean
+    upper[period - 1:] = mean + num_std * std
+    lower[period - 1:] = mean - num_std * std
+    return middle, upper, lower
+
+
+def vwap(prices, volumes, session_starts=None) -> np.ndarray:
+    """
+    Batch VWAP, equivalent to feeding every trade through VWAP.update
+
+    Args:
+        prices: Trade prices (or typical bar prices)
+        volumes: Trade volumes
+        session_starts: Optional boolean array, True where VWAP.reset() is called before the update
+
+    Returns:
+        VWAP array (NaN while the session volume is zero)
+    """
+    prices = np.asarray(prices, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    bounds = [0, len(prices)]
+    if session_starts is not None:
+        starts = np.flatnonzero(np.asarray(session_starts, dtype=bool))
+        bounds = [0] + [int(i) for i in starts if i > 0] + [len(prices)]
+
+    out = np.empty(len(prices))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        cum_pv = np.cumsum(prices[start:end] * volumes[start:end])
+        cum_v = np.cumsum(volumes[start:end])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[start:end] = np.where(cum_v > 0, cum_pv / cum_v, np.nan)
+    return out
@@ -0,0 +1,218 @@
+"""
+Kill Switch
+Emergency stop: block new orders, mass-cancel open orders and flatten positions in parallel
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Engaged state is kept in this file so every bot process on the account sees it
+DEFAULT_STATE_FILE = os.path.join('logs', 'kill_switch.json')
+
+
+class KillSwitchEngaged(RuntimeError):
+    """Raised for new orders while the kill switch is engaged"""
+
+
+class KillSwitch:
+    """
+    Account-wide emergency stop
+
+    trigger() blocks new orders first, then runs three stages, each fanned out
+    over a thread pool: one snapshot of open orders and positions (two requests
+    in parallel), one cancel-all request per symbol with open orders, and one
+    reduce-only market order per open position. A final snapshot confirms the
+    account is flat. Every stage is timed.
+
+    A failed fetch does not stop the run: without the open-order snapshot every
+    configured symbol (and every symbol in the local order index) gets a
+    cancel-all, and without the position snapshot nothing is flattened. Each
+    failure is listed in the report's errors.
+
+    Orders stay blocked until rearm(). The engaged state lives in a file, so a
+    kill switch pulled (or re-armed) from the command line applies to every bot
+    process sharing the logs directory.
+    """
+
+    def __init__(self, bot, state_file: str = DEFAULT_STATE_FILE, max_workers: int = 16):
+        """
+        Args:
+            bot: TradingBot whose account is stopped
+            state_file: File recording the engaged state, resolved against the
+                        working directory once, here
+            max_workers: Requests in flight per stage
+        """
+        self.bot = bot
+        self.state_file = os.path.abspath(state_file)
+        self.max_workers = max(1, max_workers)
+        self._engaged = threading.Event()
+        self._lock = threading.Lock()
+        self.last_report: Optional[Dict] = None
+
+    @property
+    def engaged(self) -> bool:
+        # The in-process flag only stands in when the state file could not be written
+        return self._engaged.is_set() or os.path.exists(self.state_file)
+
+    def check(self):
+        """
+        Raise if new orders are blocked
+
+        Raises:
+            KillSwitchEngaged: If the kill switch is engaged
+        """
+        if self.engaged:
+            raise KillSwitchEngaged(f"Kill switch engaged ({self.state().get('reason', 'unknown reason')}); "
+                                    f"re-arm it before placing orders")
+
+    def state(self) -> Dict:
+        """Engaged state from the state file ({} if not engaged)"""
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'reason': 'engaged in this process only'} if self._engaged.is_set() else {}
+
+    def trigger(self, reason: str = 'manual', flatten: bool = True) -> Dict:
+        """
+        Engage the kill switch: block orders, cancel everything, flatten positions
+
+        Args:
+            reason: Recorded in the state file and logs
+            flatten: Close open positions with reduce-only market orders
+
+        Returns:
+            Report with per-stage 'steps' timings, 'cancelled' symbols,
+            'flattened' positions, 'remaining' positions, 'errors' and 'total_ms'
+        """
+        with self._lock:
+            started = time.perf_counter()
+            self._engaged.set()
+            if self._write_state(reason):
+                self._engaged.clear()
+            self.bot.logger.critical(f"Kill switch engaged: {reason}")
+            report = {'reason': reason, 'steps': [], 'cancelled': [], 'flattened': [],
+                      'remaining': [], 'errors': []}
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='KillSwitch') as executor:
+                as_of = time.time() * 1000
+                orders, positions = self._step(report, 'snapshot', lambda: list(executor.map(
+                    lambda fetch: self._fetch(report, *fetch),
+                    [('open orders', self._open_orders), ('positions', self._positions)]
+                )))
+
+                if orders is None:
+                    # Unknown which symbols have orders: cancel everywhere the bot may have placed any
+                    symbols = sorted(set(self.bot.settings.symbols) | set(self.bot.order_index.symbols()))
+                else:
+                    symbols = sorted({o['symbol'] for o in orders})
+                positions = positions or []
+                results = self._step(report, 'cancel_all', lambda: list(executor.map(self._cancel_all, symbols)))
+                for symbol, error in zip(symbols, results):
+                    if error:
+                        report['errors'].append(f"cancel {symbol}: {error}")
+                    else:
+                        report['cancelled'].append(symbol)
+                        self.bot.order_index.load_snapshot([], symbol, as_of)
+
+                if flatten and positions:
+                    results = self._step(report, 'flatten', lambda: list(executor.map(self._close, positions)))
+                    for position, error in zip(positions, results):
+                        name = f"{position['symbol']} {position.get('positionSide', 'BOTH')}"
+                        if error:
+                            report['errors'].append(f"flatten {name}: {error}")
+                        else:
+                            report['flattened'].append(name)
+                    remaining = self._step(report, 'verify',
+                                           lambda: self._fetch(report, 'positions', self._positions, 'verify'))
+                    report['remaining'] = [
+                        f"{p['symbol']} {p.get('positionSide', 'BOTH')} {p['positionAmt']}"
+                        for p in remaining or []
+                    ]
+
+            report['total_ms'] = (time.perf_counter() - started) * 1000
+            self.last_report = report
+            self.bot.logger.critical(
+                f"Kill switch done in {report['total_ms']:.1f} ms: {len(report['cancelled'])} symbols cancelled, "
+                f"{len(report['flattened'])} positions flattened, {len(report['remaining'])} remaining, "
+                f"{len(report['errors'])} errors"
+            )
+            for error in report['errors']:
+                self.bot.logger.error(f"Kill switch: {error}")
+            return report
+
+    def rearm(self):
+        """Allow new orders again"""
+        with self._lock:
+            try:
+                os.remove(self.state_file)
+            except FileNotFoundError:
+                pass
+            self._engaged.clear()
+            self.bot.logger.warning("Kill switch re-armed; orders are allowed")
+
+    def _write_state(self, reason: str) -> bool:
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump({'reason': reason, 'engaged_at': int(time.time() * 1000), 'pid': os.getpid()}, f)
+            return True
+        except OSError as e:
+            self.bot.logger.error(f"Failed to write kill switch state to {self.state_file}; "
+                                  f"orders are blocked in this process only: {e}")
+            return False
+
+    @staticmethod
+    def _step(report: Dict, name: str, func: Callable):
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            report['steps'].append({'step': name, 'ms': (time.perf_counter() - started) * 1000})
+
+    @staticmethod
+    def _fetch(report: Dict, name: str, fetch: Callable, stage: str = 'snapshot') -> Optional[List[Dict]]:
+        # None (with the error reported) instead of raising, so the other stages still run
+        try:
+            return fetch()
+        except Exception as e:
+            report['errors'].append(f"{stage} {name}: {e}")
+            return None
+
+    def _open_orders(self) -> List[Dict]:
+        return self.bot._api_call(self.bot.client.futures_get_open_orders)
+
+    def _positions(self) -> List[Dict]:
+        positions = self.bot._api_call(self.bot.client.futures_position_information)
+        return [p for p in positions if float(p['positionAmt']) != 0]
+
+    def _cancel_all(self, symbol: str) -> str:
+        try:
+            self.bot._api_call(self.bot.client.futures_cancel_all_open_orders, symbol=symbol)
+            return ''
+        except Exception as e:
+            return str(e)
+
+    def _close(self, position: Dict) -> str:
+        amount = float(position['positionAmt'])
+        params = {
+            'symbol': position['symbol'],
+            'side': 'SELL' if amount > 0 else 'BUY',
+            'type': 'MARKET',
+            'quantity': position['positionAmt'].lstrip('-'),
+        }
+        position_side = position.get('positionSide', 'BOTH')
+        if position_side == 'BOTH':
+            params['reduceOnly'] = 'true'
+        else:
+            # Hedge mode closes a leg by trading against its position side; reduceOnly is rejected
+            params['positionSide'] = position_side
+        try:
+            self.bot._api_call(self.bot.client.futures_create_order, **params)
+            return ''
+        except Exception as e:
+            return str(e)
@@ -0,0 +1,235 @@
+"""
+Trade and Income Ledger
+Local SQLite copy of account trades and income, synced incrementally
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+# Page size of userTrades and income requests
+PAGE_SIZE = 1000
+
+# Income types summarized in reports
+PNL_TYPES = ('REALIZED_PNL', 'COMMISSION', 'FUNDING_FEE')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    symbol TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    order_id INTEGER NOT NULL,
+    side TEXT NOT NULL,
+    position_side TEXT,
+    price REAL NOT NULL,
+    qty REAL NOT NULL,
+    quote_qty REAL NOT NULL,
+    realized_pnl REAL NOT NULL,
+    commission REAL NOT NULL,
+    commission_asset TEXT NOT NULL,
+    maker INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    PRIMARY KEY (symbol, id)
+);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (time);
+
+CREATE TABLE IF NOT EXISTS income (
+    tran_id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    income_type TEXT NOT NULL,
+    income REAL NOT NULL,
+    asset TEXT NOT NULL,
+    trade_id TEXT,
+    info TEXT,
+    time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS income_type_time ON income (income_type, time);
+CREATE INDEX IF NOT EXISTS income_symbol_time ON income (symbol, time);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def parse_date(value: str) -> int:
+    """YYYY-MM-DD (UTC) to epoch milliseconds"""
+    day = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int(day.timestamp() * 1000)
+
+
+class Ledger:
+    """
+    SQLite ledger of fills and income
+
+    Trades are synced per symbol from the last stored trade ID and income from
+    the last stored income time, so a refresh only downloads what is new.
+    Amounts are stored as REAL, which is ample for reporting but not meant for
+    accounting to the last satoshi.
+    """
+
+    def __init__(self, path: str = 'ledger.db', logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            logger: Logger for sync events (default: module logger)
+        """
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    # Sync
+
+    def _cursor(self, key: str) -> Optional[int]:
+        row = self._db.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_cursor(self, key: str, value: int):
+        self._db.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def sync(self, bot, symbols: Optional[Iterable[str]] = None, history_days: int = 90) -> Dict[str, int]:
+        """
+        Download new income records and trades
+
+        Args:
+            bot: TradingBot used for the REST calls
+            symbols: Symbols whose trades to sync (default: every symbol seen in income)
+            history_days: How far back the first income sync starts
+
+        Returns:
+            Counts of new 'income' and 'trades' rows
+        """
+        with self._lock:
+            added = {'income': self._sync_income(bot, history_days), 'trades': 0}
+            if symbols is None:
+                symbols = [r['symbol'] for r in self._db.execute(
+                    "SELECT DISTINCT symbol FROM income WHERE symbol != ''"
+                )]
+            for symbol in symbols:
+                added['trades'] += self._sync_trades(bot, symbol)
+        self.logger.info(f"Ledger synced: {added['income']} income records, {added['trades']} trades")
+        return added
+
+    def _sync_income(self, bot, history_days: int) -> int:
+        last = self._cursor('income')
+        start = last if last is not None else int((time.time() - history_days * 86400) * 1000)
+        added = 0
+        while True:
+            rows = bot.get_income_history(start_time=start, limit=PAGE_SIZE)
+            with self._db:
+                cursor = self._db.executemany(
+                    'INSERT OR IGNORE INTO income (tran_id, symbol, income_type, income, asset, '
+                    'trade_id, info, time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(int(r['tranId']), r.get('symbol', ''), r['incomeType'], float(r['income']),
+                      r['asset'], str(r.get('tradeId', '')), r.get('info', ''), int(r['time']))
+                     for r in rows]
+                )
+                added += cursor.rowcount
+                if rows:
+                    # startTime is inclusive; duplicates at the boundary are ignored on insert
+                    last = max(int(r['time']) for r in rows)
+                    self._set_cursor('income', last)
+            if len(rows) < PAGE_SIZE:
+                return added
+            # A full page within one millisecond cannot be paged by time; step past it
+            start = last if last > start else start + 1
+
+    def _sync_trades(self, bot, symbol: str) -> int:
+        key = f'trades:{symbol}'
+        last = self._cursor(key)
+        from_id = last + 1 if last is not None else 0
+        added = 0
+        while True:
+            trades = bot.get_account_trades(symbol, from_id=from_id, limit=PAGE_SIZE)
+            if not trades:
+                return added
+            with self._db:
+                cursor = self._db.executemany(
+                    'INSERT OR IGNORE INTO trades (symbol, id, order_id, side, position_side, price, qty, '
+                    'quote_qty, realized_pnl, commission, commission_asset, maker, time) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(t['symbol'], int(t['id']), int(t['orderId']), t['side'], t.get('positionSide'),
+                      float(t['price']), float(t['qty']), float(t['quoteQty']), float(t['realizedPnl']),
+                      float(t['commission']), t['commissionAsset'], int(bool(t['maker'])), int(t['time']))
+                     for t in trades]
+                )
+                added += cursor.rowcount
+                last = max(int(t['id']) for t in trades)
+                self._set_cursor(key, last)
+            if len(trades) < PAGE_SIZE:
+                return added
+            from_id = last + 1
+
+    # Queries
+
+    def pnl_report(self, group_by: str = 'day', since: Optional[int] = None,
+                   until: Optional[int] = None) -> List[Dict]:
+        """
+        Realized PnL, commission and funding per group
+
+        Args:
+            group_by: 'day', 'symbol' or 'day_symbol'
+            since: Start time in ms (inclusive)
+            until: End time in ms (exclusive)
+        """
+        keys = {
+            'day': ["date(time / 1000, 'unixepoch') AS day"],
+            'symbol': ['symbol'],
+            'day_symbol': ["date(time / 1000, 'unixepoch') AS day", 'symbol'],
+        }
+        if group_by not in keys:
+            raise ValueError(f"group_by must be one of {', '.join(keys)}")
+        columns = ', '.join(keys[group_by])
+        names = ', '.join(k.split(' AS ')[-1] for k in keys[group_by])
+        sql = f"""
+            SELECT {columns},
+                   SUM(CASE WHEN income_type = 'REALIZED_PNL' THEN income ELSE 0 END) AS realized_pnl,
+                   SUM(CASE WHEN income_type = 'COMMISSION' THEN income ELSE 0 END) AS commission,
+                   SUM(CASE WHEN income_type = 'FUNDING_FEE' THEN income ELSE 0 END) AS funding,
+                   SUM(income) AS net
+            FROM income
+            WHERE income_type IN ({', '.join('?' * len(PNL_TYPES))}) AND time >= ? AND time < ?
+            GROUP BY {names}
+            ORDER BY {names}
+        """
+        params = (*PNL_TYPES, since or 0, until or 2 ** 62)
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, params)]
+
+    def fee_totals(self, since: Optional[int] = None, until: Optional[int] = None) -> List[Dict]:
+        """Commission paid per asset, split into maker and taker fills"""
+        sql = """
+            SELECT commission_asset AS asset,
+                   SUM(CASE WHEN maker THEN commission ELSE 0 END) AS maker,
+                   SUM(CASE WHEN maker THEN 0 ELSE commission END) AS taker,
+                   SUM(commission) AS total,
+                   COUNT(*) AS fills
+            FROM trades
+            WHERE time >= ? AND time < ?
+            GROUP BY commission_asset
+            ORDER BY commission_asset
+        """
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, (since or 0, until or 2 ** 62))]
+
+    def funding_totals(self, since: Optional[int] = None, until: Optional[int] = None) -> List[Dict]:
+        """Funding received (positive) or paid (negative) per symbol"""
+        sql = """
+            SELECT symbol, SUM(income) AS funding, COUNT(*) AS payments
+            FROM income
+            WHERE income_type = 'FUNDING_FEE' AND time >= ? AND time < ?
+            GROUP BY symbol
+            ORDER BY funding
+        """
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, (since or 0, until or 2 ** 62))]
@@ -0,0 +1,162 @@
+"""
+Leverage and Margin Mode Bootstrap
+Cached per-symbol leverage and margin type, changed only where they differ from the target
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from binance.exceptions import BinanceAPIException
+
+MARGIN_TYPES = ('CROSSED', 'ISOLATED')
+
+# positionRisk reports margin type in lower case and with a different name for cross
+_MARGIN_TYPE_NAMES = {'cross': 'CROSSED', 'crossed': 'CROSSED', 'isolated': 'ISOLATED'}
+
+# "No need to change margin type": the account already has it
+NO_CHANGE_CODE = -4046
+
+
+class SymbolChange(NamedTuple):
+    """Change needed to bring one symbol to the target settings"""
+    symbol: str
+    leverage: Optional[int]
+    margin_type: Optional[str]
+
+
+def normalize_margin_type(value: str) -> str:
+    """'cross'/'isolated' (positionRisk) or 'CROSSED'/'ISOLATED' to the change-request form"""
+    return _MARGIN_TYPE_NAMES.get(value.lower(), value.upper())
+
+
+class LeverageManager:
+    """
+    Per-symbol leverage and margin type, read in one snapshot and cached
+
+    One positionRisk request returns the leverage and margin type of every
+    symbol, so the current state costs a single call however large the
+    universe. Change requests are then issued concurrently, and only for
+    symbols that differ from the target; successful changes update the cache,
+    so applying the same target again sends nothing.
+    """
+
+    def __init__(self, bot, max_workers: int = 8):
+        """
+        Args:
+            bot: TradingBot used for the REST calls
+            max_workers: Change requests in flight
+        """
+        self.bot = bot
+        self.max_workers = max(1, max_workers)
+        self.logger = bot.logger
+        self._lock = threading.Lock()
+        self._settings: Dict[str, Dict] = {}
+
+    def refresh(self) -> Dict[str, Dict]:
+        """Reload every symbol's leverage and margin type from one positionRisk snapshot"""
+        positions = self.bot._api_call(self.bot.client.futures_position_information)
+        settings = {}
+        for position in positions:
+            # Hedge mode lists each symbol twice with the same settings
+            settings[position['symbol']] = {
+                'leverage': int(position['leverage']),
+                'margin_type': normalize_margin_type(position['marginType']),
+            }
+        with self._lock:
+            self._settings = settings
+        self.logger.info(f"Loaded leverage and margin type for {len(settings)} symbols")
+        return dict(settings)
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Cached settings of a symbol, or None if unknown"""
+        with self._lock:
+            current = self._settings.get(symbol)
+            return dict(current) if current else None
+
+    def plan(self, symbols: Iterable[str], leverage: Optional[int] = None,
+             margin_type: Optional[str] = None) -> List[SymbolChange]:
+        """
+        Changes needed to reach the target, from the cache
+
+        Args:
+            symbols: Symbols to check
+            leverage: Target leverage (None leaves leverage alone)
+            margin_type: Target 'CROSSED' or 'ISOLATED' (None leaves it alone)
+        """
+        margin_type = normalize_margin_type(margin_type) if margin_type else None
+        if margin_type and margin_type not in MARGIN_TYPES:
+            raise ValueError(f"Margin type must be one of {', '.join(MARGIN_TYPES)}")
+        changes = []
+        for symbol in dict.fromkeys(symbols):
+            current = self.get(symbol) or {}
+            new_leverage = leverage if leverage is not None and current.get('leverage') != leverage else None
+            new_margin = margin_type if margin_type and current.get('margin_type') != margin_type else None
+            if new_leverage is not None or new_margin:
+                changes.append(SymbolChange(symbol, new_leverage, new_margin))
+        return changes
+
+    def apply(self, symbols: Iterable[str], leverage: Optional[int] = None,
+              margin_type: Optional[str] = None, refresh: bool = True, dry_run: bool = False) -> Dict:
+        """
+        Bring symbols to the target leverage and margin type
+
+        Args:
+            symbols: Symbols to configure
+            leverage: Target leverage (None leaves leverage alone)
+            margin_type: Target 'CROSSED' or 'ISOLATED' (None leaves it alone)
+            refresh: Take a new snapshot first instead of trusting the cache
+            dry_run: Only compute the changes
+
+        Returns:
+            Summary with 'checked', 'changes' (planned SymbolChange list),
+            'changed' (symbols updated) and 'failed' ({symbol: error})
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if refresh or not self._settings:
+            self.refresh()
+        changes = self.plan(symbols, leverage, margin_type)
+        summary = {'checked': len(symbols), 'changes': changes, 'changed': [], 'failed': {}}
+        if dry_run or not changes:
+            return summary
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(changes)),
+                                thread_name_prefix='LeverageChange') as executor:
+            results = list(executor.map(self._change, changes))
+        for change, error in zip(changes, results):
+            if error:
+                summary['failed'][change.symbol] = error
+            else:
+                summary['changed'].append(change.symbol)
+
+        self.logger.info(f"Leverage bootstrap: {len(summary['changed'])} changed, "
+                         f"{len(symbols) - len(changes)} already set, {len(summary['failed'])} failed")
+        for symbol, error in summary['failed'].items():
+            self.logger.error(f"Failed to configure {symbol}: {error}")
+        return summary
+
+    def _change(self, change: SymbolChange) -> str:
+        """Apply one symbol's change; returns an error message or ''"""
+        client = self.bot.client
+        try:
+            # Margin type first: isolated positions may allow a different maximum leverage
+            if change.margin_type:
+                try:
+                    self.bot._api_call(client.futures_change_margin_type,
+                                       symbol=change.symbol, marginType=change.margin_type)
+                except BinanceAPIException as e:
+                    if e.code != NO_CHANGE_CODE:
+                        raise
+                self._update(change.symbol, margin_type=change.margin_type)
+            if change.leverage is not None:
+                response = self.bot._api_call(client.futures_change_leverage,
+                                              symbol=change.symbol, leverage=change.leverage)
+                self._update(change.symbol, leverage=int(response.get('leverage', change.leverage)))
+            return ''
+        except Exception as e:
+            return str(e)
+
+    def _update(self, symbol: str, **values):
+        with self._lock:
+            self._settings.setdefault(symbol, {}).update(values)
@@ -0,0 +1,213 @@
+"""
+Market and User Data Streams for Binance Futures
+Parses WebSocket messages into tick, bar and order-update events
+"""
+
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from binance import ThreadedWebsocketManager
+
+
+class Tick(NamedTuple):
+    """A single aggregated trade"""
+    symbol: str
+    price: float
+    quantity: float
+    timestamp: int
+
+
+class Bar(NamedTuple):
+    """A closed kline"""
+    symbol: str
+    interval: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    open_time: int
+    close_time: int
+
+
+def parse_agg_trade(data: Dict) -> Tick:
+    """Convert an aggTrade payload into a Tick"""
+    return Tick(data['s'], float(data['p']), float(data['q']), data['T'])
+
+
+def parse_kline(data: Dict) -> Optional[Bar]:
+    """Convert a kline payload into a Bar, or None while the kline is still open"""
+    kline = data['k']
+    if not kline['x']:
+        return None
+    return Bar(
+        kline['s'], kline['i'],
+        float(kline['o']), float(kline['h']), float(kline['l']), float(kline['c']),
+        float(kline['v']), kline['t'], kline['T']
+    )
+
+
+class MarketStream:
+    """
+    WebSocket stream manager for futures market and user data
+
+    Market data for all symbols is multiplexed over one connection; user data
+    (order updates, account updates) uses the listen-key stream.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True,
+                 logger: Optional[logging.Logger] = None, recorder=None):
+        """
+        Initialize the stream manager
+
+        Args:
+            api_key: Binance API key (needed for the user data stream)
+            api_secret: Binance API secret
+            testnet: Whether to use testnet (default: True)
+            logger: Logger for stream events (default: module logger)
+            recorder: recording.Recorder that logs every raw message (default: None)
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.recorder = recorder
+        self._manager = ThreadedWebsocketManager(
+            api_key=api_key, api_secret=api_secret, testnet=testnet
+        )
+        self._started = False
+        self._sockets: List[str] = []
+
+    def start_market(self, symbols: List[str], on_tick: Optional[Callable[[Tick], None]] = None,
+                     on_bar: Optional[Callable[[Bar], None]] = None,
+                     interval: str = '1m') -> str:
+        """
+        Subscribe to trades and klines for a set of symbols
+
+        Args:
+            symbols: Trading pair symbols
+            on_tick: Called with each Tick
+            on_bar: Called with each closed Bar
+            interval: Kline interval (default: '1m')
+
+        Returns:
+            Socket name
+        """
+        streams = []
+        for symbol in symbols:
+            if on_tick:
+                streams.append(f"{symbol.lower()}@aggTrade")
+            if on_bar:
+                streams.append(f"{symbol.lower()}@kline_{interval}")
+
+        def handle(msg: Dict):
+            if not self._check_message(msg):
+                return
+            data = msg.get('data', msg)
+            event = data.get('e')
+            if event == 'aggTrade' and on_tick:
+                on_tick(parse_agg_trade(data))
+            elif event == 'kline' and on_bar:
+                bar = parse_kline(data)
+                if bar:
+                    on_bar(bar)
+
+        return self.start_raw(streams, handle)
+
+    def start_depth(self, symbols: List[str], on_depth: Callable[[Dict], None], levels: int = 20,
+                    speed: str = '100ms') -> str:
+        """
+        Subscribe to partial book depth (the top `levels` bids and asks, resent every update)
+
+        Args:
+            symbols: Trading pair symbols
+            on_depth: Called with each depthUpdate payload
+            levels: 5, 10 or 20
+            speed: Update interval: 250ms, 500ms or 100ms
+        """
+        streams = [f"{symbol.lower()}@depth{levels}@{speed}" for symbol in symbols]
+
+        def handle(msg: Dict):
+            if not self._check_message(msg):
+                return
+            data = msg.get('data', msg)
+            if data.get('e') == 'depthUpdate':
+                on_depth(data)
+
+        return self.start_raw(streams, handle)
+
+    def start_raw(self, streams: List[str], callback: Callable[[Dict], None]) -> str:
+        """Subscribe to arbitrary futures market streams with a raw message callback"""
+        if self.recorder:
+            callback = self.recorder.wrap_callback('market', callback)
+        self._ensure_started()
+        socket = self._manager.start_futures_multiplex_socket(callback=callback, streams=streams)
+        self._sockets.append(socket)
+        self.logger.info(f"Subscribed to {len(streams)} market streams")
+        return socket
+
+    def start_user(self, on_order_update: Optional[Callable[[Dict], None]] = None,
+                   on_account_update: Optional[Callable[[Dict], None]] = None,
+                   on_status: Optional[Callable[[bool], None]] = None) -> str:
+        """
+        Subscribe to the futures user data stream
+
+        Args:
+            on_order_update: Called with the order payload of each ORDER_TRADE_UPDATE
+            on_account_update: Called with each ACCOUNT_UPDATE message
+            on_status: Called with True once subscribed, False on a stream error
+                       (e.g. a dropped connection) and True again with the next message
+
+        Returns:
+            Socket name
+        """
+        live = [False]
+
+        def status(up: bool):
+            if on_status and live[0] != up:
+                live[0] = up
+                on_status(up)
+
+        def handle(msg: Dict):
+            if not self._check_message(msg):
+                status(False)
+                return
+            status(True)
+            event = msg.get('e')
+            if event == 'ORDER_TRADE_UPDATE' and on_order_update:
+                on_order_update(msg['o'])
+            elif event == 'ACCOUNT_UPDATE' and on_account_update:
+                on_account_update(msg)
+
+        if self.recorder:
+            handle = self.recorder.wrap_callback('user', handle)
+        socket = self._subscribe_user(handle)
+        status(True)
+        return socket
+
+    def _subscribe_user(self, handle: Callable[[Dict], None]) -> str:
+        self._ensure_started()
+        socket = self._manager.start_futures_user_socket(callback=handle)
+        self._sockets.append(socket)
+        self.logger.info("Subscribed to user data stream")
+        return socket
+
+    def start(self):
+        """Start delivering messages (subscribing starts the manager implicitly)"""
+        self._ensure_started()
+
+    def stop(self):
+        """Close all sockets"""
+        if self._started:
+            self._manager.stop()
+            self._started = False
+            self._sockets.clear()
+
+    def _ensure_started(self):
+        if not self._started:
+            self._manager.start()
+            self._started = True
+
+    def _check_message(self, msg: Dict) -> bool:
+        """Filter out stream errors"""
+        if msg.get('e') == 'error':
+            self.logger.error(f"Stream error: {msg.get('m')}")
+            return False
+        return True
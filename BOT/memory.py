@@ -0,0 +1,87 @@
+"""
+Memory Footprint Reporting
+Approximate retained size of in-memory state, and process resident memory
+"""
+
+import os
+import sys
+import types
+import logging
+import threading
+from collections import deque
+from typing import Iterable, Optional
+
+# Shared infrastructure, not state owned by the object being measured
+_OPAQUE_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    threading.Thread, threading.Event, threading.Condition, type(threading.Lock()), type(threading.RLock()),
+    logging.Logger, logging.Handler,
+)
+
+# Containers whose elements are walked
+_SEQUENCES = (list, tuple, set, frozenset, deque)
+
+
+def deep_sizeof(obj, exclude: Iterable = ()) -> int:
+    """
+    Bytes retained by an object and everything it references
+
+    Walks containers, instance __dict__ and __slots__. Each object is counted
+    once; classes, functions, threads, locks and loggers are not followed, nor
+    are the objects in `exclude` (e.g. a bot that components point back to).
+    NumPy arrays count their buffers through sys.getsizeof. The result is an
+    estimate: allocator overhead and shared interned objects are ignored.
+    """
+    seen = {id(o) for o in exclude}
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _OPAQUE_TYPES):
+            continue
+        seen.add(id(current))
+        try:
+            total += sys.getsizeof(current)
+        except TypeError:
+            continue
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, _SEQUENCES):
+            stack.extend(current)
+        else:
+            attributes = getattr(current, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            for klass in type(current).__mro__:
+                slots = klass.__dict__.get('__slots__', ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if name != '__dict__' and hasattr(current, name):
+                        stack.append(getattr(current, name))
+    return total
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def directory_bytes(path: str) -> int:
+    """Total size of the files directly in a directory (0 if it does not exist)"""
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    except OSError:
+        return 0
@@ -0,0 +1,831 @@
+"""
+Mock Binance Futures Exchange
+In-memory stand-in for the USDT-M futures REST API, served over local HTTP or in process
+"""
+
+import json
+import time
+import random
+import threading
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from binance.client import Client
+
+from recording import create_client
+
+DEFAULT_SYMBOLS = {
+    'BTCUSDT': {'price': 45000.0, 'tickSize': '0.10', 'stepSize': '0.001', 'minQty': '0.001'},
+    'ETHUSDT': {'price': 3000.0, 'tickSize': '0.01', 'stepSize': '0.001', 'minQty': '0.001'},
+    'BNBUSDT': {'price': 300.0, 'tickSize': '0.010', 'stepSize': '0.01', 'minQty': '0.01'},
+}
+
+DEFAULT_BRACKETS = [
+    {'bracket': 1, 'initialLeverage': 125, 'notionalCap': 50000, 'notionalFloor': 0,
+     'maintMarginRatio': 0.004, 'cum': 0.0},
+    {'bracket': 2, 'initialLeverage': 100, 'notionalCap': 250000, 'notionalFloor': 50000,
+     'maintMarginRatio': 0.005, 'cum': 50.0},
+    {'bracket': 3, 'initialLeverage': 50, 'notionalCap': 3000000, 'notionalFloor': 250000,
+     'maintMarginRatio': 0.01, 'cum': 1300.0},
+]
+
+TERMINAL_STATUSES = {'FILLED', 'CANCELED', 'EXPIRED', 'REJECTED'}
+
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0004
+
+# Injectable faults and the responses the real exchange gives for them
+RATE_LIMITED, BANNED, TIMEOUT = 'rate_limited', 'banned', 'timeout'
+FAULT_RESPONSES = {
+    RATE_LIMITED: (429, -1003, 'Too many requests; current limit is 2400 request weight per 1 MINUTE.'),
+    BANNED: (418, -1003, 'Way too many requests; IP banned until further notice.'),
+    TIMEOUT: (503, -1007, 'Timeout waiting for response from backend server. '
+                          'Send status unknown; execution status unknown.'),
+}
+
+
+class MockAPIError(Exception):
+    """Error response in the exchange's {code, msg} format"""
+
+    def __init__(self, code: int, msg: str, status: int = 400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+class FaultPlan:
+    """
+    Deterministic fault injection for a MockExchange
+
+    Faults come from a script (inject()) first and then at random with the
+    given rates, drawn from a generator seeded with `seed`, so the same plan
+    and the same request sequence always produce the same faults. A timeout
+    is injected after the request has been executed, like a lost response:
+    the caller sees -1007 but the order may exist.
+    """
+
+    def __init__(self, seed: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit_rate: float = 0.0, ban_rate: float = 0.0, timeout_rate: float = 0.0,
+                 retry_after: int = 0, paths: Optional[List[str]] = None):
+        """
+        Args:
+            seed: Seed for latency jitter and random faults
+            latency: Seconds added to every request
+            jitter: Up to this many seconds more, uniformly drawn
+            rate_limit_rate: Probability of a 429 per request
+            ban_rate: Probability of a 418 per request
+            timeout_rate: Probability of a -1007 timeout per request
+            retry_after: Retry-After header value (seconds) on 429 and 418
+            paths: Only requests to these paths get faults (default: all)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rates = [(RATE_LIMITED, rate_limit_rate), (BANNED, ban_rate), (TIMEOUT, timeout_rate)]
+        self.retry_after = retry_after
+        self.paths = set(paths) if paths else None
+        self.injected: Counter = Counter()
+        self._random = random.Random(seed)
+        self._script: Deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def inject(self, fault: str, count: int = 1):
+        """Force `fault` on the next `count` eligible requests"""
+        with self._lock:
+            self._script.extend([fault] * count)
+
+    def draw(self, path: str) -> Tuple[float, Optional[str]]:
+        """Delay and fault (or None) for the next request to `path`"""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.paths is not None and path not in self.paths:
+                return delay, None
+            fault = self._script.popleft() if self._script else None
+            if fault is None:
+                roll = self._random.random()
+                for kind, rate in self.rates:
+                    if roll < rate:
+                        fault = kind
+                        break
+                    roll -= rate
+            if fault:
+                self.injected[fault] += 1
+            return delay, fault
+
+
+class MockExchange:
+    """
+    Deterministic in-memory model of a futures account
+
+    Market orders fill at the mark price, marketable limit orders fill at their limit
+    price, and other limit orders rest until cancelled or crossed by set_mark().
+    Request timestamps are checked against recvWindow like the real exchange.
+    """
+
+    def __init__(self, symbols: Optional[Dict[str, Dict]] = None, balance: float = 10000.0,
+                 clock_offset_ms: int = 0, faults: Optional[FaultPlan] = None, partial_fill: float = 1.0,
+                 amend_limit: Optional[int] = None):
+        """
+        Args:
+            symbols: Symbol specs {symbol: {price, tickSize, stepSize, minQty}}; optional
+                     quoteVolume, range (24h high-low as a fraction of price),
+                     fundingRate, basis (mark over index as a fraction), openInterest and
+                     depthQty (quantity per book level, one tick apart around the mark)
+                     shape the market data endpoints
+            balance: Initial USDT wallet balance
+            clock_offset_ms: How far the exchange clock runs ahead of the local clock
+            faults: Latency, rate limit, ban and timeout injection (default: none)
+            partial_fill: Fraction of a marketable limit order filled on arrival; IOC orders
+                          expire with the rest, GTC orders rest PARTIALLY_FILLED
+            amend_limit: Amends allowed per order before -5026 (default: unlimited)
+        """
+        self.faults = faults
+        self.partial_fill = partial_fill
+        self.amend_limit = amend_limit
+        self.symbols = dict(symbols or DEFAULT_SYMBOLS)
+        self.marks = {s: float(spec['price']) for s, spec in self.symbols.items()}
+        self.balance = balance
+        self.clock_offset_ms = clock_offset_ms
+
+        self.orders: Dict[int, Dict] = {}
+        self.positions: Dict[str, Dict] = {s: {'qty': 0.0, 'entry': 0.0} for s in self.symbols}
+        self.leverage = {s: 20 for s in self.symbols}
+        self.margin_type = {s: 'cross' for s in self.symbols}
+        self.countdowns: Dict[str, float] = {}
+        self.funding_rates = {s: float(spec.get('fundingRate', 0.0001)) for s, spec in self.symbols.items()}
+
+        self.trades: List[Dict] = []
+        self.income: List[Dict] = []
+        self.requests: Counter = Counter()
+        self.amends: Counter = Counter()
+        self._next_order_id = 1
+        self._next_trade_id = 1
+        self._next_tran_id = 1
+        self._lock = threading.RLock()
+        self._routes = {
+            ('GET', '/api/v3/ping'): lambda p: {},
+            ('GET', '/fapi/v1/ping'): lambda p: {},
+            ('GET', '/fapi/v1/time'): lambda p: {'serverTime': self.server_time()},
+            ('GET', '/fapi/v1/exchangeInfo'): self._exchange_info,
+            ('GET', '/fapi/v1/ticker/24hr'): self._ticker_24hr,
+            ('GET', '/fapi/v1/premiumIndex'): self._premium_index,
+            ('GET', '/fapi/v1/openInterest'): self._open_interest,
+            ('GET', '/fapi/v1/depth'): self._depth,
+            ('GET', '/fapi/v2/account'): self._account,
+            ('GET', '/fapi/v2/positionRisk'): self._position_risk,
+            ('GET', '/fapi/v1/leverageBracket'): self._leverage_bracket,
+            ('POST', '/fapi/v1/leverage'): self._change_leverage,
+            ('POST', '/fapi/v1/marginType'): self._change_margin_type,
+            ('POST', '/fapi/v1/order'): self._create_order,
+            ('PUT', '/fapi/v1/order'): self._modify_order,
+            ('POST', '/fapi/v1/batchOrders'): self._create_batch,
+            ('PUT', '/fapi/v1/batchOrders'): self._modify_batch,
+            ('DELETE', '/fapi/v1/batchOrders'): self._cancel_batch,
+            ('GET', '/fapi/v1/order'): self._get_order,
+            ('DELETE', '/fapi/v1/order'): self._cancel_order,
+            ('GET', '/fapi/v1/openOrders'): self._open_orders,
+            ('DELETE', '/fapi/v1/allOpenOrders'): self._cancel_all_orders,
+            ('POST', '/fapi/v1/countdownCancelAll'): self._countdown_cancel_all,
+            ('GET', '/fapi/v1/userTrades'): self._user_trades,
+            ('GET', '/fapi/v1/income'): self._income_history,
+        }
+
+    def server_time(self) -> int:
+        return int(time.time() * 1000) + self.clock_offset_ms
+
+    def handle(self, method: str, path: str, params: Dict[str, str]) -> Tuple[int, object]:
+        """
+        Process one request
+
+        Returns:
+            Tuple of (HTTP status, JSON-serializable body)
+        """
+        status, body, _ = self.respond(method, path, params)
+        return status, body
+
+    def respond(self, method: str, path: str, params: Dict[str, str]) -> Tuple[int, object, Dict[str, str]]:
+        """
+        Process one request, applying the fault plan
+
+        Returns:
+            Tuple of (HTTP status, JSON-serializable body, response headers)
+        """
+        fault = None
+        if self.faults is not None:
+            delay, fault = self.faults.draw(path)
+            if delay:
+                time.sleep(delay)
+            if fault in (RATE_LIMITED, BANNED):
+                status, code, msg = FAULT_RESPONSES[fault]
+                return status, {'code': code, 'msg': msg}, {'Retry-After': str(self.faults.retry_after)}
+        status, body = self._execute(method, path, params)
+        if fault == TIMEOUT:
+            status, code, msg = FAULT_RESPONSES[TIMEOUT]
+            return status, {'code': code, 'msg': msg}, {}
+        return status, body, {}
+
+    def _execute(self, method: str, path: str, params: Dict[str, str]) -> Tuple[int, object]:
+        with self._lock:
+            self.expire_countdowns()
+            self.requests[(method, path)] += 1
+            route = self._routes.get((method, path))
+            if route is None:
+                return 404, {'code': -1000, 'msg': f'Unknown endpoint {method} {path}'}
+            try:
+                if 'timestamp' in params:
+                    self._check_timestamp(params)
+                return 200, route(params)
+            except MockAPIError as e:
+                return e.status, {'code': e.code, 'msg': e.msg}
+
+    def set_mark(self, symbol: str, price: float):
+        """Move the mark price and fill resting limit orders it crosses"""
+        with self._lock:
+            self.marks[symbol] = price
+            for order in list(self.orders.values()):
+                if (order['symbol'] == symbol and order['status'] in ('NEW', 'PARTIALLY_FILLED')
+                        and order['type'] == 'LIMIT'):
+                    if self._marketable(order['side'], float(order['price']), price):
+                        self._fill(order, float(order['price']), maker=True)
+
+    def expire_countdowns(self):
+        """Cancel all orders of symbols whose auto-cancel countdown has run out"""
+        with self._lock:
+            now = self.server_time()
+            for symbol, deadline in list(self.countdowns.items()):
+                if deadline <= now:
+                    del self.countdowns[symbol]
+                    self._cancel_all_orders({'symbol': symbol})
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            self.expire_countdowns()
+            return [dict(o) for o in self.orders.values()
+                    if o['status'] in ('NEW', 'PARTIALLY_FILLED') and (symbol is None or o['symbol'] == symbol)]
+
+    def prune_closed_orders(self) -> int:
+        """Forget filled, cancelled and expired orders (long soak runs); returns how many"""
+        with self._lock:
+            closed = [i for i, o in self.orders.items() if o['status'] not in ('NEW', 'PARTIALLY_FILLED')]
+            for order_id in closed:
+                del self.orders[order_id]
+            return len(closed)
+
+    # Validation helpers
+
+    def _check_timestamp(self, params: Dict[str, str]):
+        timestamp = int(params['timestamp'])
+        recv_window = int(params.get('recvWindow', 5000))
+        now = self.server_time()
+        if timestamp > now + 1000 or now - timestamp > recv_window:
+            raise MockAPIError(-1021, 'Timestamp for this request is outside of the recvWindow.')
+
+    def _symbol(self, params: Dict[str, str]) -> str:
+        symbol = params.get('symbol')
+        if symbol not in self.symbols:
+            raise MockAPIError(-1121, 'Invalid symbol.')
+        return symbol
+
+    @staticmethod
+    def _marketable(side: str, price: float, mark: float) -> bool:
+        return price >= mark if side == 'BUY' else price <= mark
+
+    def _find_order(self, params: Dict[str, str]) -> Dict:
+        symbol = self._symbol(params)
+        if 'orderId' in params:
+            order = self.orders.get(int(params['orderId']))
+        else:
+            # A client order ID can be reused once its order is closed; the newest order wins
+            client_id = params.get('origClientOrderId')
+            order = next((o for o in reversed(list(self.orders.values())) if o['clientOrderId'] == client_id), None)
+        if order is None or order['symbol'] != symbol:
+            raise MockAPIError(-2013, 'Order does not exist.')
+        return order
+
+    # Market data and account endpoints
+
+    def _exchange_info(self, params):
+        symbols = []
+        for symbol, spec in self.symbols.items():
+            symbols.append({
+                'symbol': symbol,
+                'pair': symbol,
+                'contractType': 'PERPETUAL',
+                'status': 'TRADING',
+                'baseAsset': symbol[:-4],
+                'quoteAsset': 'USDT',
+                'marginAsset': 'USDT',
+                'orderTypes': ['LIMIT', 'MARKET', 'STOP', 'STOP_MARKET', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET'],
+                'timeInForce': ['GTC', 'IOC', 'FOK', 'GTX'],
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': spec['tickSize'], 'maxPrice': '1000000',
+                     'tickSize': spec['tickSize']},
+                    {'filterType': 'LOT_SIZE', 'minQty': spec['minQty'], 'maxQty': '1000',
+                     'stepSize': spec['stepSize']},
+                    {'filterType': 'MARKET_LOT_SIZE', 'minQty': spec['minQty'], 'maxQty': '1000',
+                     'stepSize': spec['stepSize']},
+                    {'filterType': 'MAX_NUM_ORDERS', 'limit': 200},
+                    {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                ],
+            })
+        return {'timezone': 'UTC', 'serverTime': self.server_time(), 'rateLimits': [], 'symbols': symbols}
+
+    def _market_rows(self, params, row):
+        if 'symbol' in params:
+            return row(self._symbol(params))
+        return [row(symbol) for symbol in self.symbols]
+
+    def _ticker_24hr(self, params):
+        def row(symbol):
+            spec = self.symbols[symbol]
+            mark = self.marks[symbol]
+            half_range = float(spec.get('range', 0.04)) / 2
+            quote_volume = float(spec.get('quoteVolume', 100_000_000))
+            return {
+                'symbol': symbol, 'lastPrice': f"{mark:.8f}", 'openPrice': f"{spec['price']:.8f}",
+                'highPrice': f"{mark * (1 + half_range):.8f}", 'lowPrice': f"{mark * (1 - half_range):.8f}",
+                'priceChangePercent': f"{(mark / spec['price'] - 1) * 100:.3f}",
+                'volume': f"{quote_volume / mark:.3f}", 'quoteVolume': f"{quote_volume:.2f}",
+                'count': 100000, 'closeTime': self.server_time(),
+            }
+        return self._market_rows(params, row)
+
+    def _depth(self, params):
+        symbol = self._symbol(params)
+        spec = self.symbols[symbol]
+        tick = float(spec['tickSize'])
+        quantity = float(spec.get('depthQty', 1.0))
+        mark = self.marks[symbol]
+        levels = range(1, int(params.get('limit', 20)) + 1)
+        return {
+            'lastUpdateId': self._next_order_id, 'E': self.server_time(), 'T': self.server_time(),
+            'bids': [[f"{mark - i * tick:.8f}", f"{quantity:g}"] for i in levels],
+            'asks': [[f"{mark + i * tick:.8f}", f"{quantity:g}"] for i in levels],
+        }
+
+    def _premium_index(self, params):
+        def row(symbol):
+            return {
+                'symbol': symbol, 'markPrice': f"{self.marks[symbol]:.8f}",
+                'indexPrice': f"{self.marks[symbol] / (1 + float(self.symbols[symbol].get('basis', 0))):.8f}",
+                'lastFundingRate': f"{self.funding_rates[symbol]:.8f}", 'interestRate': '0.00010000',
+                'nextFundingTime': (self.server_time() // 28_800_000 + 1) * 28_800_000,
+                'time': self.server_time(),
+            }
+        return self._market_rows(params, row)
+
+    def _open_interest(self, params):
+        symbol = self._symbol(params)
+        open_interest = float(self.symbols[symbol].get('openInterest', 1000))
+        return {'symbol': symbol, 'openInterest': f"{open_interest:.3f}", 'time': self.server_time()}
+
+    def _unrealized(self, symbol: str) -> float:
+        position = self.positions[symbol]
+        return position['qty'] * (self.marks[symbol] - position['entry'])
+
+    def _account(self, params):
+        unrealized = sum(self._unrealized(s) for s in self.symbols)
+        return {
+            'totalWalletBalance': f"{self.balance:.8f}",
+            'totalCrossWalletBalance': f"{self.balance:.8f}",
+            'totalUnrealizedProfit': f"{unrealized:.8f}",
+            'totalMarginBalance': f"{self.balance + unrealized:.8f}",
+            'availableBalance': f"{self.balance + unrealized:.8f}",
+            'assets': [{'asset': 'USDT', 'walletBalance': f"{self.balance:.8f}"}],
+            'positions': [],
+        }
+
+    def _position_risk(self, params):
+        symbols = [self._symbol(params)] if 'symbol' in params else list(self.symbols)
+        rows = []
+        for symbol in symbols:
+            position = self.positions[symbol]
+            rows.append({
+                'symbol': symbol,
+                'positionAmt': f"{position['qty']:.3f}",
+                'entryPrice': f"{position['entry']:.8f}",
+                'markPrice': f"{self.marks[symbol]:.8f}",
+                'unRealizedProfit': f"{self._unrealized(symbol):.8f}",
+                'liquidationPrice': '0',
+                'leverage': str(self.leverage[symbol]),
+                'marginType': self.margin_type[symbol],
+                'isolatedWallet': '0',
+                'positionSide': 'BOTH',
+                'notional': f"{position['qty'] * self.marks[symbol]:.8f}",
+            })
+        return rows
+
+    def _leverage_bracket(self, params):
+        symbols = [self._symbol(params)] if 'symbol' in params else list(self.symbols)
+        return [{'symbol': s, 'brackets': [dict(b) for b in DEFAULT_BRACKETS]} for s in symbols]
+
+    def _change_leverage(self, params):
+        symbol = self._symbol(params)
+        leverage = int(params.get('leverage', 0))
+        if not 1 <= leverage <= DEFAULT_BRACKETS[0]['initialLeverage']:
+            raise MockAPIError(-4028, f'Leverage {leverage} is not valid')
+        self.leverage[symbol] = leverage
+        return {'symbol': symbol, 'leverage': leverage,
+                'maxNotionalValue': str(DEFAULT_BRACKETS[0]['notionalCap'])}
+
+    def _change_margin_type(self, params):
+        symbol = self._symbol(params)
+        margin_type = params.get('marginType')
+        names = {'CROSSED': 'cross', 'ISOLATED': 'isolated'}
+        if margin_type not in names:
+            raise MockAPIError(-4044, 'The margin type is not valid.')
+        if self.margin_type[symbol] == names[margin_type]:
+            raise MockAPIError(-4046, 'No need to change margin type.')
+        if self.positions[symbol]['qty'] != 0 or self.open_orders(symbol):
+            raise MockAPIError(-4048, 'Margin type cannot be changed if there exists position.')
+        self.margin_type[symbol] = names[margin_type]
+        return {'code': 200, 'msg': 'success'}
+
+    # Order endpoints
+
+    def _create_order(self, params):
+        symbol = self._symbol(params)
+        side = params.get('side')
+        order_type = params.get('type')
+        if side not in ('BUY', 'SELL'):
+            raise MockAPIError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if order_type not in ('MARKET', 'LIMIT', 'STOP'):
+            raise MockAPIError(-1116, 'Invalid orderType.')
+
+        quantity = float(params.get('quantity', 0))
+        if quantity <= 0:
+            raise MockAPIError(-4003, 'Quantity less than or equal to zero.')
+        reduce_only = str(params.get('reduceOnly', 'false')).lower() == 'true'
+        if reduce_only:
+            position = self.positions[symbol]['qty']
+            if position == 0 or (position > 0) == (side == 'BUY'):
+                raise MockAPIError(-2022, 'ReduceOnly Order is rejected.')
+            quantity = min(quantity, abs(position))
+
+        now = self.server_time()
+        order_id = self._next_order_id
+        self._next_order_id += 1
+        order = {
+            'orderId': order_id,
+            'symbol': symbol,
+            'status': 'NEW',
+            'clientOrderId': params.get('newClientOrderId') or f"mock_{order_id}",
+            'price': params.get('price', '0'),
+            'avgPrice': '0.00000',
+            'origQty': f"{quantity:g}",
+            'executedQty': '0',
+            'cumQuote': '0',
+            'timeInForce': params.get('timeInForce', 'GTC'),
+            'type': order_type,
+            'reduceOnly': reduce_only,
+            'closePosition': False,
+            'side': side,
+            'positionSide': 'BOTH',
+            'stopPrice': params.get('stopPrice', '0'),
+            'workingType': 'CONTRACT_PRICE',
+            'priceProtect': False,
+            'origType': order_type,
+            'updateTime': now,
+        }
+        self.orders[order_id] = order
+
+        mark = self.marks[symbol]
+        if order_type == 'MARKET':
+            self._fill(order, mark)
+        elif order_type == 'LIMIT':
+            marketable = self._marketable(side, float(order['price']), mark)
+            if order['timeInForce'] == 'GTX' and marketable:
+                order['status'] = 'EXPIRED'
+            elif marketable:
+                available = self._available_quantity(symbol, quantity)
+                if available < quantity and order['timeInForce'] == 'FOK':
+                    order['status'] = 'EXPIRED'
+                else:
+                    if available > 0:
+                        self._fill(order, float(order['price']), quantity=available)
+                    if available < quantity and order['timeInForce'] == 'IOC':
+                        order['status'] = 'EXPIRED'
+            elif order['timeInForce'] in ('IOC', 'FOK'):
+                order['status'] = 'EXPIRED'
+        return dict(order)
+
+    def _available_quantity(self, symbol: str, quantity: float) -> float:
+        """Quantity a marketable limit order gets immediately: `partial_fill` of it, on the step grid"""
+        if self.partial_fill >= 1:
+            return quantity
+        step = float(self.symbols[symbol]['stepSize'])
+        return round(int(quantity * self.partial_fill / step + 1e-9) * step, 12)
+
+    def _fill(self, order: Dict, price: float, maker: bool = False, quantity: Optional[float] = None):
+        """Fill `quantity` (default: the unfilled remainder) of an order, update the position and book the trade"""
+        remaining = float(order['origQty']) - float(order['executedQty'])
+        quantity = remaining if quantity is None else min(quantity, remaining)
+        signed = quantity if order['side'] == 'BUY' else -quantity
+        position = self.positions[order['symbol']]
+        old_qty = position['qty']
+        new_qty = old_qty + signed
+
+        realized = 0.0
+        if old_qty == 0 or (old_qty > 0) == (signed > 0):
+            # Opening or adding: weighted average entry
+            position['entry'] = (abs(old_qty) * position['entry'] + quantity * price) / abs(new_qty)
+        else:
+            # Reducing, closing or flipping: realize PnL on the closed part
+            closed = min(abs(signed), abs(old_qty))
+            direction = 1 if old_qty > 0 else -1
+            realized = closed * (price - position['entry']) * direction
+            self.balance += realized
+            if abs(signed) > abs(old_qty):
+                position['entry'] = price
+            elif abs(new_qty) < 1e-12:
+                position['entry'] = 0.0
+        position['qty'] = round(new_qty, 12)
+
+        executed = float(order['executedQty']) + quantity
+        cum_quote = float(order['cumQuote']) + quantity * price
+        order['executedQty'] = order['origQty'] if quantity >= remaining else f"{round(executed, 12):g}"
+        order['avgPrice'] = f"{cum_quote / executed:.5f}"
+        order['cumQuote'] = f"{cum_quote:.5f}"
+        order['status'] = 'FILLED' if quantity >= remaining else 'PARTIALLY_FILLED'
+        order['updateTime'] = self.server_time()
+
+        commission = quantity * price * (MAKER_FEE if maker else TAKER_FEE)
+        self.balance -= commission
+        self._book_trade(order, price, quantity, realized, commission, maker)
+
+    def _book_trade(self, order: Dict, price: float, quantity: float, realized: float,
+                    commission: float, maker: bool):
+        now = order['updateTime']
+        trade_id = self._next_trade_id
+        self._next_trade_id += 1
+        self.trades.append({
+            'symbol': order['symbol'], 'id': trade_id, 'orderId': order['orderId'],
+            'side': order['side'], 'price': f"{price:.8f}", 'qty': order['origQty'],
+            'realizedPnl': f"{realized:.8f}", 'marginAsset': 'USDT',
+            'quoteQty': f"{quantity * price:.8f}", 'commission': f"{commission:.8f}",
+            'commissionAsset': 'USDT', 'time': now, 'positionSide': 'BOTH',
+            'buyer': order['side'] == 'BUY', 'maker': maker,
+        })
+        if realized:
+            self._book_income(order['symbol'], 'REALIZED_PNL', realized, now, trade_id)
+        self._book_income(order['symbol'], 'COMMISSION', -commission, now, trade_id)
+
+    def _book_income(self, symbol: str, income_type: str, amount: float, time_ms: int, trade_id=''):
+        tran_id = self._next_tran_id
+        self._next_tran_id += 1
+        self.income.append({
+            'symbol': symbol, 'incomeType': income_type, 'income': f"{amount:.8f}",
+            'asset': 'USDT', 'info': '', 'time': time_ms, 'tranId': tran_id, 'tradeId': str(trade_id),
+        })
+
+    def charge_funding(self, symbol: str, rate: float):
+        """Settle one funding interval for a symbol's position (longs pay positive rates)"""
+        with self._lock:
+            position = self.positions[symbol]
+            if position['qty'] == 0:
+                return
+            amount = -position['qty'] * self.marks[symbol] * rate
+            self.balance += amount
+            self._book_income(symbol, 'FUNDING_FEE', amount, self.server_time())
+
+    def _modify_order(self, params):
+        order = self._find_order(params)
+        if order['status'] in TERMINAL_STATUSES:
+            raise MockAPIError(-2013, 'Order does not exist.')
+        if order['type'] != 'LIMIT':
+            raise MockAPIError(-1116, 'Invalid orderType.')
+        if params.get('side') != order['side']:
+            raise MockAPIError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        price = float(params.get('price', 0))
+        quantity = float(params.get('quantity', 0))
+        if price <= 0 or quantity <= float(order['executedQty']):
+            raise MockAPIError(-4003, 'Quantity less than or equal to zero.')
+        if price == float(order['price']) and quantity == float(order['origQty']):
+            raise MockAPIError(-5027, 'No need to modify the order.')
+        if self.amend_limit is not None and self.amends[order['orderId']] >= self.amend_limit:
+            raise MockAPIError(-5026, 'Exceed maximum modify order limit.')
+        self.amends[order['orderId']] += 1
+
+        order['price'] = params['price']
+        order['origQty'] = f"{quantity:g}"
+        order['updateTime'] = self.server_time()
+        if self._marketable(order['side'], price, self.marks[order['symbol']]):
+            if order['timeInForce'] == 'GTX':
+                order['status'] = 'EXPIRED'
+            else:
+                self._fill(order, price)
+        return dict(order)
+
+    def _batch(self, params, name: str, limit: int, handler) -> List[Dict]:
+        """Apply `handler` to each item of a JSON list parameter; errors are returned in place"""
+        try:
+            batch = json.loads(params.get(name, ''))
+        except ValueError:
+            batch = None
+        if not isinstance(batch, list) or not 1 <= len(batch) <= limit:
+            raise MockAPIError(-1130, f"Data sent for parameter '{name}' is not valid.")
+        results = []
+        for item in batch:
+            try:
+                results.append(handler(item))
+            except MockAPIError as e:
+                results.append({'code': e.code, 'msg': e.msg})
+        return results
+
+    def _create_batch(self, params):
+        return self._batch(params, 'batchOrders', 5,
+                           lambda item: self._create_order({k: str(v) for k, v in item.items()}))
+
+    def _modify_batch(self, params):
+        return self._batch(params, 'batchOrders', 5,
+                           lambda item: self._modify_order({k: str(v) for k, v in item.items()}))
+
+    def _cancel_batch(self, params):
+        symbol = self._symbol(params)
+        return self._batch(params, 'orderIdList', 10,
+                           lambda order_id: self._cancel_order({'symbol': symbol, 'orderId': str(order_id)}))
+
+    def _get_order(self, params):
+        return dict(self._find_order(params))
+
+    def _cancel_order(self, params):
+        order = self._find_order(params)
+        if order['status'] in TERMINAL_STATUSES:
+            raise MockAPIError(-2011, 'Unknown order sent.')
+        order['status'] = 'CANCELED'
+        order['updateTime'] = self.server_time()
+        return dict(order)
+
+    def _open_orders(self, params):
+        symbol = self._symbol(params) if 'symbol' in params else None
+        return self.open_orders(symbol)
+
+    def _user_trades(self, params):
+        symbol = self._symbol(params)
+        limit = min(int(params.get('limit', 500)), 1000)
+        trades = [t for t in self.trades if t['symbol'] == symbol]
+        if 'fromId' in params:
+            trades = [t for t in trades if t['id'] >= int(params['fromId'])][:limit]
+        else:
+            if 'startTime' in params:
+                trades = [t for t in trades if t['time'] >= int(params['startTime'])]
+            if 'endTime' in params:
+                trades = [t for t in trades if t['time'] <= int(params['endTime'])]
+            trades = trades[-limit:]
+        return [dict(t) for t in trades]
+
+    def _income_history(self, params):
+        limit = min(int(params.get('limit', 100)), 1000)
+        rows = self.income
+        if 'symbol' in params:
+            rows = [r for r in rows if r['symbol'] == params['symbol']]
+        if 'incomeType' in params:
+            rows = [r for r in rows if r['incomeType'] == params['incomeType']]
+        if 'startTime' in params:
+            rows = [r for r in rows if r['time'] >= int(params['startTime'])]
+        if 'endTime' in params:
+            rows = [r for r in rows if r['time'] <= int(params['endTime'])]
+        return [dict(r) for r in rows[:limit]]
+
+    def _cancel_all_orders(self, params):
+        symbol = self._symbol(params)
+        now = self.server_time()
+        for order in self.orders.values():
+            if order['symbol'] == symbol and order['status'] in ('NEW', 'PARTIALLY_FILLED'):
+                order['status'] = 'CANCELED'
+                order['updateTime'] = now
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def _countdown_cancel_all(self, params):
+        symbol = self._symbol(params)
+        countdown = int(params.get('countdownTime', -1))
+        if countdown < 0:
+            raise MockAPIError(-1102, "Mandatory parameter 'countdownTime' was not sent, was empty/null, or malformed.")
+        if countdown:
+            self.countdowns[symbol] = self.server_time() + countdown
+        else:
+            self.countdowns.pop(symbol, None)
+        return {'symbol': symbol, 'countdownTime': str(countdown)}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode()))
+
+        status, body, headers = self.server.exchange.respond(self.command, url.path, params)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockExchangeServer:
+    """Serve a MockExchange over HTTP on localhost"""
+
+    def __init__(self, exchange: Optional[MockExchange] = None, port: int = 0):
+        """
+        Args:
+            exchange: Exchange model to serve (default: a new MockExchange)
+            port: TCP port (default: any free port)
+        """
+        self.exchange = exchange or MockExchange()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.exchange = self.exchange
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockExchangeServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='MockExchange', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def client(self, api_key: str = 'mock-key', api_secret: str = 'mock-secret') -> Client:
+        """Create a python-binance client that talks to this server"""
+        return create_mock_client(self.url, api_key, api_secret)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class InProcessAdapter(BaseAdapter):
+    """Transport adapter that hands requests straight to a MockExchange, without sockets or threads"""
+
+    def __init__(self, exchange: MockExchange):
+        super().__init__()
+        self.exchange = exchange
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        params = dict(parse_qsl(url.query))
+        if request.body:
+            body = request.body.decode() if isinstance(request.body, bytes) else request.body
+            params.update(parse_qsl(body))
+        status, body, headers = self.exchange.respond(request.method, url.path, params)
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json', **headers})
+        response._content = json.dumps(body).encode()
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if status == 200 else 'Mock error'
+        return response
+
+    def close(self):
+        pass
+
+
+def create_in_process_client(exchange: MockExchange, api_key: str = 'mock-key',
+                             api_secret: str = 'mock-secret') -> Client:
+    """Create a python-binance testnet client served by `exchange` in this process"""
+    client = create_client(api_key, api_secret, True, InProcessAdapter(exchange))
+    # Nothing is proxied; skips requests' per-call scan of the environment for proxy settings
+    client.session.trust_env = False
+    return client
+
+
+def mock_client_class(base_url: str) -> type:
+    """python-binance Client subclass whose testnet spot and futures URLs point at base_url"""
+    return type('MockClient', (Client,), {
+        'API_TESTNET_URL': f"{base_url}/api",
+        'FUTURES_TESTNET_URL': f"{base_url}/fapi",
+    })
+
+
+def create_mock_client(base_url: str, api_key: str = 'mock-key', api_secret: str = 'mock-secret') -> Client:
+    """Create a python-binance testnet client that talks to a mock exchange at base_url"""
+    return mock_client_class(base_url)(api_key=api_key, api_secret=api_secret, testnet=True)
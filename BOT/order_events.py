@@ -0,0 +1,438 @@
+"""
+Order Event Log
+Structured capture of order activity into rolling Parquet or Arrow files, and fill quality queries
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed when the event log is enabled or queried
+    pa = None
+
+FORMATS = {'PARQUET': '.parquet', 'ARROW': '.arrow'}
+
+# One row per REST order response (or failure) and per user data stream order update
+COLUMNS = [
+    ('time', 'timestamp'),           # Local capture time, UTC
+    ('exchange_time', 'int64'),      # updateTime / transaction time (ms) reported by the exchange
+    ('source', 'string'),            # 'rest' or 'stream'
+    ('action', 'string'),            # 'new', 'amend', 'cancel' (rest) or 'update' (stream)
+    ('symbol', 'string'),
+    ('order_id', 'int64'),
+    ('client_order_id', 'string'),
+    ('side', 'string'),
+    ('order_type', 'string'),
+    ('time_in_force', 'string'),
+    ('status', 'string'),
+    ('exec_type', 'string'),         # Stream execution type: NEW, TRADE, CANCELED, AMENDMENT, ...
+    ('price', 'float64'),
+    ('quantity', 'float64'),
+    ('filled_qty', 'float64'),       # Cumulative
+    ('avg_price', 'float64'),
+    ('last_qty', 'float64'),         # This fill (stream TRADE updates)
+    ('last_price', 'float64'),
+    ('maker', 'bool'),
+    ('commission', 'float64'),
+    ('arrival_mid', 'float64'),      # Local book mid when the request was sent, if the book is streamed
+    ('latency_ms', 'float64'),       # Request round trip
+    ('error_code', 'int64'),
+    ('error', 'string'),
+]
+
+GROUPINGS = ('symbol', 'order_type', 'side', 'day')
+
+# Rows only become readable when their file is closed, and a crash loses the open file,
+# so files roll every few minutes rather than hourly
+DEFAULT_ROLL_SECONDS = 300.0
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("The order event log needs pyarrow (pip install pyarrow)")
+
+
+def schema():
+    """Arrow schema of the event files"""
+    _require_pyarrow()
+    types = {'timestamp': pa.timestamp('ms', tz='UTC'), 'int64': pa.int64(), 'string': pa.string(),
+             'float64': pa.float64(), 'bool': pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def _num(value) -> Optional[float]:
+    return float(value) if value not in (None, '') else None
+
+
+def _request_orders(params: Dict) -> List[Dict]:
+    """The individual orders of a single or batch order request"""
+    if 'batchOrders' in params:
+        return json.loads(params['batchOrders'])
+    if 'orderIdList' in params:
+        return [{'symbol': params['symbol'], 'orderId': order_id} for order_id in json.loads(params['orderIdList'])]
+    return [params]
+
+
+class PendingRequest:
+    """An order request in flight, from OrderEventLog.begin()"""
+    __slots__ = ('action', 'orders', 'mids', 'started')
+
+    def __init__(self, action: str, orders: List[Dict], mids: Dict[str, float]):
+        self.action = action
+        self.orders = orders
+        self.mids = mids
+        self.started = time.perf_counter()
+
+
+class OrderEventLog:
+    """
+    Append-only columnar log of order events
+
+    Recording only appends a row to an in-memory buffer; a background thread
+    writes the buffer every `flush_interval` seconds (sooner once `batch_rows`
+    are waiting), so the order path never waits on disk. Files roll after
+    `roll_rows` rows, `roll_seconds` seconds and at midnight UTC, and live in
+    one directory per day (date=YYYY-MM-DD), so queries over a date range only
+    open that range's files. A file is written under a dot-prefixed name and
+    renamed when it is closed, so readers never see a half-written file; the
+    writer thread closes a file on time even when no new rows arrive, so a
+    row is readable, and safe from a crash, at most `roll_seconds` after it
+    was recorded.
+    """
+
+    def __init__(self, directory: str, fmt: str = 'PARQUET', roll_rows: int = 1_000_000,
+                 roll_seconds: float = DEFAULT_ROLL_SECONDS, flush_interval: float = 5.0, batch_rows: int = 10_000,
+                 mid: Optional[Callable[[str], float]] = None, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            directory: Root directory of the event files
+            fmt: 'PARQUET' (zstd compressed) or 'ARROW' (IPC file, uncompressed)
+            roll_rows: Rows per file before starting the next
+            roll_seconds: Seconds per file before starting the next
+            flush_interval: Seconds between background writes
+            batch_rows: Buffered rows that trigger an early write
+            mid: Returns the current book mid of a symbol (0 if unknown), stamped on requests
+            logger: Logger for file and write errors (default: module logger)
+        """
+        _require_pyarrow()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.directory = directory
+        self.fmt = fmt
+        self.roll_rows = roll_rows
+        self.roll_seconds = roll_seconds
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows
+        self.mid = mid
+        self.logger = logger or logging.getLogger(__name__)
+        self.schema = schema()
+        self.rows_written = 0
+        self.files_written = 0
+
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._path: Optional[str] = None
+        self._day: Optional[str] = None
+        self._file_rows = 0
+        self._file_opened = 0.0
+        self._sequence = 0
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # Recording
+
+    def begin(self, action: str, params: Dict) -> PendingRequest:
+        """Note an order request about to be sent: its orders and the arrival mid of their symbols"""
+        orders = _request_orders(params)
+        mids = {}
+        if self.mid is not None:
+            for order in orders:
+                symbol = order.get('symbol')
+                if symbol and symbol not in mids:
+                    mids[symbol] = self.mid(symbol) or None
+        return PendingRequest(action, orders, mids)
+
+    def end(self, pending: PendingRequest, response=None, error: Optional[Exception] = None):
+        """Record the outcome of a request from begin(): its response, or the exception it raised"""
+        latency = (time.perf_counter() - pending.started) * 1000
+        now = int(time.time() * 1000)
+        if error is not None:
+            responses = [{'code': getattr(error, 'code', None), 'msg': getattr(error, 'message', None) or str(error)}]
+            responses *= len(pending.orders)
+        elif isinstance(response, list):
+            responses = response
+        else:
+            responses = [response]
+
+        rows = []
+        for request, result in zip(pending.orders, responses):
+            result = result or {}
+            symbol = result.get('symbol') or request.get('symbol')
+            failed = 'orderId' not in result
+            rows.append({
+                'time': now, 'exchange_time': result.get('updateTime'), 'source': 'rest',
+                'action': pending.action, 'symbol': symbol,
+                'order_id': result.get('orderId', request.get('orderId')),
+                'client_order_id': result.get('clientOrderId') or request.get('newClientOrderId'),
+                'side': result.get('side') or request.get('side'),
+                'order_type': result.get('type') or request.get('type'),
+                'time_in_force': result.get('timeInForce') or request.get('timeInForce'),
+                'status': result.get('status'), 'exec_type': None,
+                'price': _num(result.get('price', request.get('price'))),
+                'quantity': _num(result.get('origQty', request.get('quantity'))),
+                'filled_qty': _num(result.get('executedQty')), 'avg_price': _num(result.get('avgPrice')),
+                'last_qty': None, 'last_price': None, 'maker': None, 'commission': None,
+                'arrival_mid': pending.mids.get(symbol), 'latency_ms': latency,
+                'error_code': result.get('code') if failed else None,
+                'error': result.get('msg') if failed else None,
+            })
+        self._append(rows)
+
+    def record_update(self, update: Dict):
+        """Record an ORDER_TRADE_UPDATE order payload from the user data stream"""
+        self._append([{
+            'time': int(time.time() * 1000), 'exchange_time': update.get('T'), 'source': 'stream',
+            'action': 'update', 'symbol': update.get('s'), 'order_id': update.get('i'),
+            'client_order_id': update.get('c'), 'side': update.get('S'), 'order_type': update.get('o'),
+            'time_in_force': update.get('f'), 'status': update.get('X'), 'exec_type': update.get('x'),
+            'price': _num(update.get('p')), 'quantity': _num(update.get('q')),
+            'filled_qty': _num(update.get('z')), 'avg_price': _num(update.get('ap')),
+            'last_qty': _num(update.get('l')), 'last_price': _num(update.get('L')),
+            'maker': update.get('m'), 'commission': _num(update.get('n')),
+            'arrival_mid': None, 'latency_ms': None, 'error_code': None, 'error': None,
+        }])
+
+    def _append(self, rows: List[Dict]):
+        with self._lock:
+            self._buffer.extend(rows)
+            waiting = len(self._buffer)
+        if waiting >= self.batch_rows:
+            self._wake.set()
+
+    # Writing
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='OrderEventLog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the writer thread, write what is buffered and close the current file"""
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush(close=True)
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Order event log write failed: {e}")
+
+    def flush(self, close: bool = False):
+        """
+        Write buffered rows now
+
+        Args:
+            close: Also close the current file so readers see everything recorded so far
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        with self._write_lock:
+            if rows:
+                self._write(pa.Table.from_pylist(rows, schema=self.schema))
+            if close or (self._writer is not None and self._file_age() >= self.roll_seconds):
+                self._close_file()
+
+    def _write(self, table):
+        days = pc.strftime(table['time'], format='%Y-%m-%d').to_numpy(zero_copy_only=False)
+        # Rows arrive in time order; split at day boundaries so each file holds one day
+        bounds = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(days)]):
+            day = days[start]
+            if self._writer is not None and (day != self._day or self._file_rows >= self.roll_rows
+                                             or self._file_age() >= self.roll_seconds):
+                self._close_file()
+            if self._writer is None:
+                self._open_file(day)
+            self._writer.write_table(table.slice(start, stop - start))
+            self._file_rows += int(stop - start)
+            self.rows_written += int(stop - start)
+
+    def _file_age(self) -> float:
+        return time.monotonic() - self._file_opened
+
+    def _open_file(self, day: str):
+        folder = os.path.join(self.directory, f'date={day}')
+        os.makedirs(folder, exist_ok=True)
+        self._sequence += 1
+        name = (f"orders_{datetime.now(timezone.utc):%H%M%S}_{os.getpid()}_{self._sequence:04d}"
+                f"{FORMATS[self.fmt]}")
+        self._path = os.path.join(folder, name)
+        partial = os.path.join(folder, '.' + name)
+        if self.fmt == 'PARQUET':
+            self._writer = pq.ParquetWriter(partial, self.schema, compression='zstd')
+        else:
+            self._writer = pa.ipc.new_file(partial, self.schema)
+        self._day = day
+        self._file_rows = 0
+        self._file_opened = time.monotonic()
+
+    def _close_file(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        folder, name = os.path.split(self._path)
+        os.replace(os.path.join(folder, '.' + name), self._path)
+        self.files_written += 1
+        self.logger.debug(f"Closed order event file {self._path} ({self._file_rows} rows)")
+        self._writer = None
+        self._path = None
+
+
+def _day(value) -> str:
+    return value.strftime('%Y-%m-%d') if value is not None else ''
+
+
+def load_events(directory: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                symbols: Optional[List[str]] = None, columns: Optional[List[str]] = None):
+    """
+    Read order events from an event log directory
+
+    Only the day directories inside [start, end] are opened, and the time and
+    symbol filters are pushed down to the files, so a query touches a small
+    fraction of months of data. Parquet and Arrow files can be mixed.
+
+    Args:
+        directory: Root directory of the event files
+        start: Earliest event time (inclusive; naive datetimes are UTC)
+        end: Latest event time (exclusive)
+        symbols: Only these symbols
+        columns: Only these columns (default: all)
+
+    Returns:
+        pyarrow Table of matching events in file order
+    """
+    _require_pyarrow()
+    start = start.replace(tzinfo=timezone.utc) if start is not None and start.tzinfo is None else start
+    end = end.replace(tzinfo=timezone.utc) if end is not None and end.tzinfo is None else end
+    first, last = _day(start), _day(end) or '9999-12-31'
+    parts = []
+    for fmt, suffix in FORMATS.items():
+        files = sorted(path for path in glob.glob(os.path.join(directory, 'date=*', '*' + suffix))
+                       if first <= os.path.basename(os.path.dirname(path))[5:] <= last)
+        if files:
+            parts.append(ds.dataset(files, schema=schema(), format='parquet' if fmt == 'PARQUET' else 'ipc'))
+    if not parts:
+        return schema().empty_table().select(columns) if columns else schema().empty_table()
+
+    condition = None
+    for expression in ((ds.field('time') >= pa.scalar(start, pa.timestamp('ms', tz='UTC'))) if start else None,
+                       (ds.field('time') < pa.scalar(end, pa.timestamp('ms', tz='UTC'))) if end else None,
+                       ds.field('symbol').isin(symbols) if symbols else None):
+        if expression is not None:
+            condition = expression if condition is None else condition & expression
+    return ds.dataset(parts).to_table(columns=columns, filter=condition)
+
+
+def fill_quality(events, by: str = 'symbol') -> List[Dict]:
+    """
+    Latency, fill rate and slippage per group, from load_events() output
+
+    An order's outcome is its row with the largest filled quantity, from REST
+    responses or stream updates. Slippage is the average fill price against
+    the arrival mid, in basis points (positive is worse), weighted by filled
+    quantity; orders sent without a streamed book have no arrival mid and are
+    left out of it.
+
+    Args:
+        events: Table with at least the columns time, source, action, symbol,
+                order_id, side, order_type, quantity, filled_qty, avg_price,
+                arrival_mid, latency_ms and error_code
+        by: 'symbol', 'order_type', 'side' or 'day'
+
+    Returns:
+        One dict per group: group, orders, rejected, filled_orders, fill_rate,
+        latency_p50_ms, latency_p99_ms, slippage_bps
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping {by!r}; expected one of {', '.join(GROUPINGS)}")
+
+    def column(name, fill=None):
+        values = events[name]
+        if fill is not None:
+            values = pc.fill_null(values, fill)
+        return values.to_numpy(zero_copy_only=False)
+
+    new = (column('action') == 'new') & (column('source') == 'rest')
+    has_id = ~np.asarray(pc.is_null(events['order_id']))
+    rejected = new & ~has_id
+    accepted = new & has_id
+    order_ids = column('order_id', 0)
+    if by == 'day':
+        keys = pc.strftime(events['time'], format='%Y-%m-%d').to_numpy(zero_copy_only=False)
+    else:
+        keys = column(by, '')
+    filled = column('filled_qty', 0.0)
+    average = column('avg_price', 0.0)
+    times = column('time').astype('datetime64[ms]').astype(np.int64)
+
+    # Outcome per order: the row with the most filled, latest first among equals
+    rows = np.flatnonzero(has_id)
+    order = rows[np.lexsort((times[rows], filled[rows], order_ids[rows]))]
+    last = np.r_[order_ids[order][1:] != order_ids[order][:-1], True]
+    outcome_ids, outcome_rows = order_ids[order][last], order[last]
+
+    quantity = column('quantity', 0.0)
+    mids = column('arrival_mid', 0.0)
+    sides = column('side', '')
+    latency = column('latency_ms', np.nan)
+    results = []
+    for key in sorted(set(keys[new])):
+        in_group = keys == key
+        sent = np.flatnonzero(accepted & in_group)
+        final = outcome_rows[np.searchsorted(outcome_ids, order_ids[sent])]
+        done = filled[final]
+        lat = latency[new & in_group]
+        lat = lat[~np.isnan(lat)]
+
+        priced = (mids[sent] > 0) & (done > 0)
+        slippage = None
+        if priced.any():
+            mid, fill_price = mids[sent][priced], average[final][priced]
+            sign = np.where(sides[sent][priced] == 'BUY', 1.0, -1.0)
+            slippage = float(np.average(sign * (fill_price - mid) / mid * 1e4, weights=done[priced]))
+        ordered = quantity[sent].sum()
+        results.append({
+            'group': key,
+            'orders': len(sent),
+            'rejected': int((rejected & in_group).sum()),
+            'filled_orders': int((done > 0).sum()),
+            'fill_rate': float(done.sum() / ordered) if ordered else 0.0,
+            'latency_p50_ms': float(np.percentile(lat, 50)) if len(lat) else None,
+            'latency_p99_ms': float(np.percentile(lat, 99)) if len(lat) else None,
+            'slippage_bps': slippage,
+        })
+    return results
@@ -0,0 +1,323 @@
+"""
+Local Open-Order Index
+In-memory view of open orders maintained from acks, cancels and stream updates
+"""
+
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Order statuses after which an order is no longer open
+TERMINAL_STATUSES = {'FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH'}
+
+# Order types that never rest on the book
+NON_RESTING_TYPES = {'MARKET'}
+
+# Removed-order tombstones older than this are dropped even without snapshots: no
+# snapshot request stays in flight that long
+TOMBSTONE_TTL_MS = 60_000
+TOMBSTONE_PRUNE_MIN = 1024
+
+
+def stream_order_to_rest(update: Dict) -> Dict:
+    """Convert an ORDER_TRADE_UPDATE order payload into the REST order format"""
+    return {
+        'symbol': update['s'],
+        'orderId': update['i'],
+        'clientOrderId': update['c'],
+        'side': update['S'],
+        'type': update['o'],
+        'timeInForce': update.get('f'),
+        'price': update['p'],
+        'stopPrice': update.get('sp', '0'),
+        'origQty': update['q'],
+        'executedQty': update.get('z', '0'),
+        'reduceOnly': update.get('R', False),
+        'positionSide': update.get('ps', 'BOTH'),
+        'status': update['X'],
+        'updateTime': update.get('T', 0),
+    }
+
+
+class OpenOrderIndex:
+    """
+    Open orders indexed by orderId, clientOrderId, symbol and price level
+
+    The index is fed by order acks, cancel responses and user data stream updates,
+    and reconciled against per-symbol REST snapshots, so "what is open" queries are
+    answered from memory instead of account-wide exchange scans.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._orders: Dict[int, Dict] = {}
+        self._by_client_id: Dict[str, int] = {}
+        self._by_symbol: Dict[str, Set[int]] = defaultdict(set)
+        self._by_level: Dict[Tuple[str, str, float], Set[int]] = defaultdict(set)
+        # Local time (ms) of the last change to each order, to protect it from stale snapshots
+        self._touched: Dict[int, float] = {}
+        # Orders removed locally, kept briefly so stale snapshots do not resurrect them
+        self._removed: Dict[int, float] = {}
+        self._prune_at = TOMBSTONE_PRUNE_MIN
+
+        self._seeded_all = False
+        self._seeded_symbols: Set[str] = set()
+        # Whether a user data stream is feeding the index; without one it goes stale silently
+        self.stream_live = False
+        self._reconcile_cursor = 0
+        self.drift_events = 0
+        # Called with every raw stream update applied (e.g. the order event log)
+        self.stream_listeners: List[Callable[[Dict], None]] = []
+
+    # Queries
+
+    def is_authoritative(self, symbol: Optional[str] = None) -> bool:
+        """
+        Whether open-order queries for `symbol` (or all symbols) can be answered from memory
+
+        Only while the user data stream is live and the index has been seeded
+        from a snapshot covering the symbol; otherwise fills and cancels made
+        elsewhere would go unnoticed until the next reconcile.
+        """
+        with self._lock:
+            return self.stream_live and self._is_seeded(symbol)
+
+    def _is_seeded(self, symbol: Optional[str]) -> bool:
+        return self._seeded_all or (symbol is not None and symbol in self._seeded_symbols)
+
+    def orders(self, symbol: Optional[str] = None) -> List[Dict]:
+        """Open orders, optionally for one symbol"""
+        with self._lock:
+            if symbol is None:
+                return [dict(o) for o in self._orders.values()]
+            return [dict(self._orders[i]) for i in self._by_symbol.get(symbol, ())]
+
+    def get(self, order_id: int) -> Optional[Dict]:
+        """Open order by orderId"""
+        with self._lock:
+            order = self._orders.get(order_id)
+            return dict(order) if order else None
+
+    def get_by_client_id(self, client_order_id: str) -> Optional[Dict]:
+        """Open order by clientOrderId"""
+        with self._lock:
+            order_id = self._by_client_id.get(client_order_id)
+            return self.get(order_id) if order_id is not None else None
+
+    def at_level(self, symbol: str, side: str, price: float) -> List[Dict]:
+        """Open orders resting at one price level"""
+        with self._lock:
+            ids = self._by_level.get((symbol, side.upper(), float(price)), ())
+            return [dict(self._orders[i]) for i in ids]
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one open order"""
+        with self._lock:
+            return sorted(s for s, ids in self._by_symbol.items() if ids)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    # Updates
+
+    def on_ack(self, order: Dict):
+        """Apply a REST order response (create or amend)"""
+        if order.get('type') in NON_RESTING_TYPES:
+            return
+        self._apply(order)
+
+    def on_cancel(self, order: Dict):
+        """Apply a REST cancel response"""
+        with self._lock:
+            self._remove(order['orderId'])
+
+    def set_stream_live(self, live: bool):
+        """
+        Note the user data stream connecting or dropping
+
+        A (re)connect discards the seeding: updates may have been missed while
+        the stream was down, so the next query goes to a REST snapshot.
+        """
+        with self._lock:
+            if live and not self.stream_live:
+                self._seeded_all = False
+                self._seeded_symbols.clear()
+            self.stream_live = live
+        self.logger.info(f"User data stream {'live' if live else 'down'}: open orders from "
+                         f"{'the local index once reseeded' if live else 'REST snapshots'}")
+
+    def on_stream_update(self, update: Dict):
+        """Apply an ORDER_TRADE_UPDATE order payload from the user data stream"""
+        self._apply(stream_order_to_rest(update))
+        for listener in self.stream_listeners:
+            listener(update)
+
+    def _apply(self, order: Dict):
+        order_id = order['orderId']
+        with self._lock:
+            current = self._orders.get(order_id)
+            if current and order.get('updateTime', 0) < current.get('updateTime', 0):
+                return  # Older than what we already have
+            if order.get('status') in TERMINAL_STATUSES:
+                self._remove(order_id)
+            elif order_id not in self._removed:
+                self._insert(order)
+
+    def _insert(self, order: Dict):
+        order_id = order['orderId']
+        if order_id in self._orders:
+            self._unlink(order_id)
+        self._orders[order_id] = order
+        self._touched[order_id] = time.time() * 1000
+        if order.get('clientOrderId'):
+            self._by_client_id[order['clientOrderId']] = order_id
+        self._by_symbol[order['symbol']].add(order_id)
+        self._by_level[self._level(order)].add(order_id)
+
+    def _remove(self, order_id: int):
+        if order_id in self._orders:
+            self._unlink(order_id)
+            del self._orders[order_id]
+        self._touched.pop(order_id, None)
+        now = time.time() * 1000
+        self._removed[order_id] = now
+        if len(self._removed) > self._prune_at:
+            # Amortized: rebuilt once the map has doubled since the last prune
+            self._removed = {i: t for i, t in self._removed.items() if t > now - TOMBSTONE_TTL_MS}
+            self._prune_at = max(TOMBSTONE_PRUNE_MIN, 2 * len(self._removed))
+
+    def _unlink(self, order_id: int):
+        order = self._orders[order_id]
+        self._by_client_id.pop(order.get('clientOrderId'), None)
+        symbol_ids = self._by_symbol.get(order['symbol'])
+        if symbol_ids is not None:
+            symbol_ids.discard(order_id)
+            if not symbol_ids:
+                del self._by_symbol[order['symbol']]
+        level = self._level(order)
+        level_ids = self._by_level.get(level)
+        if level_ids is not None:
+            level_ids.discard(order_id)
+            if not level_ids:
+                del self._by_level[level]
+
+    @staticmethod
+    def _level(order: Dict) -> Tuple[str, str, float]:
+        return order['symbol'], order['side'], float(order['price'])
+
+    # Snapshots and reconciliation
+
+    def load_snapshot(self, orders: List[Dict], symbol: Optional[str] = None,
+                      as_of: Optional[float] = None) -> Dict:
+        """
+        Reconcile the index against an exchange snapshot and adopt it
+
+        Args:
+            orders: Open orders returned by the exchange
+            symbol: Symbol the snapshot covers (None for account-wide)
+            as_of: Local time (ms) the snapshot request was sent; orders changed
+                   locally after this are kept as they are
+
+        Returns:
+            Drift report with 'missing_locally', 'unknown_on_exchange' and 'mismatched' order IDs
+        """
+        as_of = as_of if as_of is not None else time.time() * 1000
+        snapshot = {o['orderId']: o for o in orders}
+        report = {'symbol': symbol, 'missing_locally': [], 'unknown_on_exchange': [], 'mismatched': []}
+
+        with self._lock:
+            seeded = self._is_seeded(symbol)
+            local_ids = set(self._orders) if symbol is None else set(self._by_symbol.get(symbol, ()))
+
+            for order_id in local_ids - set(snapshot):
+                if self._touched.get(order_id, 0) <= as_of:
+                    report['unknown_on_exchange'].append(order_id)
+                    self._remove(order_id)
+
+            for order_id, order in snapshot.items():
+                if self._removed.get(order_id, 0) > as_of:
+                    continue  # Cancelled locally after the snapshot was taken
+                current = self._orders.get(order_id)
+                if current is None:
+                    report['missing_locally'].append(order_id)
+                    self._insert(order)
+                elif self._touched.get(order_id, 0) <= as_of and self._differs(current, order):
+                    report['mismatched'].append(order_id)
+                    self._insert(order)
+
+            # Tombstones only need to outlive snapshots that were in flight
+            self._removed = {i: t for i, t in self._removed.items() if t > as_of}
+
+            if symbol is None:
+                self._seeded_all = True
+            else:
+                self._seeded_symbols.add(symbol)
+
+        drift = sum(len(report[k]) for k in ('missing_locally', 'unknown_on_exchange', 'mismatched'))
+        report['drift'] = drift if seeded else 0
+        if seeded and drift:
+            self.drift_events += 1
+            self.logger.warning(
+                f"Open-order drift for {symbol or 'all symbols'}: "
+                f"{len(report['missing_locally'])} missing locally, "
+                f"{len(report['unknown_on_exchange'])} unknown on exchange, "
+                f"{len(report['mismatched'])} mismatched"
+            )
+        return report
+
+    def next_reconcile_symbol(self, extra_symbols: Optional[List[str]] = None) -> Optional[str]:
+        """Round-robin choice of the next symbol to reconcile"""
+        with self._lock:
+            candidates = sorted(set(self._by_symbol) | self._seeded_symbols | set(extra_symbols or ()))
+            if not candidates:
+                return None
+            symbol = candidates[self._reconcile_cursor % len(candidates)]
+            self._reconcile_cursor += 1
+            return symbol
+
+    @staticmethod
+    def _differs(local: Dict, remote: Dict) -> bool:
+        return any(
+            str(local.get(k)) != str(remote.get(k))
+            for k in ('status', 'price', 'origQty', 'executedQty')
+        )
+
+
+class OrderReconciler:
+    """Background thread reconciling one symbol's open orders per interval"""
+
+    def __init__(self, bot, interval: float = 10.0):
+        """
+        Args:
+            bot: TradingBot whose order index is reconciled
+            interval: Seconds between per-symbol snapshots
+        """
+        self.bot = bot
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.bot.background_polling_allowed('OrderReconciler'):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='OrderReconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.bot.reconcile_open_orders()
+            except Exception as e:
+                self.bot.logger.warning(f"Open-order reconciliation failed: {e}")
@@ -0,0 +1,177 @@
+"""
+Portfolio Risk Calculator
+Vectorized unrealized PnL, margin ratio and liquidation price for all positions
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+# Fixed-point refinements of the liquidation price after the maintenance tier is re-read
+_LIQUIDATION_ITERATIONS = 2
+
+
+class PortfolioCalculator:
+    """
+    Local risk model of a USDT-M futures account
+
+    Positions are held as NumPy arrays so every mark price update recomputes PnL,
+    maintenance margin, margin ratio and liquidation price for all positions in one
+    vectorized pass. Maintenance margin tiers come from the leverage brackets and are
+    stored as padded 2-D arrays, so the tier lookup is vectorized as well.
+
+    Liquidation prices use the exchange formula for one-way mode. In hedge mode each
+    leg is estimated on its own, which is only an approximation.
+    """
+
+    def __init__(self, positions: List[Dict], brackets: List[Dict], wallet_balance: float):
+        """
+        Initialize the calculator from exchange snapshots
+
+        Args:
+            positions: Rows from futures_position_information (non-zero positions)
+            brackets: Rows from futures_leverage_bracket
+            wallet_balance: Cross wallet balance in USDT
+        """
+        self.wallet_balance = float(wallet_balance)
+        self.symbols = [p['symbol'] for p in positions]
+        self.position_sides = [p.get('positionSide', 'BOTH') for p in positions]
+        self._index: Dict[str, List[int]] = {}
+        for i, symbol in enumerate(self.symbols):
+            self._index.setdefault(symbol, []).append(i)
+
+        self.quantity = np.array([float(p['positionAmt']) for p in positions], dtype=float)
+        self.entry_price = np.array([float(p['entryPrice']) for p in positions], dtype=float)
+        self.mark_price = np.array([float(p['markPrice']) for p in positions], dtype=float)
+        self.leverage = np.array([float(p.get('leverage', 1)) for p in positions], dtype=float)
+        self.isolated = np.array([p.get('marginType', 'cross').lower() == 'isolated' for p in positions])
+        self.isolated_wallet = np.array([float(p.get('isolatedWallet', 0)) for p in positions], dtype=float)
+
+        self._load_brackets(brackets)
+        self.recompute()
+
+    @classmethod
+    def from_bot(cls, bot) -> 'PortfolioCalculator':
+        """Build a calculator from the current account snapshot of a TradingBot"""
+        account = bot.get_account_info()
+        positions = bot.get_positions()
+        brackets = bot.get_leverage_brackets()
+        wallet = account.get('totalCrossWalletBalance', account['totalWalletBalance'])
+        return cls(positions, brackets, float(wallet))
+
+    def _load_brackets(self, brackets: List[Dict]):
+        """Pad per-symbol maintenance tiers into (positions x tiers) arrays"""
+        by_symbol = {b['symbol']: b['brackets'] for b in brackets}
+        tiers = max((len(by_symbol.get(s, [])) for s in self.symbols), default=1) or 1
+        count = len(self.symbols)
+
+        # Unused tiers get an infinite floor so they are never selected
+        self._tier_floor = np.full((count, tiers), np.inf)
+        self._tier_ratio = np.zeros((count, tiers))
+        self._tier_cum = np.zeros((count, tiers))
+        for i, symbol in enumerate(self.symbols):
+            symbol_tiers = sorted(by_symbol.get(symbol, []), key=lambda t: float(t['notionalFloor']))
+            if not symbol_tiers:
+                raise ValueError(f"No leverage brackets for {symbol}")
+            for j, tier in enumerate(symbol_tiers):
+                self._tier_floor[i, j] = float(tier['notionalFloor'])
+                self._tier_ratio[i, j] = float(tier['maintMarginRatio'])
+                self._tier_cum[i, j] = float(tier.get('cum', 0))
+        self._rows = np.arange(count)
+
+    def _tier(self, notional: np.ndarray):
+        """Maintenance margin ratio and amount of the tier each notional falls in"""
+        tier = (notional[:, None] >= self._tier_floor).sum(axis=1) - 1
+        tier = np.maximum(tier, 0)
+        return self._tier_ratio[self._rows, tier], self._tier_cum[self._rows, tier]
+
+    def update_marks(self, prices: Dict[str, float]):
+        """Set mark prices by symbol and recompute"""
+        for symbol, price in prices.items():
+            for i in self._index.get(symbol, ()):
+                self.mark_price[i] = price
+        self.recompute()
+
+    def set_mark_array(self, prices: np.ndarray):
+        """Set mark prices for all positions at once (aligned with self.symbols) and recompute"""
+        self.mark_price[:] = prices
+        self.recompute()
+
+    def recompute(self):
+        """Recompute PnL, margins and liquidation prices for every position"""
+        qty = self.quantity
+        size = np.abs(qty)
+        side = np.sign(qty)
+        cross = ~self.isolated
+
+        self.notional = size * self.mark_price
+        self.unrealized_pnl = qty * (self.mark_price - self.entry_price)
+        self.initial_margin = self.notional / self.leverage
+        mm_ratio, mm_cum = self._tier(self.notional)
+        self.maint_margin = np.maximum(self.notional * mm_ratio - mm_cum, 0.0)
+
+        # Account-level (cross) totals
+        self.cross_maint_margin = float(self.maint_margin[cross].sum())
+        self.cross_unrealized_pnl = float(self.unrealized_pnl[cross].sum())
+        self.margin_balance = self.wallet_balance + self.cross_unrealized_pnl
+        self.account_margin_ratio = (
+            self.cross_maint_margin / self.margin_balance if self.margin_balance > 0 else np.inf
+        )
+
+        # Per-position margin ratio: isolated legs against their own margin, cross legs share the account's
+        with np.errstate(divide='ignore', invalid='ignore'):
+            isolated_balance = self.isolated_wallet + self.unrealized_pnl
+            self.margin_ratio = np.where(
+                self.isolated,
+                np.where(isolated_balance > 0, self.maint_margin / isolated_balance, np.inf),
+                self.account_margin_ratio
+            )
+
+        # Collateral available to each position; cross legs exclude their own margin and PnL
+        balance = np.where(self.isolated, self.isolated_wallet, self.wallet_balance)
+        other_mm = np.where(cross, self.cross_maint_margin - self.maint_margin, 0.0)
+        other_upnl = np.where(cross, self.cross_unrealized_pnl - self.unrealized_pnl, 0.0)
+        collateral = balance - other_mm + other_upnl
+
+        # The tier depends on the notional at the liquidation price, so refine it a few times
+        liquidation = self.mark_price.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for _ in range(_LIQUIDATION_ITERATIONS + 1):
+                ratio, cum = self._tier(size * liquidation)
+                liquidation = (collateral + cum - side * size * self.entry_price) / (size * ratio - side * size)
+                liquidation = np.where(np.isfinite(liquidation), np.maximum(liquidation, 0.0), 0.0)
+        self.liquidation_price = liquidation
+
+    def positions(self) -> List[Dict]:
+        """Per-position risk figures"""
+        return [
+            {
+                'symbol': self.symbols[i],
+                'positionSide': self.position_sides[i],
+                'positionAmt': float(self.quantity[i]),
+                'entryPrice': float(self.entry_price[i]),
+                'markPrice': float(self.mark_price[i]),
+                'notional': float(self.notional[i]),
+                'unrealizedPnl': float(self.unrealized_pnl[i]),
+                'maintMargin': float(self.maint_margin[i]),
+                'marginRatio': float(self.margin_ratio[i]),
+                'liquidationPrice': float(self.liquidation_price[i]),
+            }
+            for i in range(len(self.symbols))
+        ]
+
+    def summary(self) -> Dict:
+        """Account-level risk figures"""
+        return {
+            'walletBalance': self.wallet_balance,
+            'unrealizedPnl': float(self.unrealized_pnl.sum()),
+            'marginBalance': self.margin_balance,
+            'maintMargin': float(self.maint_margin.sum()),
+            'initialMargin': float(self.initial_margin.sum()),
+            'marginRatio': float(self.account_margin_ratio),
+            'positions': len(self.symbols),
+        }
+
+    def breaches(self, max_margin_ratio: float) -> List[str]:
+        """Symbols whose margin ratio is at or above the given threshold"""
+        return [self.symbols[i] for i in np.flatnonzero(self.margin_ratio >= max_margin_ratio)]
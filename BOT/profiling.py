@@ -0,0 +1,367 @@
+"""
+Profiling Hooks
+Stack sampling with flamegraph (collapsed stack) output and per-method call timing
+"""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import logging
+import tempfile
+import threading
+import functools
+import subprocess
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Leaf frames of threads parked waiting for work; skipped so flamegraphs show busy time
+IDLE_FRAMES = {('threading.py', 'wait'), ('selectors.py', 'select'), ('queue.py', 'get'),
+               ('threading.py', '_wait_for_tstate_lock')}
+
+SAMPLERS = ('builtin', 'py-spy')
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the Python stack of every thread at a fixed interval
+
+    Samples are aggregated as collapsed stacks ("thread;outer;...;leaf count"),
+    the input format of flamegraph.pl, inferno and speedscope. The profiled
+    code is not instrumented: a background thread reads sys._current_frames(),
+    so the cost is one short GIL hold per sample, proportional to the number of
+    threads and their stack depth. At the default 100 Hz that is well under 1%
+    of a core, low enough for short windows in live trading.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64, skip_idle: bool = True):
+        """
+        Args:
+            interval: Seconds between samples
+            max_depth: Innermost frames kept per stack
+            skip_idle: Drop samples of threads blocked waiting for work
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.skip_idle = skip_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._names: Dict[object, str] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def reset(self):
+        self.stacks.clear()
+        self.samples = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        next_at = time.perf_counter()
+        while self._running:
+            self.sample(own)
+            next_at += self.interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_at = time.perf_counter()  # Fell behind; do not burst to catch up
+
+    def sample(self, skip_thread: Optional[int] = None):
+        """Take one sample of every thread (except `skip_thread`)"""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_thread:
+                continue
+            code = frame.f_code
+            if self.skip_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                name = self._names.get(code)
+                if name is None:
+                    name = self._names[code] = _frame_name(code)
+                stack.append(name)
+                frame = frame.f_back
+            stack.append(f"thread:{names.get(ident, ident)}")
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def write_collapsed(self, path: str) -> int:
+        """Write collapsed stacks to `path`; returns the number of distinct stacks"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return len(self.stacks)
+
+
+class PySpySampler:
+    """
+    Same interface as StackSampler, backed by an external py-spy process
+
+    py-spy samples from outside the interpreter (including native frames with
+    --native), so the bot pays no GIL time for sampling. It needs the py-spy
+    binary and permission to attach to the process (ptrace).
+    """
+
+    def __init__(self, interval: float = 0.01, native: bool = False):
+        if not shutil.which('py-spy'):
+            raise ValueError("py-spy is not installed (pip install py-spy)")
+        self.interval = interval
+        self.native = native
+        self.samples = 0
+        self._output = os.path.join(tempfile.gettempdir(), f'py-spy-{os.getpid()}.folded')
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self):
+        if self._process is not None:
+            return
+        command = ['py-spy', 'record', '--pid', str(os.getpid()), '--rate', str(max(1, round(1 / self.interval))),
+                   '--format', 'raw', '--output', self._output, '--nonblocking', '--threads']
+        if self.native:
+            command.append('--native')
+        self._process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def stop(self):
+        if self._process is None:
+            return
+        self._process.send_signal(signal.SIGINT)
+        try:
+            _, stderr = self._process.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            stderr = b''
+        if self._process.returncode not in (0, -signal.SIGINT) and not os.path.exists(self._output):
+            raise RuntimeError(f"py-spy failed: {stderr.decode(errors='replace').strip()}")
+        self._process = None
+
+    def reset(self):
+        if os.path.exists(self._output):
+            os.remove(self._output)
+
+    def write_collapsed(self, path: str) -> int:
+        if not os.path.exists(self._output):
+            return 0
+        shutil.copyfile(self._output, path)
+        with open(path, encoding='utf-8') as f:
+            return sum(1 for _ in f)
+
+
+class CallTimer:
+    """
+    Cumulative wall time per method of one object
+
+    enable() shadows the object's methods with timing wrappers on the instance
+    (the class is untouched) and disable() removes them. Times are inclusive: a
+    method that calls another is charged for both. Each call costs two
+    perf_counter() reads and a short lock hold.
+    """
+
+    def __init__(self, target, methods: Optional[Iterable[str]] = None):
+        """
+        Args:
+            target: Object whose methods are timed
+            methods: Method names (default: every public method, plus _api_call if present)
+        """
+        self.target = target
+        if methods is None:
+            methods = [name for name, value in vars(type(target)).items()
+                       if callable(value) and not name.startswith('_')]
+            if hasattr(target, '_api_call'):
+                methods.append('_api_call')
+        self.methods = list(methods)
+        self._stats: Dict[str, List[float]] = {}  # name: [calls, total, max, errors]
+        self._lock = threading.Lock()
+        self.enabled = False
+
+    def enable(self):
+        if self.enabled:
+            return
+        for name in self.methods:
+            setattr(self.target, name, self._wrap(name, getattr(self.target, name)))
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for name in self.methods:
+            self.target.__dict__.pop(name, None)
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _wrap(self, name: str, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    entry = self._stats.get(name)
+                    if entry is None:
+                        entry = self._stats[name] = [0, 0.0, 0.0, 0]
+                    entry[0] += 1
+                    entry[1] += elapsed
+                    if elapsed > entry[2]:
+                        entry[2] = elapsed
+                    entry[3] += failed
+        return timed
+
+    def stats(self) -> List[Dict]:
+        """Per method: calls, total and max ms, mean µs and errors, by total time"""
+        with self._lock:
+            items = [(name, list(entry)) for name, entry in self._stats.items()]
+        rows = [{'method': name, 'calls': int(calls), 'total_ms': total * 1000, 'mean_us': total / calls * 1e6,
+                 'max_ms': peak * 1000, 'errors': int(errors)}
+                for name, (calls, total, peak, errors) in items]
+        return sorted(rows, key=lambda row: -row['total_ms'])
+
+
+class Profiler:
+    """
+    Stack sampling and method timing for a TradingBot, switched on and off at runtime
+
+    start() and stop() (or toggle(), e.g. from a signal) bracket a profiling
+    window. dump() writes the window's collapsed stacks to a file that
+    flamegraph.pl, inferno-flamegraph or speedscope.app turn into a flamegraph.
+    """
+
+    def __init__(self, bot, interval: float = 0.01, sampler: str = 'builtin', directory: str = 'logs',
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            bot: Object whose methods are timed (normally a TradingBot)
+            interval: Seconds between stack samples
+            sampler: 'builtin' (in-process thread) or 'py-spy' (external process)
+            directory: Where dump() writes when no path is given
+            logger: Logger for start/stop/dump messages (default: module logger)
+        """
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler {sampler!r}; expected one of {', '.join(SAMPLERS)}")
+        self.bot = bot
+        self.interval = interval
+        self.sampler_name = sampler
+        self.directory = directory
+        self.logger = logger or logging.getLogger(__name__)
+        self.timer = CallTimer(bot)
+        self.sampler = None
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.started_at is not None
+
+    def start(self):
+        """Start a profiling window, discarding the previous one"""
+        with self._lock:
+            if self.enabled:
+                return
+            if self.sampler is not None:
+                self.sampler.reset()
+            self.sampler = (PySpySampler(self.interval) if self.sampler_name == 'py-spy'
+                            else StackSampler(self.interval))
+            self.timer.reset()
+            self.timer.enable()
+            self.sampler.start()
+            self.started_at = time.perf_counter()
+        self.logger.info(f"Profiling started ({self.sampler_name} sampler, {1 / self.interval:.0f} Hz)")
+
+    def stop(self):
+        """End the profiling window; its data stays available to dump() and report()"""
+        with self._lock:
+            if not self.enabled:
+                return
+            self.sampler.stop()
+            self.timer.disable()
+            self.duration = time.perf_counter() - self.started_at
+            self.started_at = None
+        self.logger.info(f"Profiling stopped after {self.duration:.1f}s")
+
+    def toggle(self) -> bool:
+        """Start or stop; returns whether profiling is now on"""
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+        return self.enabled
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """
+        Write the collapsed stacks of the current or last window
+
+        Args:
+            path: Output file (default: profile_YYYYMMDD_HHMMSS.folded in `directory`)
+
+        Returns:
+            The path written
+        """
+        if self.sampler is None:
+            raise ValueError("Nothing to dump: profiling has not been started")
+        if path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'profile_{datetime.now().strftime("%Y%m%d_%H%M%S")}.folded')
+        stacks = self.sampler.write_collapsed(path)
+        self.logger.info(f"Wrote {stacks} collapsed stacks to {path}")
+        return path
+
+    def report(self) -> Dict:
+        """Window length, sample count and per-method timing"""
+        duration = time.perf_counter() - self.started_at if self.enabled else self.duration
+        return {'enabled': self.enabled, 'duration_s': duration,
+                'samples': self.sampler.samples if self.sampler is not None else 0,
+                'methods': self.timer.stats()}
+
+    def install_signal(self, signum: Optional[int] = None) -> bool:
+        """
+        Toggle profiling on a signal (default SIGUSR2), dumping when it stops
+
+        Only possible from the main thread on POSIX systems.
+
+        Returns:
+            Whether the handler was installed
+        """
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR2', None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+
+        def handle(received, frame):
+            # Leave the signal handler quickly; stopping joins the sampler thread
+            threading.Thread(target=self._toggle_and_dump, name='ProfilerToggle', daemon=True).start()
+
+        signal.signal(signum, handle)
+        return True
+
+    def _toggle_and_dump(self):
+        try:
+            if not self.toggle():
+                self.dump()
+        except Exception as e:
+            self.logger.error(f"Profiler toggle failed: {e}")
@@ -0,0 +1,301 @@
+"""
+Quote Engine
+Keeps a desired ladder of quotes per symbol on the book with the fewest order requests
+"""
+
+import time
+import uuid
+import threading
+from collections import deque
+from decimal import Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Quote(NamedTuple):
+    """One desired resting order"""
+    side: str
+    price: float
+    quantity: float
+
+
+class QuoteDiff(NamedTuple):
+    """Requests that turn the live quotes into the desired ones"""
+    cancels: List[Dict]                 # Live orders to cancel
+    amends: List[Tuple[Dict, Quote]]    # (live order, new quote)
+    creates: List[Quote]                # Quotes to place
+    kept: int                           # Live orders already matching a quote
+
+
+def diff_quotes(desired: List[Quote], live: List[Dict], tolerance: float = 0.0) -> QuoteDiff:
+    """
+    Match desired quotes against live orders, side by side
+
+    Live orders within `tolerance` of a desired price with the desired remaining
+    quantity are kept. The rest are paired by rank from the top of the book
+    (best bid with best unmatched bid, and so on) and amended; leftover live
+    orders are cancelled and leftover quotes created. Amending in rank order
+    moves each order the shortest distance and never needs a cancel plus a
+    new order where one amend will do.
+
+    Args:
+        desired: Quotes that should rest on the book
+        live: Open orders (REST format) owned by the caller
+        tolerance: Price difference treated as equal (e.g. half a tick)
+    """
+    cancels, amends, creates, kept = [], [], [], 0
+    for side in ('BUY', 'SELL'):
+        best_first = side == 'BUY'
+        wanted = sorted((q for q in desired if q.side == side), key=lambda q: q.price, reverse=best_first)
+        resting = sorted((o for o in live if o['side'] == side), key=lambda o: float(o['price']),
+                         reverse=best_first)
+
+        unmatched_orders = []
+        for order in resting:
+            remaining = float(order['origQty']) - float(order.get('executedQty') or 0)
+            match = next((q for q in wanted if abs(q.price - float(order['price'])) <= tolerance
+                          and abs(q.quantity - remaining) <= 1e-12), None)
+            if match is not None:
+                wanted.remove(match)
+                kept += 1
+            else:
+                unmatched_orders.append(order)
+
+        pairs = min(len(unmatched_orders), len(wanted))
+        amends.extend(zip(unmatched_orders[:pairs], wanted[:pairs]))
+        cancels.extend(unmatched_orders[pairs:])
+        creates.extend(wanted[pairs:])
+    return QuoteDiff(cancels, amends, creates, kept)
+
+
+class QuoteEngine:
+    """
+    Quoting on top of the local open-order index
+
+    set_quotes() only records the desired ladder. Updates for a symbol are
+    coalesced for `coalesce_ms` and only the latest ladder is applied, so a
+    burst of price moves costs one sync. A sync diffs the ladder against the
+    engine's own live orders (recognized by client order ID prefix) and sends
+    only the difference: batch cancels, batch amends and batch creates.
+
+    Each symbol has a budget: at most `max_orders` resting quotes, and at most
+    `max_actions` creates and amends per `budget_window` seconds. Cancels are
+    always sent. When the budget runs short, levels nearest the top of the book
+    go first and the rest wait for the next sync.
+    """
+
+    def __init__(self, bot, coalesce_ms: float = 50.0, max_orders: int = 10, max_actions: int = 50,
+                 budget_window: float = 10.0, tolerance_ticks: float = 0.0, time_in_force: str = 'GTX'):
+        """
+        Args:
+            bot: TradingBot used for order requests and its order index
+            coalesce_ms: Window in which ladder updates for a symbol are merged
+            max_orders: Maximum resting quotes per symbol
+            max_actions: Creates and amends allowed per symbol per budget_window
+            budget_window: Seconds over which max_actions applies
+            tolerance_ticks: Price distance, in ticks, within which a live quote is left alone
+            time_in_force: For new quotes; GTX (post-only) never takes liquidity
+        """
+        self.bot = bot
+        self.coalesce = coalesce_ms / 1000.0
+        self.max_orders = max_orders
+        self.max_actions = max_actions
+        self.budget_window = budget_window
+        self.tolerance_ticks = tolerance_ticks
+        self.time_in_force = time_in_force
+        self.prefix = f"qe{uuid.uuid4().hex[:6]}-"
+        self.stats = {'updates': 0, 'syncs': 0, 'kept': 0, 'creates': 0, 'amends': 0,
+                      'cancels': 0, 'deferred': 0, 'errors': 0}
+
+        self._desired: Dict[str, List[Quote]] = {}
+        self._dirty: Dict[str, float] = {}
+        self._actions: Dict[str, Deque[float]] = {}
+        self._next_id = 0
+        self._cond = threading.Condition()
+        self._sync_lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # Desired state
+
+    def set_quotes(self, symbol: str, quotes: List[Quote]):
+        """Replace the desired ladder of a symbol; applied after the coalescing window"""
+        with self._cond:
+            self._desired[symbol] = list(quotes)
+            self._dirty.setdefault(symbol, time.monotonic())
+            self.stats['updates'] += 1
+            self._cond.notify()
+
+    def clear(self, symbol: str):
+        """Pull all quotes of a symbol"""
+        self.set_quotes(symbol, [])
+
+    def live_quotes(self, symbol: str) -> List[Dict]:
+        """
+        This engine's open orders for a symbol
+
+        From the order index only while it is authoritative (user data stream
+        live and seeded); otherwise from an exchange snapshot, so quotes filled
+        or cancelled unseen are re-created instead of amended forever.
+        """
+        return self._own(self.bot.get_open_orders(symbol))
+
+    def _own(self, orders: List[Dict]) -> List[Dict]:
+        return [o for o in orders if str(o.get('clientOrderId', '')).startswith(self.prefix)]
+
+    # Sync
+
+    def sync(self, symbol: str) -> QuoteDiff:
+        """
+        Bring a symbol's live quotes to its desired ladder now
+
+        Returns:
+            The diff that was applied (before budget trimming)
+        """
+        with self._cond:
+            self._dirty.pop(symbol, None)
+            desired = list(self._desired.get(symbol, []))
+        with self._sync_lock:
+            desired = self._normalize(symbol, desired)
+            tolerance = self.tolerance_ticks * float(self._filters(symbol)[0])
+            diff = diff_quotes(desired, self.live_quotes(symbol), tolerance)
+            self._apply(symbol, diff, desired)
+            self.stats['syncs'] += 1
+            self.stats['kept'] += diff.kept
+        return diff
+
+    def _apply(self, symbol: str, diff: QuoteDiff, ranked: List[Quote]):
+        if diff.cancels:
+            self._count(self.bot.cancel_orders(symbol, [o['orderId'] for o in diff.cancels]), 'cancels')
+
+        # Within the budget, levels nearest the top of the book (both sides alternately) go first
+        budget = self._budget(symbol)
+        # The index is current for our own cancels, so this needs no second snapshot
+        room = self.max_orders - (len(self._own(self.bot.order_index.orders(symbol))) - len(diff.amends))
+        amends = sorted(diff.amends, key=lambda pair: ranked.index(pair[1]))[:budget]
+        budget -= len(amends)
+        creates = sorted(diff.creates, key=ranked.index)[:max(0, min(budget, room))]
+        deferred = len(diff.amends) - len(amends) + len(diff.creates) - len(creates)
+        if deferred:
+            self.stats['deferred'] += deferred
+            # Retry the rest once the budget window has moved on
+            with self._cond:
+                self._dirty.setdefault(symbol, time.monotonic() + self.budget_window / 2)
+
+        if amends:
+            self._spend(symbol, len(amends))
+            # A quote the exchange will not amend is cancelled and replaced, still under this engine's prefix
+            results = self.bot.modify_orders([
+                {'symbol': symbol, 'order_id': order['orderId'], 'price': quote.price,
+                 'quantity': quote.quantity + float(order.get('executedQty') or 0),
+                 'client_order_id': self._client_id()}
+                for order, quote in amends
+            ])
+            self._count(results, 'amends')
+        if creates:
+            self._spend(symbol, len(creates))
+            results = self.bot.place_limit_orders([
+                {'symbol': symbol, 'side': q.side, 'quantity': q.quantity, 'price': q.price,
+                 'time_in_force': self.time_in_force, 'client_order_id': self._client_id()}
+                for q in creates
+            ])
+            self._count(results, 'creates')
+
+    def _count(self, results: List[Dict], kind: str):
+        for result in results:
+            self.stats[kind if 'orderId' in result else 'errors'] += 1
+
+    def _client_id(self) -> str:
+        self._next_id += 1
+        return f"{self.prefix}{self._next_id}"
+
+    def _budget(self, symbol: str) -> int:
+        window = self._actions.setdefault(symbol, deque())
+        cutoff = time.monotonic() - self.budget_window
+        while window and window[0] <= cutoff:
+            window.popleft()
+        return max(0, self.max_actions - len(window))
+
+    def _spend(self, symbol: str, count: int):
+        now = time.monotonic()
+        self._actions[symbol].extend([now] * count)
+
+    def _filters(self, symbol: str) -> Tuple[Decimal, Decimal]:
+        """Tick size and step size of a symbol"""
+        info = self.bot.get_symbol_info(symbol)
+        tick = step = Decimal('0')
+        for f in info['filters']:
+            if f['filterType'] == 'PRICE_FILTER':
+                tick = Decimal(f['tickSize'])
+            elif f['filterType'] == 'LOT_SIZE':
+                step = Decimal(f['stepSize'])
+        return tick, step
+
+    def _normalize(self, symbol: str, quotes: List[Quote]) -> List[Quote]:
+        """Round to the tick/step grid (bids down, asks up) and keep the best max_orders levels"""
+        tick, step = self._filters(symbol)
+        normalized = []
+        for q in quotes:
+            price = Decimal(str(q.price))
+            quantity = Decimal(str(q.quantity))
+            if tick:
+                rounding = ROUND_FLOOR if q.side == 'BUY' else ROUND_CEILING
+                price = (price / tick).to_integral_value(rounding) * tick
+            if step:
+                quantity = (quantity / step).to_integral_value(ROUND_DOWN) * step
+            if quantity > 0 and price > 0:
+                normalized.append(Quote(q.side, float(price), float(quantity)))
+        bids = sorted((q for q in normalized if q.side == 'BUY'), key=lambda q: -q.price)
+        asks = sorted((q for q in normalized if q.side == 'SELL'), key=lambda q: q.price)
+        # Interleave so trimming keeps both sides' best levels
+        ranked = [q for pair in zip(bids, asks) for q in pair]
+        ranked += bids[len(asks):] + asks[len(bids):]
+        return ranked[:self.max_orders]
+
+    # Background flushing
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='QuoteEngine', daemon=True)
+        self._thread.start()
+
+    def stop(self, cancel: bool = True):
+        """
+        Stop flushing
+
+        Args:
+            cancel: Pull every quote this engine has on the book
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if cancel:
+            for symbol in list(self._desired):
+                self._desired[symbol] = []
+                try:
+                    self.sync(symbol)
+                except Exception as e:
+                    self.bot.logger.error(f"Failed to pull quotes for {symbol}: {e}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    now = time.monotonic()
+                    due = [s for s, since in self._dirty.items() if since + self.coalesce <= now]
+                    if due:
+                        break
+                    wait = min((since + self.coalesce - now for since in self._dirty.values()), default=1.0)
+                    self._cond.wait(max(wait, 0.001))
+                if not self._running:
+                    return
+            for symbol in due:
+                try:
+                    self.sync(symbol)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    self.bot.logger.warning(f"Quote sync failed for {symbol}: {e}")
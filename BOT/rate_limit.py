@@ -0,0 +1,114 @@
+"""
+Rate Limiting for Binance Futures Requests
+Client-side sliding-window limiter that also follows the exchange's usage headers
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+# Futures order limits per account: (orders, window seconds)
+DEFAULT_ORDER_LIMITS = [(300, 10.0), (1200, 60.0)]
+
+# Request weight limit per IP: (weight, window seconds)
+DEFAULT_WEIGHT_LIMIT = (2400, 60.0)
+
+# BinanceAPIException codes / HTTP statuses that mean "slow down"
+RATE_LIMIT_CODES = {-1003, -1015}
+RATE_LIMIT_STATUSES = {418, 429}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an exception is the exchange asking us to back off"""
+    return (getattr(error, 'code', None) in RATE_LIMIT_CODES
+            or getattr(error, 'status_code', None) in RATE_LIMIT_STATUSES)
+
+
+def retry_after(error: Exception, default: float = 1.0) -> float:
+    """Seconds to wait after a rate limit error, from its Retry-After header if present"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After', default))
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """
+    Blocking limiter for order submission
+
+    Orders are admitted against sliding windows sized to the exchange's order
+    limits, scaled by `headroom`. The exchange reports actual usage in
+    X-MBX-USED-WEIGHT-1M and X-MBX-ORDER-COUNT-* headers; observe() feeds those
+    back so requests made outside this limiter (or by other processes on the
+    same key) are accounted for. After a 429/418 every caller pauses until the
+    Retry-After period has passed.
+    """
+
+    def __init__(self, order_limits: Optional[List[Tuple[int, float]]] = None,
+                 weight_limit: Tuple[int, float] = DEFAULT_WEIGHT_LIMIT, headroom: float = 0.8):
+        """
+        Args:
+            order_limits: (orders, window seconds) pairs (default: futures account limits)
+            weight_limit: (weight, window seconds) per IP (default: 2400 per minute)
+            headroom: Fraction of each limit this limiter may use
+        """
+        self.order_limits = [(max(1, int(count * headroom)), window)
+                             for count, window in (order_limits or DEFAULT_ORDER_LIMITS)]
+        self.weight_limit = int(weight_limit[0] * headroom)
+        self._windows: List[Deque[float]] = [deque() for _ in self.order_limits]
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.used_weight = 0
+        self.waits = 0
+
+    def acquire(self):
+        """Block until one more order may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    wait = self._window_wait(now)
+                if wait <= 0:
+                    for window in self._windows:
+                        window.append(now)
+                    return
+                self.waits += 1
+            time.sleep(wait)
+
+    def _window_wait(self, now: float) -> float:
+        wait = 0.0
+        for (count, period), window in zip(self.order_limits, self._windows):
+            while window and window[0] <= now - period:
+                window.popleft()
+            if len(window) >= count:
+                wait = max(wait, window[0] + period - now)
+        return wait
+
+    def observe(self, headers: Mapping[str, str]):
+        """Update usage from exchange response headers"""
+        lowered = {k.lower(): v for k, v in headers.items()}
+        weight = lowered.get('x-mbx-used-weight-1m')
+        if weight is None:
+            return
+        with self._lock:
+            self.used_weight = int(weight)
+            if self.used_weight >= self.weight_limit:
+                # Wait for the minute bucket to roll over
+                self._paused_until = max(self._paused_until, time.monotonic() + 60 - time.time() % 60)
+
+    def backoff(self, seconds: float):
+        """Pause all callers for `seconds` (e.g. after a 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'used_weight': self.used_weight,
+                'waits': self.waits,
+                'paused_for': max(0.0, self._paused_until - time.monotonic()),
+            }
@@ -0,0 +1,329 @@
+"""
+Exchange Traffic Recording and Replay
+Transport-level recorder for REST and stream traffic, and a deterministic replayer
+"""
+
+import gzip
+import json
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from binance.client import Client
+
+from market_stream import MarketStream
+
+FORMAT_VERSION = 1
+
+# Request parameters that never need to match on replay
+VOLATILE_PARAMS = {'timestamp', 'recvWindow', 'signature'}
+
+# Threads that poll the exchange on a timer. They are not started under replay, so
+# their recorded traffic is tagged and skipped instead of being handed to other callers
+BACKGROUND_THREADS = {'OrderReconciler', 'DeadMansSwitch', 'UniverseScanner', 'FundingMonitor', 'ClockSync'}
+
+# Response headers worth keeping (rate limit usage, retry hints)
+KEPT_HEADER_PREFIXES = ('x-mbx-', 'retry-after', 'content-type')
+
+
+def _request_params(request: requests.PreparedRequest) -> List[Tuple[str, str]]:
+    """Query and form parameters of a request, without the signature"""
+    params = parse_qsl(urlparse(request.url).query)
+    body = request.body
+    if body:
+        if isinstance(body, bytes):
+            body = body.decode()
+        params += parse_qsl(body)
+    return [(k, v) for k, v in params if k != 'signature']
+
+
+class ReplayMismatch(requests.exceptions.RequestException):
+    """A request during replay has no matching recorded response"""
+
+
+class Recorder:
+    """
+    Append-only log of exchange traffic
+
+    Records are gzip-compressed JSON lines with short keys. HTTP records hold the
+    request method, path and parameters (signatures removed, request headers not
+    kept) and the response status, rate limit headers, body and latency; stream
+    records hold the raw message. Every record carries its offset in seconds
+    from the start of the recording.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        """
+        Args:
+            path: Output file (conventionally *.jsonl.gz)
+            flush_interval: Seconds between flushes to disk
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_flush = self._started
+        self.records = 0
+        self._write({'k': 'meta', 'v': FORMAT_VERSION, 'started': time.time()})
+
+    def _offset(self) -> float:
+        return round(time.monotonic() - self._started, 6)
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self.records += 1
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    def record_http(self, request: requests.PreparedRequest, response: requests.Response,
+                    sent_at: float, latency: float):
+        """Record one request/response exchange"""
+        headers = {k: v for k, v in response.headers.items() if k.lower().startswith(KEPT_HEADER_PREFIXES)}
+        record = {
+            'k': 'http',
+            't': round(sent_at - self._started, 6),
+            'm': request.method,
+            'p': urlparse(request.url).path,
+            'q': urlencode(_request_params(request)),
+            's': response.status_code,
+            'h': headers,
+            'r': response.text,
+            'l': round(latency, 6),
+        }
+        if threading.current_thread().name in BACKGROUND_THREADS:
+            record['bg'] = 1
+        self._write(record)
+
+    def record_stream(self, stream: str, message: Dict):
+        """Record one stream message"""
+        self._write({'k': 'ws', 't': self._offset(), 'n': stream, 'd': message})
+
+    def wrap_callback(self, stream: str, callback: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        """Wrap a stream callback so every message is recorded before it is handled"""
+        def recorded(message: Dict):
+            self.record_stream(stream, message)
+            callback(message)
+        return recorded
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTP adapter that forwards requests and records every exchange"""
+
+    def __init__(self, recorder: Recorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        sent_at = time.monotonic()
+        response = super().send(request, **kwargs)
+        self.recorder.record_http(request, response, sent_at, time.monotonic() - sent_at)
+        return response
+
+
+class Replayer:
+    """
+    Recorded traffic loaded for replay
+
+    HTTP responses are matched to requests by method and path, in recorded order,
+    so concurrent callers that interleave differently still get the responses
+    recorded for their endpoint. Traffic of background pollers (BACKGROUND_THREADS)
+    is skipped: the bot does not start them under replay. Stream messages are
+    played back in recorded order.
+    """
+
+    def __init__(self, path: str, speed: float = 0.0, strict: bool = False,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            path: Recording to load
+            speed: Playback speed relative to the recording; 0 replays as fast as possible
+            strict: Raise ReplayMismatch when request parameters differ from the recording
+            logger: Logger for replay events (default: module logger)
+        """
+        self.path = path
+        self.speed = speed
+        self.strict = strict
+        self.logger = logger or logging.getLogger(__name__)
+        self.meta: Dict = {}
+        self._http: Dict[Tuple[str, str], Deque[Dict]] = defaultdict(deque)
+        self.stream_records: List[Dict] = []
+        self._lock = threading.Lock()
+        self.mismatches = 0
+        self.skipped_background = 0
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                kind = record['k']
+                if kind == 'http' and record.get('bg'):
+                    self.skipped_background += 1
+                elif kind == 'http':
+                    self._http[(record['m'], record['p'])].append(record)
+                elif kind == 'ws':
+                    self.stream_records.append(record)
+                elif kind == 'meta':
+                    self.meta = record
+
+    def _delay(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def next_response(self, request: requests.PreparedRequest) -> Dict:
+        """Pop the next recorded exchange for a request's endpoint"""
+        key = (request.method, urlparse(request.url).path)
+        with self._lock:
+            queue = self._http.get(key)
+            if not queue:
+                raise ReplayMismatch(f"No recorded response left for {key[0]} {key[1]}")
+            record = queue.popleft()
+
+        expected = {k: v for k, v in parse_qsl(record['q']) if k not in VOLATILE_PARAMS}
+        actual = {k: v for k, v in _request_params(request) if k not in VOLATILE_PARAMS}
+        if expected != actual:
+            self.mismatches += 1
+            message = f"Replay parameters differ for {key[0]} {key[1]}: recorded {expected}, got {actual}"
+            if self.strict:
+                raise ReplayMismatch(message)
+            self.logger.warning(message)
+
+        self._delay(record['l'])
+        return record
+
+    def remaining(self) -> int:
+        """Recorded HTTP exchanges not yet replayed"""
+        with self._lock:
+            return sum(len(q) for q in self._http.values())
+
+    def play_streams(self, callback: Callable[[str, Dict], None],
+                     stop_event: Optional[threading.Event] = None):
+        """
+        Deliver recorded stream messages in order
+
+        Args:
+            callback: Called with (stream name, message)
+            stop_event: Ends playback early when set
+        """
+        started = time.monotonic()
+        first = self.stream_records[0]['t'] if self.stream_records else 0.0
+        for record in self.stream_records:
+            if stop_event is not None and stop_event.is_set():
+                return
+            if self.speed > 0:
+                due = started + (record['t'] - first) / self.speed
+                wait = due - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            callback(record['n'], record['d'])
+
+
+class ReplayAdapter(BaseAdapter):
+    """HTTP adapter that answers requests from a Replayer without touching the network"""
+
+    def __init__(self, replayer: Replayer):
+        super().__init__()
+        self.replayer = replayer
+
+    def send(self, request, **kwargs):
+        record = self.replayer.next_response(request)
+        response = requests.Response()
+        response.status_code = record['s']
+        response.headers = CaseInsensitiveDict(record['h'])
+        response._content = record['r'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if 200 <= record['s'] < 300 else 'Recorded error'
+        return response
+
+    def close(self):
+        pass
+
+
+class ReplayStream(MarketStream):
+    """MarketStream stand-in that delivers recorded stream messages instead of live ones"""
+
+    def __init__(self, replayer: Replayer, logger: Optional[logging.Logger] = None,
+                 on_end: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            replayer: Recording to play
+            logger: Logger for stream events (default: module logger)
+            on_end: Called once every recorded message has been delivered
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.replayer = replayer
+        self.on_end = on_end
+        self._handlers: Dict[str, List[Callable[[Dict], None]]] = defaultdict(list)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start_raw(self, streams: List[str], callback: Callable[[Dict], None]) -> str:
+        self._handlers['market'].append(callback)
+        return 'market'
+
+    def _subscribe_user(self, handler: Callable[[Dict], None]) -> str:
+        self._handlers['user'].append(handler)
+        return 'user'
+
+    def start(self):
+        """Start playback on a background thread"""
+        self._thread = threading.Thread(target=self._play, name='ReplayStream', daemon=True)
+        self._thread.start()
+
+    def _play(self):
+        def deliver(stream: str, message: Dict):
+            for handler in self._handlers.get(stream, ()):
+                handler(message)
+
+        self.replayer.play_streams(deliver, self._stop_event)
+        self.logger.info(f"Replayed {len(self.replayer.stream_records)} stream messages")
+        if self.on_end and not self._stop_event.is_set():
+            self.on_end()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+
+def create_client(api_key: str, api_secret: str, testnet: bool, adapter: BaseAdapter,
+                  base_class: type = Client) -> Client:
+    """Create a python-binance client whose HTTP session uses the given transport adapter"""
+    def init_session(self):
+        session = base_class._init_session(self)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    client_class = type('TransportClient', (base_class,), {'_init_session': init_session})
+    return client_class(api_key=api_key, api_secret=api_secret, testnet=testnet)
+
+
+def create_recording_client(recorder: Recorder, api_key: str, api_secret: str,
+                            testnet: bool = True, base_class: type = Client) -> Client:
+    """Create a client that records all REST traffic"""
+    return create_client(api_key, api_secret, testnet, RecordingAdapter(recorder), base_class)
+
+
+def create_replay_client(replayer: Replayer, testnet: bool = True, base_class: type = Client) -> Client:
+    """Create a client that answers all REST calls from a recording"""
+    return create_client('replay', 'replay', testnet, ReplayAdapter(replayer), base_class)
@@ -0,0 +1,225 @@
+"""
+Smart Order Router
+Chooses post-only limit, IOC limit or market order from the local book, and records outcomes
+"""
+
+import json
+import math
+import time
+import threading
+from collections import deque
+from decimal import Decimal
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from book import OrderBook, OrderBooks
+
+# Route names as recorded in outcomes
+POST, IOC, MARKET = 'post', 'ioc', 'market'
+
+
+class RouterThresholds(NamedTuple):
+    """Tunable routing thresholds (see SmartOrderRouter)"""
+    passive_below: float = 0.3    # Urgency below which orders rest post-only
+    market_above: float = 0.8     # Urgency from which market orders are allowed
+    max_book_age: float = 2.0     # Seconds after which a book is too stale to route on
+
+
+class RouteDecision(NamedTuple):
+    """How an order is sent"""
+    route: str                    # POST, IOC or MARKET
+    order_type: str               # 'LIMIT' or 'MARKET'
+    time_in_force: str            # 'GTX', 'IOC' or '' (market)
+    price: float                  # Limit price (0 for market)
+    arrival_mid: float
+    spread_bps: float
+    expected_price: float         # Average price expected from the book (the limit price when posting)
+    expected_slippage_bps: float  # Against the arrival mid; negative means better than mid
+    reason: str
+
+
+def slippage_bps(side: str, price: float, mid: float) -> float:
+    """Cost of trading at `price` instead of `mid`, in basis points (positive is worse)"""
+    if not mid or not price:
+        return 0.0
+    return (price - mid) / mid * 1e4 if side == 'BUY' else (mid - price) / mid * 1e4
+
+
+class SmartOrderRouter:
+    """
+    Picks order type and price from the in-memory book
+
+    For an order of a given urgency (0 = patient, 1 = now) and slippage cap
+    (in basis points from the arrival mid):
+
+    - Below `passive_below` it rests post-only (GTX) at the best price on its
+      own side and never pays the spread.
+    - From `market_above`, if the visible book fills the whole quantity within
+      the cap, it sends a market order.
+    - Otherwise it sends an IOC limit order. The limit is the level deep enough
+      to fill the quantity, but never beyond the cap price, so at worst it fills
+      partly and never slips past the cap. When nothing can be taken within the
+      cap, it rests post-only instead.
+
+    decide() reads only the local book and a cached tick size and makes no
+    requests. route() sends the order and records the outcome, including
+    realized slippage and decision time. Outcomes are kept in memory and
+    optionally appended to a JSONL file, so thresholds can be tuned offline.
+    """
+
+    def __init__(self, bot, books: OrderBooks, thresholds: Optional[RouterThresholds] = None,
+                 history: int = 10000, outcome_file: Optional[str] = None):
+        """
+        Args:
+            bot: TradingBot that sends the orders
+            books: Local order books
+            thresholds: Routing thresholds (default: RouterThresholds())
+            history: Outcomes kept in memory
+            outcome_file: JSONL file every outcome is appended to (default: none)
+        """
+        self.bot = bot
+        self.books = books
+        self.thresholds = thresholds or RouterThresholds()
+        self.outcome_file = outcome_file
+        self.outcomes: Deque[Dict] = deque(maxlen=history)
+        self._ticks: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def tick_size(self, symbol: str) -> Tuple[float, int]:
+        """Tick size of a symbol and its number of decimals (cached)"""
+        tick = self._ticks.get(symbol)
+        if tick is None:
+            info = self.bot.get_symbol_info(symbol)
+            size = next(f['tickSize'] for f in info['filters'] if f['filterType'] == 'PRICE_FILTER')
+            tick = (float(size), max(0, -Decimal(size).normalize().as_tuple().exponent))
+            self._ticks[symbol] = tick
+        return tick
+
+    def decide(self, symbol: str, side: str, quantity: float, urgency: float = 0.5,
+               max_slippage_bps: float = 10.0, book: Optional[OrderBook] = None) -> RouteDecision:
+        """
+        Choose how to send an order (no requests; microseconds)
+
+        Args:
+            symbol: Trading pair symbol
+            side: 'BUY' or 'SELL'
+            quantity: Order quantity
+            urgency: 0 (patient) to 1 (immediate)
+            max_slippage_bps: Worst acceptable average price, in basis points from the mid
+            book: Book to use (default: the local book of the symbol)
+
+        Raises:
+            ValueError: If there is no fresh two-sided book for the symbol
+        """
+        side = side.upper()
+        book = book or self.books.get(symbol)
+        # One snapshot for the whole decision: sides and age from the same update
+        state = book.snapshot() if book is not None else None
+        if state is None or not state.bids or not state.asks:
+            raise ValueError(f"No local order book for {symbol}; subscribe to its depth stream first")
+        age = state.age()
+        if age > self.thresholds.max_book_age:
+            raise ValueError(f"Order book for {symbol} is {age:.1f}s old")
+
+        buy = side == 'BUY'
+        tick, decimals = self.tick_size(symbol)
+        bid, ask = state.bids[0][0], state.asks[0][0]
+        mid = (bid + ask) / 2
+        spread_bps = (ask - bid) / mid * 1e4
+        own_best = bid if buy else ask
+
+        def post(reason: str) -> RouteDecision:
+            return RouteDecision(POST, 'LIMIT', 'GTX', own_best, mid, spread_bps, own_best,
+                                 slippage_bps(side, own_best, mid), reason)
+
+        if urgency < self.thresholds.passive_below:
+            return post('patient')
+
+        # Cap price rounded to the tick, towards the passive side
+        cap = mid * (1 + max_slippage_bps / 1e4) if buy else mid * (1 - max_slippage_bps / 1e4)
+        cap = round(math.floor(cap / tick + 1e-9) * tick if buy else math.ceil(cap / tick - 1e-9) * tick,
+                    decimals)
+        sweep = state.sweep(side, quantity, cap)
+        if sweep.filled <= 0:
+            return post('nothing to take within the slippage cap')
+
+        expected = slippage_bps(side, sweep.average_price, mid)
+        if urgency >= self.thresholds.market_above and sweep.filled >= quantity:
+            return RouteDecision(MARKET, 'MARKET', '', 0.0, mid, spread_bps, sweep.average_price,
+                                 expected, 'urgent and the book absorbs it within the cap')
+        # Full fill within the cap needs only the worst level swept; a partial one may use the whole cap
+        price = sweep.worst_price if sweep.filled >= quantity else cap
+        reason = 'fills within the cap' if sweep.filled >= quantity else 'partial fill up to the cap'
+        return RouteDecision(IOC, 'LIMIT', 'IOC', price, mid, spread_bps,
+                             sweep.average_price, expected, reason)
+
+    def route(self, symbol: str, side: str, quantity: float, urgency: float = 0.5,
+              max_slippage_bps: float = 10.0) -> Dict:
+        """
+        Decide, send the order and record the outcome
+
+        Returns:
+            The order response, with the RouteDecision under 'route'
+        """
+        started = time.perf_counter()
+        decision = self.decide(symbol, side, quantity, urgency, max_slippage_bps)
+        decided = time.perf_counter()
+
+        order, error = None, ''
+        try:
+            if decision.order_type == 'MARKET':
+                order = self.bot.place_market_order(symbol, side, quantity)
+            else:
+                order = self.bot.place_limit_order(symbol, side, quantity, decision.price,
+                                                   time_in_force=decision.time_in_force)
+            return {**order, 'route': decision._asdict()}
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._record(symbol, side.upper(), quantity, urgency, max_slippage_bps, decision, order, error,
+                         (decided - started) * 1e6, (time.perf_counter() - decided) * 1000)
+
+    def _record(self, symbol: str, side: str, quantity: float, urgency: float, max_slippage_bps: float,
+                decision: RouteDecision, order: Optional[Dict], error: str,
+                decision_us: float, latency_ms: float):
+        executed = float(order.get('executedQty') or 0) if order else 0.0
+        average = float(order.get('avgPrice') or 0) if order else 0.0
+        outcome = {
+            'time': int(time.time() * 1000), 'symbol': symbol, 'side': side, 'quantity': quantity,
+            'urgency': urgency, 'max_slippage_bps': max_slippage_bps, **decision._asdict(),
+            'order_id': order.get('orderId') if order else None,
+            'status': order.get('status', '') if order else 'ERROR',
+            'executed_qty': executed, 'avg_price': average,
+            'realized_slippage_bps': slippage_bps(side, average, decision.arrival_mid) if executed else None,
+            'decision_us': round(decision_us, 2), 'latency_ms': round(latency_ms, 3), 'error': error,
+        }
+        with self._lock:
+            self.outcomes.append(outcome)
+            if self.outcome_file:
+                try:
+                    with open(self.outcome_file, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(outcome) + '\n')
+                except OSError as e:
+                    self.bot.logger.warning(f"Failed to append routing outcome to {self.outcome_file}: {e}")
+
+    def stats(self) -> List[Dict]:
+        """Per route: orders, fill ratio, mean expected and realized slippage, mean decision time"""
+        with self._lock:
+            outcomes = list(self.outcomes)
+        rows = []
+        for route in (POST, IOC, MARKET):
+            mine = [o for o in outcomes if o['route'] == route]
+            if not mine:
+                continue
+            filled = [o for o in mine if o['realized_slippage_bps'] is not None]
+            rows.append({
+                'route': route,
+                'orders': len(mine),
+                'fill_ratio': sum(o['executed_qty'] for o in mine) / sum(o['quantity'] for o in mine),
+                'expected_slippage_bps': sum(o['expected_slippage_bps'] for o in mine) / len(mine),
+                'realized_slippage_bps': (sum(o['realized_slippage_bps'] for o in filled) / len(filled)
+                                          if filled else None),
+                'decision_us': sum(o['decision_us'] for o in mine) / len(mine),
+                'errors': sum(1 for o in mine if o['error']),
+            })
+        return rows
@@ -0,0 +1,316 @@
+"""
+Settings for the Trading Bot
+Typed, validated configuration from a file and environment variables, with hot reload
+"""
+
+import os
+import json
+import runpy
+import logging
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+# Environment variables are the upper-case field names with this prefix
+ENV_PREFIX = 'TRADING_BOT_'
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Old setting names still read from files and the environment, so a limit is never dropped silently
+RENAMED = {'max_position_size': 'max_order_quantity'}
+
+
+class SettingsError(ValueError):
+    """Settings failed to load or validate"""
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Bot configuration
+
+    Field metadata drives validation: 'min'/'max' bound numbers, 'choices' limits
+    strings, and 'restart' marks fields that only take effect on restart (they
+    need a new client or connection). Everything else is applied live on reload.
+    """
+    # Credentials and connection
+    api_key: str = field(default='', metadata={'restart': True, 'secret': True})
+    api_secret: str = field(default='', metadata={'restart': True, 'secret': True})
+    testnet: bool = field(default=True, metadata={'restart': True})
+
+    # Logging
+    log_level: str = field(default='INFO', metadata={'choices': LOG_LEVELS})
+    log_to_file: bool = True
+    log_to_console: bool = True
+    log_max_bytes: int = field(default=10_000_000, metadata={'min': 0})  # Rotate a run log at this size (0: never)
+    log_backups: int = field(default=3, metadata={'min': 0})             # Rotated files kept per run
+    log_retention: int = field(default=30, metadata={'min': 0})          # Run logs kept in logs/ (0: all)
+
+    # Trading defaults
+    symbols: Tuple[str, ...] = ('BTCUSDT',)
+    default_symbol: str = 'BTCUSDT'
+    default_quantity: float = field(default=0.001, metadata={'min': 0})
+    default_leverage: int = field(default=1, metadata={'min': 1, 'max': 125})
+    margin_type: str = field(default='', metadata={'choices': ('', 'CROSSED', 'ISOLATED')})  # '' keeps it
+    apply_leverage: bool = False  # Set default_leverage/margin_type on symbols at startup
+
+    # Risk limits (0 disables a limit)
+    max_order_quantity: float = field(default=0.0, metadata={'min': 0})   # Per order, in the base asset
+    max_order_notional: float = field(default=0.0, metadata={'min': 0})
+    stop_loss_percentage: float = field(default=0.02, metadata={'min': 0, 'max': 1})
+    take_profit_percentage: float = field(default=0.05, metadata={'min': 0})
+
+    # Exchange-side auto-cancel of open orders if the bot stops refreshing it (0 disables)
+    cancel_countdown: float = field(default=0.0, metadata={'min': 0})
+
+    # Universe scanner
+    universe_size: int = field(default=20, metadata={'min': 1, 'max': 200})
+    min_quote_volume: float = field(default=50_000_000.0, metadata={'min': 0})
+    max_funding_rate: float = field(default=0.001, metadata={'min': 0})
+    min_open_interest: float = field(default=0.0, metadata={'min': 0})
+    universe_refresh: float = field(default=900.0, metadata={'min': 10})
+
+    # Caches and background work
+    exchange_info_ttl: float = field(default=300.0, metadata={'min': 0})
+    symbol_cache_size: int = field(default=2000, metadata={'min': 0})   # Symbols cached (0: unbounded)
+    reconcile_interval: float = field(default=10.0, metadata={'min': 0.1})
+
+    # Order event log ('' disables; needs pyarrow)
+    order_events: str = field(default='', metadata={'choices': ('', 'PARQUET', 'ARROW'), 'restart': True})
+    order_events_dir: str = field(default='order_events', metadata={'restart': True})
+    order_events_roll_rows: int = field(default=1_000_000, metadata={'min': 1})      # Rows per file
+    order_events_roll_seconds: float = field(default=300.0, metadata={'min': 1})    # Seconds per file
+
+    def validate(self) -> 'Settings':
+        """
+        Check every field against its type and metadata
+
+        Raises:
+            SettingsError: Listing every invalid field
+        """
+        errors = []
+        for f in fields(self):
+            value = getattr(self, f.name)
+            expected = _field_type(f)
+            if expected is float:
+                type_ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+            elif expected is int:
+                type_ok = isinstance(value, int) and not isinstance(value, bool)
+            elif expected is tuple:
+                type_ok = isinstance(value, tuple) and all(isinstance(v, str) for v in value)
+            else:
+                type_ok = isinstance(value, expected)
+            if not type_ok:
+                errors.append(f"{f.name}: expected {expected.__name__}, got {value!r}")
+                continue
+            if 'min' in f.metadata and value < f.metadata['min']:
+                errors.append(f"{f.name}: must be >= {f.metadata['min']}")
+            if 'max' in f.metadata and value > f.metadata['max']:
+                errors.append(f"{f.name}: must be <= {f.metadata['max']}")
+            if 'choices' in f.metadata and value not in f.metadata['choices']:
+                choices = ', '.join(c or "''" for c in f.metadata['choices'])
+                errors.append(f"{f.name}: must be one of {choices}")
+        if 0 < self.cancel_countdown < 10:
+            errors.append("cancel_countdown: must be 0 (disabled) or at least 10 seconds")
+        if self.default_symbol not in self.symbols:
+            errors.append("default_symbol: must be listed in symbols")
+        if errors:
+            raise SettingsError("Invalid settings: " + '; '.join(errors))
+        return self
+
+    def changes(self, other: 'Settings') -> Dict[str, Tuple]:
+        """Fields whose values differ in `other`, as {name: (old, new)}"""
+        return {f.name: (getattr(self, f.name), getattr(other, f.name))
+                for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)}
+
+    @staticmethod
+    def restart_fields() -> List[str]:
+        return [f.name for f in fields(Settings) if f.metadata.get('restart')]
+
+    def redacted(self) -> Dict:
+        """Field values with secrets masked, for display and logs"""
+        return {f.name: ('***' if f.metadata.get('secret') and getattr(self, f.name) else getattr(self, f.name))
+                for f in fields(self)}
+
+
+def _field_type(f) -> type:
+    annotation = f.type if isinstance(f.type, type) else str(f.type)
+    if annotation in (str, 'str'):
+        return str
+    if annotation in (bool, 'bool'):
+        return bool
+    if annotation in (int, 'int'):
+        return int
+    if annotation in (float, 'float'):
+        return float
+    return tuple
+
+
+def _coerce(f, value):
+    """Convert a raw file or environment value to the field's type"""
+    expected = _field_type(f)
+    if isinstance(value, str):
+        text = value.strip()
+        if expected is bool:
+            if text.lower() in ('1', 'true', 'yes', 'on'):
+                return True
+            if text.lower() in ('0', 'false', 'no', 'off'):
+                return False
+            return value
+        if expected is tuple:
+            return tuple(s.strip().upper() for s in text.split(',') if s.strip())
+        if 'choices' in f.metadata:
+            return text.upper()
+        try:
+            if expected is int:
+                return int(text)
+            if expected is float:
+                return float(text)
+        except ValueError:
+            return value
+        return value
+    if expected is tuple and isinstance(value, list):
+        return tuple(value)
+    if expected is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def read_file(path: str) -> Dict:
+    """
+    Read raw settings from a JSON file or a Python module of constants
+
+    Python files use the config_example.py style (API_KEY = "...", LOG_LEVEL = "INFO");
+    JSON files use the lower-case field names.
+    """
+    try:
+        if path.endswith('.py'):
+            namespace = runpy.run_path(path)
+            return {k.lower(): v for k, v in namespace.items() if k.isupper()}
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        raise SettingsError(f"Cannot read settings from {path}: {e}")
+    if not isinstance(data, dict):
+        raise SettingsError(f"Settings file {path} must contain an object")
+    return {k.lower(): v for k, v in data.items()}
+
+
+def load_settings(path: Optional[str] = None, environ: Optional[Mapping[str, str]] = None,
+                  overrides: Optional[Dict] = None) -> Settings:
+    """
+    Build validated settings: defaults, then the file, then environment, then overrides
+
+    Args:
+        path: JSON or Python settings file (optional)
+        environ: Environment to read TRADING_BOT_* variables from (default: os.environ)
+        overrides: Final values, e.g. from CLI arguments; None values are ignored
+
+    Raises:
+        SettingsError: If the file cannot be read, a key is unknown or a value is invalid
+    """
+    known = {f.name: f for f in fields(Settings)}
+    raw: Dict = {}
+    if path:
+        data = _rename(read_file(path), path)
+        unknown = sorted(set(data) - set(known))
+        if unknown and not path.endswith('.py'):
+            raise SettingsError(f"Unknown settings in {path}: {', '.join(unknown)}")
+        raw.update({k: v for k, v in data.items() if k in known})
+
+    environ = os.environ if environ is None else environ
+    for old, new in RENAMED.items():
+        value = environ.get(ENV_PREFIX + old.upper())
+        if value is not None:
+            raw.update(_rename({old: value}, 'the environment'))
+    for name in known:
+        value = environ.get(ENV_PREFIX + name.upper())
+        if value is not None:
+            raw[name] = value
+
+    raw.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    values = {name: _coerce(known[name], value) for name, value in raw.items()}
+    return Settings(**values).validate()
+
+
+def _rename(data: Dict, source: str) -> Dict:
+    """Map old setting names to their current ones"""
+    for old, new in RENAMED.items():
+        if old in data:
+            logging.getLogger(__name__).warning(f"Setting {old} in {source} is now {new}; please rename it")
+            data.setdefault(new, data.pop(old))
+    return data
+
+
+class SettingsWatcher:
+    """
+    Polls a settings file and reloads it when its modification time changes
+
+    An invalid file is logged and ignored, so the running settings stay in force
+    until the file is fixed. Valid changes are passed to `on_change(old, new)`.
+    """
+
+    def __init__(self, path: str, current: Settings, on_change: Callable[[Settings, Settings], None],
+                 interval: float = 1.0, overrides: Optional[Dict] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            path: Settings file to watch
+            current: Settings currently in force
+            on_change: Called with (old, new) after a valid change
+            interval: Seconds between checks
+            overrides: Values that always win over the file (e.g. CLI arguments)
+            logger: Logger for reload events (default: module logger)
+        """
+        self.path = path
+        self.current = current
+        self.on_change = on_change
+        self.interval = interval
+        self.overrides = overrides
+        self.logger = logger or logging.getLogger(__name__)
+        self._mtime = self._stat()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload if the file changed; returns True if new settings were applied"""
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            new = load_settings(self.path, overrides=self.overrides)
+        except SettingsError as e:
+            self.logger.error(f"Settings reload rejected, keeping current settings: {e}")
+            return False
+        if new == self.current:
+            return False
+        old, self.current = self.current, new
+        self.on_change(old, new)
+        return True
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='SettingsWatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.warning(f"Settings reload failed: {e}")
@@ -0,0 +1,487 @@
+"""
+Sharded Strategy Runtime
+Runs strategies in worker processes, one shard of symbols each, behind a single order gateway
+"""
+
+import os
+import json
+import time
+import base64
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from market_stream import Bar, Tick
+from rate_limit import RateLimiter, is_rate_limit_error, retry_after
+from shm_ring import TICK_EVENT, EventReader, EventRing, RingReader, ShmRing
+from strategy import LIVENESS_MAX_STALL, StrategyRuntime, load_strategy
+
+# Record types on the gateway's broadcast ring and the workers' request rings
+BAR, ORDER_UPDATE, RESULT, RESULT_PART, STOP = 'b', 'o', 'r', 'rp', 'x'
+REQUEST, REQUEST_PART, READY, HEARTBEAT = 'q', 'qp', 'ready', 'h'
+
+# TradingBot methods that send orders and count against the order rate limit
+ORDER_METHODS = {
+    'place_market_order', 'place_limit_order', 'place_stop_limit_order', 'place_oco_order',
+    'place_limit_orders', 'smart_order', 'modify_order', 'modify_orders', 'cancel_order', 'cancel_orders',
+}
+
+# Seconds a worker waits for the gateway to answer a request
+GATEWAY_TIMEOUT = 30.0
+
+# Room left in a slot for the fields of a RESULT_PART or REQUEST_PART record around its chunk
+PART_OVERHEAD = 64
+
+
+def encode(record: list) -> bytes:
+    return json.dumps(record, separators=(',', ':'), default=str).encode()
+
+
+def split_record(payload: bytes, header: list, max_payload: int) -> List[list]:
+    """
+    Part records carrying an encoded record that does not fit one slot
+
+    Each part is `header` followed by its index, the number of parts and a
+    base64 chunk of the payload; a Reassembler rebuilds the original record
+    once it has every part.
+    """
+    size = (max_payload - PART_OVERHEAD) // 4 * 3
+    if size <= 0:
+        raise ValueError(f"Slot payload of {max_payload} bytes is too small to split records")
+    chunks = [payload[i:i + size] for i in range(0, len(payload), size)]
+    return [[*header, index, len(chunks), base64.b64encode(chunk).decode()] for index, chunk in enumerate(chunks)]
+
+
+class Reassembler:
+    """Collects the parts of split records until each is complete"""
+
+    def __init__(self):
+        self._parts: Dict[tuple, Dict[int, bytes]] = {}
+
+    def add(self, key: tuple, index: int, count: int, chunk: str) -> Optional[list]:
+        """Store one part; returns the original record once all `count` parts are in"""
+        parts = self._parts.setdefault(key, {})
+        parts[index] = base64.b64decode(chunk)
+        if len(parts) < count:
+            return None
+        del self._parts[key]
+        return json.loads(b''.join(parts[i] for i in range(count)))
+
+    def discard(self, key: tuple):
+        self._parts.pop(key, None)
+
+
+def partition_symbols(symbols: List[str], workers: int) -> List[List[str]]:
+    """Split symbols round-robin into at most `workers` non-empty shards"""
+    symbols = sorted(set(symbols))
+    count = max(1, min(workers, len(symbols)))
+    return [symbols[i::count] for i in range(count)]
+
+
+def _idle(polls: int):
+    """Back off from spinning to short sleeps while a ring stays empty"""
+    if polls > 1000:
+        time.sleep(0.001)
+    elif polls > 100:
+        time.sleep(0)
+
+
+class GatewayError(Exception):
+    """An order request that failed in the gateway process"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class GatewayClient:
+    """
+    Stand-in for TradingBot inside a worker process
+
+    Any public TradingBot method called on it is sent to the gateway as a
+    request record and blocks until the gateway's result comes back on the
+    broadcast ring.
+    """
+
+    def __init__(self, worker: int, requests: ShmRing, logger: logging.Logger,
+                 timeout: float = GATEWAY_TIMEOUT):
+        self.worker = worker
+        self.logger = logger
+        self.timeout = timeout
+        self._requests = requests
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}
+        self._results = Reassembler()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, method: str):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self.call(method, *args, **kwargs)
+
+    def send(self, record: list):
+        # Strategy.submit() calls come from several threads; the ring takes one producer
+        payload = encode(record)
+        with self._lock:
+            if len(payload) <= self._requests.max_payload or record[0] != REQUEST:
+                self._requests.publish(payload)
+                return
+            for part in split_record(payload, [REQUEST_PART, record[1]], self._requests.max_payload):
+                self._requests.publish(encode(part))
+
+    def call(self, method: str, *args, **kwargs):
+        request_id = next(self._ids)
+        waiter = [threading.Event(), None, None, None]
+        self._pending[request_id] = waiter
+        try:
+            self.send([REQUEST, request_id, method, args, kwargs])
+            if not waiter[0].wait(self.timeout):
+                raise GatewayError(f"No answer from the order gateway for {method} within {self.timeout:.0f}s")
+        finally:
+            self._pending.pop(request_id, None)
+            self._results.discard((request_id,))
+        _, result, error, code = waiter
+        if error is not None:
+            raise GatewayError(error, code)
+        return result
+
+    def on_record(self, record: list) -> bool:
+        """Handle a RESULT or RESULT_PART record from the broadcast ring; False if it is not for this worker"""
+        if record[1] != self.worker:
+            return False
+        if record[0] == RESULT:
+            self.resolve(*record[2:])
+        elif record[0] == RESULT_PART:
+            self._add_part(*record[2:])
+        return True
+
+    def resolve(self, request_id: int, result, error: Optional[str], code: Optional[int]):
+        waiter = self._pending.get(request_id)
+        if waiter is not None:
+            waiter[1:] = [result, error, code]
+            waiter[0].set()
+
+    def _add_part(self, request_id: int, index: int, count: int, chunk: str):
+        if request_id not in self._pending:
+            return  # Timed out already
+        record = self._results.add((request_id,), index, count, chunk)
+        if record is not None:
+            self.resolve(*record[2:])
+
+
+def _push_ticks(runtime: StrategyRuntime, events, shard) -> int:
+    """Hand the shard's ticks in a view of EventRing records to the runtime"""
+    mine = events[(events['kind'] == TICK_EVENT) & np.isin(events['symbol'], shard)]
+    for symbol, price, qty, ts in zip(mine['symbol'].tolist(), mine['price'].tolist(),
+                                      mine['qty'].tolist(), mine['ts'].tolist()):
+        runtime.push_tick(Tick(symbol.decode(), price, qty, ts))
+    return len(events)
+
+
+def _worker_main(worker: int, specs: List[str], symbols: List[str], ticks_name: str, events_name: str,
+                 requests_name: str, log_level: str):
+    """Entry point of a worker process: one StrategyRuntime for one shard of symbols"""
+    logging.basicConfig(level=log_level, format=f'%(asctime)s - shard{worker} - %(levelname)s - %(message)s')
+    logger = logging.getLogger(f"TradingBot.shard{worker}")
+    ticks = EventRing.attach(ticks_name)
+    events = ShmRing.attach(events_name)
+    requests = ShmRing.attach(requests_name)
+    tick_reader = EventReader(ticks)
+    reader = RingReader(events)
+    gateway = GatewayClient(worker, requests, logger)
+    runtime = StrategyRuntime(gateway, logger=logger)
+    for spec in specs:
+        runtime.add_strategy(load_strategy(spec, symbols))
+    runtime.start()
+    gateway.send([READY, os.getpid()])
+
+    shard = set(symbols)
+    shard_bytes = np.array([s.encode() for s in symbols], dtype='S16')
+    polls = 0
+    next_heartbeat = 0.0
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= next_heartbeat:
+                gateway.send([HEARTBEAT, runtime.is_alive(LIVENESS_MAX_STALL)])
+                next_heartbeat = now + 1.0
+            read = _push_ticks(runtime, tick_reader.read(), shard_bytes)
+            records = reader.poll()
+            if not records and not read:
+                polls += 1
+                _idle(polls)
+                continue
+            polls = 0
+            for payload in records:
+                record = json.loads(payload)
+                kind = record[0]
+                if kind == BAR:
+                    if record[1] in shard:
+                        runtime.push_bar(Bar(*record[1:]))
+                elif kind == ORDER_UPDATE:
+                    if record[1].get('s') in shard:
+                        runtime.push_order_update(record[1])
+                elif kind in (RESULT, RESULT_PART):
+                    gateway.on_record(record)
+                elif kind == STOP:
+                    while _push_ticks(runtime, tick_reader.read(), shard_bytes):
+                        pass
+                    deadline = time.monotonic() + 30
+                    while runtime.pending() and time.monotonic() < deadline:
+                        time.sleep(0.01)
+                    return
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if reader.lost or tick_reader.lost:
+            logger.warning(f"Fell behind the gateway and lost {reader.lost} records "
+                           f"and {tick_reader.lost} ticks")
+        runtime.stop()
+        del tick_reader
+        ticks.close()
+        events.close()
+        requests.close()
+
+
+class ShardedRuntime:
+    """
+    Strategies spread over worker processes, one shard of symbols per process
+
+    This process is the order gateway. It owns the API key, the market and
+    user data streams, the order index and one rate limiter for every order
+    of every shard. Ticks are published once as fixed-width records to an
+    EventRing, and bars and order updates to a ShmRing. All workers read
+    both, and each keeps only its own symbols. Workers send order requests through their own request ring and
+    receive results on the broadcast ring, so nothing is pickled between
+    processes and no two workers compete for the rate limit. A request or
+    result larger than a slot (a batch placement, a list of open orders) is
+    split into part records and reassembled on the other side.
+
+    Each worker runs a StrategyRuntime with a GatewayClient in place of the
+    bot, so strategies are written exactly as for a single process.
+    """
+
+    def __init__(self, bot, specs: List[str], symbols: List[str], workers: Optional[int] = None,
+                 interval: str = '1m', ring_slots: int = 65536, slot_size: int = 1024,
+                 gateway_threads: int = 8, rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            bot: TradingBot that sends every order
+            specs: Strategy classes as 'module:ClassName', run in every worker
+            symbols: Symbols to stream, split across the workers
+            workers: Worker processes (default: CPU count)
+            interval: Bar interval
+            ring_slots: Records held by each ring
+            slot_size: Bytes per ring slot; larger requests and results are sent in several parts
+            gateway_threads: Order requests executed concurrently by the gateway
+            rate_limiter: Order limiter shared by all workers (default: futures order limits)
+        """
+        self.bot = bot
+        self.specs = specs
+        self.interval = interval
+        self.shards = partition_symbols(symbols, workers or os.cpu_count() or 1)
+        self.ring_slots = ring_slots
+        self.slot_size = slot_size
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.logger = bot.logger
+        self.stats = {'requests': 0, 'errors': 0, 'published': 0}
+
+        self._executor = ThreadPoolExecutor(max_workers=gateway_threads, thread_name_prefix='Gateway')
+        self._publish_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._ticks: Optional[EventRing] = None
+        self._tick_lock = threading.Lock()
+        self._events: Optional[ShmRing] = None
+        self._requests: List[ShmRing] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._heartbeats: Dict[int, tuple] = {}
+        self._request_parts = Reassembler()
+
+    def publish(self, record: list):
+        """Broadcast a record to every worker (thread-safe)"""
+        with self._publish_lock:
+            self._events.publish(encode(record))
+            self.stats['published'] += 1
+
+    def publish_tick(self, tick: Tick):
+        """Broadcast a trade to every worker (thread-safe)"""
+        with self._tick_lock:
+            self._ticks.publish_event(TICK_EVENT, tick.symbol, tick.price, tick.quantity, tick.timestamp)
+            self.stats['published'] += 1
+
+    def is_alive(self, max_stall: float = LIVENESS_MAX_STALL) -> bool:
+        """Whether every worker process runs and its event loop reported in recently"""
+        now = time.monotonic()
+        for worker, process in enumerate(self._processes):
+            received, alive = self._heartbeats.get(worker, (0.0, False))
+            if not process.is_alive() or not alive or now - received > max_stall:
+                return False
+        return True
+
+    def run(self):
+        """Start the workers and serve their orders until interrupted or the stream ends"""
+        self._ticks = EventRing(capacity=self.ring_slots)
+        self._events = ShmRing(slots=self.ring_slots, slot_size=self.slot_size)
+        context = multiprocessing.get_context('spawn')
+        stream = None
+        try:
+            for worker, symbols in enumerate(self.shards):
+                requests = ShmRing(slots=4096, slot_size=self.slot_size)
+                self._requests.append(requests)
+                process = context.Process(
+                    target=_worker_main, name=f"Shard{worker}", daemon=True,
+                    args=(worker, self.specs, symbols, self._ticks.name, self._events.name, requests.name,
+                          logging.getLevelName(self.logger.getEffectiveLevel()))
+                )
+                process.start()
+                self._processes.append(process)
+            readers = [RingReader(r, from_start=True) for r in self._requests]
+            self._wait_ready(readers)
+            self.logger.info(f"Sharded runtime: {len(self.shards)} workers, "
+                             f"{sum(len(s) for s in self.shards)} symbols")
+
+            stream = self.bot.create_market_stream(on_end=self._stop_event.set)
+            stream.start_market(
+                [s for shard in self.shards for s in shard],
+                on_tick=self.publish_tick,
+                on_bar=lambda bar: self.publish([BAR, *bar]),
+                interval=self.interval
+            )
+            # Local books for smart_order() requests, which are routed here in the gateway
+            stream.start_depth([s for shard in self.shards for s in shard], self.bot.books.on_depth)
+            stream.start_user(on_order_update=self._on_order_update,
+                              on_status=self.bot.order_index.set_stream_live)
+            stream.start()
+            self.bot.order_reconciler.start()
+            self.bot.start_dead_man_switch(self.is_alive)
+            self._serve(readers)
+        finally:
+            if self.bot.dead_man_switch:
+                self.bot.dead_man_switch.stop()
+            self.bot.order_reconciler.stop()
+            self.bot.order_index.set_stream_live(False)
+            if stream:
+                stream.stop()
+            self._shutdown()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _on_order_update(self, update: Dict):
+        self.bot.order_index.on_stream_update(update)
+        self.publish([ORDER_UPDATE, update])
+
+    def _wait_ready(self, readers: List[RingReader], timeout: float = 60.0):
+        waiting = set(range(len(readers)))
+        deadline = time.monotonic() + timeout
+        while waiting:
+            for worker in list(waiting):
+                for payload in readers[worker].poll():
+                    record = json.loads(payload)
+                    if record[0] == READY:
+                        waiting.discard(worker)
+                        self._heartbeats[worker] = (time.monotonic(), True)
+                if not self._processes[worker].is_alive():
+                    raise RuntimeError(f"Worker {worker} exited during startup "
+                                       f"(exit code {self._processes[worker].exitcode})")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Workers {sorted(waiting)} did not start within {timeout:.0f}s")
+            time.sleep(0.01)
+
+    def _serve(self, readers: List[RingReader]):
+        polls = 0
+        try:
+            while not self._stop_event.is_set():
+                busy = False
+                for worker, reader in enumerate(readers):
+                    for payload in reader.poll():
+                        busy = True
+                        self._on_request(worker, json.loads(payload))
+                if not any(p.is_alive() for p in self._processes):
+                    self.logger.error("All workers exited")
+                    return
+                polls = 0 if busy else polls + 1
+                _idle(polls)
+
+            # Let workers drain their queues; keep answering their orders meanwhile
+            self.publish([STOP])
+            deadline = time.monotonic() + 35
+            while any(p.is_alive() for p in self._processes) and time.monotonic() < deadline:
+                for worker, reader in enumerate(readers):
+                    for payload in reader.poll():
+                        self._on_request(worker, json.loads(payload))
+                time.sleep(0.001)
+        except KeyboardInterrupt:
+            self.logger.info("Interrupted; stopping workers")
+            self.publish([STOP])
+
+    def _on_request(self, worker: int, record: list):
+        kind = record[0]
+        if kind == HEARTBEAT:
+            self._heartbeats[worker] = (time.monotonic(), record[1])
+        elif kind == REQUEST:
+            self.stats['requests'] += 1
+            self._executor.submit(self._execute, worker, *record[1:])
+        elif kind == REQUEST_PART:
+            request = self._request_parts.add((worker, record[1]), *record[2:])
+            if request is not None:
+                self._on_request(worker, request)
+
+    def _execute(self, worker: int, request_id: int, method: str, args: list, kwargs: Dict):
+        result, error, code = None, None, None
+        attempts = 0
+        while True:
+            try:
+                if method.startswith('_') or not callable(getattr(self.bot, method, None)):
+                    raise AttributeError(f"TradingBot has no method {method}")
+                if method in ORDER_METHODS:
+                    self.rate_limiter.acquire()
+                result = getattr(self.bot, method)(*args, **kwargs)
+                if method in ORDER_METHODS:
+                    self._observe_usage()
+            except Exception as e:
+                if is_rate_limit_error(e) and attempts < 3:
+                    attempts += 1
+                    self.rate_limiter.backoff(retry_after(e))
+                    continue
+                self.stats['errors'] += 1
+                error, code = str(e), getattr(e, 'code', None)
+            break
+        self._publish_result([RESULT, worker, request_id, result, error, code])
+
+    def _publish_result(self, record: list):
+        # The request already ran: a result too large for one slot is split, never replaced by an error
+        payload = encode(record)
+        with self._publish_lock:
+            if len(payload) <= self._events.max_payload:
+                self._events.publish(payload)
+            else:
+                for part in split_record(payload, [RESULT_PART, *record[1:3]], self._events.max_payload):
+                    self._events.publish(encode(part))
+            self.stats['published'] += 1
+
+    def _observe_usage(self):
+        # The client keeps the last response; with several threads this is approximate
+        response = getattr(self.bot.client, 'response', None)
+        if response is not None:
+            self.rate_limiter.observe(response.headers)
+
+    def _shutdown(self):
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._executor.shutdown(wait=True)
+        for ring in self._requests:
+            ring.close()
+        if self._events:
+            self._events.close()
+        if self._ticks:
+            self._ticks.close()
+        self.logger.info(f"Sharded runtime stopped: {self.stats['requests']} order requests, "
+                         f"{self.stats['errors']} errors")
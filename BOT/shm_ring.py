@@ -0,0 +1,398 @@
+"""
+Shared Memory Ring Buffer
+Single-producer, multi-consumer broadcast of records between processes
+"""
+
+import platform
+import struct
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# Ring header: sequence of the last published record, slot count, slot size
+HEADER = struct.Struct('<QII')
+
+# Slot header: seqlock stamp of the record in the slot, payload length
+SLOT_HEADER = struct.Struct('<QI')
+
+# Machines whose stores become visible to other cores in program order
+ORDERED_MACHINES = ('x86_64', 'amd64', 'i386', 'i686', 'x86')
+
+
+def _check_memory_order():
+    """
+    Refuse to share a ring on a machine that reorders stores or loads
+
+    The seqlock only works if other processes see the stamp, payload and
+    head writes in the order they are made. x86 guarantees that; ARM and
+    others need memory barriers, which Python has no way to issue.
+    """
+    machine = platform.machine().lower()
+    if machine not in ORDERED_MACHINES:
+        raise RuntimeError(f"Shared memory rings need x86 memory ordering; {machine or 'this machine'} "
+                           f"may show readers a record before its contents")
+
+
+def _publish(stamps: np.ndarray, head: np.ndarray, count: int,
+             write: Callable[[slice, slice], None]) -> int:
+    """
+    Write the next count records into a ring under a per-slot seqlock
+
+    Every slot to be written is stamped odd (2 * seq - 1) first, then
+    filled, then stamped even (2 * seq), and only then does the head
+    advance. A reader that finds a slot stamped 2 * seq both before and
+    after copying it has a whole record; any other stamp means the slot
+    is being written or already holds a newer record.
+
+    Args:
+        stamps: The ring's per-slot stamps
+        head: One-element array with the sequence number of the last published record
+        count: Number of records, at most the number of slots
+        write: Fills the slots; called with (ring slots, batch records) slices
+
+    Returns:
+        Sequence number of the last record
+    """
+    slots = len(stamps)
+    first = int(head[0]) + 1
+    start = (first - 1) % slots
+    split = min(count, slots - start)
+    spans = [(slice(start, start + split), slice(0, split))]
+    if split < count:
+        spans.append((slice(0, count - split), slice(split, count)))
+
+    for ring_span, batch_span in spans:
+        stamps[ring_span] = _stamps(first + batch_span.start, batch_span.stop - batch_span.start) - 1
+    for ring_span, batch_span in spans:
+        write(ring_span, batch_span)
+    for ring_span, batch_span in spans:
+        stamps[ring_span] = _stamps(first + batch_span.start, batch_span.stop - batch_span.start)
+    head[0] = first + count - 1
+    return first + count - 1
+
+
+def _stamps(first: int, count: int) -> np.ndarray:
+    """Stamps of count published records starting with sequence number first"""
+    return np.arange(2 * first, 2 * (first + count), 2, dtype='<u8')
+
+
+class ShmRing:
+    """
+    Fixed-size ring of records in a named shared memory block
+
+    One process publishes; any number of processes attach by name and read
+    with their own RingReader, so every reader sees every record (broadcast)
+    and readers never block the producer or each other. Each slot carries a
+    seqlock stamp derived from the sequence number of its record (see
+    _publish). Readers use it to detect a record being overwritten under them
+    and to count records lost when they fall more than a full ring behind.
+    """
+
+    def __init__(self, name: Optional[str] = None, slots: int = 4096, slot_size: int = 256,
+                 create: bool = True):
+        """
+        Args:
+            name: Shared memory block name (default: generated when creating)
+            slots: Number of records the ring holds
+            slot_size: Bytes per slot, including its SLOT_HEADER
+            create: Create the block; False attaches to an existing one
+        """
+        _check_memory_order()
+        if create:
+            if slot_size <= SLOT_HEADER.size:
+                raise ValueError(f"slot_size must exceed {SLOT_HEADER.size} bytes")
+            self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                                   size=HEADER.size + slots * slot_size)
+            HEADER.pack_into(self._shm.buf, 0, 0, slots, slot_size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            _, slots, slot_size = HEADER.unpack_from(self._shm.buf, 0)
+        self.name = self._shm.name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_payload = slot_size - SLOT_HEADER.size
+        self._stamps = np.ndarray((slots,), dtype='<u8', buffer=self._shm.buf, offset=HEADER.size,
+                                  strides=(slot_size,))
+        self._head = np.ndarray((1,), dtype='<u8', buffer=self._shm.buf, offset=0)
+        self._owner = create
+
+    @classmethod
+    def attach(cls, name: str) -> 'ShmRing':
+        """Open a ring created by another process"""
+        return cls(name, create=False)
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the last published record (0 if none)"""
+        return int(self._head[0])
+
+    def publish(self, payload: bytes) -> int:
+        """
+        Append a record, overwriting the oldest one when the ring is full
+
+        Only one thread of one process may publish to a ring.
+
+        Returns:
+            Sequence number of the record
+        """
+        if len(payload) > self.max_payload:
+            raise ValueError(f"Record of {len(payload)} bytes exceeds the {self.max_payload}-byte slot payload")
+        buf = self._shm.buf
+
+        def write(ring_span: slice, _):
+            offset = HEADER.size + ring_span.start * self.slot_size
+            struct.pack_into('<I', buf, offset + 8, len(payload))
+            start = offset + SLOT_HEADER.size
+            buf[start:start + len(payload)] = payload
+
+        return _publish(self._stamps, self._head, 1, write)
+
+    def close(self):
+        """Detach from the block; the creating process also removes it"""
+        # Views into the buffer must be released before the block can close
+        self._stamps = self._head = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A reader still holds a view; the mapping goes away with the process
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingReader:
+    """One consumer's position in a ShmRing"""
+
+    def __init__(self, ring: ShmRing, from_start: bool = False):
+        """
+        Args:
+            ring: Ring to read
+            from_start: Start with the oldest record still in the ring instead of the next new one
+        """
+        self.ring = ring
+        self.cursor = max(0, ring.head - ring.slots) if from_start else ring.head
+        self.lost = 0
+
+    def poll(self, max_records: int = 256) -> List[bytes]:
+        """
+        Read the records published since the last poll, without waiting
+
+        Returns:
+            Up to max_records payloads, oldest first
+        """
+        ring = self.ring
+        buf = ring._shm.buf
+        records = []
+        while len(records) < max_records:
+            head = ring.head
+            if self.cursor >= head:
+                break
+            if head - self.cursor > ring.slots:
+                # Lapped by the producer: skip to the oldest record still in the ring
+                self.lost += head - ring.slots - self.cursor
+                self.cursor = head - ring.slots
+            seq = self.cursor + 1
+            offset = HEADER.size + (seq - 1) % ring.slots * ring.slot_size
+            stamp, length = SLOT_HEADER.unpack_from(buf, offset)
+            if stamp == 2 * seq:
+                start = offset + SLOT_HEADER.size
+                payload = bytes(buf[start:start + length])
+                # Same stamp after the copy: the record was not overwritten meanwhile
+                stamp = SLOT_HEADER.unpack_from(buf, offset)[0]
+                if stamp == 2 * seq:
+                    records.append(payload)
+                    self.cursor = seq
+                    continue
+            if stamp > 2 * seq:
+                # Overwritten (or being overwritten) before it could be read
+                self.lost += 1
+                self.cursor = seq
+            else:
+                break
+        return records
+
+    @property
+    def lag(self) -> int:
+        """Records published but not yet read"""
+        return self.ring.head - self.cursor
+
+
+# Fixed-width market event: 64 bytes, one cache line
+EVENT_DTYPE = np.dtype([
+    ('seq', '<u8'),         # Seqlock stamp: 2 * sequence number, odd while being written
+    ('ts', '<i8'),          # Event time (ms)
+    ('price', '<f8'),
+    ('qty', '<f8'),
+    ('order_id', '<i8'),    # Fills only
+    ('symbol', 'S16'),
+    ('kind', 'u1'),         # TICK_EVENT, BOOK_EVENT or FILL_EVENT
+    ('side', 'i1'),         # 1 bid/buy, -1 ask/sell, 0 unknown
+    ('_pad', 'V6'),
+])
+
+TICK_EVENT, BOOK_EVENT, FILL_EVENT = 1, 2, 3
+
+# Event ring header: sequence of the last published event, capacity; padded to keep records aligned
+EVENT_HEADER = struct.Struct('<QQ48x')
+
+
+class EventRing:
+    """
+    Ring of fixed-width EVENT_DTYPE records in a named shared memory block
+
+    Like ShmRing, one producer broadcasts to any number of readers without
+    locks, but records are binary and laid out as a NumPy structured array,
+    so the producer writes whole batches with one slice assignment and
+    readers get views straight into shared memory instead of copies.
+
+    Writes follow the same per-slot seqlock (see _publish): the 'seq'
+    field of each record holds its stamp, 2 * seq once it is published, so
+    readers can tell whether every record they read is whole.
+    """
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 1 << 16, create: bool = True):
+        """
+        Args:
+            name: Shared memory block name (default: generated when creating)
+            capacity: Number of events the ring holds
+            create: Create the block; False attaches to an existing one
+        """
+        _check_memory_order()
+        if create:
+            self._shm = shared_memory.SharedMemory(
+                name=name, create=True, size=EVENT_HEADER.size + capacity * EVENT_DTYPE.itemsize)
+            EVENT_HEADER.pack_into(self._shm.buf, 0, 0, capacity)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            _, capacity = EVENT_HEADER.unpack_from(self._shm.buf, 0)
+        self.name = self._shm.name
+        self.capacity = capacity
+        self.records = np.ndarray((capacity,), dtype=EVENT_DTYPE, buffer=self._shm.buf,
+                                  offset=EVENT_HEADER.size)
+        self._head = np.ndarray((1,), dtype='<u8', buffer=self._shm.buf, offset=0)
+        # Every field but the stamp, which _publish writes
+        self._payload_fields = [field for field in EVENT_DTYPE.names if field != 'seq']
+        self._payload = self.records[self._payload_fields]
+        self._owner = create
+
+    @classmethod
+    def attach(cls, name: str) -> 'EventRing':
+        """Open a ring created by another process"""
+        return cls(name, create=False)
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the last published event (0 if none)"""
+        return int(self._head[0])
+
+    def publish(self, events: np.ndarray) -> int:
+        """
+        Append a batch of EVENT_DTYPE records (their 'seq' field is ignored and stamped here)
+
+        Only one thread of one process may publish to a ring.
+
+        Returns:
+            Sequence number of the last event
+        """
+        count = len(events)
+        if count > self.capacity:
+            raise ValueError(f"Batch of {count} events exceeds the ring capacity of {self.capacity}")
+        if count == 0:
+            return self.head
+        payload = events[self._payload_fields]
+
+        def write(ring_span: slice, batch_span: slice):
+            self._payload[ring_span] = payload[batch_span]
+
+        return _publish(self.records['seq'], self._head, count, write)
+
+    def publish_event(self, kind: int, symbol: str, price: float, qty: float, ts: int = 0,
+                      side: int = 0, order_id: int = 0) -> int:
+        """Append one event"""
+        event = np.zeros(1, dtype=EVENT_DTYPE)
+        event[0] = (0, ts, price, qty, order_id, symbol.encode(), kind, side, b'')
+        return self.publish(event)
+
+    def close(self):
+        """Detach from the block; the creating process also removes it"""
+        # Views into the buffer must be released before the block can close
+        self.records = self._head = self._payload = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A reader still holds a view; the mapping goes away with the process
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class EventReader:
+    """
+    One consumer's position in an EventRing
+
+    read() returns a view into shared memory, not a copy. The records in it
+    stay valid until the producer laps them. A consumer that keeps a view
+    while doing slow work calls intact() afterwards to confirm that what it
+    read was not overwritten meanwhile.
+    """
+
+    def __init__(self, ring: EventRing, from_start: bool = False):
+        """
+        Args:
+            ring: Ring to read
+            from_start: Start with the oldest event still in the ring instead of the next new one
+        """
+        self.ring = ring
+        self.cursor = max(0, ring.head - ring.capacity) if from_start else ring.head
+        self.lost = 0
+        self._view = ring.records[:0]
+        self._stamps = _stamps(1, 0)
+
+    def read(self, max_records: int = 4096) -> np.ndarray:
+        """
+        Events published since the last read, without waiting
+
+        Returns:
+            A view of up to max_records events, oldest first (empty if none are new).
+            It stops at the end of the ring's storage or at an event being overwritten;
+            the next read continues from there.
+        """
+        ring = self.ring
+        while True:
+            head = ring.head
+            if self.cursor >= head:
+                self._view, self._stamps = ring.records[:0], _stamps(1, 0)
+                return self._view
+            if head - self.cursor > ring.capacity:
+                # Lapped by the producer: skip to the oldest event still in the ring
+                self.lost += head - ring.capacity - self.cursor
+                self.cursor = head - ring.capacity
+            start = self.cursor % ring.capacity
+            count = min(head - self.cursor, max_records, ring.capacity - start)
+            view = ring.records[start:start + count]
+            stamps = _stamps(self.cursor + 1, count)
+            whole = view['seq'] == stamps
+            count = count if whole.all() else int(whole.argmin())
+            if count:
+                self._view, self._stamps = view[:count], stamps[:count]
+                self.cursor += count
+                return self._view
+            # The oldest event is being overwritten right now; it is lost
+            self.lost += 1
+            self.cursor += 1
+
+    def intact(self) -> bool:
+        """Whether the view returned by the last read() still holds the events it held when read"""
+        return bool(np.array_equal(self._view['seq'], self._stamps))
+
+    @property
+    def lag(self) -> int:
+        """Events published but not yet read"""
+        return self.ring.head - self.cursor
@@ -0,0 +1,397 @@
+"""
+Strategy Runtime for the Trading Bot
+Event-driven loop that feeds market data, order updates and timers to pluggable strategies
+"""
+
+import time
+import heapq
+import logging
+import importlib
+import threading
+import itertools
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from market_stream import Bar, Tick
+
+# Event kinds, in dispatch priority order (lower first)
+ORDER_EVENT = 0
+RESULT_EVENT = 1
+BAR_EVENT = 2
+
+# Seconds without an event loop cycle after which the runtime counts as hung
+LIVENESS_MAX_STALL = 5.0
+
+
+class Strategy:
+    """
+    Base class for trading strategies
+
+    Subclasses override the callbacks they need. All callbacks run on the runtime's
+    event loop thread, so a strategy never needs its own locking. Orders go through
+    the regular ``TradingBot`` methods, either directly via ``self.bot`` (blocks the
+    loop for one round trip) or via ``self.submit`` (runs on a worker thread and
+    reports back through ``on_order_result``).
+    """
+
+    def __init__(self, symbols: Optional[List[str]] = None, name: Optional[str] = None):
+        """
+        Initialize the strategy
+
+        Args:
+            symbols: Symbols whose events this strategy receives (default: all)
+            name: Display name (default: class name)
+        """
+        self.symbols = [s.upper() for s in symbols] if symbols else []
+        self.name = name or self.__class__.__name__
+        self.bot = None
+        self.runtime: Optional['StrategyRuntime'] = None
+        self.logger = logging.getLogger(f"TradingBot.{self.name}")
+
+    def on_start(self):
+        """Called once when the runtime starts"""
+
+    def on_stop(self):
+        """Called once when the runtime stops"""
+
+    def on_tick(self, tick: Tick):
+        """Called with the latest trade of a subscribed symbol"""
+
+    def on_bar(self, bar: Bar):
+        """Called with each closed bar of a subscribed symbol"""
+
+    def on_fill(self, fill: Dict):
+        """Called with the order payload of each execution on a subscribed symbol"""
+
+    def on_order_update(self, update: Dict):
+        """Called with the order payload of every order status change on a subscribed symbol"""
+
+    def on_order_result(self, request: Tuple[str, tuple, dict], result: Optional[Dict],
+                        error: Optional[Exception]):
+        """Called with the outcome of an order submitted through submit()"""
+
+    def submit(self, method: str, *args, **kwargs):
+        """
+        Call a TradingBot method on a worker thread
+
+        Args:
+            method: TradingBot method name (e.g., 'place_limit_order')
+            *args: Positional arguments for the method
+            **kwargs: Keyword arguments for the method
+        """
+        self.runtime.submit(self, method, *args, **kwargs)
+
+    def schedule(self, interval: float, callback: Callable[[], Any], repeat: bool = True) -> int:
+        """Run a callback on the event loop after `interval` seconds (repeatedly by default)"""
+        return self.runtime.schedule(interval, callback, repeat)
+
+
+class StrategyRuntime:
+    """
+    Event loop multiplexing market data, order updates and timers
+
+    Ticks are conflated per symbol: if a strategy falls behind, only the latest trade
+    of each symbol is delivered, which bounds the time any event waits in the queue.
+    Order updates, order results and bars are never conflated and are dispatched
+    ahead of ticks.
+    """
+
+    def __init__(self, bot, handler_budget_ms: float = 5.0, order_workers: int = 4,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the runtime
+
+        Args:
+            bot: TradingBot used by strategies to submit orders
+            handler_budget_ms: Callback duration above which a warning is logged
+            order_workers: Worker threads for orders submitted via Strategy.submit()
+            logger: Logger for runtime events (default: the bot's logger)
+        """
+        self.bot = bot
+        self.handler_budget_ms = handler_budget_ms
+        self.logger = logger or getattr(bot, 'logger', None) or logging.getLogger(__name__)
+
+        self.strategies: List[Strategy] = []
+        self._by_symbol: Dict[str, List[Strategy]] = defaultdict(list)
+        self._wildcard: List[Strategy] = []
+
+        self._cond = threading.Condition()
+        self._events: List[Tuple[int, int, float, Any]] = []
+        self._sequence = itertools.count()
+        self._ticks: Dict[str, Tuple[Tick, float]] = {}
+        self._tick_order: Deque[str] = deque()
+        self._timers: List[Tuple[float, int, float, Callable, bool]] = []
+        self._cancelled_timers = set()
+
+        self._executor = ThreadPoolExecutor(max_workers=order_workers, thread_name_prefix='StrategyOrder')
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'events': 0,
+            'ticks_conflated': 0,
+            'slow_handlers': 0,
+            'handler_errors': 0,
+            'max_queue_delay_ms': 0.0,
+            'max_handler_ms': 0.0,
+        }
+        self.last_loop_time = time.monotonic()
+
+    def add_strategy(self, strategy: Strategy):
+        """Attach a strategy to the runtime"""
+        strategy.bot = self.bot
+        strategy.runtime = self
+        self.strategies.append(strategy)
+        if strategy.symbols:
+            for symbol in strategy.symbols:
+                self._by_symbol[symbol].append(strategy)
+        else:
+            self._wildcard.append(strategy)
+        self.logger.info(f"Strategy added: {strategy.name} {strategy.symbols or '(all symbols)'}")
+
+    def symbols(self) -> List[str]:
+        """Symbols subscribed by at least one strategy"""
+        return sorted(self._by_symbol)
+
+    # Producers (thread-safe, called from stream threads)
+
+    def push_tick(self, tick: Tick):
+        """Queue a trade, replacing any undelivered trade of the same symbol"""
+        with self._cond:
+            if tick.symbol in self._ticks:
+                self.stats['ticks_conflated'] += 1
+                self._ticks[tick.symbol] = (tick, self._ticks[tick.symbol][1])
+            else:
+                self._ticks[tick.symbol] = (tick, time.monotonic())
+                self._tick_order.append(tick.symbol)
+            self._cond.notify()
+
+    def push_bar(self, bar: Bar):
+        """Queue a closed bar"""
+        self._push(BAR_EVENT, bar)
+
+    def push_order_update(self, update: Dict):
+        """Queue an order payload from the user data stream"""
+        self._push(ORDER_EVENT, update)
+
+    def submit(self, strategy: Strategy, method: str, *args, **kwargs):
+        """Run a TradingBot method on a worker thread and queue its result for the strategy"""
+        request = (method, args, kwargs)
+
+        def run():
+            try:
+                result = getattr(self.bot, method)(*args, **kwargs)
+                self._push(RESULT_EVENT, (strategy, request, result, None))
+            except Exception as e:
+                self._push(RESULT_EVENT, (strategy, request, None, e))
+
+        self._executor.submit(run)
+
+    def schedule(self, interval: float, callback: Callable[[], Any], repeat: bool = True) -> int:
+        """
+        Schedule a callback on the event loop
+
+        Returns:
+            Timer ID for cancel_timer()
+        """
+        timer_id = next(self._sequence)
+        with self._cond:
+            heapq.heappush(self._timers, (time.monotonic() + interval, timer_id, interval, callback, repeat))
+            self._cond.notify()
+        return timer_id
+
+    def cancel_timer(self, timer_id: int):
+        """Cancel a scheduled callback"""
+        with self._cond:
+            self._cancelled_timers.add(timer_id)
+
+    # Event loop
+
+    def start(self):
+        """Run the event loop on a background thread"""
+        self._thread = threading.Thread(target=self.run, name='StrategyRuntime', daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Run the event loop on the calling thread until stop() is called"""
+        self._running = True
+        for strategy in self.strategies:
+            self._call(strategy, strategy.on_start)
+        self.logger.info(f"Strategy runtime started with {len(self.strategies)} strategies")
+
+        try:
+            while self._running:
+                self.last_loop_time = time.monotonic()
+                item = self._next_event()
+                if item is not None:
+                    self._dispatch(*item)
+        finally:
+            for strategy in self.strategies:
+                self._call(strategy, strategy.on_stop)
+            self.logger.info("Strategy runtime stopped")
+
+    def stop(self):
+        """Stop the event loop and wait for pending order submissions"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True)
+
+    def pending(self) -> int:
+        """Events and ticks waiting to be dispatched"""
+        with self._cond:
+            return len(self._events) + len(self._tick_order)
+
+    def is_alive(self, max_stall: float) -> bool:
+        """Whether the event loop has cycled within the last `max_stall` seconds"""
+        return self._running and time.monotonic() - self.last_loop_time <= max_stall
+
+    def _push(self, kind: int, payload: Any):
+        with self._cond:
+            heapq.heappush(self._events, (kind, next(self._sequence), time.monotonic(), payload))
+            self._cond.notify()
+
+    def _next_event(self) -> Optional[Tuple[int, float, Any]]:
+        """Wait for the next due event; returns (kind, enqueue time, payload) or None on wake-up"""
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                if self._timers and self._timers[0][0] <= now:
+                    due, timer_id, interval, callback, repeat = heapq.heappop(self._timers)
+                    if timer_id in self._cancelled_timers:
+                        self._cancelled_timers.discard(timer_id)
+                        continue
+                    if repeat:
+                        heapq.heappush(self._timers, (due + interval, timer_id, interval, callback, repeat))
+                    return None, due, callback
+                if self._events:
+                    kind, _, queued_at, payload = heapq.heappop(self._events)
+                    return kind, queued_at, payload
+                if self._tick_order:
+                    symbol = self._tick_order.popleft()
+                    tick, queued_at = self._ticks.pop(symbol)
+                    return Tick, queued_at, tick
+
+                timeout = self._timers[0][0] - now if self._timers else 1.0
+                self._cond.wait(timeout)
+                return None
+            return None
+
+    def _dispatch(self, kind, queued_at: float, payload: Any):
+        delay_ms = (time.monotonic() - queued_at) * 1000
+        if delay_ms > self.stats['max_queue_delay_ms']:
+            self.stats['max_queue_delay_ms'] = delay_ms
+        self.stats['events'] += 1
+
+        if kind is None:
+            self._call(None, payload)
+        elif kind is Tick:
+            for strategy in self._subscribers(payload.symbol):
+                self._call(strategy, strategy.on_tick, payload)
+        elif kind == BAR_EVENT:
+            for strategy in self._subscribers(payload.symbol):
+                self._call(strategy, strategy.on_bar, payload)
+        elif kind == ORDER_EVENT:
+            for strategy in self._subscribers(payload.get('s', '')):
+                self._call(strategy, strategy.on_order_update, payload)
+                if payload.get('x') == 'TRADE':
+                    self._call(strategy, strategy.on_fill, payload)
+        elif kind == RESULT_EVENT:
+            strategy, request, result, error = payload
+            self._call(strategy, strategy.on_order_result, request, result, error)
+
+    def _subscribers(self, symbol: str) -> List[Strategy]:
+        subscribers = self._by_symbol.get(symbol)
+        if subscribers and self._wildcard:
+            return subscribers + self._wildcard
+        return subscribers or self._wildcard
+
+    def _call(self, strategy: Optional[Strategy], callback: Callable, *args):
+        """Invoke a callback, isolating failures and measuring its duration"""
+        started = time.perf_counter()
+        try:
+            callback(*args)
+        except Exception as e:
+            self.stats['handler_errors'] += 1
+            name = strategy.name if strategy else 'timer'
+            self.logger.error(f"{name} failed in {getattr(callback, '__name__', callback)}: {e}")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > self.stats['max_handler_ms']:
+            self.stats['max_handler_ms'] = elapsed_ms
+        if elapsed_ms > self.handler_budget_ms:
+            self.stats['slow_handlers'] += 1
+            name = strategy.name if strategy else 'timer'
+            self.logger.warning(
+                f"{name}.{getattr(callback, '__name__', 'callback')} took {elapsed_ms:.1f}ms "
+                f"(budget {self.handler_budget_ms}ms)"
+            )
+
+
+def load_strategy(spec: str, symbols: List[str]) -> Strategy:
+    """
+    Instantiate a strategy from a 'module:ClassName' spec
+
+    Args:
+        spec: Import path of the strategy class
+        symbols: Symbols passed to the strategy constructor
+
+    Returns:
+        Strategy instance
+    """
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f"Strategy must be given as module:ClassName, got '{spec}'")
+    strategy_class = getattr(importlib.import_module(module_name), class_name)
+    if not issubclass(strategy_class, Strategy):
+        raise ValueError(f"{spec} is not a Strategy subclass")
+    return strategy_class(symbols=symbols)
+
+
+def run_strategies(bot, specs: List[str], symbols: List[str], interval: str = '1m'):
+    """
+    Run strategies on live market and user data until interrupted
+
+    Args:
+        bot: TradingBot used for order submission
+        specs: Strategy classes as 'module:ClassName'
+        symbols: Symbols to stream and trade
+        interval: Bar interval (default: '1m')
+    """
+    runtime = StrategyRuntime(bot)
+    for spec in specs:
+        runtime.add_strategy(load_strategy(spec, symbols))
+
+    def on_replay_end():
+        # Let the runtime drain what the replay delivered before stopping it
+        deadline = time.monotonic() + 30
+        while runtime.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        runtime.stop()
+
+    stream = bot.create_market_stream(on_end=on_replay_end)
+    stream.start_market(symbols, on_tick=runtime.push_tick, on_bar=runtime.push_bar, interval=interval)
+    # Local books for bot.smart_order()
+    stream.start_depth(symbols, bot.books.on_depth)
+
+    def on_order_update(update: Dict):
+        bot.order_index.on_stream_update(update)
+        runtime.push_order_update(update)
+
+    stream.start_user(on_order_update=on_order_update, on_status=bot.order_index.set_stream_live)
+    stream.start()
+    bot.order_reconciler.start()
+    # Orders are pulled by the exchange if the event loop stops cycling
+    bot.start_dead_man_switch(lambda: runtime.is_alive(LIVENESS_MAX_STALL))
+    try:
+        runtime.run()
+    finally:
+        if bot.dead_man_switch:
+            bot.dead_man_switch.stop()
+        bot.order_reconciler.stop()
+        bot.order_index.set_stream_live(False)
+        runtime.stop()
+        stream.stop()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Dashboard state, layout and redraws: only what changed is drawn
+"""
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import dashboard
+from dashboard import HELP, Dashboard, DashboardState, ScreenBuffer, render_lines
+
+POSITIONS = [
+    {'symbol': 'BTCUSDT', 'positionSide': 'BOTH', 'positionAmt': '0.010', 'entryPrice': '45000', 'markPrice': '45100'},
+    {'symbol': 'ETHUSDT', 'positionSide': 'BOTH', 'positionAmt': '-0.50', 'entryPrice': '3000', 'markPrice': '2990'},
+]
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    """Keep the header's clock and the once-a-second redraw from changing under a test"""
+    monkeypatch.setattr(dashboard, 'datetime', SimpleNamespace(now=lambda: datetime(2026, 10, 19, 9, 30)))
+    monkeypatch.setattr(dashboard, 'time', SimpleNamespace(monotonic=time.monotonic, time=lambda: 1_800_000_000.0))
+
+
+def loaded_state() -> DashboardState:
+    state = DashboardState()
+    state.load_snapshot({'totalWalletBalance': '1000'}, POSITIONS)
+    return state
+
+
+def mark(symbol: str, price: float):
+    return {'stream': 'markPrice', 'data': [{'e': 'markPriceUpdate', 's': symbol, 'p': str(price)}]}
+
+
+def order(order_id: int) -> dict:
+    return {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'origQty': '0.001', 'price': '40000',
+            'orderId': order_id, 'status': 'NEW'}
+
+
+def test_mark_price_update_redraws_one_position_row():
+    state, screen = loaded_state(), ScreenBuffer()
+    first = render_lines(state, [], 120, 30)
+    assert len(screen.diff(first)) == len(first)
+
+    state.on_mark_prices(mark('BTCUSDT', 45200))
+    changes = screen.diff(render_lines(state, [], 120, 30))
+
+    # The BTCUSDT row and the header's unrealized total; the ETHUSDT row is left alone
+    assert [row for row, _ in changes] == [0, 3]
+    assert changes[1][1].startswith('BTCUSDT') and changes[1][1].endswith('2.0000')
+    assert 'Unrealized +7.00' in changes[0][1]
+
+
+def test_marks_that_change_nothing_keep_the_version():
+    state = loaded_state()
+    version = state.version
+    state.on_mark_prices(mark('BTCUSDT', 45100))     # Same mark
+    state.on_mark_prices(mark('SOLUSDT', 150))       # No position
+    state.on_mark_prices({'e': 'somethingElse'})
+    assert state.version == version
+
+    state.on_account_update({'a': {'B': [{'a': 'USDT', 'wb': '990'}],
+                                   'P': [{'s': 'ETHUSDT', 'ps': 'BOTH', 'pa': '0', 'ep': '0'}]}})
+    assert state.version == version + 1
+    balance, positions = state.snapshot()
+    assert balance == 990 and [p['symbol'] for p in positions] == ['BTCUSDT']
+
+
+def test_order_overflow_is_summarized():
+    lines = render_lines(DashboardState(), [order(i) for i in range(10)], 120, 12)
+
+    # 6 lines of headers and an empty positions table leave room for 4 rows: 3 orders and the rest
+    assert len(lines) == 11 and lines[-1] == HELP
+    assert [line.split()[-2] for line in lines[6:9]] == ['0', '1', '2']
+    assert lines[9] == '... 7 more orders'
+
+
+class FakeScreen:
+    """Just enough of a curses window for Dashboard._loop; runs `script[i]` before the i-th key poll"""
+
+    def __init__(self, board: Dashboard, script):
+        self.board = board
+        self.script = list(script)
+        self.rows = []
+
+    def timeout(self, ms):
+        pass
+
+    def getch(self):
+        if not self.script:
+            self.board._running = False
+            return -1
+        step = self.script.pop(0)
+        if step:
+            step()
+        time.sleep(0.005)       # Longer than a frame
+        return -1
+
+    def getmaxyx(self):
+        return 30, 120
+
+    def addstr(self, row, col, text):
+        self.rows.append(row)
+
+    def move(self, row, col):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def test_frames_are_skipped_while_nothing_changes(mock_bot, monkeypatch):
+    monkeypatch.setattr('curses.curs_set', lambda visibility: None)
+    board = Dashboard(mock_bot, fps=1000)
+    board.state = loaded_state()
+    screen = FakeScreen(board, [None, None, None, lambda: board.state.on_mark_prices(mark('BTCUSDT', 45200)),
+                                None, None])
+
+    board._loop(screen)
+
+    assert board.frames == 2
+    # The second frame rewrote the two changed lines and the prompt
+    assert screen.rows[-3:] == [0, 3, 29]
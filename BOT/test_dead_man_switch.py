@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Dead man's switch heartbeats, weight deferral and stall handling against the mock exchange
+"""
+
+import time
+from types import SimpleNamespace
+
+from dead_man_switch import DeadMansSwitch
+from mock_exchange import MockExchange
+from rate_limit import DEFAULT_WEIGHT_LIMIT
+
+COUNTDOWN = ('POST', '/fapi/v1/countdownCancelAll')
+
+
+def bot_with_orders(make_bot, symbols=('BTCUSDT', 'ETHUSDT')):
+    exchange = MockExchange()
+    bot = make_bot(exchange)
+    for symbol in symbols:
+        bot.place_limit_order(symbol, 'BUY', 0.01, exchange.marks[symbol] * 0.9)
+    return exchange, bot
+
+
+def test_heartbeat_rearms_only_when_due(make_bot):
+    exchange, bot = bot_with_orders(make_bot)
+    switch = DeadMansSwitch(bot, countdown=60, refresh_margin=20)
+    now = time.monotonic()
+
+    # Only symbols with open orders are armed
+    assert switch.check(now) == ['BTCUSDT', 'ETHUSDT']
+    assert sorted(exchange.countdowns) == ['BTCUSDT', 'ETHUSDT']
+    assert switch.check(now + 30) == []
+    assert exchange.requests[COUNTDOWN] == 2
+
+    assert switch.check(now + 45) == ['BTCUSDT', 'ETHUSDT']
+    assert exchange.requests[COUNTDOWN] == 4 and switch.stats['refreshes'] == 4
+
+    # An orderly stop disarms, so the orders survive
+    switch.stop(disarm=True)
+    assert exchange.countdowns == {}
+    assert len(exchange.open_orders()) == 2
+
+
+def test_busy_account_defers_until_urgent(make_bot):
+    exchange, bot = bot_with_orders(make_bot, symbols=('BTCUSDT',))
+    switch = DeadMansSwitch(bot, countdown=60, refresh_margin=20, defer_above=0.7, tick=1.0)
+    now = time.monotonic()
+    switch.check(now)
+
+    busy = SimpleNamespace(headers={'X-MBX-USED-WEIGHT-1M': str(int(DEFAULT_WEIGHT_LIMIT[0] * 0.8))})
+    bot.client.response = busy
+    assert switch.check(now + 45) == []
+    assert switch.stats['deferred'] == 1
+    # Within three ticks of expiry the refresh goes out regardless
+    bot.client.response = busy
+    assert switch.check(now + 58) == ['BTCUSDT']
+    assert exchange.requests[COUNTDOWN] == 2
+
+    # Many active symbols lengthen the countdown to stay within the weight budget
+    assert switch.effective_countdown(1) == 60
+    assert switch.effective_countdown(20) == 20 * 10 * 60 / 120 + 20
+
+
+def test_stalled_loop_lets_the_countdown_fire(make_bot):
+    exchange, bot = bot_with_orders(make_bot, symbols=('BTCUSDT',))
+    alive = [True]
+    # Budget large enough that the one-second countdown is not lengthened
+    switch = DeadMansSwitch(bot, countdown=1.0, refresh_margin=0.5, weight_budget=6000,
+                            liveness=lambda: alive[0])
+    now = time.monotonic()
+    assert switch.check(now) == ['BTCUSDT']
+
+    alive[0] = False
+    assert switch.check(now + 0.6) == []
+    assert switch.stats['stalls'] == 1 and exchange.requests[COUNTDOWN] == 1
+
+    time.sleep(1.1)
+    # The exchange cancelled the orders on its own
+    assert exchange.open_orders() == []
+    assert exchange.countdowns == {}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Rate limits, bans, lost responses and partial fills injected by the mock exchange
+"""
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from batch import BatchRunner, ResultWriter
+from mock_exchange import BANNED, RATE_LIMITED, TIMEOUT, FaultPlan, MockExchange
+from rate_limit import is_rate_limit_error
+
+ORDER_PATHS = ['/fapi/v1/order']
+
+
+def test_rate_limited_orders_are_retried(make_bot, tmp_path):
+    faults = FaultPlan(paths=ORDER_PATHS)
+    exchange = MockExchange(faults=faults)
+    bot = make_bot(exchange)
+    faults.inject(RATE_LIMITED, 3)
+
+    orders = tmp_path / 'orders.csv'
+    orders.write_text('symbol,side,type,quantity,price\n' +
+                      ''.join(f'BTCUSDT,BUY,LIMIT,0.001,{40000 + i}\n' for i in range(5)))
+    writer = ResultWriter(str(tmp_path / 'results.csv'))
+    summary = BatchRunner(bot, concurrency=1).submit_file(str(orders), 'csv', writer)
+    writer.close()
+
+    assert summary['submitted'] == 5 and summary['failed'] == 0
+    assert faults.injected[RATE_LIMITED] == 3
+    assert len(exchange.open_orders('BTCUSDT')) == 5
+
+
+def test_ban_surfaces_status_and_retry_after(make_bot):
+    faults = FaultPlan(retry_after=120, paths=ORDER_PATHS)
+    exchange = MockExchange(faults=faults)
+    bot = make_bot(exchange)
+    faults.inject(BANNED)
+
+    with pytest.raises(BinanceAPIException) as raised:
+        bot.place_limit_order('BTCUSDT', 'BUY', 0.001, 40000)
+    assert raised.value.status_code == 418
+    assert raised.value.code == -1003
+    assert raised.value.response.headers['Retry-After'] == '120'
+    assert is_rate_limit_error(raised.value)
+    assert exchange.open_orders() == []
+
+
+def test_lost_response_is_found_by_reconciliation(make_bot):
+    faults = FaultPlan(paths=ORDER_PATHS)
+    exchange = MockExchange(faults=faults)
+    bot = make_bot(exchange)
+    faults.inject(TIMEOUT)
+
+    with pytest.raises(BinanceAPIException) as raised:
+        bot.place_limit_order('BTCUSDT', 'BUY', 0.001, 40000)
+    assert raised.value.code == -1007
+    # The order reached the matching engine even though its response was lost
+    assert len(exchange.open_orders('BTCUSDT')) == 1
+    assert bot.order_index.orders('BTCUSDT') == []
+
+    bot.reconcile_open_orders('BTCUSDT')
+    assert [o['orderId'] for o in bot.order_index.orders('BTCUSDT')] == \
+           [o['orderId'] for o in exchange.open_orders('BTCUSDT')]
+
+
+def test_partial_fills(make_bot):
+    exchange = MockExchange(partial_fill=0.4)
+    bot = make_bot(exchange)
+
+    ioc = bot.place_limit_order('BTCUSDT', 'BUY', 0.010, 46000, time_in_force='IOC')
+    assert ioc['status'] == 'EXPIRED'
+    assert float(ioc['executedQty']) == pytest.approx(0.004)
+
+    gtc = bot.place_limit_order('BTCUSDT', 'BUY', 0.010, 46000)
+    assert gtc['status'] == 'PARTIALLY_FILLED'
+    assert float(gtc['executedQty']) == pytest.approx(0.004)
+    assert [o['orderId'] for o in bot.get_open_orders('BTCUSDT', refresh=True)] == [gtc['orderId']]
+
+    # The rest fills once the market trades through the limit
+    exchange.set_mark('BTCUSDT', 45900)
+    assert bot.get_order_status('BTCUSDT', gtc['orderId'])['status'] == 'FILLED'
+
+    fok = bot.place_limit_order('BTCUSDT', 'BUY', 0.010, 46000, time_in_force='FOK')
+    assert fok['status'] == 'EXPIRED' and float(fok['executedQty']) == 0
+
+
+def test_fault_plan_is_deterministic():
+    def sequence(seed):
+        plan = FaultPlan(seed=seed, jitter=0.01, rate_limit_rate=0.1, ban_rate=0.05, timeout_rate=0.1)
+        return [plan.draw('/fapi/v1/order') for _ in range(500)]
+
+    assert sequence(7) == sequence(7)
+    assert sequence(7) != sequence(8)
+    faults = [fault for _, fault in sequence(7)]
+    assert {RATE_LIMITED, BANNED, TIMEOUT, None} == set(faults)
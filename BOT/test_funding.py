@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Funding and basis metrics, the single bulk request and edge-triggered alerts against the mock exchange
+"""
+
+import pytest
+
+from funding import FundingMonitor, FundingThresholds, funding_metrics
+from mock_exchange import MockExchange
+
+SYMBOLS = {
+    'BTCUSDT': {'price': 45000.0, 'tickSize': '0.10', 'stepSize': '0.001', 'minQty': '0.001',
+                'fundingRate': '0.0003', 'basis': '0.001'},
+    'ETHUSDT': {'price': 3000.0, 'tickSize': '0.01', 'stepSize': '0.001', 'minQty': '0.001',
+                'fundingRate': '-0.00005', 'basis': '-0.0001'},
+    'SOLUSDT': {'price': 100.0, 'tickSize': '0.001', 'stepSize': '0.1', 'minQty': '0.1',
+                'fundingRate': '0.0001', 'basis': '0'},
+}
+
+
+def test_metrics_from_premium_rows():
+    premium = [
+        {'symbol': 'BTCUSDT', 'markPrice': '101', 'indexPrice': '100', 'lastFundingRate': '0.0001',
+         'interestRate': '0.0001', 'nextFundingTime': 3_600_000},
+        {'symbol': 'ETHUSDT', 'markPrice': '100', 'indexPrice': '100', 'lastFundingRate': '-0.0002',
+         'interestRate': '0.0001', 'nextFundingTime': 0},
+        {'symbol': 'BTCUSDT_240628', 'markPrice': '102', 'indexPrice': '100', 'lastFundingRate': ''},
+    ]
+    metrics = funding_metrics(premium, positions={'BTCUSDT': 2, 'ETHUSDT': -1},
+                              intervals={'ETHUSDT': 4}, now_ms=0)
+
+    assert list(metrics['symbol']) == ['BTCUSDT', 'ETHUSDT']   # delivery contract skipped
+    assert metrics['annualized'] == pytest.approx([0.0001 * 3 * 365, -0.0002 * 6 * 365])
+    assert metrics['basis_bps'] == pytest.approx([100, 0])
+    # Interest component clamped to +/-0.05% of the premium
+    assert metrics['predicted_rate'] == pytest.approx([0.0095, 0.0001])
+    assert metrics['seconds_to_funding'] == pytest.approx([3600, 0])
+    # Long pays positive funding, short pays negative funding
+    assert metrics['payment'] == pytest.approx([-2 * 101 * 0.0001, -100 * 0.0002])
+
+
+def test_refresh_is_one_request_and_alerts_once(make_bot):
+    exchange = MockExchange(symbols=SYMBOLS)
+    bot = make_bot(exchange)
+    alerts = []
+    monitor = FundingMonitor(bot, FundingThresholds(min_annualized=0.3, min_basis_bps=5),
+                             on_alert=alerts.append)
+
+    before = exchange.requests[('GET', '/fapi/v1/premiumIndex')]
+    monitor.refresh()
+    assert exchange.requests[('GET', '/fapi/v1/premiumIndex')] == before + 1
+    assert {(a.symbol, a.kind) for a in alerts} == {('BTCUSDT', 'funding'), ('BTCUSDT', 'basis')}
+    assert [row['symbol'] for row in monitor.rows('basis_bps')] == ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+
+    # A persistent breach does not alert again; it re-arms once back inside
+    monitor.refresh()
+    assert len(alerts) == 2
+    exchange.funding_rates['BTCUSDT'] = 0.0001
+    monitor.refresh()
+    exchange.funding_rates['BTCUSDT'] = 0.0004
+    monitor.refresh()
+    assert [(a.symbol, a.kind) for a in alerts[2:]] == [('BTCUSDT', 'funding')]
+
+
+def test_positions_predict_payments(make_bot):
+    exchange = MockExchange(symbols=SYMBOLS)
+    bot = make_bot(exchange)
+    bot.place_market_order('BTCUSDT', 'BUY', 0.01)
+    bot.place_market_order('ETHUSDT', 'BUY', 1)
+    alerts = []
+    monitor = FundingMonitor(bot, FundingThresholds(0, 0, min_payment=0.1), track_positions=True,
+                             on_alert=alerts.append)
+    monitor.refresh()
+
+    # The long on positive funding pays; the long on negative funding receives
+    rows = monitor.rows('payment')
+    assert [row['symbol'] for row in rows] == ['ETHUSDT', 'BTCUSDT', 'SOLUSDT']
+    assert [row['payment'] for row in rows] == pytest.approx([0.15, -0.135, 0])
+    assert sorted(a.symbol for a in alerts) == ['BTCUSDT', 'ETHUSDT']
+
+
+def test_hedge_mode_legs_are_netted(make_bot, monkeypatch):
+    bot = make_bot(MockExchange(symbols=SYMBOLS))
+    legs = [{'symbol': 'BTCUSDT', 'positionSide': 'LONG', 'positionAmt': '0.03'},
+            {'symbol': 'BTCUSDT', 'positionSide': 'SHORT', 'positionAmt': '-0.01'}]
+    monkeypatch.setattr(bot, 'get_positions', lambda: legs)
+    monitor = FundingMonitor(bot, FundingThresholds(0, 0, min_payment=0.1), track_positions=True,
+                             on_alert=lambda alert: None)
+    monitor.refresh()
+
+    payments = {row['symbol']: row['payment'] for row in monitor.rows('payment')}
+    # Net long 0.02 pays on positive funding, whichever leg comes last
+    assert payments['BTCUSDT'] == pytest.approx(-0.02 * 45000 * 0.0003)
+    legs.reverse()
+    monitor.refresh()
+    assert monitor.rows('payment')[0]['payment'] == pytest.approx(-0.27)
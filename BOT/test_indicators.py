@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the streaming and batch technical indicators
+"""
+
+import numpy as np
+
+from indicators import (ATR, EMA, RSI, VWAP, BollingerBands,
+                        atr, bollinger_bands, ema, rsi, vwap)
+
+RTOL = 1e-9
+
+
+def make_bars(count=5000, seed=7):
+    """Random-walk OHLCV bars around a BTC-like price level"""
+    rng = np.random.default_rng(seed)
+    closes = 45000 + np.cumsum(rng.normal(0, 40, count))
+    highs = closes + rng.uniform(0, 60, count)
+    lows = closes - rng.uniform(0, 60, count)
+    volumes = rng.uniform(0.1, 5.0, count)
+    return highs, lows, closes, volumes
+
+
+def stream(values):
+    """Replace None (warm-up) with NaN so streaming output compares against batch output"""
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def assert_equivalent(streamed, batched):
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batched))
+    np.testing.assert_allclose(streamed, batched, rtol=RTOL, equal_nan=True)
+
+
+def test_ema_matches_batch():
+    _, _, closes, _ = make_bars()
+    for period in (1, 2, 9, 50, 200):
+        indicator = EMA(period)
+        assert_equivalent(stream(indicator.update(c) for c in closes), ema(closes, period))
+
+
+def test_rsi_matches_batch():
+    _, _, closes, _ = make_bars()
+    for period in (2, 14, 30):
+        indicator = RSI(period)
+        assert_equivalent(stream(indicator.update(c) for c in closes), rsi(closes, period))
+
+
+def test_rsi_flat_and_rising_prices():
+    flat = np.full(50, 100.0)
+    rising = np.arange(50, dtype=float)
+    indicator = RSI(14)
+    assert_equivalent(stream(indicator.update(c) for c in flat), rsi(flat, 14))
+    assert rsi(flat, 14)[-1] == 50.0
+    assert rsi(rising, 14)[-1] == 100.0
+
+
+def test_atr_matches_batch():
+    highs, lows, closes, _ = make_bars()
+    for period in (1, 14, 50):
+        indicator = ATR(period)
+        streamed = stream(indicator.update(*bar) for bar in zip(highs, lows, closes))
+        assert_equivalent(streamed, atr(highs, lows, closes, period))
+
+
+def test_bollinger_matches_batch():
+    _, _, closes, _ = make_bars(count=20000)
+    for period in (5, 20):
+        indicator = BollingerBands(period, 2.0)
+        streamed = [indicator.update(c) for c in closes]
+        batched = bollinger_bands(closes, period, 2.0)
+        for band in range(3):
+            assert_equivalent(stream(v[band] if v else None for v in streamed), batched[band])
+
+
+def test_vwap_matches_batch_with_sessions():
+    _, _, closes, volumes = make_bars()
+    session_starts = np.zeros(len(closes), dtype=bool)
+    session_starts[::1440] = True
+
+    indicator = VWAP()
+    streamed = []
+    for price, volume, new_session in zip(closes, volumes, session_starts):
+        if new_session:
+            indicator.reset()
+        streamed.append(indicator.update(price, volume))
+
+    assert_equivalent(stream(streamed), vwap(closes, volumes, session_starts))
+
+
+def test_short_history_is_all_nan():
+    assert np.isnan(ema([1.0, 2.0], 5)).all()
+    assert np.isnan(rsi([1.0, 2.0], 5)).all()
+    assert np.isnan(bollinger_bands([1.0, 2.0], 5)[0]).all()
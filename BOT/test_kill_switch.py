@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Kill switch against the local mock exchange
+"""
+
+import os
+
+import pytest
+
+from kill_switch import KillSwitchEngaged
+from mock_exchange import BANNED, FaultPlan, MockExchange, MockExchangeServer
+from settings import Settings
+from trading_bot import TradingBot
+
+SYMBOLS = {f'C{i:02d}USDT': {'price': 100.0 + i, 'tickSize': '0.01', 'stepSize': '0.001', 'minQty': '0.001'}
+           for i in range(20)}
+
+# Whole kill switch run against a local mock: 2 snapshot + 20 cancel + 20 close + 1 verify requests
+LATENCY_BUDGET_MS = 1000
+
+
+def test_kill_switch_cancels_flattens_and_blocks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(symbols=SYMBOLS)
+    settings = Settings(symbols=tuple(SYMBOLS), default_symbol='C00USDT', log_to_console=False)
+
+    with MockExchangeServer(exchange) as server:
+        bot = TradingBot('key', 'secret', sync_clock=False, client=server.client(), settings=settings)
+        for i, symbol in enumerate(SYMBOLS):
+            side = 'BUY' if i % 2 else 'SELL'
+            bot.place_market_order(symbol, side, 0.5)
+            bot.place_limit_order(symbol, 'BUY', 0.1, 50.0)
+            bot.place_limit_order(symbol, 'SELL', 0.1, 200.0)
+        assert len(exchange.open_orders()) == 40
+
+        report = bot.kill_switch.trigger('test')
+
+        assert report['errors'] == []
+        assert sorted(report['cancelled']) == sorted(SYMBOLS)
+        assert len(report['flattened']) == len(SYMBOLS)
+        assert report['remaining'] == []
+        assert [step['step'] for step in report['steps']] == ['snapshot', 'cancel_all', 'flatten', 'verify']
+        assert report['total_ms'] < LATENCY_BUDGET_MS
+        assert exchange.open_orders() == []
+        assert all(position['qty'] == 0 for position in exchange.positions.values())
+        assert bot.get_open_orders() == []
+
+        # Blocked here and in any other bot sharing the state file
+        with pytest.raises(KillSwitchEngaged):
+            bot.place_market_order('C00USDT', 'BUY', 0.1)
+        other = TradingBot('key', 'secret', sync_clock=False, client=server.client(), settings=settings)
+        with pytest.raises(KillSwitchEngaged):
+            other.place_limit_order('C01USDT', 'BUY', 0.1, 50.0)
+
+        other.kill_switch.rearm()
+        assert not bot.kill_switch.engaged
+        order = bot.place_market_order('C00USDT', 'BUY', 0.1)
+        assert order['status'] == 'FILLED'
+        other.close()
+        bot.close()
+
+
+def test_failed_snapshot_still_cancels_and_flattens(make_bot):
+    faults = FaultPlan(paths=['/fapi/v1/openOrders'])
+    exchange = MockExchange(faults=faults)
+    bot = make_bot(exchange)
+    bot.place_market_order('BTCUSDT', 'BUY', 0.01)
+    bot.place_limit_order('ETHUSDT', 'BUY', 0.1, 2000)
+    faults.inject(BANNED)
+
+    report = bot.kill_switch.trigger('test')
+
+    assert len(report['errors']) == 1 and report['errors'][0].startswith('snapshot open orders:')
+    # Open orders unknown: one cancel-all for every configured symbol
+    assert report['cancelled'] == sorted(exchange.symbols)
+    assert exchange.requests[('DELETE', '/fapi/v1/allOpenOrders')] == len(exchange.symbols)
+    assert report['flattened'] == ['BTCUSDT BOTH'] and report['remaining'] == []
+    assert exchange.open_orders() == []
+    assert [step['step'] for step in report['steps']] == ['snapshot', 'cancel_all', 'flatten', 'verify']
+
+
+def test_state_file_is_resolved_once(make_bot, tmp_path):
+    bot = make_bot(MockExchange())
+    assert bot.kill_switch.state_file == str(tmp_path / 'logs' / 'kill_switch.json')
+
+    # Changing directory later does not move it
+    os.chdir(tmp_path / 'logs')
+    bot.kill_switch.trigger('moved', flatten=False)
+    assert os.path.exists(tmp_path / 'logs' / 'kill_switch.json')
+    with pytest.raises(KillSwitchEngaged):
+        bot.place_market_order('BTCUSDT', 'BUY', 0.01)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Leverage and margin type bootstrap served from its cache against the mock exchange
+"""
+
+from mock_exchange import MockExchange
+
+SNAPSHOT = ('GET', '/fapi/v2/positionRisk')
+CHANGES = (('POST', '/fapi/v1/leverage'), ('POST', '/fapi/v1/marginType'))
+SYMBOLS = {symbol: {'price': price, 'tickSize': '0.01', 'stepSize': '0.001', 'minQty': '0.001'}
+           for symbol, price in (('BTCUSDT', 45000.0), ('ETHUSDT', 3000.0), ('SOLUSDT', 100.0))}
+
+
+def request_counts(exchange):
+    return exchange.requests[SNAPSHOT], sum(exchange.requests[key] for key in CHANGES)
+
+
+def test_second_bootstrap_uses_the_cache(make_bot):
+    exchange = MockExchange(symbols=SYMBOLS)
+    bot = make_bot(exchange)
+
+    first = bot.bootstrap_leverage(leverage=5, margin_type='ISOLATED', refresh=False)
+    assert sorted(first['changed']) == sorted(SYMBOLS)
+    assert request_counts(exchange) == (1, 6)
+    assert bot.leverage_manager.get('ETHUSDT') == {'leverage': 5, 'margin_type': 'ISOLATED'}
+
+    # Same target again: answered from the cache, nothing is sent
+    second = bot.bootstrap_leverage(leverage=5, margin_type='ISOLATED', refresh=False)
+    assert second['changes'] == [] and second['changed'] == []
+    assert request_counts(exchange) == (1, 6)
+
+    # Only the difference goes out
+    third = bot.bootstrap_leverage(['BTCUSDT', 'ETHUSDT'], leverage=10, margin_type='ISOLATED', refresh=False)
+    assert sorted(third['changed']) == ['BTCUSDT', 'ETHUSDT']
+    assert request_counts(exchange) == (1, 8)
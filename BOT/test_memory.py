@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Bounded caches, order index tombstones, log retention and the memory report
+"""
+
+import os
+
+import order_index
+from cache import TTLCache
+from memory import deep_sizeof
+from mock_exchange import MockExchange
+
+
+def test_ttl_cache_caps_size_lru_first():
+    cache = TTLCache(ttl=60, max_size=3)
+    cache.set_many({'a': 1, 'b': 2, 'c': 3})
+    assert cache.get('a') == 1          # 'a' is now the most recently used
+    cache.set('d', 4)
+    assert cache.peek('b') is None      # least recently used goes first
+    assert [cache.peek(k) for k in 'acd'] == [1, 3, 4]
+    assert cache.stats()['evictions'] == 1
+
+    expiring = TTLCache(ttl=0, max_size=2)
+    expiring.set_many({'x': 1, 'y': 2})
+    assert expiring.purge() == 2 and len(expiring) == 0
+
+
+def test_tombstones_are_pruned_without_snapshots(make_bot, monkeypatch):
+    monkeypatch.setattr(order_index, 'TOMBSTONE_TTL_MS', 0)
+    bot = make_bot(MockExchange())
+    index = bot.order_index
+    for order_id in range(5000):
+        index.on_cancel({'orderId': order_id})
+    assert len(index._removed) <= 2 * order_index.TOMBSTONE_PRUNE_MIN
+
+
+def test_old_run_logs_are_deleted(make_bot, tmp_path):
+    os.makedirs('logs', exist_ok=True)
+    for run in range(5):
+        for suffix in ('', '.1'):
+            (tmp_path / 'logs' / f'trading_bot_20250101_00000{run}.log{suffix}').write_text('x')
+    (tmp_path / 'logs' / 'other.txt').write_text('kept')
+
+    bot = make_bot(MockExchange(), log_retention=3)
+    bot.logger.warning('current run')
+
+    assert sorted(os.listdir('logs')) == sorted([
+        'other.txt', 'trading_bot_20250101_000003.log', 'trading_bot_20250101_000003.log.1',
+        'trading_bot_20250101_000004.log', 'trading_bot_20250101_000004.log.1',
+        os.path.basename(bot._file_handler.baseFilename)])
+
+
+def test_memory_report_covers_subsystems(make_bot):
+    bot = make_bot(MockExchange())
+    for price in (40000, 40000.1, 40000.2):
+        bot.place_limit_order('BTCUSDT', 'BUY', 0.001, price)
+
+    rows = {row['subsystem']: row for row in bot.memory_report()}
+    assert rows['order_index']['entries'] == 3
+    assert rows['symbol_cache']['entries'] == 3
+    assert all(row['bytes'] > 0 for row in rows.values())
+    # Shared objects are counted once
+    assert deep_sizeof([b'x' * 1000] * 3) < 2000
+
+
+def test_run_log_rotates_and_keeps_backups(make_bot):
+    bot = make_bot(MockExchange(), log_max_bytes=2000, log_backups=2)
+    for i in range(200):
+        bot.logger.info(f"record {i:04d} " + 'x' * 40)
+    base = bot._file_handler.baseFilename
+    files = sorted(name for name in os.listdir('logs') if name.startswith(os.path.basename(base)))
+    assert len(files) == 3
+    assert all(os.path.getsize(os.path.join('logs', name)) < 2200 for name in files)
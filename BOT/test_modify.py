@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Order amends, batch amends and the cancel/replace fallback against the mock exchange
+"""
+
+from mock_exchange import MockExchange
+
+AMEND = ('PUT', '/fapi/v1/order')
+BATCH_AMEND = ('PUT', '/fapi/v1/batchOrders')
+CANCEL = ('DELETE', '/fapi/v1/order')
+
+
+def test_amend_keeps_the_order(make_bot):
+    exchange = MockExchange()
+    bot = make_bot(exchange)
+    order = bot.place_limit_order('BTCUSDT', 'BUY', 0.01, 40000)
+
+    amended = bot.modify_order('BTCUSDT', order['orderId'], 40100, quantity=0.02)
+    assert amended['orderId'] == order['orderId'] and 'replacedOrderId' not in amended
+    assert (float(amended['price']), float(amended['origQty'])) == (40100, 0.02)
+    assert bot.order_index.at_level('BTCUSDT', 'BUY', 40100)[0]['orderId'] == order['orderId']
+
+    # Nothing to change: the order is returned as it is
+    assert bot.modify_order('BTCUSDT', order['orderId'], 40100)['orderId'] == order['orderId']
+    assert exchange.requests[AMEND] == 2 and exchange.requests[CANCEL] == 0
+
+
+def test_batch_amend_reports_failures_in_place(make_bot):
+    exchange = MockExchange()
+    bot = make_bot(exchange)
+    orders = [bot.place_limit_order('ETHUSDT', 'SELL', 0.1, 3100 + i) for i in range(3)]
+    # Cancelled behind the bot's back: the index still has it open
+    exchange.handle('DELETE', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'orderId': str(orders[1]['orderId'])})
+
+    results = bot.modify_orders([{'symbol': 'ETHUSDT', 'order_id': order['orderId'], 'price': 3200 + i}
+                                 for i, order in enumerate(orders)])
+
+    assert [r.get('orderId') for r in results] == [orders[0]['orderId'], None, orders[2]['orderId']]
+    assert results[1]['code'] == -2013
+    assert [float(r['price']) for r in (results[0], results[2])] == [3200, 3202]
+    assert exchange.requests[BATCH_AMEND] == 1
+
+
+def test_fallback_replaces_and_keeps_client_id(make_bot):
+    exchange = MockExchange(amend_limit=1)
+    bot = make_bot(exchange)
+    order = bot.place_limit_order('BTCUSDT', 'BUY', 0.01, 40000)
+    bot.modify_order('BTCUSDT', order['orderId'], 40100)
+
+    # Amend limit reached (-5026): cancelled and replaced under the same client ID
+    replacement = bot.modify_order('BTCUSDT', order['orderId'], 40200)
+    assert replacement['replacedOrderId'] == order['orderId'] != replacement['orderId']
+    assert replacement['clientOrderId'] == order['clientOrderId']
+    assert bot.order_index.get_by_client_id(order['clientOrderId'])['orderId'] == replacement['orderId']
+    assert [(o['orderId'], float(o['price'])) for o in exchange.open_orders()] == [(replacement['orderId'], 40200)]
+
+    # The batch path falls back the same way, here with an explicit new client ID
+    bot.modify_orders([{'symbol': 'BTCUSDT', 'order_id': replacement['orderId'], 'price': 40300}])
+    second, = bot.modify_orders([{'symbol': 'BTCUSDT', 'order_id': replacement['orderId'], 'price': 40400,
+                                  'client_order_id': 'replaced-1'}])
+    assert second['replacedOrderId'] == replacement['orderId']
+    assert [o['clientOrderId'] for o in exchange.open_orders()] == ['replaced-1']
+    assert bot.order_index.get_by_client_id(order['clientOrderId']) is None
+
+
+def test_fallback_skips_a_replacement_that_already_filled(make_bot, monkeypatch):
+    exchange = MockExchange(amend_limit=0)
+    bot = make_bot(exchange)
+    order = bot.place_limit_order('BTCUSDT', 'BUY', 0.01, 40000)
+
+    # 0.006 fills between the rejected amend and the cancel: more than the new quantity
+    cancel_order = bot.cancel_order
+
+    def fill_then_cancel(symbol, order_id):
+        exchange._fill(exchange.orders[order_id], 40000, maker=True, quantity=0.006)
+        return cancel_order(symbol, order_id)
+
+    monkeypatch.setattr(bot, 'cancel_order', fill_then_cancel)
+    result = bot.modify_order('BTCUSDT', order['orderId'], 40100, quantity=0.004)
+
+    assert result['orderId'] == order['orderId'] and result['status'] == 'CANCELED'
+    assert float(result['executedQty']) == 0.006
+    assert exchange.requests[('POST', '/fapi/v1/order')] == 1
+    assert exchange.open_orders() == [] and bot.order_index.orders('BTCUSDT') == []
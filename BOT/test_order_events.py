@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Order event capture, rolling columnar files and fill quality queries against the mock exchange
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from mock_exchange import MockExchange
+
+pytest.importorskip('pyarrow')
+
+from order_events import OrderEventLog, fill_quality, load_events  # noqa: E402
+
+
+def stream_fill(order_id: int, symbol: str = 'BTCUSDT', quantity: str = '0.01', price: str = '40000') -> dict:
+    return {'s': symbol, 'i': order_id, 'c': f'c{order_id}', 'S': 'BUY', 'o': 'LIMIT', 'f': 'GTC',
+            'p': price, 'q': quantity, 'X': 'FILLED', 'x': 'TRADE', 'z': quantity, 'ap': price,
+            'l': quantity, 'L': price, 'T': 1, 'm': True, 'n': '0.001'}
+
+
+def test_order_activity_is_captured(make_bot):
+    bot = make_bot(MockExchange(), order_events='PARQUET')
+    bot.books.load_snapshot('BTCUSDT', {'bids': [['44980', '5']], 'asks': [['45000', '5']]})
+
+    bot.place_market_order('BTCUSDT', 'BUY', 0.01)
+    resting = bot.place_limit_order('BTCUSDT', 'BUY', 0.01, 40000)
+    bot.modify_order('BTCUSDT', resting['orderId'], 40100)
+    batch = bot.place_limit_orders([{'symbol': 'BTCUSDT', 'side': 'SELL', 'quantity': 0.01, 'price': 50000 + i}
+                                    for i in range(3)])
+    bot.cancel_orders('BTCUSDT', [order['orderId'] for order in batch])
+    with pytest.raises(BinanceAPIException):
+        bot.cancel_order('BTCUSDT', 999999)
+    bot.order_index.on_stream_update(stream_fill(resting['orderId'], price='40100'))
+    bot.order_events.flush(close=True)
+
+    events = load_events('order_events')
+    assert events.column('action').to_pylist() == ['new', 'new', 'amend', 'new', 'new', 'new',
+                                                   'cancel', 'cancel', 'cancel', 'cancel', 'update']
+    rest = [row for row in events.to_pylist() if row['source'] == 'rest']
+    assert all(row['latency_ms'] > 0 and row['arrival_mid'] == 44990 for row in rest)
+    assert rest[-1]['error_code'] == -2013 and rest[-1]['order_id'] == 999999
+
+    quality = fill_quality(events, by='order_type')
+    assert [(r['group'], r['orders'], r['filled_orders']) for r in quality] == [('LIMIT', 4, 1), ('MARKET', 1, 1)]
+    # Market buy filled at the ask, half the spread above the arrival mid
+    assert quality[1]['slippage_bps'] == pytest.approx(10 / 44990 * 1e4)
+    assert quality[0]['fill_rate'] == pytest.approx(0.25)
+
+
+def test_files_roll_and_queries_prune(tmp_path):
+    directory = str(tmp_path / 'events')
+    for fmt in ('PARQUET', 'ARROW'):
+        log = OrderEventLog(directory, fmt, roll_rows=3, batch_rows=1000)
+        for order_id in range(7):
+            log.record_update(stream_fill(order_id, symbol='ETHUSDT' if order_id % 2 else 'BTCUSDT'))
+            log.flush()
+        log.stop()
+
+    files = [name for _, _, names in os.walk(directory) for name in names]
+    assert len(files) == 6 and not any(name.startswith('.') for name in files)
+    assert sum(name.endswith('.arrow') for name in files) == 3
+
+    assert load_events(directory).num_rows == 14
+    assert load_events(directory, symbols=['ETHUSDT'], columns=['order_id']).column(0).to_pylist() == [1, 3, 5] * 2
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    assert load_events(directory, start=tomorrow).num_rows == 0
+    assert load_events(str(tmp_path / 'missing')).num_rows == 0
+
+
+def test_idle_file_closes_on_time(tmp_path):
+    directory = str(tmp_path / 'events')
+    log = OrderEventLog(directory, roll_seconds=0.05)
+    log.record_update(stream_fill(1))
+    log.flush()
+    assert load_events(directory).num_rows == 0   # Still being written
+
+    # No new rows: the next flush still closes the file once it is due
+    time.sleep(0.06)
+    log.flush()
+    assert load_events(directory).num_rows == 1 and log.files_written == 1
+    log.stop()
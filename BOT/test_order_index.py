@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+When open-order queries are answered from the local index and when they go to the exchange
+"""
+
+from mock_exchange import MockExchange
+
+OPEN_ORDERS = ('GET', '/fapi/v1/openOrders')
+
+
+def test_index_needs_a_live_user_stream(make_bot):
+    exchange = MockExchange()
+    bot, other = make_bot(exchange), make_bot(exchange)
+    order = bot.place_limit_order('BTCUSDT', 'BUY', 0.001, 40000)
+    bot.reconcile_open_orders('BTCUSDT')
+
+    # No stream: every query is a snapshot, so a cancel made elsewhere shows at once
+    other.cancel_order('BTCUSDT', order['orderId'])
+    before = exchange.requests[OPEN_ORDERS]
+    assert bot.get_open_orders('BTCUSDT') == []
+    assert exchange.requests[OPEN_ORDERS] == before + 1
+
+    # Live stream: the first query reseeds, later ones are served from memory
+    bot.order_index.set_stream_live(True)
+    bot.place_limit_order('BTCUSDT', 'BUY', 0.001, 40000)
+    assert len(bot.get_open_orders('BTCUSDT')) == 1
+    assert len(bot.get_open_orders('BTCUSDT')) == 1
+    assert exchange.requests[OPEN_ORDERS] == before + 2
+
+    # A dropped stream falls back to snapshots, and a reconnect reseeds before trusting the index
+    bot.order_index.set_stream_live(False)
+    bot.get_open_orders('BTCUSDT')
+    bot.order_index.set_stream_live(True)
+    assert not bot.order_index.is_authoritative('BTCUSDT')
+    bot.get_open_orders('BTCUSDT')
+    bot.get_open_orders('BTCUSDT')
+    assert exchange.requests[OPEN_ORDERS] == before + 4
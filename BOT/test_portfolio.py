@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Vectorized liquidation price and margin ratio against the scalar exchange formula
+"""
+
+import pytest
+
+from portfolio import PortfolioCalculator
+
+BRACKETS = [
+    {'symbol': 'BTCUSDT', 'brackets': [
+        {'notionalFloor': 0, 'maintMarginRatio': 0.004, 'cum': 0},
+        {'notionalFloor': 250000, 'maintMarginRatio': 0.005, 'cum': 250},
+    ]},
+    {'symbol': 'ETHUSDT', 'brackets': [{'notionalFloor': 0, 'maintMarginRatio': 0.005, 'cum': 0}]},
+]
+
+
+def scalar_liquidation(balance, other_mm, other_upnl, cum, side, size, entry, ratio):
+    """One-way mode liquidation price, written out as in the exchange documentation"""
+    return (balance - other_mm + other_upnl + cum - side * size * entry) / (size * ratio - side * size)
+
+
+def position(symbol, amount, entry, mark, margin_type='cross', isolated_wallet=0):
+    return {'symbol': symbol, 'positionAmt': str(amount), 'entryPrice': str(entry), 'markPrice': str(mark),
+            'leverage': '10', 'marginType': margin_type, 'isolatedWallet': str(isolated_wallet)}
+
+
+def test_cross_positions_match_scalar_formula():
+    calculator = PortfolioCalculator([position('BTCUSDT', 1, 40000, 41000), position('ETHUSDT', -10, 2000, 2100)],
+                                     BRACKETS, wallet_balance=10000)
+    btc, eth = calculator.positions()
+    btc_mm, eth_mm = 41000 * 0.004, 21000 * 0.005
+    btc_upnl, eth_upnl = 1000, -1000
+
+    assert btc['maintMargin'] == pytest.approx(btc_mm)
+    assert btc['marginRatio'] == eth['marginRatio'] == pytest.approx((btc_mm + eth_mm) / (10000 + btc_upnl + eth_upnl))
+    # Each cross leg is liquidated against the wallet less the other legs' margin, plus their PnL
+    assert btc['liquidationPrice'] == pytest.approx(scalar_liquidation(10000, eth_mm, eth_upnl, 0, 1, 1, 40000, 0.004))
+    assert eth['liquidationPrice'] == pytest.approx(scalar_liquidation(10000, btc_mm, btc_upnl, 0, -1, 10, 2000, 0.005))
+
+
+def test_isolated_position_uses_its_own_margin():
+    calculator = PortfolioCalculator([position('BTCUSDT', -0.5, 40000, 39000, 'isolated', 4000),
+                                      position('ETHUSDT', 10, 2000, 1500)], BRACKETS, wallet_balance=10000)
+    btc = calculator.positions()[0]
+
+    assert btc['marginRatio'] == pytest.approx(19500 * 0.004 / (4000 + 500))
+    assert btc['liquidationPrice'] == pytest.approx(scalar_liquidation(4000, 0, 0, 0, -1, 0.5, 40000, 0.004))
+    # The losing cross position does not move the isolated one
+    assert calculator.summary()['marginRatio'] == pytest.approx(15000 * 0.005 / (10000 - 5000))
+
+
+def test_liquidation_re_reads_the_maintenance_tier():
+    # Large enough that the notional at liquidation falls in the second tier
+    calculator = PortfolioCalculator([position('BTCUSDT', 10, 40000, 40000)], BRACKETS, wallet_balance=100000)
+    liquidation = calculator.positions()[0]['liquidationPrice']
+    assert liquidation == pytest.approx(scalar_liquidation(100000, 0, 0, 250, 1, 10, 40000, 0.005))
+    assert 10 * liquidation >= 250000
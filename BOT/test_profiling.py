@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Profiler toggling, method timing and collapsed-stack output against the mock exchange
+"""
+
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from mock_exchange import MockExchange
+from profiling import StackSampler
+
+
+def busy_wait(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_window_times_methods_and_writes_stacks(make_bot, tmp_path):
+    bot = make_bot(MockExchange())
+    assert not bot.profiler.enabled
+    assert 'place_limit_order' not in vars(bot)
+
+    bot.profiler.start()
+    for _ in range(20):
+        order = bot.place_limit_order('BTCUSDT', 'BUY', 0.001, 40000)
+        bot.cancel_order('BTCUSDT', order['orderId'])
+    busy_wait(0.1)
+    bot.profiler.stop()
+
+    # Timing wrappers are gone once the window closes
+    assert 'place_limit_order' not in vars(bot)
+    report = bot.profiler.report()
+    methods = {row['method']: row for row in report['methods']}
+    assert methods['place_limit_order']['calls'] == 20
+    assert methods['_api_call']['calls'] == 40
+    assert methods['place_limit_order']['total_ms'] >= methods['validate_order_params']['total_ms']
+    assert report['samples'] > 0
+
+    path = bot.profiler.dump(str(tmp_path / 'window.folded'))
+    lines = open(path).read().splitlines()
+    assert lines and all(line.startswith('thread:') and line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('busy_wait (test_profiling.py' in line for line in lines)
+
+
+def test_sampler_skips_idle_threads():
+    release = threading.Event()
+    idle = threading.Thread(target=release.wait, name='IdleWorker', daemon=True)
+    idle.start()
+    time.sleep(0.05)  # Until it blocks
+    try:
+        sampler, everything = StackSampler(), StackSampler(skip_idle=False)
+        sampler.sample()
+        everything.sample()
+    finally:
+        release.set()
+        idle.join()
+
+    assert any('test_sampler_skips_idle_threads' in stack for stack in sampler.stacks)
+    assert not any(stack.startswith('thread:IdleWorker;') for stack in sampler.stacks)
+    idle_stacks = [stack for stack in everything.stacks if stack.startswith('thread:IdleWorker;')]
+    assert len(idle_stacks) == 1 and ';wait (threading.py:' in idle_stacks[0]
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR2'), reason='POSIX signals only')
+def test_signal_toggles_and_dumps(make_bot, tmp_path):
+    bot = make_bot(MockExchange())
+    bot.profiler.directory = str(tmp_path / 'profiles')
+    previous = signal.getsignal(signal.SIGUSR2)
+    try:
+        assert bot.profiler.install_signal()
+        os.kill(os.getpid(), signal.SIGUSR2)
+        deadline = time.monotonic() + 5
+        while not bot.profiler.enabled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert bot.profiler.enabled
+        busy_wait(0.05)
+
+        os.kill(os.getpid(), signal.SIGUSR2)
+        dumps = []
+        while not dumps and time.monotonic() < deadline:
+            time.sleep(0.01)
+            if os.path.isdir(bot.profiler.directory):
+                dumps = [name for name in os.listdir(bot.profiler.directory) if name.endswith('.folded')]
+        assert not bot.profiler.enabled
+        assert dumps
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
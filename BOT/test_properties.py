@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Property-based tests for order validation, price rounding, quote diffing and routing
+"""
+
+from decimal import Decimal
+
+from hypothesis import given, settings, strategies as st
+
+from book import OrderBook
+from quote_engine import Quote, QuoteEngine, diff_quotes
+from router import IOC, MARKET, POST, SmartOrderRouter
+from trading_bot import _plain
+
+# Default mock symbols: BTCUSDT tick 0.10 / step 0.001, BNBUSDT tick 0.010 / step 0.01
+SYMBOL_GRIDS = {'BTCUSDT': (Decimal('0.1'), Decimal('0.001')), 'BNBUSDT': (Decimal('0.01'), Decimal('0.01'))}
+
+symbols = st.sampled_from(sorted(SYMBOL_GRIDS))
+sides = st.sampled_from(['BUY', 'SELL'])
+prices = st.floats(min_value=1.0, max_value=100000.0, allow_nan=False, allow_infinity=False)
+quantities = st.floats(min_value=0.001, max_value=1000.0, allow_nan=False, allow_infinity=False)
+
+
+@settings(deadline=None)
+@given(symbols, sides, st.integers(1, 10 ** 6), st.integers(1, 10 ** 8))
+def test_on_grid_orders_validate(mock_bot, symbol, side, steps, ticks):
+    tick, step = SYMBOL_GRIDS[symbol]
+    quantity, price = float(steps * step), float(ticks * tick)
+    assert mock_bot.validate_order_params(symbol, side, 'LIMIT', quantity, price) == (True, '')
+
+
+@settings(deadline=None)
+@given(symbols, st.integers(1, 10 ** 6), st.integers(1, 9))
+def test_off_grid_quantity_is_rejected(mock_bot, symbol, steps, fraction):
+    _, step = SYMBOL_GRIDS[symbol]
+    quantity = float(steps * step + step * fraction / 10)
+    valid, error = mock_bot.validate_order_params(symbol, 'BUY', 'MARKET', quantity)
+    assert not valid and 'multiple' in error
+
+
+@settings(deadline=None)
+@given(symbols, st.integers(1, 9))
+def test_below_min_quantity_is_rejected(mock_bot, symbol, fraction):
+    _, step = SYMBOL_GRIDS[symbol]
+    valid, error = mock_bot.validate_order_params(symbol, 'BUY', 'MARKET', float(step * fraction / 10))
+    assert not valid and 'at least' in error
+
+
+@given(st.decimals(min_value=Decimal('1e-8'), max_value=Decimal('1e9'), places=8))
+def test_plain_round_trips(value):
+    text = _plain(value)
+    assert 'E' not in text.upper()
+    assert Decimal(text) == value
+
+
+@settings(deadline=None)
+@given(symbols, st.lists(st.tuples(sides, prices, quantities), max_size=30))
+def test_normalized_quotes_are_on_grid_and_never_more_aggressive(mock_bot, symbol, raw):
+    tick, step = SYMBOL_GRIDS[symbol]
+    engine = QuoteEngine(mock_bot, max_orders=10)
+    quotes = [Quote(side, price, quantity) for side, price, quantity in raw]
+    normalized = engine._normalize(symbol, quotes)
+
+    assert len(normalized) <= 10
+    originals = {}
+    for q in quotes:
+        originals.setdefault(q.side, []).append(q)
+    for q in normalized:
+        assert Decimal(str(q.price)) % tick == 0
+        assert Decimal(str(q.quantity)) % step == 0
+        # Each normalized quote comes from an original one that is at least as aggressive and as large
+        assert any((q.price <= o.price + 1e-9 if q.side == 'BUY' else q.price >= o.price - 1e-9)
+                   and q.quantity <= o.quantity + 1e-12 for o in originals[q.side])
+
+
+live_orders = st.lists(st.tuples(sides, st.integers(1, 50), st.integers(1, 5)), max_size=12).map(
+    lambda rows: [{'orderId': i, 'side': side, 'price': str(float(price)), 'origQty': str(float(qty)),
+                   'executedQty': '0'} for i, (side, price, qty) in enumerate(rows)])
+desired_quotes = st.lists(st.tuples(sides, st.integers(1, 50), st.integers(1, 5)), max_size=12).map(
+    lambda rows: [Quote(side, float(price), float(qty)) for side, price, qty in rows])
+
+
+@given(desired_quotes, live_orders)
+def test_quote_diff_accounts_for_every_order_and_quote(desired, live):
+    diff = diff_quotes(desired, live)
+    assert diff.kept + len(diff.amends) + len(diff.cancels) == len(live)
+    assert diff.kept + len(diff.amends) + len(diff.creates) == len(desired)
+    assert all(order['side'] == quote.side for order, quote in diff.amends)
+    touched = [o['orderId'] for o in diff.cancels] + [o['orderId'] for o, _ in diff.amends]
+    assert len(touched) == len(set(touched))
+
+
+@given(desired_quotes)
+def test_quote_diff_of_a_ladder_against_itself_is_empty(desired):
+    live = [{'orderId': i, 'side': q.side, 'price': str(q.price), 'origQty': str(q.quantity), 'executedQty': '0'}
+            for i, q in enumerate(desired)]
+    diff = diff_quotes(desired, live)
+    assert (diff.kept, diff.amends, diff.cancels, diff.creates) == (len(desired), [], [], [])
+
+
+def book_levels(best: int, sizes, direction: int):
+    """Levels one tick (0.1) apart starting at `best` ticks"""
+    return [(round((best + direction * i) * 0.1, 1), size) for i, size in enumerate(sizes)]
+
+
+level_sizes = st.lists(st.floats(min_value=0.001, max_value=5.0, allow_nan=False), min_size=1, max_size=20)
+
+
+@settings(deadline=None)
+@given(sides, st.integers(100000, 500000), st.integers(1, 20), level_sizes, level_sizes,
+       st.floats(min_value=0.001, max_value=50.0), st.floats(min_value=0.0, max_value=1.0),
+       st.floats(min_value=0.5, max_value=100.0))
+def test_router_never_prices_beyond_the_slippage_cap(mock_bot, side, bid, spread, bid_sizes, ask_sizes,
+                                                     quantity, urgency, max_slippage_bps):
+    book = OrderBook('BTCUSDT')
+    book.update(book_levels(bid, bid_sizes, -1), book_levels(bid + spread, ask_sizes, 1))
+    router = SmartOrderRouter(mock_bot, None)
+    decision = router.decide('BTCUSDT', side, quantity, urgency, max_slippage_bps, book=book)
+
+    if decision.route == POST:
+        assert decision.price == (book.best_bid if side == 'BUY' else book.best_ask)
+        assert decision.time_in_force == 'GTX'
+        return
+    assert decision.route in (IOC, MARKET)
+    assert decision.expected_slippage_bps <= max_slippage_bps + 1e-6
+    if decision.route == IOC:
+        limit_bps = ((decision.price - decision.arrival_mid) if side == 'BUY'
+                     else (decision.arrival_mid - decision.price)) / decision.arrival_mid * 1e4
+        assert limit_bps <= max_slippage_bps + 1e-6
+        assert Decimal(str(decision.price)) % Decimal('0.1') == 0
+    else:
+        assert book.sweep(side, quantity).filled >= quantity
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Quote engine syncs against the mock exchange
+"""
+
+import time
+
+from mock_exchange import MockExchange
+from quote_engine import Quote, QuoteEngine
+
+
+def test_replaced_quotes_are_still_pulled_on_stop(make_bot):
+    # No amends allowed: every reprice falls back to cancel/replace (-5026)
+    exchange = MockExchange(amend_limit=0)
+    bot = make_bot(exchange)
+    engine = QuoteEngine(bot, coalesce_ms=0)
+
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44000, 0.01), Quote('SELL', 46000, 0.01)])
+    engine.sync('BTCUSDT')
+    first = {o['orderId'] for o in engine.live_quotes('BTCUSDT')}
+    first_client_ids = {o['clientOrderId'] for o in engine.live_quotes('BTCUSDT')}
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44100, 0.01), Quote('SELL', 45900, 0.01)])
+    diff = engine.sync('BTCUSDT')
+
+    assert len(diff.amends) == 2 and engine.stats['amends'] == 2 and engine.stats['errors'] == 0
+    live = engine.live_quotes('BTCUSDT')
+    assert sorted(float(o['price']) for o in live) == [44100, 45900]
+    assert first.isdisjoint(o['orderId'] for o in live)
+    # Replacements get fresh client IDs under the engine's prefix
+    assert first_client_ids.isdisjoint(o['clientOrderId'] for o in live)
+    assert all(o['clientOrderId'].startswith(engine.prefix) for o in exchange.open_orders())
+
+    engine.stop(cancel=True)
+    assert exchange.open_orders() == []
+
+
+def open_prices(exchange, symbol='BTCUSDT'):
+    return sorted((o['side'], float(o['price'])) for o in exchange.open_orders(symbol))
+
+
+def test_sync_sends_only_the_difference(make_bot):
+    exchange = MockExchange()
+    engine = QuoteEngine(make_bot(exchange))
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44000, 0.01), Quote('BUY', 43900, 0.01),
+                                  Quote('SELL', 46000, 0.01), Quote('SELL', 46100, 0.01)])
+    assert len(engine.sync('BTCUSDT').creates) == 4
+    assert exchange.requests[('POST', '/fapi/v1/batchOrders')] == 1
+
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44000, 0.01), Quote('BUY', 43800, 0.01),
+                                  Quote('BUY', 43700, 0.01), Quote('SELL', 46000, 0.01)])
+    diff = engine.sync('BTCUSDT')
+
+    assert diff.kept == 2
+    assert [(o['price'], q.price) for o, q in diff.amends] == [('43900', 43800)]
+    assert [o['price'] for o in diff.cancels] == ['46100']
+    assert diff.creates == [Quote('BUY', 43700, 0.01)]
+    assert open_prices(exchange) == [('BUY', 43700), ('BUY', 43800), ('BUY', 44000), ('SELL', 46000)]
+    assert engine.stats['errors'] == 0
+
+
+def test_quote_filled_unseen_is_recreated(make_bot):
+    # No user data stream: the index never hears of the fill, so live quotes come from a snapshot
+    exchange = MockExchange()
+    bot = make_bot(exchange)
+    engine = QuoteEngine(bot)
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44000, 0.01)])
+    engine.sync('BTCUSDT')
+    exchange.set_mark('BTCUSDT', 43990)
+    assert exchange.open_orders() == []
+    exchange.set_mark('BTCUSDT', 45000)
+
+    diff = engine.sync('BTCUSDT')
+    assert diff.kept == 0 and len(diff.creates) == 1
+    assert open_prices(exchange) == [('BUY', 44000)]
+    assert engine.stats['errors'] == 0
+
+
+def test_updates_within_the_window_coalesce(make_bot):
+    exchange = MockExchange()
+    engine = QuoteEngine(make_bot(exchange), coalesce_ms=50)
+    engine.start()
+    try:
+        for i in range(5):
+            engine.set_quotes('BTCUSDT', [Quote('BUY', 44000 + i * 10, 0.01)])
+        time.sleep(0.3)
+    finally:
+        engine.stop(cancel=False)
+
+    assert engine.stats['updates'] == 5 and engine.stats['syncs'] == 1
+    assert open_prices(exchange) == [('BUY', 44040)]
+
+
+def test_budgets_limit_orders_and_actions(make_bot):
+    exchange = MockExchange()
+    engine = QuoteEngine(make_bot(exchange), max_orders=2, max_actions=3)
+
+    # Only the best bid and ask of four levels rest
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44000, 0.01), Quote('BUY', 43900, 0.01),
+                                  Quote('SELL', 46000, 0.01), Quote('SELL', 46100, 0.01)])
+    engine.sync('BTCUSDT')
+    assert open_prices(exchange) == [('BUY', 44000), ('SELL', 46000)]
+
+    # One action left in the window: the bid moves, the ask waits
+    engine.set_quotes('BTCUSDT', [Quote('BUY', 44100, 0.01), Quote('SELL', 45900, 0.01)])
+    engine.sync('BTCUSDT')
+    assert open_prices(exchange) == [('BUY', 44100), ('SELL', 46000)]
+    assert engine.stats['deferred'] == 1 and engine.stats['amends'] == 1
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Smart order routing decisions from a local book
+"""
+
+import time
+
+import pytest
+
+from mock_exchange import MockExchange
+from router import IOC, MARKET, POST, RouterThresholds, SmartOrderRouter
+
+# Mid 44995; BTCUSDT tick 0.1
+DEPTH = {'bids': [['44990', '1'], ['44980', '1']],
+         'asks': [['45000', '0.5'], ['45010', '0.5'], ['45100', '5']]}
+
+
+@pytest.fixture
+def bot(make_bot):
+    bot = make_bot(MockExchange())
+    bot.books.load_snapshot('BTCUSDT', DEPTH)
+    return bot
+
+
+def test_patient_order_posts(bot):
+    decision = bot.router.decide('BTCUSDT', 'BUY', 1, urgency=0.1)
+    assert (decision.route, decision.time_in_force, decision.price) == (POST, 'GTX', 44990)
+    assert decision.reason == 'patient'
+
+
+def test_urgent_order_the_book_absorbs_goes_market(bot):
+    decision = bot.router.decide('BTCUSDT', 'BUY', 1, urgency=0.9, max_slippage_bps=10)
+    assert (decision.route, decision.order_type, decision.price) == (MARKET, 'MARKET', 0.0)
+    assert decision.expected_price == pytest.approx(45005)
+    assert decision.expected_slippage_bps == pytest.approx(10 / 44995 * 1e4)
+
+
+def test_partial_fill_is_capped(bot):
+    # Only 1 of 2 within 10 bps: IOC at the cap, floored to the tick, even when urgent
+    decision = bot.router.decide('BTCUSDT', 'BUY', 2, urgency=0.9, max_slippage_bps=10)
+    assert (decision.route, decision.time_in_force) == (IOC, 'IOC')
+    assert decision.price == pytest.approx(45039.9)
+    assert decision.reason == 'partial fill up to the cap'
+
+
+def test_nothing_within_the_cap_posts(bot):
+    decision = bot.router.decide('BTCUSDT', 'SELL', 1, urgency=0.9, max_slippage_bps=1)
+    assert (decision.route, decision.price) == (POST, 45000)
+    assert decision.reason == 'nothing to take within the slippage cap'
+
+
+def test_stale_or_missing_book_is_refused(bot):
+    router = SmartOrderRouter(bot, bot.books, RouterThresholds(max_book_age=0.01))
+    snapshot = bot.books.get('BTCUSDT').snapshot()
+    time.sleep(0.02)
+    with pytest.raises(ValueError, match='old'):
+        router.decide('BTCUSDT', 'BUY', 1)
+    with pytest.raises(ValueError, match='No local order book'):
+        router.decide('ETHUSDT', 'BUY', 1)
+
+    # A fresh update replaces the snapshot as a whole; the one taken earlier is unchanged
+    bot.books.load_snapshot('BTCUSDT', {'bids': [['44000', '1']], 'asks': [['44010', '1']]})
+    assert router.decide('BTCUSDT', 'BUY', 1, urgency=0.1).price == 44000
+    assert (snapshot.bids[0][0], snapshot.asks[0][0]) == (44990, 45000)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Settings validation, sources, renames and hot reload
+"""
+
+import json
+import os
+
+import pytest
+
+from mock_exchange import MockExchange
+from settings import Settings, SettingsError, SettingsWatcher, load_settings
+
+
+def test_validate_lists_every_error():
+    with pytest.raises(SettingsError) as raised:
+        Settings(default_leverage=0, log_level='LOUD', universe_size='20', cancel_countdown=5,
+                 default_symbol='ETHUSDT').validate()
+    message = str(raised.value)
+    assert 'default_leverage: must be >= 1' in message
+    assert 'log_level: must be one of DEBUG' in message
+    assert "universe_size: expected int, got '20'" in message
+    assert 'cancel_countdown: must be 0 (disabled) or at least 10 seconds' in message
+    assert 'default_symbol: must be listed in symbols' in message
+
+
+def test_environment_and_overrides_win_over_the_file(tmp_path):
+    config = tmp_path / 'settings.json'
+    config.write_text(json.dumps({'log_level': 'DEBUG', 'universe_size': 5, 'default_leverage': 3}))
+    environ = {'TRADING_BOT_UNIVERSE_SIZE': '7', 'TRADING_BOT_DEFAULT_LEVERAGE': '4'}
+
+    settings = load_settings(str(config), environ=environ, overrides={'default_leverage': 5, 'log_level': None})
+    assert (settings.log_level, settings.universe_size, settings.default_leverage) == ('DEBUG', 7, 5)
+
+    config.write_text(json.dumps({'no_such_setting': 1}))
+    with pytest.raises(SettingsError, match='Unknown settings'):
+        load_settings(str(config), environ={})
+
+
+def watched_bot(make_bot, tmp_path):
+    """A bot whose settings file, symbols and all, holds its current settings"""
+    bot = make_bot(MockExchange())
+    config = tmp_path / 'settings.json'
+    values = {'symbols': list(bot.settings.symbols), 'default_symbol': bot.settings.default_symbol,
+              'log_to_console': False}
+    config.write_text(json.dumps(values))
+    watcher = SettingsWatcher(str(config), bot.settings, lambda old, new: bot.apply_settings(new))
+    return bot, watcher, config, values
+
+
+def rewrite(config, values):
+    config.write_text(json.dumps(values))
+    mtime = os.stat(config).st_mtime + 1
+    os.utime(config, (mtime, mtime))
+
+
+def test_reload_applies_live_fields_and_keeps_restart_fields(make_bot, tmp_path, caplog):
+    bot, watcher, config, values = watched_bot(make_bot, tmp_path)
+    rewrite(config, dict(values, reconcile_interval=2.5, testnet=False, api_key='other-key'))
+
+    assert watcher.check()
+    assert bot.settings.reconcile_interval == bot.order_reconciler.interval == 2.5
+    # Restart-only fields keep their running values until a restart
+    assert (bot.settings.testnet, bot.settings.api_key) == (True, '')
+    assert 'need a restart: api_key, testnet' in caplog.text
+
+
+def test_invalid_reload_keeps_the_current_settings(make_bot, tmp_path, caplog):
+    bot, watcher, config, values = watched_bot(make_bot, tmp_path)
+    current = bot.settings
+    rewrite(config, dict(values, reconcile_interval=0))
+
+    assert not watcher.check()
+    assert bot.settings is current and watcher.current is current
+    assert 'reconcile_interval: must be >= 0.1' in caplog.text
+
+
+def test_old_limit_name_still_applies(tmp_path, caplog):
+    config = tmp_path / 'config.py'
+    config.write_text('MAX_POSITION_SIZE = 0.05\n')
+    assert load_settings(str(config), environ={}).max_order_quantity == 0.05
+    assert 'now max_order_quantity' in caplog.text
+    assert load_settings(environ={'TRADING_BOT_MAX_POSITION_SIZE': '0.2'}).max_order_quantity == 0.2
+
+
+def test_order_quantity_limit_is_per_order(make_bot):
+    bot = make_bot(MockExchange(), max_order_quantity=0.01)
+    assert bot.validate_order_params('BTCUSDT', 'BUY', 'MARKET', 0.01) == (True, '')
+    assert not bot.validate_order_params('BTCUSDT', 'BUY', 'MARKET', 0.011)[0]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Order gateway of the sharded runtime, driven in-process over its shared memory rings
+"""
+
+import json
+import threading
+
+import pytest
+
+from mock_exchange import RATE_LIMITED, FaultPlan, MockExchange
+from sharded import GatewayClient, GatewayError, ShardedRuntime
+from shm_ring import RingReader, ShmRing
+
+SLOT_SIZE = 256
+
+
+@pytest.fixture
+def gateway(make_bot):
+    """Factory for (exchange, runtime, client): a worker's GatewayClient served by the runtime's gateway"""
+    rings, pumps = [], []
+    stop = threading.Event()
+
+    def make(exchange: MockExchange):
+        bot = make_bot(exchange)
+        runtime = ShardedRuntime(bot, [], list(exchange.symbols), workers=1, slot_size=SLOT_SIZE)
+        runtime._events = ShmRing(slots=1024, slot_size=SLOT_SIZE)
+        requests = ShmRing(slots=64, slot_size=SLOT_SIZE)
+        rings.extend([runtime._events, requests])
+        client = GatewayClient(0, requests, bot.logger, timeout=10)
+
+        def pump():
+            # The gateway's _serve() loop and the worker's result handling, in one thread
+            request_reader = RingReader(requests, from_start=True)
+            result_reader = RingReader(runtime._events, from_start=True)
+            while not stop.is_set():
+                for payload in request_reader.poll():
+                    runtime._on_request(0, json.loads(payload))
+                for payload in result_reader.poll():
+                    client.on_record(json.loads(payload))
+                stop.wait(0.001)
+
+        thread = threading.Thread(target=pump, daemon=True)
+        thread.start()
+        pumps.append((thread, runtime))
+        return exchange, runtime, client
+
+    yield make
+    stop.set()
+    for thread, runtime in pumps:
+        thread.join(timeout=5)
+        runtime._executor.shutdown(wait=True)
+    for ring in rings:
+        ring.close()
+
+
+def test_requests_are_executed_by_the_gateway(gateway):
+    exchange, runtime, client = gateway(MockExchange())
+
+    order = client.place_limit_order('BTCUSDT', 'BUY', 0.01, 40000)
+    assert [o['orderId'] for o in exchange.open_orders()] == [order['orderId']]
+    assert runtime.stats['requests'] == 1 and runtime.stats['errors'] == 0
+
+    with pytest.raises(GatewayError, match='no method'):
+        client.call('no_such_method')
+    with pytest.raises(GatewayError) as raised:
+        client.cancel_order('BTCUSDT', 999999)
+    assert raised.value.code == -2013
+
+
+def test_rate_limited_order_is_retried(gateway):
+    faults = FaultPlan(paths=['/fapi/v1/order'])
+    exchange, runtime, client = gateway(MockExchange(faults=faults))
+    faults.inject(RATE_LIMITED)
+
+    order = client.place_market_order('BTCUSDT', 'BUY', 0.01)
+    assert order['status'] == 'FILLED'
+    assert faults.injected[RATE_LIMITED] == 1
+    assert exchange.requests[('POST', '/fapi/v1/order')] == 1
+    assert runtime.stats['errors'] == 0
+
+
+def test_oversize_results_arrive_whole(gateway):
+    exchange, runtime, client = gateway(MockExchange())
+
+    orders = client.place_limit_orders([{'symbol': 'ETHUSDT', 'side': 'BUY', 'quantity': 0.01, 'price': 2000 + i}
+                                        for i in range(5)])
+    assert len(json.dumps(orders)) > SLOT_SIZE
+    assert sorted(o['orderId'] for o in orders) == sorted(o['orderId'] for o in exchange.open_orders())
+    assert len(client.get_open_orders('ETHUSDT')) == 5
+    # Two results, sent as many more records
+    assert runtime._events.head > 2 and runtime.stats['published'] == 2
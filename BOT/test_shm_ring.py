@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Shared memory ring buffers: broadcast, zero-copy reads and overrun detection
+"""
+
+import numpy as np
+import pytest
+
+import shm_ring
+from shm_ring import EVENT_DTYPE, TICK_EVENT, EventReader, EventRing, RingReader, ShmRing
+
+
+def events(start: int, count: int) -> np.ndarray:
+    batch = np.zeros(count, dtype=EVENT_DTYPE)
+    batch['kind'] = TICK_EVENT
+    batch['symbol'] = b'BTCUSDT'
+    batch['ts'] = np.arange(start, start + count)
+    return batch
+
+
+def test_event_ring_broadcasts_views_and_detects_overrun():
+    ring = EventRing(capacity=8)
+    other = EventRing.attach(ring.name)
+    try:
+        fast, slow = EventReader(ring), EventReader(other)
+        ring.publish(events(0, 5))
+
+        view = fast.read()
+        assert view['ts'].tolist() == [0, 1, 2, 3, 4]
+        assert view['seq'].tolist() == [2, 4, 6, 8, 10]     # Seqlock stamps: 2 * sequence
+        assert np.shares_memory(view, ring.records)
+        assert fast.intact()
+
+        # Wrapping overwrites the slots behind the fast reader's view
+        ring.publish(events(5, 6))
+        assert not fast.intact()
+        assert fast.read()['ts'].tolist() == [5, 6, 7]     # Up to the end of storage
+        assert fast.read()['ts'].tolist() == [8, 9, 10]
+        assert fast.lost == 0
+
+        # The slow reader was lapped: it skips to the oldest event still in the ring
+        ring.publish(events(11, 4))
+        seen = []
+        while True:
+            view = slow.read()
+            if not len(view):
+                break
+            seen.extend(view['ts'].tolist())
+        assert seen == list(range(7, 15))
+        assert slow.lost == 7
+        assert slow.lag == 0
+        del view
+    finally:
+        other.close()
+        ring.close()
+
+
+def test_byte_ring_counts_lost_records():
+    ring = ShmRing(slots=4, slot_size=64)
+    try:
+        reader = RingReader(ring)
+        for i in range(6):
+            ring.publish(f'record {i}'.encode())
+        assert reader.poll() == [b'record 2', b'record 3', b'record 4', b'record 5']
+        assert reader.lost == 2
+    finally:
+        ring.close()
+
+
+def test_records_being_rewritten_are_not_read():
+    ring = EventRing(capacity=8)
+    try:
+        reader = EventReader(ring)
+        ring.publish(events(0, 5))
+        # The producer is rewriting the third slot for event 11: its stamp is odd
+        ring.records['seq'][2] = 2 * 11 - 1
+        assert reader.read()['ts'].tolist() == [0, 1]
+        assert reader.read()['ts'].tolist() == [3, 4]
+        assert reader.lost == 1
+    finally:
+        ring.close()
+
+    byte_ring = ShmRing(slots=4, slot_size=64)
+    try:
+        reader = RingReader(byte_ring)
+        for i in range(3):
+            byte_ring.publish(f'record {i}'.encode())
+        byte_ring._stamps[1] = 2 * 6 - 1
+        assert reader.poll() == [b'record 0', b'record 2']
+        assert reader.lost == 1
+    finally:
+        byte_ring.close()
+
+
+def test_rings_refuse_machines_that_reorder_stores(monkeypatch):
+    monkeypatch.setattr(shm_ring.platform, 'machine', lambda: 'aarch64')
+    with pytest.raises(RuntimeError, match='x86 memory ordering; aarch64'):
+        EventRing(capacity=8)
+    with pytest.raises(RuntimeError, match='x86 memory ordering'):
+        ShmRing(slots=4)
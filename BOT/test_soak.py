@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Soak test: tens of thousands of orders placed and cancelled through the in-process mock exchange
+
+Fails if throughput decays or memory grows over the run. SOAK_ORDERS sets the
+number of orders (default 20000).
+"""
+
+import logging
+import os
+import time
+import tracemalloc
+
+from mock_exchange import MockExchange
+
+ORDERS = int(os.environ.get('SOAK_ORDERS', 20000))
+CHUNKS = 10
+BATCH = 5
+
+# The last timed chunks may be at most this much slower than the first ones
+MAX_SLOWDOWN = 1.5
+# Memory the bot may retain over the memory phase
+# (bounded library caches such as urllib's URL-splitting cache still fill up here)
+MAX_GROWTH_BYTES = 512 * 1024
+
+
+def test_order_churn_keeps_throughput_and_memory_flat(make_bot, caplog):
+    exchange = MockExchange()
+    bot = make_bot(exchange)
+    # pytest's log capture would keep every per-batch INFO record
+    caplog.set_level(logging.WARNING, logger=bot.logger.name)
+    orders = [{'symbol': 'BTCUSDT', 'side': 'BUY' if i % 2 else 'SELL', 'quantity': 0.001,
+               'price': 40000.0 if i % 2 else 50000.0} for i in range(BATCH)]
+
+    def churn(count: int) -> float:
+        started = time.perf_counter()
+        for _ in range(count // BATCH):
+            placed = bot.place_limit_orders(orders)
+            cancelled = bot.cancel_orders('BTCUSDT', [o['orderId'] for o in placed])
+            assert all('orderId' in o for o in placed + cancelled)
+        # What the background reconciler does every few seconds (and what prunes cancel tombstones)
+        bot.reconcile_open_orders('BTCUSDT')
+        return time.perf_counter() - started
+
+    chunk = ORDERS // CHUNKS
+    churn(chunk)  # Warm-up: caches, connection objects, interned strings
+    durations = [churn(chunk) for _ in range(CHUNKS - 3)]
+
+    # The exchange keeps every order it has seen; only the bot's memory is under test
+    tracemalloc.start()
+    try:
+        exchange.prune_closed_orders()
+        baseline = tracemalloc.take_snapshot()
+        churn(chunk * 2)
+        exchange.prune_closed_orders()
+        final = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    growth = sum(stat.size_diff for stat in final.filter_traces(ignore).compare_to(
+        baseline.filter_traces(ignore), 'filename'))
+
+    assert len(bot.order_index) == 0
+    assert exchange.open_orders() == []
+    assert sum(durations[-2:]) <= sum(durations[:2]) * MAX_SLOWDOWN, f"Throughput decayed: {durations}"
+    assert growth <= MAX_GROWTH_BYTES, f"Memory grew by {growth} bytes"
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Strategy runtime: event ordering, tick conflation, timers and order submission
+"""
+
+import time
+
+from binance.exceptions import BinanceAPIException
+
+from market_stream import Bar, Tick
+from mock_exchange import MockExchange
+from strategy import Strategy, StrategyRuntime
+
+
+class Recorder(Strategy):
+    """Records every callback as (callback, detail)"""
+
+    def __init__(self, symbols=None, name=None):
+        super().__init__(symbols, name)
+        self.calls = []
+
+    def on_tick(self, tick):
+        self.calls.append(('tick', tick.symbol, tick.price))
+
+    def on_bar(self, bar):
+        self.calls.append(('bar', bar.symbol, bar.close))
+
+    def on_order_update(self, update):
+        self.calls.append(('update', update['s'], update['x']))
+
+    def on_fill(self, fill):
+        self.calls.append(('fill', fill['s'], fill['x']))
+
+    def on_order_result(self, request, result, error):
+        self.calls.append(('result', request[0], result, error))
+
+
+def run_until_idle(runtime: StrategyRuntime, timeout: float = 5.0, linger: float = 0.0):
+    """Run the event loop until nothing is queued (and `linger` seconds more), then stop it"""
+    runtime.start()
+    deadline = time.monotonic() + timeout
+    while runtime.pending() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    time.sleep(linger)
+    runtime.stop()
+
+
+def bar(symbol: str, close: float) -> Bar:
+    return Bar(symbol, '1m', close, close, close, close, 1.0, 0, 59_999)
+
+
+def test_events_are_prioritized_and_ticks_conflated(mock_bot):
+    runtime = StrategyRuntime(mock_bot)
+    everything, eth_only = Recorder(name='All'), Recorder(['ethusdt'], name='Eth')
+    runtime.add_strategy(everything)
+    runtime.add_strategy(eth_only)
+
+    # Queued before the loop starts, as if the strategies had fallen behind
+    for symbol, price in [('BTCUSDT', 45000), ('ETHUSDT', 3000), ('BTCUSDT', 45010), ('BTCUSDT', 45020)]:
+        runtime.push_tick(Tick(symbol, price, 0.01, 0))
+    runtime.push_bar(bar('BTCUSDT', 45020))
+    runtime.push_order_update({'s': 'ETHUSDT', 'x': 'NEW'})
+    runtime.push_order_update({'s': 'BTCUSDT', 'x': 'TRADE'})
+    assert runtime.pending() == 5
+
+    run_until_idle(runtime)
+
+    # Order updates first (in arrival order), then bars, then the latest tick of each symbol
+    assert everything.calls == [('update', 'ETHUSDT', 'NEW'), ('update', 'BTCUSDT', 'TRADE'),
+                                ('fill', 'BTCUSDT', 'TRADE'), ('bar', 'BTCUSDT', 45020),
+                                ('tick', 'BTCUSDT', 45020), ('tick', 'ETHUSDT', 3000)]
+    assert eth_only.calls == [('update', 'ETHUSDT', 'NEW'), ('tick', 'ETHUSDT', 3000)]
+    assert runtime.stats['ticks_conflated'] == 2 and runtime.stats['events'] == 5
+
+
+def test_timers_fire_in_due_order_and_can_be_cancelled(mock_bot):
+    runtime = StrategyRuntime(mock_bot)
+    strategy = Recorder()
+    runtime.add_strategy(strategy)
+    fired = []
+
+    strategy.schedule(0.03, lambda: fired.append('repeating'))
+    strategy.schedule(0.05, lambda: fired.append('once'), repeat=False)
+    strategy.schedule(0.01, lambda: fired.append('first'), repeat=False)
+    cancelled = strategy.schedule(0.02, lambda: fired.append('cancelled'))
+    runtime.cancel_timer(cancelled)
+
+    run_until_idle(runtime, linger=0.2)
+
+    assert fired[:3] == ['first', 'repeating', 'once']
+    assert fired.count('once') == 1 and 'cancelled' not in fired
+    assert fired.count('repeating') >= 3
+
+
+def test_handler_errors_do_not_stop_the_loop(mock_bot):
+    runtime = StrategyRuntime(mock_bot)
+    failing, healthy = Recorder(name='Failing'), Recorder(name='Healthy')
+    failing.on_tick = lambda tick: 1 / 0
+    runtime.add_strategy(failing)
+    runtime.add_strategy(healthy)
+
+    runtime.push_tick(Tick('BTCUSDT', 45000, 0.01, 0))
+    runtime.push_bar(bar('BTCUSDT', 45000))
+    run_until_idle(runtime)
+
+    assert runtime.stats['handler_errors'] == 1
+    assert failing.calls == [('bar', 'BTCUSDT', 45000)]
+    assert healthy.calls == [('bar', 'BTCUSDT', 45000), ('tick', 'BTCUSDT', 45000)]
+
+
+def test_submitted_orders_report_results_and_errors(make_bot):
+    exchange = MockExchange()
+    runtime = StrategyRuntime(make_bot(exchange))
+    strategy = Recorder()
+    runtime.add_strategy(strategy)
+
+    strategy.submit('place_limit_order', 'BTCUSDT', 'BUY', 0.01, 40000)
+    strategy.submit('cancel_order', 'BTCUSDT', 999999)
+    strategy.submit('no_such_method')
+    # Results arrive from worker threads; give them time to be queued
+    run_until_idle(runtime, linger=0.3)
+
+    results = {call[1]: call[2:] for call in strategy.calls}
+    order, error = results['place_limit_order']
+    assert error is None and [o['orderId'] for o in exchange.open_orders()] == [order['orderId']]
+    result, error = results['cancel_order']
+    assert result is None and isinstance(error, BinanceAPIException) and error.code == -2013
+    result, error = results['no_such_method']
+    assert result is None and isinstance(error, AttributeError)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Clock offset, drift and recvWindow estimates, and the -1021 resync-and-retry
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+import time_sync
+from mock_exchange import MockAPIError, MockExchange
+from time_sync import MAX_RECV_WINDOW_MS, MIN_RECV_WINDOW_MS, ClockSync
+
+ACCOUNT = ('GET', '/fapi/v2/account')
+
+
+class ExchangeClock:
+    """Client whose serverTime runs offset_ms plus drift_ms_per_hour ahead of a local clock the test moves"""
+
+    def __init__(self, offset_ms: float = 0.0, drift_ms_per_hour: float = 0.0, latency_ms: float = 0.0):
+        self.now_ms = 1_700_000_000_000.0
+        self.start_ms = self.now_ms
+        self.offset_ms = offset_ms
+        self.drift_ms_per_hour = drift_ms_per_hour
+        self.latency_ms = latency_ms
+        self.timestamp_offset = 0
+
+    def time(self) -> float:
+        return self.now_ms / 1000
+
+    def futures_time(self):
+        hours = (self.now_ms - self.start_ms) / 3600000
+        server_time = self.now_ms + self.offset_ms + self.drift_ms_per_hour * hours
+        self.now_ms += self.latency_ms
+        return {'serverTime': server_time + self.latency_ms / 2}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """An ExchangeClock that is also the local clock ClockSync reads"""
+    clock = ExchangeClock()
+    monkeypatch.setattr(time_sync, 'time', SimpleNamespace(time=clock.time, monotonic=time.monotonic))
+    return clock
+
+
+def test_offset_and_drift_are_estimated(clock):
+    clock.offset_ms, clock.drift_ms_per_hour = 100, 36
+    sync = ClockSync(clock)
+
+    # Estimates over less than MIN_DRIFT_SPAN_MS are not trusted with a drift
+    for _ in range(3):
+        sync.sync()
+        clock.now_ms += 60_000
+    assert sync.drift_ms_per_hour == 0
+    assert sync.offset_ms == pytest.approx(100 + 36 * 2 / 60)
+
+    for _ in range(3):
+        clock.now_ms += 600_000
+        sync.sync()
+    assert sync.drift_ms_per_hour == pytest.approx(36, rel=1e-4)
+    assert sync.offset_ms == pytest.approx(100 + 36 * 33 / 60)
+    assert clock.timestamp_offset == 120
+
+    # Between syncs the applied offset follows the drift
+    clock.now_ms += 3600_000
+    sync._apply_offset()
+    assert clock.timestamp_offset == 156
+
+
+def test_recv_window_stays_within_its_bounds(clock):
+    sync = ClockSync(clock)
+    sync.sync()
+    assert sync.recv_window == MIN_RECV_WINDOW_MS
+
+    clock.latency_ms = 1000
+    sync.sync()
+    assert MIN_RECV_WINDOW_MS < sync.recv_window < MAX_RECV_WINDOW_MS
+
+    clock.latency_ms = 20_000
+    sync.sync()
+    assert sync.recv_window == MAX_RECV_WINDOW_MS
+    assert sync.metrics()['rtt_p95_ms'] == 20_000
+
+
+def test_rejected_timestamp_resyncs_and_retries_once(make_bot):
+    exchange = MockExchange()
+    bot = make_bot(exchange)
+    assert abs(bot.clock_sync.offset_ms) < 100
+
+    # The exchange clock jumps ahead: the stale offset puts requests outside the recvWindow
+    exchange.clock_offset_ms = 30_000
+    bot._api_call(bot.client.futures_account)
+    assert exchange.requests[ACCOUNT] == 3      # Authentication, rejected, retried
+    assert bot.clock_sync.timestamp_errors == 1
+    assert bot.clock_sync.offset_ms == pytest.approx(30_000, abs=100)
+
+    # A resync that cannot reach the exchange leaves the retry to fail: it is not retried again
+    def unavailable(params):
+        raise MockAPIError(-1001, 'Internal error; unable to process your request. Please try again.')
+
+    exchange.clock_offset_ms = 60_000
+    exchange._routes[('GET', '/fapi/v1/time')] = unavailable
+    with pytest.raises(BinanceAPIException) as raised:
+        bot._api_call(bot.client.futures_account)
+    assert raised.value.code == -1021
+    assert exchange.requests[ACCOUNT] == 5
+    assert bot.clock_sync.timestamp_errors == 2 and bot.clock_sync.sync_failures == 1
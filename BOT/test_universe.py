@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Universe ranking and filtering from bulk market data served by the mock exchange
+"""
+
+import pytest
+
+from mock_exchange import MockExchange
+from universe import UniverseCriteria, UniverseScanner
+
+OPEN_INTEREST = ('GET', '/fapi/v1/openInterest')
+
+
+def spec(price, quote_volume, price_range, funding_rate, open_interest=1000):
+    return {'price': price, 'tickSize': '0.01', 'stepSize': '0.001', 'minQty': '0.001',
+            'quoteVolume': quote_volume, 'range': price_range, 'fundingRate': funding_rate,
+            'openInterest': open_interest}
+
+
+# Percentile ranks across all five symbols: liquidity DDD < EEE < CCC < BBB < AAA,
+# volatility EEE < AAA < DDD < CCC < BBB, |funding| AAA < BBB < EEE < DDD < CCC
+SYMBOLS = {
+    'AAAUSDT': spec(100.0, 900e6, 0.02, 0.0001),
+    'BBBUSDT': spec(10.0, 500e6, 0.10, 0.0002, open_interest=10000),
+    'CCCUSDT': spec(50.0, 200e6, 0.05, 0.005),          # Funding above the cap
+    'DDDUSDT': spec(20.0, 10e6, 0.03, -0.0004),         # Too little volume
+    'EEEUSDT': spec(1.0, 100e6, 0.01, -0.0003),         # Open interest worth $1000
+}
+CRITERIA = UniverseCriteria(size=5, min_quote_volume=50e6, max_funding_rate=0.001, min_open_interest=50_000)
+
+
+def test_scan_ranks_and_filters(make_bot):
+    exchange = MockExchange(symbols=SYMBOLS)
+    scanner = UniverseScanner(make_bot(exchange), CRITERIA)
+
+    rows = scanner.scan()
+    assert [row['symbol'] for row in rows] == ['BBBUSDT', 'AAAUSDT']
+    # 0.5 * liquidity + 0.3 * volatility - 0.2 * funding percentile ranks
+    assert rows[0]['score'] == pytest.approx(0.5 * 0.75 + 0.3 * 1.0 - 0.2 * 0.25)
+    assert rows[1]['score'] == pytest.approx(0.5 * 1.0 + 0.3 * 0.25)
+    assert rows[0]['volatility'] == pytest.approx(0.10)
+    assert rows[0]['open_interest'] == pytest.approx(100_000)
+    # Open interest only for the three symbols passing the bulk filters
+    assert exchange.requests[OPEN_INTEREST] == 3
+
+
+def test_refresh_reports_changes(make_bot):
+    exchange = MockExchange(symbols=SYMBOLS)
+    changes = []
+    scanner = UniverseScanner(make_bot(exchange), CRITERIA._replace(size=1),
+                              on_change=lambda added, removed: changes.append((added, removed)))
+
+    assert scanner.symbols() == ['BBBUSDT']
+    assert exchange.requests[OPEN_INTEREST] == 2   # OPEN_INTEREST_CANDIDATES per slot
+    assert 'BBBUSDT' in scanner and 'AAAUSDT' not in scanner
+
+    exchange.funding_rates['BBBUSDT'] = 0.002
+    assert scanner.refresh() == ['AAAUSDT']
+    assert changes == [(['BBBUSDT'], []), (['AAAUSDT'], ['BBBUSDT'])]
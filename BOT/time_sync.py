@@ -0,0 +1,210 @@
+"""
+Clock Synchronization for Signed Binance Requests
+Keeps the local-to-exchange clock offset and the recvWindow up to date in the background
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# Binance rejects recvWindow values above 60 seconds
+MAX_RECV_WINDOW_MS = 60000
+
+# Lower bound for the adaptive recvWindow
+MIN_RECV_WINDOW_MS = 3000
+
+# Extra headroom added on top of the observed latency
+RECV_WINDOW_MARGIN_MS = 2000
+
+# Multiplier applied to the 95th percentile round-trip time
+RECV_WINDOW_RTT_FACTOR = 4
+
+# Offset estimates must span at least this long before drift is trusted
+MIN_DRIFT_SPAN_MS = 5 * 60 * 1000
+
+
+class ClockSync:
+    """
+    Background estimator of the offset between the local clock and the exchange clock
+
+    Every sync takes a short burst of server-time samples and keeps the one with the
+    lowest round-trip time, since that sample is the least distorted by network jitter.
+    The offset and its drift are applied to the client's ``timestamp_offset`` so every
+    signed request carries a corrected timestamp without a serverTime call per order.
+    """
+
+    def __init__(self, client, logger: Optional[logging.Logger] = None,
+                 sync_interval: float = 60.0, adjust_interval: float = 1.0,
+                 burst_size: int = 3, history_size: int = 30):
+        """
+        Initialize the clock synchronizer
+
+        Args:
+            client: python-binance client whose timestamp_offset is managed
+            logger: Logger for sync events (default: module logger)
+            sync_interval: Seconds between server-time sample bursts
+            adjust_interval: Seconds between drift corrections of the applied offset
+            burst_size: Number of server-time samples taken per sync
+            history_size: Number of sync estimates kept for drift estimation
+        """
+        self.client = client
+        self.logger = logger or logging.getLogger(__name__)
+        self.sync_interval = sync_interval
+        self.adjust_interval = adjust_interval
+        self.burst_size = burst_size
+
+        # (local time ms, offset ms) of the best sample of each burst
+        self._estimates: Deque[Tuple[float, float]] = deque(maxlen=history_size)
+        # Round-trip times of every sample, used for the recvWindow
+        self._rtts: Deque[float] = deque(maxlen=history_size * burst_size)
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.offset_ms = 0.0
+        self.drift_ms_per_hour = 0.0
+        self.recv_window = 5000
+        self.last_sync: Optional[float] = None
+        self.sync_count = 0
+        self.sync_failures = 0
+        self.timestamp_errors = 0
+
+    def sample(self) -> Tuple[float, float, float]:
+        """
+        Take a single server-time sample
+
+        Returns:
+            Tuple of (local midpoint ms, offset ms, round-trip time ms)
+        """
+        sent = time.time() * 1000
+        server_time = self.client.futures_time()['serverTime']
+        received = time.time() * 1000
+
+        midpoint = (sent + received) / 2
+        return midpoint, server_time - midpoint, received - sent
+
+    def sync(self) -> float:
+        """
+        Take a burst of samples and update the offset, drift and recvWindow
+
+        Returns:
+            The offset in milliseconds now applied to signed requests
+        """
+        samples = [self.sample() for _ in range(self.burst_size)]
+        midpoint, offset, _ = min(samples, key=lambda s: s[2])
+        offsets = [s[1] for s in samples]
+
+        with self._lock:
+            self._estimates.append((midpoint, offset))
+            self._rtts.extend(s[2] for s in samples)
+            self.drift_ms_per_hour = self._estimate_drift()
+            self.recv_window = self._compute_recv_window(max(offsets) - min(offsets))
+            self.offset_ms = offset
+            self.last_sync = time.time()
+            self.sync_count += 1
+            self._apply_offset()
+
+        self.logger.debug(
+            f"Clock synced: offset={self.offset_ms:.1f}ms "
+            f"drift={self.drift_ms_per_hour:.2f}ms/h recvWindow={self.recv_window}ms"
+        )
+        return self.offset_ms
+
+    def handle_timestamp_error(self) -> None:
+        """Resync immediately after the exchange rejected a request timestamp (-1021)"""
+        self.timestamp_errors += 1
+        self.logger.warning("Request timestamp rejected by exchange, resyncing clock")
+        try:
+            self.sync()
+        except Exception as e:
+            self.sync_failures += 1
+            self.logger.error(f"Clock resync failed: {e}")
+
+    def start(self) -> None:
+        """Start the background sync thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ClockSync', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background sync thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def metrics(self) -> Dict:
+        """Get offset, drift and latency metrics"""
+        with self._lock:
+            rtts = sorted(self._rtts)
+            return {
+                'offset_ms': round(self.offset_ms, 3),
+                'applied_offset_ms': self.client.timestamp_offset,
+                'drift_ms_per_hour': round(self.drift_ms_per_hour, 3),
+                'recv_window_ms': self.recv_window,
+                'rtt_min_ms': round(rtts[0], 3) if rtts else None,
+                'rtt_p95_ms': round(self._percentile(rtts, 0.95), 3) if rtts else None,
+                'last_sync_age_s': round(time.time() - self.last_sync, 3) if self.last_sync else None,
+                'syncs': self.sync_count,
+                'sync_failures': self.sync_failures,
+                'timestamp_errors': self.timestamp_errors,
+            }
+
+    def _run(self) -> None:
+        """Background loop: resync periodically, correct for drift in between"""
+        next_sync = time.monotonic() + self.sync_interval
+        while not self._stop_event.wait(self.adjust_interval):
+            if time.monotonic() >= next_sync:
+                next_sync = time.monotonic() + self.sync_interval
+                try:
+                    self.sync()
+                except Exception as e:
+                    self.sync_failures += 1
+                    self.logger.warning(f"Clock sync failed, keeping previous offset: {e}")
+            else:
+                with self._lock:
+                    self._apply_offset()
+
+    def _apply_offset(self) -> None:
+        """Set the client offset, extrapolated by the estimated drift since the last sample"""
+        if not self._estimates:
+            return
+        sampled_at, offset = self._estimates[-1]
+        elapsed_ms = time.time() * 1000 - sampled_at
+        drift = self.drift_ms_per_hour / 3600000 * elapsed_ms
+        self.client.timestamp_offset = int(round(offset + drift))
+
+    def _estimate_drift(self) -> float:
+        """Least-squares slope of the offset estimates, in ms per hour"""
+        if len(self._estimates) < 3:
+            return 0.0
+        times = [t for t, _ in self._estimates]
+        offsets = [o for _, o in self._estimates]
+        if times[-1] - times[0] < MIN_DRIFT_SPAN_MS:
+            return 0.0
+        mean_t = sum(times) / len(times)
+        mean_o = sum(offsets) / len(offsets)
+        var_t = sum((t - mean_t) ** 2 for t in times)
+        if var_t == 0:
+            return 0.0
+        cov = sum((t - mean_t) * (o - mean_o) for t, o in zip(times, offsets))
+        return cov / var_t * 3600000
+
+    def _compute_recv_window(self, jitter: float) -> int:
+        """Derive the recvWindow from the observed round-trip times and offset jitter"""
+        rtt_p95 = self._percentile(sorted(self._rtts), 0.95)
+        window = RECV_WINDOW_MARGIN_MS + RECV_WINDOW_RTT_FACTOR * rtt_p95 + jitter
+        return int(min(MAX_RECV_WINDOW_MS, max(MIN_RECV_WINDOW_MS, window)))
+
+    @staticmethod
+    def _percentile(sorted_values, fraction: float) -> float:
+        """Nearest-rank percentile of an already sorted sequence"""
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+        return sorted_values[index]
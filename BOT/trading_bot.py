@@ -6,11 +6,15 @@ A comprehensive trading bot implementation with CLI interface
 
 import os
 import sys
+import glob
 import json
+import time
 import logging
 import argparse
+from logging.handlers import RotatingFileHandler
+from dataclasses import replace
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from decimal import Decimal, ROUND_DOWN
 
 try:
@@ -23,15 +27,77 @@ except ImportError:
 from colorama import init, Fore, Style
 from tabulate import tabulate
 
+from time_sync import ClockSync
+from strategy import run_strategies
+from sharded import ShardedRuntime
+from portfolio import PortfolioCalculator
+from order_index import OpenOrderIndex, OrderReconciler
+from cache import TTLCache
+from batch import BatchRunner, ResultWriter, detect_format, open_source
+from dashboard import Dashboard
+from ledger import Ledger, parse_date
+from leverage import LeverageManager
+from universe import UniverseCriteria, UniverseScanner
+from funding import FundingAlert, FundingMonitor, FundingThresholds
+from kill_switch import KillSwitch
+from dead_man_switch import DeadMansSwitch
+from book import OrderBooks
+from router import SmartOrderRouter
+from market_stream import MarketStream
+from recording import Recorder, Replayer, ReplayStream, create_recording_client, create_replay_client
+from settings import Settings, SettingsError, SettingsWatcher, load_settings
+from memory import deep_sizeof, directory_bytes, rss_bytes
+from profiling import SAMPLERS, Profiler
+from order_events import GROUPINGS, OrderEventLog, fill_quality, load_events
+
 # Initialize colorama for cross-platform colored output
 init(autoreset=True)
 
+# Futures batch endpoints take at most this many orders per request
+MAX_BATCH_ORDERS = 5
+
+# Batch cancel takes at most this many order IDs per request
+MAX_BATCH_CANCELS = 10
+
+# Amend rejected because nothing would change
+AMEND_NOT_NEEDED_CODE = -5027
+
+# Amend rejections answered with cancel/replace: order type not amendable,
+# maximum modification count reached
+AMEND_FALLBACK_CODES = {-1116, -5026}
+
+# Commands that trade and so get leverage applied first when apply_leverage is set
+TRADING_COMMANDS = {'market', 'limit', 'smart', 'stop-limit', 'oco', 'run', 'batch', 'dashboard', 'interactive'}
+
+
+def _plain(value: Decimal) -> str:
+    """Decimal as a plain string without exponent or trailing zeros (e.g. '0.00001')"""
+    return format(value.normalize(), 'f')
+
+
+class RunLogHandler(RotatingFileHandler):
+    """
+    Size-rotated run log that checks the file position instead of re-formatting each record
+
+    The stock shouldRollover() formats every record a second time and seeks to
+    the end of the file, which costs more than writing it. Here the position
+    after the previous write decides, so a file may exceed maxBytes by one
+    record before it rotates.
+    """
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        return bool(self.maxBytes) and self.stream is not None and self.stream.tell() >= self.maxBytes
+
+
 class TradingBot:
     """
     A simplified trading bot for Binance Futures Testnet
     """
     
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True,
+                 sync_clock: bool = True, client: Optional[Client] = None,
+                 exchange_info_ttl: float = 300.0, recorder: Optional[Recorder] = None,
+                 replayer: Optional[Replayer] = None, settings: Optional[Settings] = None):
         """
         Initialize the trading bot
         
@@ -39,17 +105,78 @@ class TradingBot:
             api_key: Binance API key
             api_secret: Binance API secret
             testnet: Whether to use testnet (default: True)
+            sync_clock: Keep the clock offset in sync in the background (default: True)
+            client: Pre-built Binance client, e.g. pointed at a mock exchange (default: None)
+            exchange_info_ttl: Seconds symbol filters are cached (default: 300)
+            recorder: Record all REST and stream traffic to this log (default: None)
+            replayer: Answer REST calls and streams from a recording instead of the
+                      exchange; clock sync and the other background pollers are not
+                      started (default: None)
+            settings: Logging, risk limit and cache settings; overrides
+                      exchange_info_ttl (default: built-in defaults)
         """
         self.api_key = api_key
         self.api_secret = api_secret
         self.testnet = testnet
+        self.recorder = recorder
+        self.replayer = replayer
+        self.settings = settings or Settings(exchange_info_ttl=exchange_info_ttl)
+        self.settings_watcher: Optional[SettingsWatcher] = None
+        if replayer is not None:
+            sync_clock = False
         
         # Setup logging
         self.setup_logging()
         
+        # Stack sampling and method timing, off until started (CLI --profile, SIGUSR2 or 'profile')
+        self.profiler = Profiler(self, logger=self.logger)
+        
+        # Local view of open orders
+        self.order_index = OpenOrderIndex(self.logger)
+        self.order_reconciler = OrderReconciler(self, self.settings.reconcile_interval)
+        
+        # Symbol filters from exchange info, refreshed every exchange_info_ttl seconds
+        self.symbol_cache = TTLCache(self.settings.exchange_info_ttl, self.settings.symbol_cache_size)
+        
+        # Emergency stop; blocks new orders while engaged
+        self.kill_switch = KillSwitch(self)
+        self.dead_man_switch: Optional[DeadMansSwitch] = None
+        
+        # Local order books (fed by depth streams) and the router that reads them
+        self.books = OrderBooks()
+        self.router = SmartOrderRouter(self, self.books)
+        
+        # Every order request and stream update as columnar rows, when enabled
+        self.order_events: Optional[OrderEventLog] = None
+        if self.settings.order_events:
+            self.order_events = OrderEventLog(
+                self.settings.order_events_dir, self.settings.order_events,
+                roll_rows=self.settings.order_events_roll_rows,
+                roll_seconds=self.settings.order_events_roll_seconds,
+                mid=self._book_mid, logger=self.logger
+            )
+            self.order_events.start()
+            self.order_index.stream_listeners.append(self.order_events.record_update)
+        
+        # Per-symbol leverage and margin type, loaded on first bootstrap
+        self.leverage_manager = LeverageManager(self)
+        
+        # Tradable symbols ranked from bulk market data, rescanned while running
+        self.universe = UniverseScanner(self, UniverseCriteria.from_settings(self.settings),
+                                        self.settings.universe_refresh, on_change=self._on_universe_change)
+        
         # Initialize Binance client
         try:
-            if testnet:
+            if client is not None:
+                self.client = client
+                self.logger.info("Using provided Binance client")
+            elif replayer is not None:
+                self.client = create_replay_client(replayer, testnet)
+                self.logger.info(f"Replaying exchange traffic from {replayer.path}")
+            elif recorder is not None:
+                self.client = create_recording_client(recorder, api_key, api_secret, testnet)
+                self.logger.info(f"Recording exchange traffic to {recorder.path}")
+            elif testnet:
                 self.client = Client(
                     api_key=api_key,
                     api_secret=api_secret,
@@ -59,9 +186,15 @@ class TradingBot:
             else:
                 self.client = Client(api_key=api_key, api_secret=api_secret)
                 self.logger.info("Connected to Binance Futures Mainnet")
+            
+            # Align signed request timestamps with the exchange clock
+            self.clock_sync = ClockSync(self.client, self.logger)
+            self.clock_sync.sync()
+            if sync_clock:
+                self.clock_sync.start()
                 
             # Test connection
-            self.client.futures_account()
+            self._api_call(self.client.futures_account)
             self.logger.info("Successfully authenticated with Binance API")
             
         except Exception as e:
@@ -75,48 +208,301 @@ class TradingBot:
         
         # Setup logger
         self.logger = logging.getLogger('TradingBot')
-        self.logger.setLevel(logging.INFO)
+        self.logger.setLevel(self.settings.log_level)
         
         # Clear existing handlers
         self.logger.handlers.clear()
         
-        # File handler for detailed logs
-        file_handler = logging.FileHandler(
-            f'logs/trading_bot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
+        # File handler for detailed logs (the file is only created once something is logged),
+        # rotated at log_max_bytes so a long run keeps a bounded amount on disk
+        self._file_handler = RunLogHandler(
+            f'logs/trading_bot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log',
+            maxBytes=self.settings.log_max_bytes, backupCount=self.settings.log_backups, delay=True
         )
-        file_handler.setLevel(logging.DEBUG)
+        self._file_handler.setLevel(logging.DEBUG)
         
         # Console handler for user feedback
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
+        self._console_handler = logging.StreamHandler()
+        self._console_handler.setLevel(self.settings.log_level)
         
         # Formatter
         formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        self._file_handler.setFormatter(formatter)
+        self._console_handler.setFormatter(formatter)
         
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self._attach_log_handlers()
+        self.prune_logs()
+    
+    def prune_logs(self) -> int:
+        """
+        Delete the oldest run logs (with their rotated backups) beyond log_retention
+        
+        Returns:
+            Number of files deleted
+        """
+        keep = self.settings.log_retention
+        if not keep:
+            return 0
+        current = os.path.basename(self._file_handler.baseFilename).split('.log')[0]
+        runs: Dict[str, List[str]] = {}
+        for path in glob.glob(os.path.join('logs', 'trading_bot_*.log*')):
+            run = os.path.basename(path).split('.log')[0]
+            if run != current:
+                runs.setdefault(run, []).append(path)
+        
+        # Run names are timestamps, so they sort oldest first; the current run counts towards `keep`
+        deleted = 0
+        for run in sorted(runs)[:max(0, len(runs) - (keep - 1))]:
+            for path in runs[run]:
+                try:
+                    os.remove(path)
+                    deleted += 1
+                except OSError as e:
+                    self.logger.warning(f"Failed to delete old log {path}: {e}")
+        if deleted:
+            self.logger.debug(f"Deleted {deleted} old log files")
+        return deleted
+    
+    def _attach_log_handlers(self):
+        """Attach or detach the file and console handlers according to the settings"""
+        for handler, enabled in ((self._file_handler, self.settings.log_to_file),
+                                 (self._console_handler, self.settings.log_to_console)):
+            if enabled and handler not in self.logger.handlers:
+                self.logger.addHandler(handler)
+            elif not enabled and handler in self.logger.handlers:
+                self.logger.removeHandler(handler)
+    
+    def apply_settings(self, settings: Settings):
+        """
+        Apply new settings to the running bot
+        
+        Log levels, risk limits, cache TTLs and intervals take effect immediately;
+        the client, caches, order index and streams are kept as they are.
+        Credential and network changes are reported but need a restart; until
+        then the running values of those fields stay in self.settings.
+        """
+        changes = self.settings.changes(settings)
+        if not changes:
+            return
+        restart = [name for name in changes if name in Settings.restart_fields()]
+        settings = replace(settings, **{name: getattr(self.settings, name) for name in restart})
+        self.settings = settings
+        
+        self.logger.setLevel(settings.log_level)
+        self._console_handler.setLevel(settings.log_level)
+        self._attach_log_handlers()
+        self._file_handler.maxBytes = settings.log_max_bytes
+        self._file_handler.backupCount = settings.log_backups
+        self.symbol_cache.ttl = settings.exchange_info_ttl
+        self.symbol_cache.max_size = settings.symbol_cache_size
+        self.order_reconciler.interval = settings.reconcile_interval
+        if self.order_events:
+            self.order_events.roll_rows = settings.order_events_roll_rows
+            self.order_events.roll_seconds = settings.order_events_roll_seconds
+        if self.dead_man_switch and settings.cancel_countdown:
+            self.dead_man_switch.countdown = settings.cancel_countdown
+            self.dead_man_switch.refresh_margin = settings.cancel_countdown / 3
+        self.universe.criteria = UniverseCriteria.from_settings(settings)
+        self.universe.interval = settings.universe_refresh
+        
+        if settings.apply_leverage and {'apply_leverage', 'symbols', 'default_leverage', 'margin_type'} & set(changes):
+            try:
+                self.bootstrap_leverage(refresh=False)
+            except Exception as e:
+                self.logger.error(f"Failed to apply leverage settings: {e}")
+        
+        applied = sorted(name for name in changes if name not in restart)
+        if applied:
+            self.logger.info(f"Settings reloaded: {', '.join(applied)}")
+        if restart:
+            self.logger.warning(f"Settings changed that need a restart: {', '.join(sorted(restart))}")
+    
+    def watch_settings(self, path: str, overrides: Optional[Dict] = None, interval: float = 1.0):
+        """Reload settings from `path` whenever the file changes"""
+        self.settings_watcher = SettingsWatcher(
+            path, self.settings, lambda old, new: self.apply_settings(new),
+            interval=interval, overrides=overrides, logger=self.logger
+        )
+        self.settings_watcher.start()
+    
+    def _api_call(self, func: Callable, **params):
+        """
+        Call a signed client endpoint with the synced recvWindow applied
+        
+        A request rejected for its timestamp (-1021) never reached the matching
+        engine, so it is retried once after an immediate clock resync.
+        
+        Args:
+            func: Bound python-binance client method
+            **params: Endpoint parameters
+            
+        Returns:
+            Endpoint response
+        """
+        params.setdefault('recvWindow', self.clock_sync.recv_window)
+        try:
+            return func(**params)
+        except BinanceAPIException as e:
+            if e.code != -1021:
+                raise
+            self.clock_sync.handle_timestamp_error()
+            params['recvWindow'] = self.clock_sync.recv_window
+            return func(**params)
+    
+    def _order_call(self, action: str, func: Callable, **params):
+        """
+        _api_call for order entry, recorded in the order event log when it is enabled
+        
+        Args:
+            action: 'new', 'amend' or 'cancel'
+            func: Bound python-binance client method (or request function)
+            **params: Endpoint parameters
+        """
+        if self.order_events is None:
+            return self._api_call(func, **params)
+        pending = self.order_events.begin(action, params)
+        try:
+            response = self._api_call(func, **params)
+        except Exception as e:
+            self.order_events.end(pending, error=e)
+            raise
+        self.order_events.end(pending, response)
+        return response
+    
+    def background_polling_allowed(self, name: str) -> bool:
+        """
+        Whether a timer-driven REST poller may start
+        
+        Not under replay: its calls would take recorded responses from the
+        session's own calls in an order that depends on thread timing.
+        """
+        if self.replayer is None:
+            return True
+        self.logger.info(f"{name} not started while replaying a recording")
+        return False
+    
+    def _book_mid(self, symbol: str) -> float:
+        book = self.books.get(symbol)
+        return book.mid if book else 0.0
+    
+    def close(self):
+        """Stop background services"""
+        self.profiler.stop()
+        if self.order_events:
+            self.order_events.stop()
+        self.order_reconciler.stop()
+        self.universe.stop()
+        if self.dead_man_switch:
+            self.dead_man_switch.stop()
+        self.clock_sync.stop()
+        if self.settings_watcher:
+            self.settings_watcher.stop()
+        if self.replayer is not None:
+            self.logger.info(
+                f"Replay finished: {self.replayer.remaining()} recorded requests unused, "
+                f"{self.replayer.mismatches} parameter mismatches"
+            )
+    
+    def start_dead_man_switch(self, liveness: Optional[Callable[[], bool]] = None) -> Optional[DeadMansSwitch]:
+        """
+        Keep the exchange's auto-cancel countdown armed for symbols with open orders
+        
+        Does nothing unless the cancel_countdown setting is set. If the process
+        dies or `liveness` returns False, the exchange cancels the orders when
+        the countdown runs out.
+        
+        Args:
+            liveness: Returns False when the caller's loop is stuck (default: thread alive)
+            
+        Returns:
+            The running DeadMansSwitch, or None if disabled
+        """
+        countdown = self.settings.cancel_countdown
+        if not countdown:
+            return None
+        if self.dead_man_switch is None:
+            self.dead_man_switch = DeadMansSwitch(self, countdown, refresh_margin=countdown / 3)
+        self.dead_man_switch.liveness = liveness
+        self.dead_man_switch.start()
+        return self.dead_man_switch
+    
+    def create_market_stream(self, on_end: Optional[Callable[[], None]] = None) -> MarketStream:
+        """
+        Create a market/user data stream for this bot
+        
+        Args:
+            on_end: Called when a replayed stream has delivered every message
+            
+        Returns:
+            A live MarketStream (recording if a recorder is set) or a ReplayStream
+        """
+        if self.replayer is not None:
+            return ReplayStream(self.replayer, self.logger, on_end)
+        return MarketStream(self.api_key, self.api_secret, self.testnet, self.logger, self.recorder)
+    
+    def get_clock_metrics(self) -> Dict:
+        """Get clock offset, drift and recvWindow metrics"""
+        return self.clock_sync.metrics()
+    
+    def memory_report(self) -> List[Dict]:
+        """
+        Approximate memory held by each subsystem
+        
+        Returns:
+            One row per subsystem with 'subsystem', 'entries' (what it holds, e.g.
+            open orders or cached symbols; None where not meaningful) and 'bytes'
+        """
+        subsystems = [
+            ('order_index', self.order_index, len(self.order_index)),
+            ('symbol_cache', self.symbol_cache, len(self.symbol_cache)),
+            ('order_books', self.books, len(self.books.symbols())),
+            ('router', self.router, len(self.router.outcomes)),
+            ('clock_sync', self.clock_sync, None),
+            ('leverage', self.leverage_manager, None),
+            ('universe', self.universe, len(self.universe.rows)),
+            ('kill_switch', self.kill_switch, None),
+        ]
+        if self.dead_man_switch:
+            subsystems.append(('dead_man_switch', self.dead_man_switch, len(self.dead_man_switch.armed_until)))
+        if self.replayer is not None:
+            subsystems.append(('replayer', self.replayer, len(self.replayer.stream_records)))
+        
+        # Subsystems point at the bot, the client and each other; each is measured on its own
+        shared = [self, self.client] + [obj for _, obj, _ in subsystems]
+        return [{'subsystem': name, 'entries': entries,
+                 'bytes': deep_sizeof(obj, exclude=[o for o in shared if o is not obj])}
+                for name, obj, entries in subsystems]
     
     def get_account_info(self) -> Dict:
         """Get account information"""
         try:
-            account_info = self.client.futures_account()
+            account_info = self._api_call(self.client.futures_account)
             self.logger.info("Retrieved account information")
             return account_info
         except Exception as e:
             self.logger.error(f"Failed to get account info: {e}")
             raise
     
+    def get_exchange_symbols(self) -> List[Dict]:
+        """Download exchange info for every symbol and refresh the symbol cache"""
+        symbols = self.client.futures_exchange_info()['symbols']
+        self.symbol_cache.set_many({s['symbol']: s for s in symbols})
+        return symbols
+    
     def get_symbol_info(self, symbol: str) -> Dict:
-        """Get symbol information"""
+        """Get symbol information (cached for exchange_info_ttl seconds)"""
         try:
-            exchange_info = self.client.futures_exchange_info()
-            for symbol_info in exchange_info['symbols']:
-                if symbol_info['symbol'] == symbol:
-                    return symbol_info
+            symbol_info = self.symbol_cache.get(symbol)
+            if symbol_info is not None:
+                return symbol_info
+            
+            # One exchange info download refreshes every symbol
+            self.get_exchange_symbols()
+            symbol_info = self.symbol_cache.peek(symbol)
+            if symbol_info is not None:
+                return symbol_info
             raise ValueError(f"Symbol {symbol} not found")
         except Exception as e:
             self.logger.error(f"Failed to get symbol info for {symbol}: {e}")
@@ -151,19 +537,34 @@ class TradingBot:
                 if price is None or price <= 0:
                     return False, "Price must be specified and positive for limit orders"
             
-            # Get quantity precision
+            # Risk limits from settings (0 disables a limit)
+            limits = self.settings
+            if limits.max_order_quantity and quantity > limits.max_order_quantity:
+                return False, f"Quantity exceeds max order quantity {limits.max_order_quantity}"
+            if limits.max_order_notional and price and quantity * price > limits.max_order_notional:
+                return False, f"Order notional exceeds {limits.max_order_notional} USDT"
+            
+            # Check quantity and price against the symbol filters; Decimal keeps
+            # e.g. 0.003 an exact multiple of 0.001
             for filter_info in symbol_info['filters']:
                 if filter_info['filterType'] == 'LOT_SIZE':
-                    step_size = float(filter_info['stepSize'])
-                    min_qty = float(filter_info['minQty'])
+                    step_size = Decimal(filter_info['stepSize'])
+                    min_qty = Decimal(filter_info['minQty'])
                     
                     # Check minimum quantity
-                    if quantity < min_qty:
-                        return False, f"Quantity must be at least {min_qty}"
+                    if Decimal(str(quantity)) < min_qty:
+                        return False, f"Quantity must be at least {min_qty.normalize()}"
                     
                     # Check step size
-                    if (quantity / step_size) % 1 != 0:
-                        return False, f"Quantity must be a multiple of {step_size}"
+                    if step_size and Decimal(str(quantity)) % step_size:
+                        return False, f"Quantity must be a multiple of {step_size.normalize()}"
+                
+                elif filter_info['filterType'] == 'PRICE_FILTER' and price is not None and order_type.upper() == 'LIMIT':
+                    tick_size = Decimal(filter_info['tickSize'])
+                    
+                    # Check tick size
+                    if tick_size and Decimal(str(price)) % tick_size:
+                        return False, f"Price must be a multiple of {tick_size.normalize()}"
             
             return True, ""
             
@@ -183,13 +584,17 @@ class TradingBot:
             Order response from Binance
         """
         try:
+            self.kill_switch.check()
+            
             # Validate parameters
             is_valid, error_msg = self.validate_order_params(symbol, side, 'MARKET', quantity)
             if not is_valid:
                 raise ValueError(error_msg)
             
             # Place order
-            order = self.client.futures_create_order(
+            order = self._order_call(
+                'new',
+                self.client.futures_create_order,
                 symbol=symbol,
                 side=side.upper(),
                 type='MARKET',
@@ -197,6 +602,7 @@ class TradingBot:
             )
             
             self.logger.info(f"Market order placed: {order}")
+            self.order_index.on_ack(order)
             return order
             
         except BinanceAPIException as e:
@@ -206,7 +612,8 @@ class TradingBot:
             self.logger.error(f"Error placing market order: {e}")
             raise
     
-    def place_limit_order(self, symbol: str, side: str, quantity: float, price: float) -> Dict:
+    def place_limit_order(self, symbol: str, side: str, quantity: float, price: float,
+                          time_in_force: str = 'GTC') -> Dict:
         """
         Place a limit order
         
@@ -215,27 +622,33 @@ class TradingBot:
             side: 'BUY' or 'SELL'
             quantity: Order quantity
             price: Order price
+            time_in_force: GTC, IOC, FOK or GTX (post-only) (default: GTC)
             
         Returns:
             Order response from Binance
         """
         try:
+            self.kill_switch.check()
+            
             # Validate parameters
             is_valid, error_msg = self.validate_order_params(symbol, side, 'LIMIT', quantity, price)
             if not is_valid:
                 raise ValueError(error_msg)
             
             # Place order
-            order = self.client.futures_create_order(
+            order = self._order_call(
+                'new',
+                self.client.futures_create_order,
                 symbol=symbol,
                 side=side.upper(),
                 type='LIMIT',
                 quantity=quantity,
                 price=price,
-                timeInForce='GTC'  # Good Till Cancel
+                timeInForce=time_in_force
             )
             
             self.logger.info(f"Limit order placed: {order}")
+            self.order_index.on_ack(order)
             return order
             
         except BinanceAPIException as e:
@@ -261,6 +674,8 @@ class TradingBot:
             Order response from Binance
         """
         try:
+            self.kill_switch.check()
+            
             # Validate parameters
             is_valid, error_msg = self.validate_order_params(symbol, side, 'LIMIT', quantity, price)
             if not is_valid:
@@ -270,7 +685,9 @@ class TradingBot:
                 raise ValueError("Stop price must be positive")
             
             # Place stop-limit order
-            order = self.client.futures_create_order(
+            order = self._order_call(
+                'new',
+                self.client.futures_create_order,
                 symbol=symbol,
                 side=side.upper(),
                 type='STOP',
@@ -281,6 +698,7 @@ class TradingBot:
             )
             
             self.logger.info(f"Stop-limit order placed: {order}")
+            self.order_index.on_ack(order)
             return order
             
         except BinanceAPIException as e:
@@ -307,6 +725,8 @@ class TradingBot:
             Order response from Binance
         """
         try:
+            self.kill_switch.check()
+            
             # Validate parameters
             is_valid, error_msg = self.validate_order_params(symbol, side, 'LIMIT', quantity, price)
             if not is_valid:
@@ -316,7 +736,9 @@ class TradingBot:
                 raise ValueError("Stop prices must be positive")
             
             # Place OCO order
-            order = self.client.futures_create_order(
+            order = self._order_call(
+                'new',
+                self.client.futures_create_order,
                 symbol=symbol,
                 side=side.upper(),
                 type='OCO',
@@ -328,6 +750,7 @@ class TradingBot:
             )
             
             self.logger.info(f"OCO order placed: {order}")
+            self.order_index.on_ack(order)
             return order
             
         except BinanceAPIException as e:
@@ -340,7 +763,7 @@ class TradingBot:
     def get_order_status(self, symbol: str, order_id: int) -> Dict:
         """Get order status"""
         try:
-            order = self.client.futures_get_order(symbol=symbol, orderId=order_id)
+            order = self._api_call(self.client.futures_get_order, symbol=symbol, orderId=order_id)
             self.logger.info(f"Retrieved order status: {order}")
             return order
         except Exception as e:
@@ -350,31 +773,346 @@ class TradingBot:
     def cancel_order(self, symbol: str, order_id: int) -> Dict:
         """Cancel an order"""
         try:
-            result = self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            result = self._order_call('cancel', self.client.futures_cancel_order, symbol=symbol, orderId=order_id)
             self.logger.info(f"Order cancelled: {result}")
+            self.order_index.on_cancel(result)
             return result
         except Exception as e:
             self.logger.error(f"Failed to cancel order: {e}")
             raise
     
-    def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict]:
-        """Get open orders"""
+    def place_limit_orders(self, orders: List[Dict]) -> List[Dict]:
+        """
+        Place several limit orders with batch requests (up to 5 per request)
+        
+        Args:
+            orders: Dicts with 'symbol', 'side', 'quantity', 'price' and optional
+                    'time_in_force' (default: GTC) and 'client_order_id'
+                    
+        Returns:
+            One result per order, in order: the order response, or a dict with
+            'code' and 'msg' for an order that failed
+        """
+        self.kill_switch.check()
+        results: List[Optional[Dict]] = [None] * len(orders)
+        batch: List[Tuple[int, Dict]] = []
+        for i, order in enumerate(orders):
+            is_valid, error_msg = self.validate_order_params(
+                order['symbol'], order['side'], 'LIMIT', order['quantity'], order['price'])
+            if not is_valid:
+                results[i] = {'code': None, 'msg': error_msg}
+                continue
+            params = {'symbol': order['symbol'], 'side': order['side'].upper(), 'type': 'LIMIT',
+                      'quantity': _plain(Decimal(str(order['quantity']))),
+                      'price': _plain(Decimal(str(order['price']))),
+                      'timeInForce': order.get('time_in_force', 'GTC')}
+            if order.get('client_order_id'):
+                params['newClientOrderId'] = order['client_order_id']
+            batch.append((i, params))
+        
+        for start in range(0, len(batch), MAX_BATCH_ORDERS):
+            chunk = batch[start:start + MAX_BATCH_ORDERS]
+            try:
+                responses = self._order_call(
+                    'new',
+                    lambda **params: self.client._request_futures_api('post', 'batchOrders', True, data=params),
+                    batchOrders=json.dumps([params for _, params in chunk], separators=(',', ':'))
+                )
+            except BinanceAPIException as e:
+                responses = [{'code': e.code, 'msg': e.message}] * len(chunk)
+            for (i, _), response in zip(chunk, responses):
+                if 'orderId' in response:
+                    self.order_index.on_ack(response)
+                results[i] = response
+        
+        failed = sum(1 for r in results if 'orderId' not in r)
+        self.logger.info(f"Placed {len(orders) - failed} of {len(orders)} limit orders")
+        return results
+    
+    def cancel_orders(self, symbol: str, order_ids: List[int]) -> List[Dict]:
+        """
+        Cancel several orders of one symbol with batch requests (up to 10 per request)
+        
+        Returns:
+            One result per order ID, in order: the cancelled order, or a dict with
+            'code' and 'msg' for an order that could not be cancelled
+        """
+        results = []
+        for start in range(0, len(order_ids), MAX_BATCH_CANCELS):
+            chunk = list(order_ids[start:start + MAX_BATCH_CANCELS])
+            try:
+                responses = self._order_call('cancel', self.client.futures_cancel_orders, symbol=symbol,
+                                             orderIdList=json.dumps(chunk))
+            except BinanceAPIException as e:
+                responses = [{'code': e.code, 'msg': e.message}] * len(chunk)
+            for response in responses:
+                if 'orderId' in response:
+                    self.order_index.on_cancel(response)
+            results.extend(responses)
+        self.logger.info(f"Cancelled {sum(1 for r in results if 'orderId' in r)} of {len(order_ids)} "
+                         f"{symbol} orders")
+        return results
+    
+    def smart_order(self, symbol: str, side: str, quantity: float, urgency: float = 0.5,
+                    max_slippage_bps: float = 10.0) -> Dict:
+        """
+        Place an order whose type and price are chosen from the local order book
+        
+        Args:
+            symbol: Trading pair symbol (its depth must be streamed into self.books)
+            side: 'BUY' or 'SELL'
+            quantity: Order quantity
+            urgency: 0 (rest post-only) to 1 (take liquidity now)
+            max_slippage_bps: Worst acceptable average price, in basis points from the mid
+            
+        Returns:
+            Order response, with the routing decision under 'route'
+        """
+        try:
+            order = self.router.route(symbol, side, quantity, urgency, max_slippage_bps)
+            route = order['route']
+            self.logger.info(f"Smart order routed as {route['route']} ({route['reason']}): {order['orderId']}")
+            return order
+        except Exception as e:
+            self.logger.error(f"Error placing smart order: {e}")
+            raise
+    
+    def modify_order(self, symbol: str, order_id: int, price: float,
+                     quantity: Optional[float] = None, client_order_id: Optional[str] = None) -> Dict:
+        """
+        Reprice (and optionally resize) a resting order in place
+        
+        LIMIT orders are amended with one request, keeping their order ID. Other
+        order types, and orders the exchange will not amend, are cancelled and
+        replaced instead; see _cancel_replace().
+        
+        Args:
+            symbol: Trading pair symbol
+            order_id: Order to modify
+            price: New limit price
+            quantity: New quantity (default: unchanged)
+            client_order_id: clientOrderId for a replacement order (default: the
+                             original order's)
+            
+        Returns:
+            The amended order, the replacement order (with 'replacedOrderId'), or
+            the cancelled order if the new quantity had filled before the cancel
+        """
+        try:
+            self.kill_switch.check()
+            order = self._order_for_amend(symbol, order_id)
+            quantity = quantity if quantity is not None else float(order['origQty'])
+            
+            is_valid, error_msg = self.validate_order_params(symbol, order['side'], 'LIMIT', quantity, price)
+            if not is_valid:
+                raise ValueError(error_msg)
+            
+            if order['type'] != 'LIMIT':
+                return self._cancel_replace(order, price, quantity, client_order_id)
+            try:
+                result = self._order_call(
+                    'amend',
+                    lambda **params: self.client._request_futures_api('put', 'order', True, data=params),
+                    **self._amend_params(order, price, quantity)
+                )
+            except BinanceAPIException as e:
+                if e.code == AMEND_NOT_NEEDED_CODE:
+                    return order
+                if e.code in AMEND_FALLBACK_CODES:
+                    return self._cancel_replace(order, price, quantity, client_order_id)
+                raise
+            
+            self.logger.info(f"Order modified: {result}")
+            self.order_index.on_ack(result)
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Failed to modify order {order_id}: {e}")
+            raise
+    
+    def modify_orders(self, amends: List[Dict]) -> List[Dict]:
+        """
+        Modify several resting orders with batch requests
+        
+        Each amend is validated locally first; valid LIMIT amends go out in
+        batches of up to 5 per request, everything else through modify_order().
+        
+        Args:
+            amends: Dicts with 'symbol', 'order_id', 'price' and optional 'quantity'
+                    and 'client_order_id' (for a replacement order, as in modify_order())
+            
+        Returns:
+            One result per amend, in order: the modified order, the replacement
+            order (with 'replacedOrderId'), or a dict with 'code' and 'msg' for an
+            amend that failed
+        """
+        self.kill_switch.check()
+        results: List[Optional[Dict]] = [None] * len(amends)
+        batch: List[Tuple[int, Dict, Dict]] = []
+        for i, amend in enumerate(amends):
+            try:
+                order = self._order_for_amend(amend['symbol'], amend['order_id'])
+                quantity = amend.get('quantity') or float(order['origQty'])
+                is_valid, error_msg = self.validate_order_params(
+                    amend['symbol'], order['side'], 'LIMIT', quantity, amend['price'])
+                if not is_valid:
+                    raise ValueError(error_msg)
+                if order['type'] == 'LIMIT':
+                    batch.append((i, order, self._amend_params(order, amend['price'], quantity)))
+                else:
+                    results[i] = self._cancel_replace(order, amend['price'], quantity,
+                                                      amend.get('client_order_id'))
+            except BinanceAPIException as e:
+                results[i] = {'code': e.code, 'msg': e.message}
+            except Exception as e:
+                results[i] = {'code': None, 'msg': str(e)}
+        
+        for start in range(0, len(batch), MAX_BATCH_ORDERS):
+            chunk = batch[start:start + MAX_BATCH_ORDERS]
+            try:
+                responses = self._order_call(
+                    'amend',
+                    lambda **params: self.client._request_futures_api('put', 'batchOrders', True, data=params),
+                    batchOrders=json.dumps([params for _, _, params in chunk], separators=(',', ':'))
+                )
+            except BinanceAPIException as e:
+                responses = [{'code': e.code, 'msg': e.message}] * len(chunk)
+            for (i, order, params), response in zip(chunk, responses):
+                code = response.get('code') if 'orderId' not in response else None
+                if code is None:
+                    self.order_index.on_ack(response)
+                    results[i] = response
+                elif code == AMEND_NOT_NEEDED_CODE:
+                    results[i] = order
+                elif code in AMEND_FALLBACK_CODES:
+                    try:
+                        results[i] = self._cancel_replace(order, float(params['price']), float(params['quantity']),
+                                                          amends[i].get('client_order_id'))
+                    except Exception as e:
+                        results[i] = {'code': getattr(e, 'code', None), 'msg': str(e)}
+                else:
+                    results[i] = response
+        
+        failed = sum(1 for r in results if 'orderId' not in r)
+        self.logger.info(f"Modified {len(amends) - failed} of {len(amends)} orders")
+        return results
+    
+    def _order_for_amend(self, symbol: str, order_id: int) -> Dict:
+        """Current state of an order, from the local index or the exchange"""
+        order = self.order_index.get(order_id)
+        if order is None:
+            order = self._api_call(self.client.futures_get_order, symbol=symbol, orderId=order_id)
+        if order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+            raise ValueError(f"Order {order_id} is {order['status']} and cannot be modified")
+        return order
+    
+    @staticmethod
+    def _amend_params(order: Dict, price: float, quantity: float) -> Dict:
+        return {'symbol': order['symbol'], 'orderId': order['orderId'], 'side': order['side'],
+                'quantity': _plain(Decimal(str(quantity))), 'price': _plain(Decimal(str(price)))}
+    
+    def _cancel_replace(self, order: Dict, price: float, quantity: float,
+                        client_order_id: Optional[str] = None) -> Dict:
+        """
+        Replace an order that cannot be amended
+        
+        The cancel must succeed before the replacement is sent, so an order that
+        filled in the meantime is never replaced (no double fill). The cost is a
+        short gap with no order resting, which an amend avoids.
+        
+        The replacement keeps the original clientOrderId unless `client_order_id`
+        is given, so callers that track orders by client ID still find it; its
+        'replacedOrderId' maps it back to the cancelled order. If the new
+        quantity had already filled by the time of the cancel, nothing is sent
+        and the cancelled order is returned.
+        """
+        cancelled = self.cancel_order(order['symbol'], order['orderId'])
+        remaining = Decimal(str(quantity)) - Decimal(cancelled.get('executedQty') or '0')
+        if remaining <= 0:
+            self.logger.info(f"Order {order['orderId']} not replaced: {cancelled.get('executedQty')} "
+                             f"already filled of the new quantity {quantity}")
+            return cancelled
+        params = {
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'type': order['type'],
+            'quantity': _plain(remaining),
+            'price': _plain(Decimal(str(price))),
+            'timeInForce': order.get('timeInForce') or 'GTC',
+        }
+        client_order_id = client_order_id or order.get('clientOrderId')
+        if client_order_id:
+            params['newClientOrderId'] = client_order_id
+        if float(order.get('stopPrice') or 0):
+            params['stopPrice'] = order['stopPrice']
+        if order.get('reduceOnly'):
+            params['reduceOnly'] = 'true'
+        replacement = self._order_call('new', self.client.futures_create_order, **params)
+        replacement['replacedOrderId'] = order['orderId']
+        self.logger.info(f"Order {order['orderId']} replaced by {replacement['orderId']}")
+        self.order_index.on_ack(replacement)
+        return replacement
+    
+    def get_open_orders(self, symbol: Optional[str] = None, refresh: bool = False) -> List[Dict]:
+        """
+        Get open orders
+        
+        Answered from the local order index while the user data stream is live and
+        the index has been seeded; otherwise (or with refresh=True) fetched from the
+        exchange and used to seed the index.
+        
+        Args:
+            symbol: Trading pair symbol (default: all symbols)
+            refresh: Force an exchange snapshot
+            
+        Returns:
+            List of open orders
+        """
+        if not refresh and self.order_index.is_authoritative(symbol):
+            return self.order_index.orders(symbol)
+        
         try:
+            as_of = time.time() * 1000
             if symbol:
-                orders = self.client.futures_get_open_orders(symbol=symbol)
+                orders = self._api_call(self.client.futures_get_open_orders, symbol=symbol)
             else:
-                orders = self.client.futures_get_open_orders()
+                orders = self._api_call(self.client.futures_get_open_orders)
             
+            self.order_index.load_snapshot(orders, symbol, as_of)
             self.logger.info(f"Retrieved {len(orders)} open orders")
             return orders
         except Exception as e:
             self.logger.error(f"Failed to get open orders: {e}")
             raise
     
+    def reconcile_open_orders(self, symbol: Optional[str] = None, full: bool = False) -> Optional[Dict]:
+        """
+        Reconcile the local order index against an exchange snapshot
+        
+        Per-symbol snapshots cost weight 1; the account-wide one (full=True) costs 40.
+        
+        Args:
+            symbol: Trading pair symbol (default: next symbol in round-robin order)
+            full: Reconcile against an account-wide snapshot instead
+            
+        Returns:
+            Drift report, or None if there is nothing to reconcile
+        """
+        as_of = time.time() * 1000
+        if full:
+            orders = self._api_call(self.client.futures_get_open_orders)
+            return self.order_index.load_snapshot(orders, None, as_of)
+        
+        symbol = symbol or self.order_index.next_reconcile_symbol()
+        if not symbol:
+            return None
+        orders = self._api_call(self.client.futures_get_open_orders, symbol=symbol)
+        return self.order_index.load_snapshot(orders, symbol, as_of)
+    
     def get_positions(self) -> List[Dict]:
         """Get current positions"""
         try:
-            positions = self.client.futures_position_information()
+            positions = self._api_call(self.client.futures_position_information)
             # Filter out positions with zero size
             active_positions = [pos for pos in positions if float(pos['positionAmt']) != 0]
             self.logger.info(f"Retrieved {len(active_positions)} active positions")
@@ -383,6 +1121,131 @@ class TradingBot:
             self.logger.error(f"Failed to get positions: {e}")
             raise
     
+    def get_leverage_brackets(self) -> List[Dict]:
+        """Get notional brackets with maintenance margin tiers for all symbols"""
+        try:
+            brackets = self._api_call(self.client.futures_leverage_bracket)
+            self.logger.info(f"Retrieved leverage brackets for {len(brackets)} symbols")
+            return brackets
+        except Exception as e:
+            self.logger.error(f"Failed to get leverage brackets: {e}")
+            raise
+    
+    def get_account_trades(self, symbol: str, from_id: Optional[int] = None,
+                           limit: int = 1000) -> List[Dict]:
+        """
+        Get account trades for a symbol in trade ID order
+        
+        Args:
+            symbol: Trading pair symbol
+            from_id: First trade ID to return (default: most recent trades)
+            limit: Maximum trades (max 1000)
+        """
+        try:
+            params = {'symbol': symbol, 'limit': limit}
+            if from_id is not None:
+                params['fromId'] = from_id
+            trades = self._api_call(self.client.futures_account_trades, **params)
+            self.logger.debug(f"Retrieved {len(trades)} trades for {symbol}")
+            return trades
+        except Exception as e:
+            self.logger.error(f"Failed to get trades for {symbol}: {e}")
+            raise
+    
+    def get_income_history(self, start_time: Optional[int] = None, limit: int = 1000) -> List[Dict]:
+        """
+        Get income records (realized PnL, commission, funding, ...) in time order
+        
+        Args:
+            start_time: Earliest record time in ms (default: last 7 days)
+            limit: Maximum records (max 1000)
+        """
+        try:
+            params = {'limit': limit}
+            if start_time is not None:
+                params['startTime'] = start_time
+            income = self._api_call(self.client.futures_income_history, **params)
+            self.logger.debug(f"Retrieved {len(income)} income records")
+            return income
+        except Exception as e:
+            self.logger.error(f"Failed to get income history: {e}")
+            raise
+    
+    def bootstrap_leverage(self, symbols: Optional[List[str]] = None, leverage: Optional[int] = None,
+                           margin_type: Optional[str] = None, refresh: bool = True,
+                           dry_run: bool = False) -> Dict:
+        """
+        Set leverage and margin type on symbols where they differ from the target
+        
+        Args:
+            symbols: Symbols to configure (default: settings.symbols)
+            leverage: Target leverage (default: settings.default_leverage)
+            margin_type: 'CROSSED' or 'ISOLATED' (default: settings.margin_type; '' keeps it)
+            refresh: Re-read current values from the exchange instead of the cache
+            dry_run: Only report what would change
+            
+        Returns:
+            Summary from LeverageManager.apply()
+        """
+        try:
+            return self.leverage_manager.apply(
+                symbols or self.settings.symbols,
+                leverage if leverage is not None else self.settings.default_leverage,
+                margin_type if margin_type is not None else self.settings.margin_type or None,
+                refresh=refresh, dry_run=dry_run
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to bootstrap leverage: {e}")
+            raise
+    
+    def _on_universe_change(self, added: List[str], removed: List[str]):
+        """Configure leverage on symbols entering the universe"""
+        if added and self.settings.apply_leverage:
+            try:
+                self.bootstrap_leverage(added, refresh=False)
+            except Exception as e:
+                self.logger.error(f"Failed to apply leverage to new universe symbols: {e}")
+    
+    def get_portfolio(self) -> PortfolioCalculator:
+        """Build a local risk model of the current positions"""
+        return PortfolioCalculator.from_bot(self)
+    
+    def display_portfolio_risk(self):
+        """Display locally computed PnL, margin ratio and liquidation prices"""
+        try:
+            portfolio = self.get_portfolio()
+            summary = portfolio.summary()
+            
+            print(f"\n{Fore.CYAN}{'='*60}")
+            print(f"{Fore.CYAN}PORTFOLIO RISK")
+            print(f"{Fore.CYAN}{'='*60}")
+            print(f"{Fore.GREEN}Margin Balance: {summary['marginBalance']:.4f} USDT")
+            print(f"{Fore.YELLOW}Unrealized PnL: {summary['unrealizedPnl']:.4f} USDT")
+            print(f"{Fore.BLUE}Maintenance Margin: {summary['maintMargin']:.4f} USDT")
+            print(f"{Fore.BLUE}Margin Ratio: {summary['marginRatio'] * 100:.2f}%")
+            
+            rows = []
+            for pos in portfolio.positions():
+                rows.append([
+                    pos['symbol'],
+                    f"{pos['positionAmt']:.6f}",
+                    f"{pos['entryPrice']:.4f}",
+                    f"{pos['markPrice']:.4f}",
+                    f"{pos['unrealizedPnl']:.4f}",
+                    f"{pos['maintMargin']:.4f}",
+                    f"{pos['marginRatio'] * 100:.2f}%",
+                    f"{pos['liquidationPrice']:.4f}" if pos['liquidationPrice'] > 0 else '-'
+                ])
+            if rows:
+                headers = ['Symbol', 'Size', 'Entry Price', 'Mark Price', 'Unrealized PnL',
+                           'Maint. Margin', 'Margin Ratio', 'Liq. Price']
+                print(tabulate(rows, headers=headers, tablefmt='grid'))
+            print(f"{Fore.CYAN}{'='*60}\n")
+            
+        except Exception as e:
+            self.logger.error(f"Failed to display portfolio risk: {e}")
+            print(f"{Fore.RED}Error displaying portfolio risk: {e}")
+    
     def display_account_summary(self):
         """Display account summary"""
         try:
@@ -451,9 +1314,21 @@ class TradingBot:
 def main():
     """Main CLI interface"""
     parser = argparse.ArgumentParser(description='Simplified Trading Bot for Binance Futures Testnet')
-    parser.add_argument('--api-key', required=True, help='Binance API key')
-    parser.add_argument('--api-secret', required=True, help='Binance API secret')
+    parser.add_argument('--api-key', help='Binance API key (or api_key in --config / TRADING_BOT_API_KEY)')
+    parser.add_argument('--api-secret', help='Binance API secret (or api_secret in --config / TRADING_BOT_API_SECRET)')
+    parser.add_argument('--config', metavar='FILE', help='Settings file (.json or config.py style); reloaded on change')
     parser.add_argument('--mainnet', action='store_true', help='Use mainnet instead of testnet')
+    parser.add_argument('--record', metavar='FILE', help='Record all exchange traffic to FILE (.jsonl.gz)')
+    parser.add_argument('--replay', metavar='FILE', help='Replay exchange traffic from FILE instead of connecting')
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help='Replay speed relative to the recording; 0 = as fast as possible (default: 0)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Profile the command: write collapsed stacks (flamegraph input) to FILE and '
+                             'print per-method timing. SIGUSR2 toggles profiling in any command')
+    parser.add_argument('--profile-interval', type=float, default=0.01,
+                        help='Seconds between stack samples (default: 0.01)')
+    parser.add_argument('--profile-sampler', choices=SAMPLERS, default='builtin',
+                        help='Stack sampler: builtin thread or external py-spy (default: builtin)')
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
@@ -490,6 +1365,9 @@ def main():
     # Account info command
     subparsers.add_parser('account', help='Display account information')
     
+    # Portfolio risk command
+    subparsers.add_parser('portfolio', help='Display PnL, margin ratio and liquidation prices')
+    
     # Order status command
     status_parser = subparsers.add_parser('status', help='Get order status')
     status_parser.add_argument('symbol', help='Trading pair symbol')
@@ -500,6 +1378,107 @@ def main():
     cancel_parser.add_argument('symbol', help='Trading pair symbol')
     cancel_parser.add_argument('order_id', type=int, help='Order ID')
     
+    # Modify order command
+    modify_parser = subparsers.add_parser('modify', help='Reprice a resting order in place')
+    modify_parser.add_argument('symbol', help='Trading pair symbol')
+    modify_parser.add_argument('order_id', type=int, help='Order ID')
+    modify_parser.add_argument('price', type=float, help='New price')
+    modify_parser.add_argument('--quantity', type=float, help='New quantity (default: unchanged)')
+    
+    # Smart order command
+    smart_parser = subparsers.add_parser('smart', help='Place an order routed from the order book')
+    smart_parser.add_argument('symbol', help='Trading pair symbol')
+    smart_parser.add_argument('side', choices=['BUY', 'SELL'], help='Order side')
+    smart_parser.add_argument('quantity', type=float, help='Order quantity')
+    smart_parser.add_argument('--urgency', type=float, default=0.5,
+                              help='0 (post-only) to 1 (take liquidity now) (default: 0.5)')
+    smart_parser.add_argument('--max-slippage', type=float, default=10.0,
+                              help='Slippage cap in basis points from the mid (default: 10)')
+    
+    # Clock sync metrics command
+    subparsers.add_parser('clock', help='Show clock offset, drift and recvWindow')
+    
+    # Memory footprint command
+    subparsers.add_parser('memory', help='Show memory held by each subsystem and log disk usage')
+    
+    # Strategy runtime command
+    run_parser = subparsers.add_parser('run', help='Run strategies on live market data')
+    run_parser.add_argument('strategies', nargs='+', help='Strategy classes as module:ClassName')
+    run_parser.add_argument('--symbols', help='Comma-separated symbols (e.g., BTCUSDT,ETHUSDT); '
+                                              'default: scanned universe')
+    run_parser.add_argument('--interval', default='1m', help='Bar interval (default: 1m)')
+    run_parser.add_argument('--workers', type=int, default=0,
+                            help='Worker processes to shard symbols across (default: 0, single process)')
+    
+    # Bulk order command
+    batch_parser = subparsers.add_parser('batch', help='Submit orders from a CSV/JSONL file')
+    batch_parser.add_argument('file', help="Order file with symbol,side,type,quantity,price,stop_price ('-' for stdin)")
+    batch_parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from extension)')
+    batch_parser.add_argument('--output', '-o', help='Results file, .csv or .jsonl (default: batch_results_<time>.csv)')
+    batch_parser.add_argument('--concurrency', type=int, default=4, help='Orders in flight (default: 4)')
+    batch_parser.add_argument('--skip-invalid', action='store_true', help='Submit valid orders even if some are invalid')
+    batch_parser.add_argument('--dry-run', action='store_true', help='Only validate the file')
+    
+    # Ledger report
+    report_parser = subparsers.add_parser('report', help='Realized PnL, fees and funding from the local ledger')
+    report_parser.add_argument('--db', default='ledger.db', help='Ledger database (default: ledger.db)')
+    report_parser.add_argument('--by', choices=['day', 'symbol', 'day_symbol'], default='day',
+                               help='Grouping (default: day)')
+    report_parser.add_argument('--since', help='Start date YYYY-MM-DD (UTC)')
+    report_parser.add_argument('--until', help='End date YYYY-MM-DD (UTC, exclusive)')
+    report_parser.add_argument('--symbols', help='Comma-separated symbols to sync trades for (default: all traded)')
+    report_parser.add_argument('--no-sync', action='store_true', help='Report from the ledger without syncing')
+    
+    # Fill quality from the order event log
+    events_parser = subparsers.add_parser('events', help='Latency, fill rate and slippage from the order event log')
+    events_parser.add_argument('--dir', help='Event log directory (default: order_events_dir setting)')
+    events_parser.add_argument('--by', choices=GROUPINGS, default='symbol', help='Grouping (default: symbol)')
+    events_parser.add_argument('--since', help='Start date YYYY-MM-DD (UTC)')
+    events_parser.add_argument('--until', help='End date YYYY-MM-DD (UTC, exclusive)')
+    events_parser.add_argument('--symbols', help='Comma-separated symbols (default: all)')
+    
+    # Live dashboard
+    dashboard_parser = subparsers.add_parser('dashboard', help='Live positions and orders from streams')
+    dashboard_parser.add_argument('--fps', type=float, default=10.0, help='Maximum redraws per second (default: 10)')
+    
+    # Leverage and margin type command
+    leverage_parser = subparsers.add_parser('leverage', help='Set leverage and margin type where they differ')
+    leverage_parser.add_argument('--symbols', help='Comma-separated symbols (default: symbols setting)')
+    leverage_parser.add_argument('--leverage', type=int, help='Target leverage (default: default_leverage setting)')
+    leverage_parser.add_argument('--margin-type', choices=['CROSSED', 'ISOLATED'],
+                                 help='Target margin type (default: margin_type setting)')
+    leverage_parser.add_argument('--dry-run', action='store_true', help='Only show what would change')
+    
+    # Universe scanner command
+    scan_parser = subparsers.add_parser('scan', help='Rank symbols by liquidity, volatility and funding')
+    scan_parser.add_argument('--size', type=int, help='Universe size (default: universe_size setting)')
+    scan_parser.add_argument('--min-volume', type=float, help='Minimum 24h quote volume (default: min_quote_volume setting)')
+    
+    # Funding and basis monitor command
+    funding_parser = subparsers.add_parser('funding', help='Funding, basis and predicted payments for all perpetuals')
+    funding_parser.add_argument('--top', type=int, default=20, help='Symbols shown (default: 20)')
+    funding_parser.add_argument('--sort', choices=['annualized', 'basis_bps', 'payment'], default='annualized',
+                                help='Largest absolute value first (default: annualized)')
+    funding_parser.add_argument('--positions', action='store_true',
+                                help='Fetch positions to predict their next funding payment')
+    funding_parser.add_argument('--min-annualized', type=float, default=FundingThresholds().min_annualized,
+                                help='Alert at this |annualized funding|, e.g. 0.3 = 30%%/year (0 disables)')
+    funding_parser.add_argument('--min-basis-bps', type=float, default=FundingThresholds().min_basis_bps,
+                                help='Alert at this |basis| in basis points (0 disables)')
+    funding_parser.add_argument('--min-payment', type=float, default=0.0,
+                                help='Alert at this |predicted payment| in USDT (needs --positions; 0 disables)')
+    funding_parser.add_argument('--watch', type=float, metavar='SECONDS',
+                                help='Keep refreshing every SECONDS and print alerts until Ctrl-C')
+    
+    # Kill switch commands
+    kill_parser = subparsers.add_parser('kill', help='Block orders, cancel all open orders and flatten positions')
+    kill_parser.add_argument('--reason', default='manual', help='Reason recorded with the kill switch')
+    kill_parser.add_argument('--no-flatten', action='store_true', help='Cancel orders but keep positions')
+    subparsers.add_parser('rearm', help='Re-arm the kill switch so orders are allowed again')
+    
+    # Settings command
+    subparsers.add_parser('config', help='Validate and show the effective settings')
+    
     # Interactive mode
     subparsers.add_parser('interactive', help='Start interactive mode')
     
@@ -509,13 +1488,54 @@ def main():
         parser.print_help()
         return
     
+    # CLI arguments win over the settings file and environment
+    overrides = {'api_key': args.api_key, 'api_secret': args.api_secret,
+                 'testnet': False if args.mainnet else None}
     try:
+        settings = load_settings(args.config, overrides=overrides)
+    except SettingsError as e:
+        print(f"{Fore.RED}{e}")
+        sys.exit(1)
+    
+    if args.command == 'config':
+        display_settings(settings)
+        return
+    
+    if not args.replay and not (settings.api_key and settings.api_secret):
+        parser.error('API credentials are required (--api-key/--api-secret, --config or environment) '
+                     'unless --replay is used')
+    
+    bot = None
+    recorder = None
+    try:
+        recorder = Recorder(args.record) if args.record else None
+        replayer = Replayer(args.replay, speed=args.replay_speed) if args.replay else None
+        
         # Initialize bot
         bot = TradingBot(
-            api_key=args.api_key,
-            api_secret=args.api_secret,
-            testnet=not args.mainnet
+            api_key=settings.api_key,
+            api_secret=settings.api_secret,
+            testnet=settings.testnet,
+            recorder=recorder,
+            replayer=replayer,
+            settings=settings
         )
+        if args.config:
+            bot.watch_settings(args.config, overrides)
+        bot.profiler.interval = args.profile_interval
+        bot.profiler.sampler_name = args.profile_sampler
+        bot.profiler.install_signal()
+        if args.profile:
+            bot.profiler.start()
+        run_symbols = []
+        if args.command == 'run':
+            if args.symbols:
+                run_symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+            else:
+                run_symbols = bot.universe.symbols()
+                bot.universe.start()
+        if settings.apply_leverage and args.command in TRADING_COMMANDS:
+            bot.bootstrap_leverage(list(settings.symbols) + run_symbols)
         
         # Execute command
         if args.command == 'market':
@@ -547,6 +1567,9 @@ def main():
         elif args.command == 'account':
             bot.display_account_summary()
             
+        elif args.command == 'portfolio':
+            bot.display_portfolio_risk()
+            
         elif args.command == 'status':
             order = bot.get_order_status(args.symbol, args.order_id)
             print(f"{Fore.CYAN}Order Status:")
@@ -563,6 +1586,72 @@ def main():
             print(f"{Fore.GREEN}Order cancelled successfully!")
             print(f"{Fore.CYAN}Order ID: {result['orderId']}")
             
+        elif args.command == 'modify':
+            order = bot.modify_order(args.symbol, args.order_id, args.price, args.quantity)
+            if order.get('replacedOrderId'):
+                print(f"{Fore.GREEN}Order {order['replacedOrderId']} replaced (cancel/replace)")
+            else:
+                print(f"{Fore.GREEN}Order modified successfully!")
+            print(f"{Fore.CYAN}Order ID: {order['orderId']}")
+            print(f"{Fore.CYAN}Price: {order['price']}  Quantity: {order['origQty']}")
+            print(f"{Fore.CYAN}Status: {order['status']}")
+            
+        elif args.command == 'smart':
+            bot.books.load_snapshot(args.symbol, bot.client.futures_order_book(symbol=args.symbol, limit=20))
+            order = bot.smart_order(args.symbol, args.side, args.quantity, args.urgency, args.max_slippage)
+            route = order['route']
+            print(f"{Fore.GREEN}Smart order placed as {route['route']}: {route['reason']}")
+            print(f"{Fore.CYAN}Order ID: {order['orderId']}")
+            print(f"{Fore.CYAN}Type: {order['type']} {order.get('timeInForce', '')}  Price: {order['price']}")
+            print(f"{Fore.CYAN}Mid: {route['arrival_mid']:g}  Expected slippage: "
+                  f"{route['expected_slippage_bps']:.2f} bps")
+            print(f"{Fore.CYAN}Status: {order['status']}  Executed: {order['executedQty']}")
+            
+        elif args.command == 'clock':
+            display_clock_metrics(bot)
+            
+        elif args.command == 'memory':
+            display_memory_report(bot)
+            
+        elif args.command == 'run':
+            if args.workers > 0:
+                ShardedRuntime(bot, args.strategies, run_symbols, args.workers, args.interval).run()
+            else:
+                run_strategies(bot, args.strategies, run_symbols, args.interval)
+            
+        elif args.command == 'kill':
+            report = bot.kill_switch.trigger(args.reason, flatten=not args.no_flatten)
+            display_kill_report(report)
+            if report['errors'] or report['remaining']:
+                sys.exit(1)
+            
+        elif args.command == 'rearm':
+            bot.kill_switch.rearm()
+            print(f"{Fore.GREEN}Kill switch re-armed; orders are allowed")
+            
+        elif args.command == 'scan':
+            display_universe(bot, args)
+            
+        elif args.command == 'funding':
+            run_funding_monitor(bot, args)
+            
+        elif args.command == 'batch':
+            if not run_batch(bot, args):
+                sys.exit(1)
+            
+        elif args.command == 'leverage':
+            if not run_leverage(bot, args):
+                sys.exit(1)
+            
+        elif args.command == 'report':
+            display_ledger_report(bot, args)
+            
+        elif args.command == 'events':
+            display_fill_quality(bot, args)
+            
+        elif args.command == 'dashboard':
+            Dashboard(bot, fps=args.fps).run()
+            
         elif args.command == 'interactive':
             interactive_mode(bot)
             
@@ -571,6 +1660,283 @@ def main():
     except Exception as e:
         print(f"{Fore.RED}Error: {e}")
         sys.exit(1)
+    finally:
+        if bot:
+            if args.profile and bot.profiler.sampler is not None:
+                bot.profiler.stop()
+                display_profile_report(bot.profiler.report(), bot.profiler.dump(args.profile))
+            bot.close()
+        if recorder:
+            recorder.close()
+
+
+def run_batch(bot: TradingBot, args) -> bool:
+    """
+    Validate and submit an order file
+    
+    Returns:
+        True if every order was submitted successfully
+    """
+    runner = BatchRunner(bot, concurrency=args.concurrency)
+    with open_source(args.file) as path:
+        fmt = detect_format(args.file if args.file != '-' else '', args.format)
+        
+        count, errors = runner.validate_file(path, fmt)
+        print(f"{Fore.CYAN}Validated {count} orders: {count - len(errors)} valid, {len(errors)} invalid")
+        for line, error in errors[:20]:
+            print(f"{Fore.RED}  line {line}: {error}")
+        if len(errors) > 20:
+            print(f"{Fore.RED}  ... and {len(errors) - 20} more")
+        
+        if args.dry_run:
+            return not errors
+        if errors and not args.skip_invalid:
+            print(f"{Fore.YELLOW}Nothing submitted; fix the file or use --skip-invalid")
+            return False
+        
+        output = args.output or f'batch_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        writer = ResultWriter(output)
+        try:
+            summary = runner.submit_file(path, fmt, writer)
+        finally:
+            writer.close()
+    
+    color = Fore.GREEN if not summary['failed'] else Fore.YELLOW
+    print(f"{color}Submitted {summary['submitted']}, failed {summary['failed']}, "
+          f"skipped {summary['skipped']} in {summary['elapsed_s']:.2f}s "
+          f"(rate limit waits: {summary['rate_limit_waits']})")
+    print(f"{Fore.CYAN}Results written to {output}")
+    return not summary['failed']
+
+
+def run_leverage(bot: TradingBot, args) -> bool:
+    """
+    Bring symbols to the target leverage and margin type
+    
+    Returns:
+        True if every change succeeded
+    """
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()] if args.symbols else None
+    summary = bot.bootstrap_leverage(symbols, args.leverage, args.margin_type, dry_run=args.dry_run)
+    
+    rows = []
+    for change in summary['changes']:
+        current = bot.leverage_manager.get(change.symbol) or {}
+        if args.dry_run:
+            status = 'pending'
+        elif change.symbol in summary['failed']:
+            status = f"{Fore.RED}{summary['failed'][change.symbol]}{Style.RESET_ALL}"
+        else:
+            status = f"{Fore.GREEN}changed{Style.RESET_ALL}"
+        rows.append([change.symbol,
+                     change.leverage if change.leverage is not None else current.get('leverage', ''),
+                     change.margin_type or current.get('margin_type', ''), status])
+    if rows:
+        print(tabulate(rows, headers=['Symbol', 'Leverage', 'Margin Type', 'Status'], tablefmt='grid'))
+    print(f"{Fore.CYAN}{summary['checked']} symbols checked, {len(summary['changes'])} "
+          f"{'to change' if args.dry_run else 'needed changes'}, {len(summary['failed'])} failed")
+    return not summary['failed']
+
+
+def display_kill_report(report: Dict):
+    """Display the stages and outcome of a kill switch run"""
+    print(f"{Fore.RED}KILL SWITCH ENGAGED: {report['reason']}")
+    print(tabulate([[step['step'], f"{step['ms']:.1f}"] for step in report['steps']],
+                   headers=['Step', 'ms'], tablefmt='grid'))
+    print(f"{Fore.CYAN}Cancelled orders on: {', '.join(report['cancelled']) or 'none'}")
+    print(f"{Fore.CYAN}Flattened: {', '.join(report['flattened']) or 'none'}")
+    for position in report['remaining']:
+        print(f"{Fore.RED}Still open: {position}")
+    for error in report['errors']:
+        print(f"{Fore.RED}Error: {error}")
+    print(f"{Fore.YELLOW}Total {report['total_ms']:.1f} ms. New orders are blocked until 'rearm'.")
+
+
+def display_universe(bot: TradingBot, args):
+    """Scan the market and display the ranked universe"""
+    overrides = {'size': args.size, 'min_quote_volume': args.min_volume}
+    bot.universe.criteria = bot.universe.criteria._replace(**{k: v for k, v in overrides.items() if v is not None})
+    bot.universe.refresh()
+    
+    print(f"{Fore.CYAN}Universe ({len(bot.universe.rows)} symbols):")
+    if not bot.universe.rows:
+        print("No symbols pass the filters")
+        return
+    table = [[i, r['symbol'], f"{r['score']:.3f}", f"{r['quote_volume'] / 1e6:,.1f}M",
+              f"{r['volatility'] * 100:.2f}%", f"{r['change_pct']:+.2f}%", f"{r['funding_rate'] * 100:.4f}%",
+              f"{r['open_interest'] / 1e6:,.1f}M"]
+             for i, r in enumerate(bot.universe.rows, 1)]
+    print(tabulate(table, headers=['#', 'Symbol', 'Score', 'Volume 24h', 'Range 24h', 'Change',
+                                   'Funding', 'Open Interest'], tablefmt='grid'))
+
+
+def display_funding(monitor: FundingMonitor, sort_by: str = 'annualized', limit: int = 20):
+    """Display the latest funding and basis metrics"""
+    rows = monitor.rows(sort_by, limit)
+    print(f"{Fore.CYAN}Funding ({len(monitor.metrics.get('symbol', []))} perpetuals, one request):")
+    if not rows:
+        print("No perpetuals with funding")
+        return
+    track = monitor.track_positions
+    table = [[r['symbol'], f"{r['mark']:g}", f"{r['funding_rate'] * 100:+.4f}%", f"{r['annualized'] * 100:+.1f}%",
+              f"{r['basis_bps']:+.1f}", f"{r['predicted_rate'] * 100:+.4f}%",
+              f"{int(r['seconds_to_funding'] // 3600)}h{int(r['seconds_to_funding'] % 3600 // 60):02d}m",
+              *([f"{r['position']:g}", f"{r['payment']:+.4f}"] if track else [])]
+             for r in rows]
+    headers = ['Symbol', 'Mark', 'Funding', 'Annualized', 'Basis bps', 'Predicted', 'Next in',
+               *(['Position', 'Payment'] if track else [])]
+    print(tabulate(table, headers=headers, tablefmt='grid'))
+
+
+def run_funding_monitor(bot: TradingBot, args):
+    """Show funding and basis for all perpetuals, optionally refreshing and alerting until interrupted"""
+    def alert(a: FundingAlert):
+        print(f"{Fore.YELLOW}{datetime.now():%H:%M:%S} ALERT {a.message}")
+    
+    thresholds = FundingThresholds(args.min_annualized, args.min_basis_bps, args.min_payment)
+    monitor = FundingMonitor(bot, thresholds, interval=args.watch or 60.0, track_positions=args.positions,
+                             on_alert=alert)
+    monitor.refresh()
+    display_funding(monitor, args.sort, args.top)
+    if not args.watch:
+        return
+    print(f"{Fore.CYAN}Refreshing every {args.watch:g}s; Ctrl-C to stop")
+    monitor.start()
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        monitor.stop()
+
+
+def display_ledger_report(bot: TradingBot, args):
+    """Sync the ledger and display PnL, fee and funding totals"""
+    ledger = Ledger(args.db, bot.logger)
+    try:
+        if not args.no_sync:
+            symbols = [s.strip().upper() for s in args.symbols.split(',')] if args.symbols else None
+            added = ledger.sync(bot, symbols)
+            print(f"{Fore.CYAN}Synced {added['income']} income records and {added['trades']} trades")
+        
+        since = parse_date(args.since) if args.since else None
+        until = parse_date(args.until) if args.until else None
+        rows = ledger.pnl_report(args.by, since, until)
+        
+        print(f"\n{Fore.CYAN}{'='*60}")
+        print(f"{Fore.CYAN}PNL REPORT")
+        print(f"{Fore.CYAN}{'='*60}")
+        if rows:
+            table = [[*(r[k] for k in r if k not in ('realized_pnl', 'commission', 'funding', 'net')),
+                      f"{r['realized_pnl']:.4f}", f"{r['commission']:.4f}", f"{r['funding']:.4f}",
+                      f"{r['net']:.4f}"] for r in rows]
+            keys = [k.replace('_', ' ').title() for k in rows[0] if k not in ('realized_pnl', 'commission', 'funding', 'net')]
+            table.append(['Total'] + [''] * (len(keys) - 1) + [
+                f"{sum(r[k] for r in rows):.4f}" for k in ('realized_pnl', 'commission', 'funding', 'net')
+            ])
+            print(tabulate(table, headers=keys + ['Realized PnL', 'Commission', 'Funding', 'Net'], tablefmt='grid'))
+        else:
+            print("No realized PnL, commission or funding in this period")
+        
+        fees = ledger.fee_totals(since, until)
+        if fees:
+            print(f"\n{Fore.CYAN}FEES:")
+            print(tabulate([[f['asset'], f"{f['maker']:.4f}", f"{f['taker']:.4f}", f"{f['total']:.4f}", f['fills']]
+                            for f in fees], headers=['Asset', 'Maker', 'Taker', 'Total', 'Fills'], tablefmt='grid'))
+        
+        funding = ledger.funding_totals(since, until)
+        if funding:
+            print(f"\n{Fore.CYAN}FUNDING:")
+            print(tabulate([[f['symbol'], f"{f['funding']:.4f}", f['payments']] for f in funding],
+                           headers=['Symbol', 'Funding', 'Payments'], tablefmt='grid'))
+        print(f"{Fore.CYAN}{'='*60}\n")
+    finally:
+        ledger.close()
+
+
+def display_fill_quality(bot: TradingBot, args):
+    """Display latency, fill rate and slippage from the order event log"""
+    if bot.order_events:
+        bot.order_events.flush(close=True)  # Include this session's events
+    directory = args.dir or bot.settings.order_events_dir
+    since = datetime.strptime(args.since, '%Y-%m-%d') if args.since else None
+    until = datetime.strptime(args.until, '%Y-%m-%d') if args.until else None
+    symbols = [s.strip().upper() for s in args.symbols.split(',')] if args.symbols else None
+    
+    started = time.perf_counter()
+    events = load_events(directory, since, until, symbols)
+    rows = fill_quality(events, args.by)
+    elapsed = time.perf_counter() - started
+    
+    print(f"\n{Fore.CYAN}{'='*60}")
+    print(f"{Fore.CYAN}FILL QUALITY ({events.num_rows} events from {directory} in {elapsed:.2f}s)")
+    print(f"{Fore.CYAN}{'='*60}")
+    if not rows:
+        print("No orders in this period")
+        return
+    
+    def optional(value, spec):
+        return format(value, spec) if value is not None else '-'
+    
+    table = [[r['group'], r['orders'], r['rejected'], r['filled_orders'], f"{r['fill_rate'] * 100:.1f}%",
+              optional(r['latency_p50_ms'], '.1f'), optional(r['latency_p99_ms'], '.1f'),
+              optional(r['slippage_bps'], '+.2f')] for r in rows]
+    print(tabulate(table, headers=[args.by.replace('_', ' ').title(), 'Orders', 'Rejected', 'Filled', 'Fill Rate',
+                                   'Latency p50 ms', 'Latency p99 ms', 'Slippage bps'], tablefmt='grid'))
+
+
+def display_settings(settings: Settings):
+    """Display the effective settings with credentials masked"""
+    print(f"{Fore.CYAN}Settings:")
+    restart = Settings.restart_fields()
+    rows = [[name, ', '.join(value) if isinstance(value, tuple) else value,
+             'restart' if name in restart else 'live']
+            for name, value in settings.redacted().items()]
+    print(tabulate(rows, headers=['Setting', 'Value', 'Reload'], tablefmt='grid'))
+
+
+def display_clock_metrics(bot: TradingBot):
+    """Display clock synchronization metrics"""
+    metrics = bot.get_clock_metrics()
+    print(f"{Fore.CYAN}Clock Sync:")
+    print(f"Offset: {metrics['offset_ms']} ms (applied: {metrics['applied_offset_ms']} ms)")
+    print(f"Drift: {metrics['drift_ms_per_hour']} ms/hour")
+    print(f"recvWindow: {metrics['recv_window_ms']} ms")
+    print(f"RTT min/p95: {metrics['rtt_min_ms']} / {metrics['rtt_p95_ms']} ms")
+    print(f"Syncs: {metrics['syncs']} (failures: {metrics['sync_failures']})")
+    print(f"Timestamp errors: {metrics['timestamp_errors']}")
+
+
+def display_memory_report(bot: TradingBot):
+    """Display the memory footprint of each subsystem, process RSS and log disk usage"""
+    rows = bot.memory_report()
+    table = [[r['subsystem'], '' if r['entries'] is None else r['entries'], f"{r['bytes'] / 1024:,.1f}"]
+             for r in rows]
+    table.append(['total', '', f"{sum(r['bytes'] for r in rows) / 1024:,.1f}"])
+    print(f"{Fore.CYAN}Memory by subsystem:")
+    print(tabulate(table, headers=['Subsystem', 'Entries', 'KiB'], tablefmt='grid'))
+    
+    cache = bot.symbol_cache.stats()
+    print(f"Symbol cache: {cache['size']} / {cache['max_size'] or 'unbounded'} entries, "
+          f"{cache['evictions']} evicted")
+    rss = rss_bytes()
+    print(f"Process RSS: {rss / 1024 ** 2:,.1f} MiB" if rss is not None else "Process RSS: unavailable")
+    print(f"Logs on disk: {directory_bytes('logs') / 1024 ** 2:,.1f} MiB "
+          f"(rotated at {bot.settings.log_max_bytes / 1024 ** 2:,.1f} MiB, "
+          f"{bot.settings.log_retention or 'all'} runs kept)")
+
+
+def display_profile_report(report: Dict, path: Optional[str] = None, limit: int = 20):
+    """Display per-method timing of a profiling window and where its stacks were written"""
+    print(f"{Fore.CYAN}Profile: {report['duration_s']:.1f}s, {report['samples']} stack samples")
+    rows = [[r['method'], r['calls'], f"{r['total_ms']:,.1f}", f"{r['mean_us']:,.1f}", f"{r['max_ms']:,.2f}",
+             r['errors']] for r in report['methods'][:limit]]
+    if rows:
+        print(tabulate(rows, headers=['Method', 'Calls', 'Total ms', 'Mean µs', 'Max ms', 'Errors'],
+                       tablefmt='grid'))
+    else:
+        print("No TradingBot methods were called")
+    if path:
+        print(f"{Fore.CYAN}Collapsed stacks: {path} (flamegraph.pl, inferno-flamegraph or speedscope.app)")
 
 
 def interactive_mode(bot: TradingBot):
@@ -580,6 +1946,10 @@ def interactive_mode(bot: TradingBot):
     print(f"{Fore.CYAN}{'='*60}")
     print(f"{Fore.YELLOW}Type 'help' for available commands or 'quit' to exit")
     
+    # Keep the local order index in line with the exchange while the session is open
+    bot.order_reconciler.start()
+    bot.start_dead_man_switch()
+    
     while True:
         try:
             command = input(f"\n{Fore.GREEN}Bot> ").strip().lower()
@@ -591,20 +1961,32 @@ def interactive_mode(bot: TradingBot):
             elif command == 'help':
                 print(f"\n{Fore.CYAN}Available commands:")
                 print(f"{Fore.WHITE}  account     - Display account summary")
+                print(f"{Fore.WHITE}  portfolio   - Display portfolio risk")
                 print(f"{Fore.WHITE}  market      - Place market order")
                 print(f"{Fore.WHITE}  limit       - Place limit order")
                 print(f"{Fore.WHITE}  stop-limit  - Place stop-limit order")
                 print(f"{Fore.WHITE}  oco         - Place OCO order")
                 print(f"{Fore.WHITE}  status      - Get order status")
                 print(f"{Fore.WHITE}  cancel      - Cancel order")
+                print(f"{Fore.WHITE}  modify      - Reprice an open order")
                 print(f"{Fore.WHITE}  orders      - Show open orders")
+                print(f"{Fore.WHITE}  reconcile   - Check open orders against the exchange")
                 print(f"{Fore.WHITE}  positions   - Show positions")
+                print(f"{Fore.WHITE}  clock       - Show clock sync metrics")
+                print(f"{Fore.WHITE}  memory      - Show memory footprint by subsystem")
+                print(f"{Fore.WHITE}  profile     - Start/stop profiling; stopping writes a flamegraph file")
+                print(f"{Fore.WHITE}  dashboard   - Live view of positions and orders")
+                print(f"{Fore.WHITE}  kill        - Cancel everything, flatten and block orders")
+                print(f"{Fore.WHITE}  rearm       - Allow orders again after a kill")
                 print(f"{Fore.WHITE}  help        - Show this help")
                 print(f"{Fore.WHITE}  quit        - Exit interactive mode")
                 
             elif command == 'account':
                 bot.display_account_summary()
                 
+            elif command == 'portfolio':
+                bot.display_portfolio_risk()
+                
             elif command == 'market':
                 symbol = input("Symbol (e.g., BTCUSDT): ").strip().upper()
                 side = input("Side (BUY/SELL): ").strip().upper()
@@ -657,6 +2039,15 @@ def interactive_mode(bot: TradingBot):
                 result = bot.cancel_order(symbol, order_id)
                 print(f"{Fore.GREEN}Order cancelled! ID: {result['orderId']}")
                 
+            elif command == 'modify':
+                symbol = input("Symbol: ").strip().upper()
+                order_id = int(input("Order ID: "))
+                price = float(input("New Price: "))
+                quantity = input("New Quantity (blank to keep): ").strip()
+                
+                order = bot.modify_order(symbol, order_id, price, float(quantity) if quantity else None)
+                print(f"{Fore.GREEN}Order modified! ID: {order['orderId']} Price: {order['price']}")
+                
             elif command == 'orders':
                 orders = bot.get_open_orders()
                 if orders:
@@ -667,6 +2058,14 @@ def interactive_mode(bot: TradingBot):
                 else:
                     print(f"{Fore.YELLOW}No open orders")
                     
+            elif command == 'reconcile':
+                symbol = input("Symbol (blank for all): ").strip().upper()
+                report = bot.reconcile_open_orders(symbol or None, full=not symbol)
+                print(f"{Fore.CYAN}Drift: {report['drift']} "
+                      f"(missing locally: {len(report['missing_locally'])}, "
+                      f"unknown on exchange: {len(report['unknown_on_exchange'])}, "
+                      f"mismatched: {len(report['mismatched'])})")
+                
             elif command == 'positions':
                 positions = bot.get_positions()
                 if positions:
@@ -678,6 +2077,29 @@ def interactive_mode(bot: TradingBot):
                 else:
                     print(f"{Fore.YELLOW}No active positions")
                     
+            elif command == 'clock':
+                display_clock_metrics(bot)
+                
+            elif command == 'memory':
+                display_memory_report(bot)
+                
+            elif command == 'profile':
+                if bot.profiler.toggle():
+                    print(f"{Fore.GREEN}Profiling on; run 'profile' again to stop and write the flamegraph")
+                else:
+                    display_profile_report(bot.profiler.report(), bot.profiler.dump())
+                
+            elif command == 'dashboard':
+                Dashboard(bot).run()
+                
+            elif command == 'kill':
+                flatten = input("Flatten positions too? (Y/n): ").strip().lower() != 'n'
+                display_kill_report(bot.kill_switch.trigger('interactive', flatten=flatten))
+                
+            elif command == 'rearm':
+                bot.kill_switch.rearm()
+                print(f"{Fore.GREEN}Kill switch re-armed; orders are allowed")
+                
             else:
                 print(f"{Fore.RED}Unknown command: {command}")
                 print(f"{Fore.YELLOW}Type 'help' for available commands")
@@ -0,0 +1,201 @@
+"""
+Symbol Universe Scanner
+Ranks every listed futures symbol by liquidity, volatility and funding from bulk market data
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# Score weights; funding counts against a symbol (carry cost or crowded positioning)
+DEFAULT_WEIGHTS = {'liquidity': 0.5, 'volatility': 0.3, 'funding': 0.2}
+
+# Shortlisted candidates per universe slot whose open interest is fetched
+OPEN_INTEREST_CANDIDATES = 2
+
+
+class UniverseCriteria(NamedTuple):
+    """Filters and size of the tradable universe"""
+    size: int = 20
+    quote_asset: str = 'USDT'
+    min_quote_volume: float = 50_000_000.0
+    min_volatility: float = 0.0
+    max_funding_rate: float = 0.001
+    min_open_interest: float = 0.0
+
+    @classmethod
+    def from_settings(cls, settings) -> 'UniverseCriteria':
+        return cls(size=settings.universe_size,
+                   min_quote_volume=settings.min_quote_volume,
+                   max_funding_rate=settings.max_funding_rate,
+                   min_open_interest=settings.min_open_interest)
+
+
+def percentile_rank(values: np.ndarray) -> np.ndarray:
+    """Rank of each value in [0, 1] (ties broken by position)"""
+    if len(values) < 2:
+        return np.ones(len(values))
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values, kind='stable')] = np.arange(len(values))
+    return ranks / (len(values) - 1)
+
+
+def rank_symbols(tickers: List[Dict], premium: List[Dict], eligible: Optional[set] = None,
+                 criteria: UniverseCriteria = UniverseCriteria(),
+                 weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    Score and filter symbols from 24h tickers and premium index rows
+
+    Every metric is computed as a NumPy array over all symbols at once.
+    Liquidity is log quote volume, volatility the 24h high-low range relative to
+    the last price, and funding the absolute last funding rate; the score is the
+    weighted sum of their percentile ranks, with funding subtracted.
+
+    Args:
+        tickers: Rows from futures_ticker() (all symbols)
+        premium: Rows from futures_mark_price() (all symbols)
+        eligible: Symbols allowed at all, e.g. trading perpetuals (default: every ticker)
+        criteria: Filters applied before ranking
+        weights: Score weights for 'liquidity', 'volatility' and 'funding'
+
+    Returns:
+        Rows for symbols passing the filters, best score first
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    funding_by_symbol = {p['symbol']: float(p.get('lastFundingRate') or 0) for p in premium}
+    tickers = [t for t in tickers if (eligible is None or t['symbol'] in eligible)
+               and t['symbol'] in funding_by_symbol]
+    if not tickers:
+        return []
+
+    symbols = np.array([t['symbol'] for t in tickers])
+    quote_volume = np.array([float(t['quoteVolume']) for t in tickers])
+    last = np.array([float(t['lastPrice']) for t in tickers])
+    high = np.array([float(t['highPrice']) for t in tickers])
+    low = np.array([float(t['lowPrice']) for t in tickers])
+    change = np.array([float(t['priceChangePercent']) for t in tickers])
+    funding = np.array([funding_by_symbol[s] for s in symbols])
+
+    volatility = np.divide(high - low, last, out=np.zeros_like(last), where=last > 0)
+    score = (weights['liquidity'] * percentile_rank(np.log1p(quote_volume))
+             + weights['volatility'] * percentile_rank(volatility)
+             - weights['funding'] * percentile_rank(np.abs(funding)))
+
+    mask = ((quote_volume >= criteria.min_quote_volume)
+            & (volatility >= criteria.min_volatility)
+            & (np.abs(funding) <= criteria.max_funding_rate))
+    selected = np.flatnonzero(mask)
+    selected = selected[np.argsort(-score[selected], kind='stable')]
+    return [{
+        'symbol': str(symbols[i]), 'score': float(score[i]), 'quote_volume': float(quote_volume[i]),
+        'volatility': float(volatility[i]), 'change_pct': float(change[i]),
+        'funding_rate': float(funding[i]), 'last_price': float(last[i]),
+    } for i in selected]
+
+
+class UniverseScanner:
+    """
+    Tradable symbol universe, rescanned on a schedule
+
+    A scan costs the same however many symbols the exchange lists: one
+    exchange info download, one all-symbol 24h ticker request and one
+    all-symbol premium index request. Open interest has no bulk
+    endpoint, so it is fetched only for the top-ranked shortlist, at most
+    OPEN_INTEREST_CANDIDATES per universe slot.
+    """
+
+    def __init__(self, bot, criteria: Optional[UniverseCriteria] = None, interval: float = 900.0,
+                 weights: Optional[Dict[str, float]] = None,
+                 on_change: Optional[Callable[[List[str], List[str]], None]] = None):
+        """
+        Args:
+            bot: TradingBot used for the REST calls
+            criteria: Universe size and filters (default: UniverseCriteria())
+            interval: Seconds between scheduled rescans
+            weights: Score weights (default: DEFAULT_WEIGHTS)
+            on_change: Called with (added, removed) symbols when a rescan changes the universe
+        """
+        self.bot = bot
+        self.criteria = criteria or UniverseCriteria()
+        self.interval = interval
+        self.weights = weights
+        self.on_change = on_change
+        self.rows: List[Dict] = []
+        self.updated_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> List[Dict]:
+        """Rank the market and return the rows of the universe, best first"""
+        criteria = self.criteria
+        eligible = {s['symbol'] for s in self.bot.get_exchange_symbols()
+                    if s.get('status') == 'TRADING' and s.get('contractType') == 'PERPETUAL'
+                    and s.get('quoteAsset') == criteria.quote_asset}
+        tickers = self.bot.client.futures_ticker()
+        premium = self.bot.client.futures_mark_price()
+        ranked = rank_symbols(tickers, premium, eligible, criteria, self.weights)
+
+        shortlist = ranked[:criteria.size * OPEN_INTEREST_CANDIDATES]
+        if shortlist:
+            with ThreadPoolExecutor(max_workers=min(8, len(shortlist)),
+                                    thread_name_prefix='OpenInterest') as executor:
+                open_interest = list(executor.map(
+                    lambda row: float(self.bot.client.futures_open_interest(symbol=row['symbol'])['openInterest']),
+                    shortlist
+                ))
+            for row, contracts in zip(shortlist, open_interest):
+                row['open_interest'] = contracts * row['last_price']
+        universe = [row for row in shortlist if row['open_interest'] >= criteria.min_open_interest]
+        return universe[:criteria.size]
+
+    def refresh(self) -> List[str]:
+        """Rescan now; returns the new universe symbols"""
+        rows = self.scan()
+        with self._lock:
+            old = [row['symbol'] for row in self.rows]
+            self.rows = rows
+            self.updated_at = time.time()
+        new = [row['symbol'] for row in rows]
+        added = [s for s in new if s not in old]
+        removed = [s for s in old if s not in new]
+        self.bot.logger.info(f"Universe scanned: {len(new)} symbols, {len(added)} added, {len(removed)} removed")
+        if self.on_change and (added or removed):
+            self.on_change(added, removed)
+        return new
+
+    def symbols(self) -> List[str]:
+        """Current universe, scanning first if it has never been scanned"""
+        if self.updated_at is None:
+            return self.refresh()
+        with self._lock:
+            return [row['symbol'] for row in self.rows]
+
+    def __contains__(self, symbol: str) -> bool:
+        with self._lock:
+            return any(row['symbol'] == symbol for row in self.rows)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.bot.background_polling_allowed('UniverseScanner'):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='UniverseScanner', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.bot.logger.warning(f"Universe rescan failed: {e}")